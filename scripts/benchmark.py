@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+Python 数学与模拟热点路径的基准测试
+
+对 unimath.py 的标量函数、unimath_batch.py 的批量函数以及
+calculate_amounts_for_liquidity 在 1 到 10^7 的数据规模下计时，
+记录每秒操作数（ops/sec）和峰值内存（tracemalloc），结果以 JSON 输出。
+指定基线文件时与基线比较，ops/sec 下降超过阈值即视为性能回退，
+以非零状态码退出，便于接入 CI。
+
+参考基线 scripts/benchmark_baseline.json 随仓库提交，由 --quick 规模生成；
+接入 CI 时使用 --quick --baseline scripts/benchmark_baseline.json 检查回退。
+新增用例或优化热点路径后，用 --quick --out scripts/benchmark_baseline.json 重新生成。
+
+标量用例在 Python 循环中逐个调用，规模默认最多 10^5；
+批量用例一次调用处理整个数组。
+
+使用方法:
+    python scripts/benchmark.py --out bench.json
+    python scripts/benchmark.py --quick --baseline scripts/benchmark_baseline.json
+    python scripts/benchmark.py --filter batch --max-size 1000000
+
+参考文档: docs/1FirstSwap/05-流动性计算.md
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from collections import namedtuple
+
+
+# ============================================================
+# 常量与结果类型
+# ============================================================
+
+DEFAULT_SIZES = [10**i for i in range(8)]  # 1 到 10^7
+QUICK_SIZES = [1, 10, 100, 1000, 10000]
+SCALAR_MAX_SIZE = 10**5  # 标量用例默认的最大规模
+MIN_TIME = 0.2  # 每次计时的最短时长（秒），小规模用例会重复调用
+REPEAT = 3  # 取最好成绩的重复次数
+DEFAULT_THRESHOLD = 0.2  # ops/sec 下降超过 20% 视为回退
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+
+Benchmark = namedtuple("Benchmark", ["name", "make", "max_size"])
+BenchmarkResult = namedtuple("BenchmarkResult", ["name", "size", "seconds", "ops_per_sec", "peak_bytes"])
+Regression = namedtuple("Regression", ["name", "size", "baseline", "current", "ratio"])
+
+
+# ============================================================
+# 用例定义
+# ============================================================
+
+def _positions(size, seed=9):
+    """生成 size 个随机仓位参数 (当前价格, 下限, 上限)"""
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(size):
+        price = rng.uniform(1000, 10000)
+        rows.append((price, price * rng.uniform(0.5, 0.99), price * rng.uniform(1.01, 2.0)))
+    return rows
+
+
+def _scalar_cases():
+    """标量用例：每个 make(size) 返回执行 size 次调用的函数"""
+    from unimath import (
+        price_to_tick, price_to_sqrtp_q96, liquidity_from_x, liquidity_from_y,
+        calc_amount_x, calc_amount_y, calculate_liquidity, ETH
+    )
+    from calculate_liquidity import calculate_amounts_for_liquidity
+    from tickmath import get_sqrt_ratio_at_tick
+
+    def prices(size):
+        return [row[0] for row in _positions(size)]
+
+    def sqrtps(size):
+        return [tuple(price_to_sqrtp_q96(p) for p in row) for row in _positions(size)]
+
+    def make_price_to_tick(size):
+        values = prices(size)
+        return lambda: [price_to_tick(p) for p in values]
+
+    def make_price_to_sqrtp(size):
+        values = prices(size)
+        return lambda: [price_to_sqrtp_q96(p) for p in values]
+
+    def make_liquidity_from_x(size):
+        values = sqrtps(size)
+        return lambda: [liquidity_from_x(ETH, cur, upp) for cur, _, upp in values]
+
+    def make_liquidity_from_y(size):
+        values = sqrtps(size)
+        return lambda: [liquidity_from_y(5000 * ETH, low, cur) for cur, low, _ in values]
+
+    def make_calc_amount_x(size):
+        values = sqrtps(size)
+        return lambda: [calc_amount_x(10**21, cur, upp) for cur, _, upp in values]
+
+    def make_calc_amount_y(size):
+        values = sqrtps(size)
+        return lambda: [calc_amount_y(10**21, low, cur) for cur, low, _ in values]
+
+    def make_calculate_liquidity(size):
+        values = _positions(size)
+        return lambda: [calculate_liquidity(cur, low, upp, 1, 5000, verbose=False) for cur, low, upp in values]
+
+    def make_amounts_for_liquidity(size):
+        rng = random.Random(9)
+        values = []
+        for _ in range(size):
+            tick = rng.randrange(80000, 90000)
+            values.append((get_sqrt_ratio_at_tick(tick), tick - rng.randrange(1, 2000), tick + rng.randrange(1, 2000)))
+        return lambda: [calculate_amounts_for_liquidity(s, lo, up, 10**21) for s, lo, up in values]
+
+    return [
+        Benchmark("price_to_tick", make_price_to_tick, SCALAR_MAX_SIZE),
+        Benchmark("price_to_sqrtp_q96", make_price_to_sqrtp, SCALAR_MAX_SIZE),
+        Benchmark("liquidity_from_x", make_liquidity_from_x, SCALAR_MAX_SIZE),
+        Benchmark("liquidity_from_y", make_liquidity_from_y, SCALAR_MAX_SIZE),
+        Benchmark("calc_amount_x", make_calc_amount_x, SCALAR_MAX_SIZE),
+        Benchmark("calc_amount_y", make_calc_amount_y, SCALAR_MAX_SIZE),
+        Benchmark("calculate_liquidity", make_calculate_liquidity, SCALAR_MAX_SIZE),
+        Benchmark("calculate_amounts_for_liquidity", make_amounts_for_liquidity, SCALAR_MAX_SIZE),
+    ]
+
+
+def _batch_cases():
+    """批量用例：每个 make(size) 返回一次处理 size 个元素的函数"""
+    import numpy as np
+
+    from unimath_batch import (
+        price_to_tick_batch, price_to_sqrtp_q96_batch, liquidity_from_x_batch,
+        liquidity_from_y_batch, calc_amount_x_batch, calc_amount_y_batch,
+        calculate_liquidity_batch
+    )
+
+    def arrays(size):
+        rng = np.random.default_rng(9)
+        cur = rng.uniform(1000, 10000, size)
+        return cur, cur * rng.uniform(0.5, 0.99, size), cur * rng.uniform(1.01, 2.0, size)
+
+    def make_price_to_tick(size):
+        cur, _, _ = arrays(size)
+        return lambda: price_to_tick_batch(cur)
+
+    def make_price_to_sqrtp(size):
+        cur, _, _ = arrays(size)
+        return lambda: price_to_sqrtp_q96_batch(cur, exact=False)
+
+    def make_price_to_sqrtp_exact(size):
+        cur, _, _ = arrays(size)
+        return lambda: price_to_sqrtp_q96_batch(cur)
+
+    def make_liquidity_from_x(size):
+        cur, _, upp = (price_to_sqrtp_q96_batch(a, exact=False) for a in arrays(size))
+        amounts = np.full(size, 1e18)
+        return lambda: liquidity_from_x_batch(amounts, cur, upp)
+
+    def make_liquidity_from_y(size):
+        cur, low, _ = (price_to_sqrtp_q96_batch(a, exact=False) for a in arrays(size))
+        amounts = np.full(size, 5000e18)
+        return lambda: liquidity_from_y_batch(amounts, low, cur)
+
+    def make_calc_amount_x(size):
+        cur, _, upp = (price_to_sqrtp_q96_batch(a, exact=False) for a in arrays(size))
+        liquidity = np.full(size, 1e21)
+        return lambda: calc_amount_x_batch(liquidity, cur, upp)
+
+    def make_calc_amount_y(size):
+        cur, low, _ = (price_to_sqrtp_q96_batch(a, exact=False) for a in arrays(size))
+        liquidity = np.full(size, 1e21)
+        return lambda: calc_amount_y_batch(liquidity, low, cur)
+
+    def make_calculate_liquidity(exact):
+        def make(size):
+            cur, low, upp = arrays(size)
+            eth, usdc = np.ones(size), np.full(size, 5000.0)
+            return lambda: calculate_liquidity_batch(cur, low, upp, eth, usdc, exact=exact)
+        return make
+
+    return [
+        Benchmark("price_to_tick_batch", make_price_to_tick, None),
+        Benchmark("price_to_sqrtp_q96_batch", make_price_to_sqrtp, None),
+        Benchmark("price_to_sqrtp_q96_batch[exact]", make_price_to_sqrtp_exact, 10**6),
+        Benchmark("liquidity_from_x_batch", make_liquidity_from_x, None),
+        Benchmark("liquidity_from_y_batch", make_liquidity_from_y, None),
+        Benchmark("calc_amount_x_batch", make_calc_amount_x, None),
+        Benchmark("calc_amount_y_batch", make_calc_amount_y, None),
+        Benchmark("calculate_liquidity_batch", make_calculate_liquidity(False), None),
+        Benchmark("calculate_liquidity_batch[exact]", make_calculate_liquidity(True), 10**5),
+    ]
+
+
+def all_benchmarks():
+    """返回全部用例（批量用例需要 NumPy，缺失时跳过）"""
+    cases = _scalar_cases()
+    try:
+        cases += _batch_cases()
+    except ImportError:
+        print("⚠️  未安装 numpy，跳过批量用例", file=sys.stderr)
+    return cases
+
+
+# ============================================================
+# 计时与内存测量
+# ============================================================
+
+def measure(func, size):
+    """
+    测量单个用例
+
+    先估计单次耗时，不足 MIN_TIME 时在一次计时中重复调用，
+    取 REPEAT 次计时中的最好成绩；峰值内存单独运行一次测量，
+    避免 tracemalloc 的开销影响计时。
+
+    参数:
+        func: 无参数的被测函数，每次调用处理 size 个元素
+        size: 数据规模
+
+    返回:
+        (每次调用的秒数, ops/sec, 峰值内存字节数)
+    """
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    number = max(1, int(MIN_TIME / elapsed)) if elapsed > 0 else 1000
+
+    best = elapsed
+    if elapsed < MIN_TIME * 5:
+        for _ in range(REPEAT):
+            start = time.perf_counter()
+            for _ in range(number):
+                func()
+            best = min(best, (time.perf_counter() - start) / number)
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    ops_per_sec = size / best if best > 0 else float("inf")
+    return best, ops_per_sec, peak
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, name_filter=None, max_size=None, scalar_max_size=SCALAR_MAX_SIZE, log=None):
+    """
+    运行基准测试
+
+    参数:
+        sizes: 数据规模列表
+        name_filter: 只运行名称包含该子串的用例
+        max_size: 所有用例的规模上限
+        scalar_max_size: 标量用例的规模上限
+        log: 进度输出函数（None 表示不输出）
+
+    返回:
+        BenchmarkResult 列表
+    """
+    results = []
+    for case in all_benchmarks():
+        if name_filter and name_filter not in case.name:
+            continue
+        limit = case.max_size
+        if limit == SCALAR_MAX_SIZE:
+            limit = scalar_max_size
+        for size in sizes:
+            if (limit is not None and size > limit) or (max_size is not None and size > max_size):
+                continue
+            seconds, ops_per_sec, peak = measure(case.make(size), size)
+            result = BenchmarkResult(case.name, size, seconds, ops_per_sec, peak)
+            results.append(result)
+            if log:
+                log(f"  {case.name:<36} n={size:<9d} {ops_per_sec:>14,.0f} ops/s  峰值 {peak / 2**20:>9.2f} MB")
+    return results
+
+
+# ============================================================
+# 结果保存与基线比较
+# ============================================================
+
+def to_json(results):
+    """将结果转换为可序列化的字典"""
+    try:
+        import numpy
+        numpy_version = numpy.__version__
+    except ImportError:
+        numpy_version = None
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": numpy_version,
+            "machine": platform.machine(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": [result._asdict() for result in results],
+    }
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    与基线比较
+
+    参数:
+        results: BenchmarkResult 列表
+        baseline: to_json 格式的基线字典
+        threshold: 允许的 ops/sec 下降比例
+
+    返回:
+        Regression 列表（只包含超过阈值的回退）
+    """
+    reference = {(r["name"], r["size"]): r["ops_per_sec"] for r in baseline["results"]}
+    regressions = []
+    for result in results:
+        base = reference.get((result.name, result.size))
+        if not base:
+            continue
+        ratio = result.ops_per_sec / base
+        if ratio < 1 - threshold:
+            regressions.append(Regression(result.name, result.size, base, result.ops_per_sec, ratio))
+    return regressions
+
+
+# ============================================================
+# 主程序
+# ============================================================
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="Python 数学与模拟热点路径基准测试")
+    parser.add_argument("--out", help="结果 JSON 文件")
+    parser.add_argument("--baseline", help="基线 JSON 文件，ops/sec 下降超过阈值时以状态码 1 退出")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="允许的 ops/sec 下降比例")
+    parser.add_argument("--filter", help="只运行名称包含该子串的用例")
+    parser.add_argument("--sizes", help="逗号分隔的数据规模，例如 1,1000,1000000")
+    parser.add_argument("--max-size", type=int, help="所有用例的规模上限")
+    parser.add_argument("--scalar-max-size", type=int, default=SCALAR_MAX_SIZE, help="标量用例的规模上限")
+    parser.add_argument("--quick", action="store_true", help="只运行 1 到 10^4 的规模")
+    args = parser.parse_args()
+
+    if args.sizes:
+        sizes = [int(v) for v in args.sizes.split(",")]
+    else:
+        sizes = QUICK_SIZES if args.quick else DEFAULT_SIZES
+
+    print("=" * 80)
+    print("基准测试")
+    print("=" * 80)
+    results = run_benchmarks(sizes, args.filter, args.max_size, args.scalar_max_size, log=print)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(to_json(results), f, indent=2)
+        print(f"\n✅ 结果已写入 {args.out}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} 个用例性能回退（阈值 {args.threshold:.0%}）:")
+            for r in regressions:
+                print(f"  {r.name:<36} n={r.size:<9d} {r.baseline:>14,.0f} -> {r.current:>14,.0f} ops/s ({r.ratio:.0%})")
+            sys.exit(1)
+        print(f"\n✅ 与基线相比没有超过 {args.threshold:.0%} 的性能回退")
+
+
+if __name__ == "__main__":
+    main()
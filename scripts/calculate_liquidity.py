@@ -1,103 +1,260 @@
 #!/usr/bin/env python3
+"""
+计算给定流动性需要的代币数量
 
-import math
-from decimal import Decimal, getcontext
-
-# 设置高精度
-getcontext().prec = 50
-
-def tick_to_price(tick):
-    """将 tick 转换为价格"""
-    return Decimal(1.0001) ** tick
-
-def calculate_amounts_for_liquidity(sqrt_price_x96, tick_lower, tick_upper, liquidity):
-    """计算给定流动性需要的代币数量"""
-    
-    # 当前价格
-    current_price = (Decimal(sqrt_price_x96) / Decimal(2**96)) ** 2
-    
-    # 边界价格
-    price_lower = tick_to_price(tick_lower)
-    price_upper = tick_to_price(tick_upper)
-    
-    print(f"价格信息:")
-    print(f"  当前价格: {current_price:.6f}")
-    print(f"  下边界价格: {price_lower:.6f}")
-    print(f"  上边界价格: {price_upper:.6f}")
-    
-    # 计算需要的代币数量
-    if current_price <= price_lower:
-        # 当前价格低于范围，只需要 token0 (WETH)
-        amount0 = liquidity
+calculate_amounts_for_liquidity 使用 Q64.96 精确整数运算，分支与
+UniswapV3Pool.mint 一致，取整方向与 Math.calcAmount0Delta /
+calcAmount1Delta 一致（存入金额向上取整），结果单位为 wei。
+
+Decimal 高精度版本保留为可选的校验模式（--verify），用于交叉验证整数结果。
+
+使用方法:
+    python scripts/calculate_liquidity.py
+    python scripts/calculate_liquidity.py --verify
+
+参考文档: docs/1FirstSwap/05-流动性计算.md
+"""
+
+import sys
+
+from tickmath import get_sqrt_ratio_at_tick
+from v3math import Q96, mul_div, calc_amount0_delta, calc_amount1_delta
+
+
+ETH = 10**18
+
+
+# ============================================================
+# 错误定义
+# ============================================================
+
+class VerificationError(ArithmeticError):
+    """整数结果与 Decimal 校验结果不一致"""
+
+
+# ============================================================
+# 代币数量计算
+# ============================================================
+
+def calculate_amounts_for_liquidity(sqrt_price_x96, tick_lower, tick_upper, liquidity, verify=False):
+    """
+    计算给定流动性需要的代币数量
+
+    参数:
+        sqrt_price_x96: 当前平方根价格（Q64.96）
+        tick_lower: 价格区间下限
+        tick_upper: 价格区间上限
+        liquidity: 流动性数量
+        verify: 是否用 Decimal 版本交叉验证，不一致时抛出 VerificationError
+
+    返回:
+        (amount0, amount1)，单位为 wei
+    """
+    sqrt_price_lower = get_sqrt_ratio_at_tick(tick_lower)
+    sqrt_price_upper = get_sqrt_ratio_at_tick(tick_upper)
+
+    # 与合约按 slot0.tick 判断等价：tick < tick_lower 当且仅当 sqrtP < sqrtP(tick_lower)，
+    # 直接比较平方根价格，省去一次 getTickAtSqrtRatio
+    if sqrt_price_x96 < sqrt_price_lower:
+        # 价格区间在当前价格之上，只需要 token0 (WETH)
+        amount0 = calc_amount0_delta(sqrt_price_lower, sqrt_price_upper, liquidity)
         amount1 = 0
-    elif current_price >= price_upper:
-        # 当前价格高于范围，只需要 token1 (USDC)
-        amount0 = 0
-        amount1 = liquidity * Decimal(price_upper).sqrt()
+    elif sqrt_price_x96 < sqrt_price_upper:
+        # 当前价格在区间内，需要两种代币
+        amount0 = calc_amount0_delta(sqrt_price_x96, sqrt_price_upper, liquidity)
+        amount1 = calc_amount1_delta(sqrt_price_x96, sqrt_price_lower, liquidity)
     else:
-        # 当前价格在范围内，需要两种代币
-        sqrt_price = Decimal(sqrt_price_x96) / Decimal(2**96)
-        sqrt_price_lower = price_lower.sqrt()
-        sqrt_price_upper = price_upper.sqrt()
-        
-        amount0 = liquidity * (sqrt_price_upper - sqrt_price) / (sqrt_price * sqrt_price_upper)
-        amount1 = liquidity * (sqrt_price - sqrt_price_lower)
-    
+        # 价格区间在当前价格之下，只需要 token1 (USDC)
+        amount0 = 0
+        amount1 = calc_amount1_delta(sqrt_price_lower, sqrt_price_upper, liquidity)
+
+    if verify:
+        from decimal import Decimal
+
+        # 参与计算的 TickMath 边界价格（当前价格是精确输入，不带 TickMath 误差）
+        if sqrt_price_x96 < sqrt_price_lower:
+            bounds = ((sqrt_price_lower, sqrt_price_upper), ())
+        elif sqrt_price_x96 < sqrt_price_upper:
+            bounds = ((sqrt_price_upper,), (sqrt_price_lower,))
+        else:
+            bounds = ((), (sqrt_price_lower, sqrt_price_upper))
+
+        expected = calculate_amounts_for_liquidity_decimal(sqrt_price_x96, tick_lower, tick_upper, liquidity)
+        for name, actual, reference, ratios, token0 in (
+            ("amount0", amount0, expected[0], bounds[0], True),
+            ("amount1", amount1, expected[1], bounds[1], False),
+        ):
+            # 允许取整误差、TickMath 的相对误差，以及边界价格 Q64.96 量化误差的传递
+            tolerance = 2 + reference * Decimal("1e-15") + _quantization_error(liquidity, ratios, token0)
+            if abs(actual - reference) > tolerance:
+                raise VerificationError(f"{name}: {actual} != {reference:.0f}")
+
     return amount0, amount1
 
+
+def _quantization_error(liquidity, sqrt_ratios, token0):
+    """
+    边界价格的 Q64.96 量化误差传递到金额上的上限
+
+    getSqrtRatioAtTick 的结果最多偏离理想值约 1 个 2^-96，相对误差约为 2^-96 / sqrtP，
+    深度负 Tick（sqrtP 很小）时远大于固定的相对容差。金额对每个边界的敏感度为
+    L / sqrtP（amount0）或 L * sqrtP（amount1），每个边界按 TickMath 的相对误差
+    加上 2 个最小单位累加；当前价格与边界重合、参考金额接近 0 时也能覆盖边界的误差。
+
+    参数:
+        liquidity: 流动性数量
+        sqrt_ratios: 参与计算的 TickMath 边界价格（Q64.96）
+        token0: True 表示 amount0，False 表示 amount1
+
+    返回:
+        允许的绝对误差（Decimal，单位 wei）
+    """
+    from decimal import Decimal
+
+    error = Decimal(0)
+    for sqrt_ratio in sqrt_ratios:
+        term = Decimal(liquidity * Q96) / sqrt_ratio if token0 else Decimal(liquidity * sqrt_ratio) / Q96
+        error += term * (Decimal("1e-15") + Decimal(2) / sqrt_ratio)
+    return error
+
+
+def calculate_amounts_for_liquidity_decimal(sqrt_price_x96, tick_lower, tick_upper, liquidity):
+    """
+    calculate_amounts_for_liquidity 的 Decimal 高精度版本（仅用于校验）
+
+    边界价格直接由 1.0001^tick 计算，不经过 TickMath。
+
+    返回:
+        (amount0, amount1)，单位为 wei（Decimal，未取整）
+    """
+    # decimal 只在校验时需要，不拖慢命令行的启动
+    from decimal import Decimal, localcontext
+
+    with localcontext() as ctx:
+        ctx.prec = 50
+        sqrt_price = Decimal(sqrt_price_x96) / Decimal(Q96)
+        sqrt_price_lower = (Decimal("1.0001") ** tick_lower).sqrt()
+        sqrt_price_upper = (Decimal("1.0001") ** tick_upper).sqrt()
+        liquidity = Decimal(liquidity)
+
+        if sqrt_price < sqrt_price_lower:
+            amount0 = liquidity * (sqrt_price_upper - sqrt_price_lower) / (sqrt_price_lower * sqrt_price_upper)
+            amount1 = Decimal(0)
+        elif sqrt_price < sqrt_price_upper:
+            amount0 = liquidity * (sqrt_price_upper - sqrt_price) / (sqrt_price * sqrt_price_upper)
+            amount1 = liquidity * (sqrt_price - sqrt_price_lower)
+        else:
+            amount0 = Decimal(0)
+            amount1 = liquidity * (sqrt_price_upper - sqrt_price_lower)
+
+        return +amount0, +amount1
+
+
+def max_liquidity_for_amounts(sqrt_price_x96, tick_lower, tick_upper, amount0, amount1):
+    """
+    计算给定代币余额能提供的最大流动性（闭式解）
+
+    与 Uniswap V3 LiquidityAmounts.getLiquidityForAmounts 一致，全部向下取整，
+    因此 calculate_amounts_for_liquidity 对结果算出的金额不会超过余额。
+
+    参数:
+        sqrt_price_x96: 当前平方根价格（Q64.96）
+        tick_lower: 价格区间下限
+        tick_upper: 价格区间上限
+        amount0: token0 余额（wei）
+        amount1: token1 余额（wei）
+
+    返回:
+        最大流动性
+    """
+    sqrt_price_lower = get_sqrt_ratio_at_tick(tick_lower)
+    sqrt_price_upper = get_sqrt_ratio_at_tick(tick_upper)
+
+    def liquidity_for_amount0(sqrt_price_a, sqrt_price_b):
+        intermediate = mul_div(sqrt_price_a, sqrt_price_b, Q96)
+        return mul_div(amount0, intermediate, sqrt_price_b - sqrt_price_a)
+
+    def liquidity_for_amount1(sqrt_price_a, sqrt_price_b):
+        return mul_div(amount1, Q96, sqrt_price_b - sqrt_price_a)
+
+    if sqrt_price_x96 < sqrt_price_lower:
+        return liquidity_for_amount0(sqrt_price_lower, sqrt_price_upper)
+    if sqrt_price_x96 < sqrt_price_upper:
+        return min(
+            liquidity_for_amount0(sqrt_price_x96, sqrt_price_upper),
+            liquidity_for_amount1(sqrt_price_lower, sqrt_price_x96)
+        )
+    return liquidity_for_amount1(sqrt_price_lower, sqrt_price_upper)
+
+
+# ============================================================
+# 主程序
+# ============================================================
+
 def main():
+    verify = '--verify' in sys.argv[1:]
+
     # 参数
     sqrt_price_x96 = 5602277097478614198912276234240
     tick_lower = 84222
     tick_upper = 86129
     liquidity = 1527882343751509868544
-    
+
     print(f"计算流动性 {liquidity} 需要的代币数量:")
-    
+
+    current_price = (sqrt_price_x96 / Q96) ** 2
+    print(f"价格信息:")
+    print(f"  当前价格: {current_price:.6f}")
+    print(f"  下边界价格: {1.0001 ** tick_lower:.6f}")
+    print(f"  上边界价格: {1.0001 ** tick_upper:.6f}")
+
     amount0, amount1 = calculate_amounts_for_liquidity(
-        sqrt_price_x96, tick_lower, tick_upper, liquidity
+        sqrt_price_x96, tick_lower, tick_upper, liquidity, verify=verify
     )
-    
+
     print(f"\n需要的代币数量:")
-    print(f"  WETH (amount0): {amount0:.18f}")
-    print(f"  USDC (amount1): {amount1:.18f}")
-    
+    print(f"  WETH (amount0): {amount0 / ETH:.18f} ({amount0} wei)")
+    print(f"  USDC (amount1): {amount1 / ETH:.18f} ({amount1} wei)")
+    if verify:
+        print(f"  ✅ 与 Decimal 校验结果一致")
+
     # 检查是否超过用户余额
-    user_weth = Decimal("1.0")
-    user_usdc = Decimal("5042.0")
-    
+    user_weth = 1 * ETH
+    user_usdc = 5042 * ETH
+
     print(f"\n用户余额:")
-    print(f"  WETH: {user_weth}")
-    print(f"  USDC: {user_usdc}")
-    
+    print(f"  WETH: {user_weth / ETH}")
+    print(f"  USDC: {user_usdc / ETH}")
+
     print(f"\n检查:")
     if amount0 > user_weth:
-        print(f"❌ WETH 不足: 需要 {amount0:.6f}, 只有 {user_weth}")
+        print(f"❌ WETH 不足: 需要 {amount0 / ETH:.6f}, 只有 {user_weth / ETH}")
     else:
         print(f"✅ WETH 充足")
-        
+
     if amount1 > user_usdc:
-        print(f"❌ USDC 不足: 需要 {amount1:.6f}, 只有 {user_usdc}")
+        print(f"❌ USDC 不足: 需要 {amount1 / ETH:.6f}, 只有 {user_usdc / ETH}")
     else:
         print(f"✅ USDC 充足")
-    
+
     # 建议合适的流动性数量
     print(f"\n建议:")
     if amount0 > user_weth or amount1 > user_usdc:
-        # 计算最大可能的流动性
-        max_liquidity_by_weth = user_weth / (amount0 / Decimal(liquidity)) if amount0 > 0 else Decimal('inf')
-        max_liquidity_by_usdc = user_usdc / (amount1 / Decimal(liquidity)) if amount1 > 0 else Decimal('inf')
-        
-        max_liquidity = min(max_liquidity_by_weth, max_liquidity_by_usdc)
-        
-        print(f"  建议使用流动性: {int(max_liquidity)}")
+        max_liquidity = max_liquidity_for_amounts(
+            sqrt_price_x96, tick_lower, tick_upper, user_weth, user_usdc
+        )
+
+        print(f"  建议使用流动性: {max_liquidity}")
         print(f"  这将需要:")
-        
+
         new_amount0, new_amount1 = calculate_amounts_for_liquidity(
-            sqrt_price_x96, tick_lower, tick_upper, int(max_liquidity)
+            sqrt_price_x96, tick_lower, tick_upper, max_liquidity
         )
-        print(f"    WETH: {new_amount0:.6f}")
-        print(f"    USDC: {new_amount1:.6f}")
+        print(f"    WETH: {new_amount0 / ETH:.6f}")
+        print(f"    USDC: {new_amount1 / ETH:.6f}")
+    else:
+        print(f"  ✅ 余额足够提供流动性 {liquidity}")
+
 
 if __name__ == "__main__":
     main()
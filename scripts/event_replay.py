@@ -0,0 +1,476 @@
+#!/usr/bin/env python3
+"""
+事件日志回放：从 Mint / Swap 事件流重建池子状态
+
+读取 UniswapV3Pool 的 Mint / Swap 事件（例如从本地 anvil 节点导出），
+按顺序增量维护 pool_sim.Pool 的状态：Tick 映射、位图索引、仓位和 slot0。
+
+    - Mint 事件：调用 Pool.mint 更新 Tick、位图和仓位
+    - Swap 事件：事件本身携带交换后的 sqrtPriceX96 / liquidity / tick，
+      直接写入，无需重新模拟；verify=True 时重新模拟并与事件比对
+
+每隔 checkpoint_interval 个区块保存一次检查点（池子状态 + 事件文件偏移），
+回放到区块 N 时从不晚于 N 的最近检查点继续，而不是从头回放。
+
+事件文件格式:
+    JSONL：每行一个事件，字段名与合约事件一致，大整数可以是数字或字符串
+        {"event": "Initialize", "block": 1, "sqrtPriceX96": ..., "tick": 85176}
+        {"event": "Mint", "block": 2, "logIndex": 0, "owner": "0x..", "lowerTick": 84222,
+         "upperTick": 86129, "amount": ..., "amount0": ..., "amount1": ...}
+        {"event": "Swap", "block": 3, "logIndex": 0, "amount0": ..., "amount1": ...,
+         "sqrtPriceX96": ..., "liquidity": ..., "tick": 85184}
+    二进制：write_events_binary 写出的定长字段记录，读取时无需解析 JSON
+
+合约没有 Initialize 事件（slot0 在构造函数中设置），可以在事件文件开头
+写一条 Initialize 记录，或者通过 sqrt_price_x96 / tick 参数提供初始状态。
+事件中也不包含池子的手续费率和 Tick 间距，回放手续费档位池子时通过
+fee / tick_spacing 参数（命令行 --fee / --tick-spacing）提供。
+
+使用方法:
+    from event_replay import PoolReplayer
+
+    replayer = PoolReplayer("events.jsonl", checkpoint_dir="checkpoints", checkpoint_interval=1000)
+    pool = replayer.replay_to(block=123456)
+
+    python scripts/event_replay.py events.jsonl --to-block 123456 --checkpoint-dir checkpoints
+    python scripts/event_replay.py events.jsonl --fee 3000 --verify
+    python scripts/event_replay.py events.jsonl --convert events.bin
+
+参考文档: docs/2SecondSwap/14-广义交换（Generalized Swapping）.md
+"""
+
+import argparse
+import bisect
+import json
+import os
+import pickle
+import struct
+from collections import namedtuple
+
+from pool_sim import Pool
+
+
+# ============================================================
+# 错误定义
+# ============================================================
+
+class ReplayMismatch(ValueError):
+    """回放结果与事件记录不一致"""
+
+
+# ============================================================
+# 事件类型
+# ============================================================
+
+InitializeEvent = namedtuple("InitializeEvent", ["block", "log_index", "sqrt_price_x96", "tick"])
+MintEvent = namedtuple("MintEvent", [
+    "block", "log_index", "owner", "lower_tick", "upper_tick", "amount", "amount0", "amount1"
+])
+SwapEvent = namedtuple("SwapEvent", [
+    "block", "log_index", "amount0", "amount1", "sqrt_price_x96", "liquidity", "tick"
+])
+
+
+def event_from_dict(data):
+    """
+    将 JSON 对象转换为事件
+
+    参数:
+        data: 字段名与合约事件一致的字典
+
+    返回:
+        InitializeEvent / MintEvent / SwapEvent
+    """
+    kind = data["event"]
+    block = int(data["block"])
+    log_index = int(data.get("logIndex", 0))
+
+    if kind == "Mint":
+        return MintEvent(
+            block, log_index, data["owner"], int(data["lowerTick"]), int(data["upperTick"]),
+            int(data["amount"]), int(data["amount0"]), int(data["amount1"])
+        )
+    if kind == "Swap":
+        return SwapEvent(
+            block, log_index, int(data["amount0"]), int(data["amount1"]),
+            int(data["sqrtPriceX96"]), int(data["liquidity"]), int(data["tick"])
+        )
+    if kind == "Initialize":
+        return InitializeEvent(block, log_index, int(data["sqrtPriceX96"]), int(data["tick"]))
+    raise ValueError(f"unknown event: {kind}")
+
+
+def event_to_dict(event):
+    """将事件转换为 JSON 对象（大整数写为字符串）"""
+    if isinstance(event, MintEvent):
+        return {
+            "event": "Mint", "block": event.block, "logIndex": event.log_index,
+            "owner": event.owner, "lowerTick": event.lower_tick, "upperTick": event.upper_tick,
+            "amount": str(event.amount), "amount0": str(event.amount0), "amount1": str(event.amount1),
+        }
+    if isinstance(event, SwapEvent):
+        return {
+            "event": "Swap", "block": event.block, "logIndex": event.log_index,
+            "amount0": str(event.amount0), "amount1": str(event.amount1),
+            "sqrtPriceX96": str(event.sqrt_price_x96), "liquidity": str(event.liquidity), "tick": event.tick,
+        }
+    return {
+        "event": "Initialize", "block": event.block, "logIndex": event.log_index,
+        "sqrtPriceX96": str(event.sqrt_price_x96), "tick": event.tick,
+    }
+
+
+# ============================================================
+# 二进制事件格式
+# ============================================================
+
+BINARY_MAGIC = b"UV3EVT\x00\x01"
+
+# 记录头: 事件类型、区块号、logIndex
+_RECORD_HEADER = struct.Struct("<BqI")
+_KIND_INITIALIZE, _KIND_MINT, _KIND_SWAP = 0, 1, 2
+# 定长字段: Mint 为 lowerTick、upperTick 和 owner 长度；Swap 与 Initialize 为 tick
+_MINT_FIELDS = struct.Struct("<iiH")
+_TICK_FIELD = struct.Struct("<i")
+
+
+def _int_bytes(value, size, signed=False):
+    return value.to_bytes(size, "big", signed=signed)
+
+
+def _read_int(data, start, size, signed=False):
+    return int.from_bytes(data[start:start + size], "big", signed=signed), start + size
+
+
+def write_events_binary(events, path):
+    """
+    将事件写为二进制格式
+
+    整数按合约中的类型宽度大端存储（uint128 16 字节，int256 32 字节，uint160 20 字节）。
+
+    参数:
+        events: 事件迭代器
+        path: 输出文件
+    """
+    with open(path, "wb") as f:
+        f.write(BINARY_MAGIC)
+        for event in events:
+            if isinstance(event, MintEvent):
+                owner = event.owner.encode()
+                f.write(_RECORD_HEADER.pack(_KIND_MINT, event.block, event.log_index))
+                f.write(_MINT_FIELDS.pack(event.lower_tick, event.upper_tick, len(owner)))
+                f.write(owner)
+                f.write(_int_bytes(event.amount, 16))
+                f.write(_int_bytes(event.amount0, 32))
+                f.write(_int_bytes(event.amount1, 32))
+            elif isinstance(event, SwapEvent):
+                f.write(_RECORD_HEADER.pack(_KIND_SWAP, event.block, event.log_index))
+                f.write(_TICK_FIELD.pack(event.tick))
+                f.write(_int_bytes(event.amount0, 32, signed=True))
+                f.write(_int_bytes(event.amount1, 32, signed=True))
+                f.write(_int_bytes(event.sqrt_price_x96, 20))
+                f.write(_int_bytes(event.liquidity, 16))
+            else:
+                f.write(_RECORD_HEADER.pack(_KIND_INITIALIZE, event.block, event.log_index))
+                f.write(_TICK_FIELD.pack(event.tick))
+                f.write(_int_bytes(event.sqrt_price_x96, 20))
+
+
+def _read_binary_record(f):
+    """读取一条二进制记录，文件结束时返回 None"""
+    header = f.read(_RECORD_HEADER.size)
+    if not header:
+        return None
+    kind, block, log_index = _RECORD_HEADER.unpack(header)
+
+    if kind == _KIND_MINT:
+        lower_tick, upper_tick, owner_size = _MINT_FIELDS.unpack(f.read(_MINT_FIELDS.size))
+        owner = f.read(owner_size).decode()
+        data = f.read(16 + 32 + 32)
+        amount, pos = _read_int(data, 0, 16)
+        amount0, pos = _read_int(data, pos, 32)
+        amount1, _ = _read_int(data, pos, 32)
+        return MintEvent(block, log_index, owner, lower_tick, upper_tick, amount, amount0, amount1)
+
+    (tick,) = _TICK_FIELD.unpack(f.read(_TICK_FIELD.size))
+    if kind == _KIND_SWAP:
+        data = f.read(32 + 32 + 20 + 16)
+        amount0, pos = _read_int(data, 0, 32, signed=True)
+        amount1, pos = _read_int(data, pos, 32, signed=True)
+        sqrt_price_x96, pos = _read_int(data, pos, 20)
+        liquidity, _ = _read_int(data, pos, 16)
+        return SwapEvent(block, log_index, amount0, amount1, sqrt_price_x96, liquidity, tick)
+
+    sqrt_price_x96, _ = _read_int(f.read(20), 0, 20)
+    return InitializeEvent(block, log_index, sqrt_price_x96, tick)
+
+
+def _is_binary(path):
+    with open(path, "rb") as f:
+        return f.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+
+
+def read_events(path, offset=None):
+    """
+    按顺序读取事件文件（JSONL 或二进制）
+
+    参数:
+        path: 事件文件
+        offset: 起始字节偏移（来自 read_events 产出的偏移），None 表示从头读取
+
+    返回:
+        生成器，每次产出 (event, next_offset)，next_offset 为下一条事件的偏移
+    """
+    binary = _is_binary(path)
+    with open(path, "rb") as f:
+        if offset is not None:
+            f.seek(offset)
+        elif binary:
+            f.seek(len(BINARY_MAGIC))
+
+        if binary:
+            while True:
+                event = _read_binary_record(f)
+                if event is None:
+                    return
+                yield event, f.tell()
+        else:
+            for line in iter(f.readline, b""):
+                if line.strip():
+                    yield event_from_dict(json.loads(line)), f.tell()
+
+
+# ============================================================
+# 回放器
+# ============================================================
+
+Checkpoint = namedtuple("Checkpoint", ["block", "offset", "events_applied", "pool"])
+
+
+class PoolReplayer:
+    """
+    增量回放事件并维护池子状态
+
+    属性:
+        pool: 当前池子状态（尚未初始化时为 None）
+        block: 已完整回放的最后一个区块
+        offset: 下一条待回放事件在文件中的偏移
+        events_applied: 已回放的事件数
+    """
+
+    def __init__(
+        self,
+        events_path,
+        checkpoint_dir=None,
+        checkpoint_interval=10000,
+        verify=False,
+        sqrt_price_x96=None,
+        tick=None,
+        fee=0,
+        tick_spacing=None
+    ):
+        """
+        参数:
+            events_path: 事件文件（JSONL 或二进制）
+            checkpoint_dir: 检查点目录（None 表示不保存检查点）。
+                检查点中保存的是文件偏移，因此每个事件文件使用独立的目录
+            checkpoint_interval: 每隔多少个区块保存一次检查点
+            verify: 是否校验 Mint 金额并重新模拟每次 Swap
+            sqrt_price_x96 / tick: 初始 slot0（事件文件中没有 Initialize 记录时需要）
+            fee / tick_spacing: 池子的手续费率与 Tick 间距（见 pool_sim.Pool），
+                合约事件中不包含这两个参数，回放手续费档位池子时必须提供
+        """
+        if checkpoint_interval <= 0:
+            raise ValueError("checkpoint_interval must be positive")
+        self.events_path = events_path
+        self.checkpoint_dir = checkpoint_dir
+        self.checkpoint_interval = checkpoint_interval
+        self.verify = verify
+        self._initial = (sqrt_price_x96, tick)
+        self.fee = fee
+        self.tick_spacing = tick_spacing
+        self._reset()
+
+        if checkpoint_dir is not None:
+            os.makedirs(checkpoint_dir, exist_ok=True)
+
+    def _reset(self):
+        """回到创世状态"""
+        sqrt_price_x96, tick = self._initial
+        self.pool = None if sqrt_price_x96 is None else self._new_pool(sqrt_price_x96, tick)
+        self.block = -1
+        self.offset = None
+        self.events_applied = 0
+
+    def _new_pool(self, sqrt_price_x96, tick):
+        return Pool(sqrt_price_x96, tick, fee=self.fee, tick_spacing=self.tick_spacing)
+
+    # ---------- 事件处理 ----------
+
+    def apply(self, event):
+        """
+        回放单个事件
+
+        参数:
+            event: InitializeEvent / MintEvent / SwapEvent
+        """
+        if isinstance(event, InitializeEvent):
+            self.pool = self._new_pool(event.sqrt_price_x96, event.tick)
+            return
+        if self.pool is None:
+            raise ReplayMismatch("pool is not initialized")
+
+        pool = self.pool
+        if isinstance(event, MintEvent):
+            amounts = pool.mint(event.owner, event.lower_tick, event.upper_tick, event.amount)
+            if self.verify and amounts != (event.amount0, event.amount1):
+                raise ReplayMismatch(f"Mint at block {event.block}: {amounts} != {(event.amount0, event.amount1)}")
+            return
+
+        if self.verify:
+            zero_for_one = event.amount0 > 0
+            amount_in = event.amount0 if zero_for_one else event.amount1
+            result = pool.simulate_swap(zero_for_one, amount_in)
+            if tuple(result) != tuple(event[2:]):
+                raise ReplayMismatch(f"Swap at block {event.block}: {tuple(result)} != {tuple(event[2:])}")
+
+        pool.sqrt_price_x96 = event.sqrt_price_x96
+        pool.tick = event.tick
+        pool.liquidity = event.liquidity
+        pool.version += 1
+
+    def replay_to(self, block=None):
+        """
+        回放到指定区块（包含该区块的全部事件）
+
+        当前状态已经超过目标区块时，从不晚于目标区块的最近检查点重新开始；
+        存在比当前状态更新且不晚于目标区块的检查点时，直接跳到该检查点。
+
+        参数:
+            block: 目标区块，None 表示回放全部事件
+
+        返回:
+            回放后的 Pool
+        """
+        target = float("inf") if block is None else block
+
+        if self.block > target:
+            self._reset()
+        checkpoint = self._nearest_checkpoint(target)
+        if checkpoint is not None:
+            self._restore(checkpoint)
+
+        next_checkpoint = (max(self.block, 0) // self.checkpoint_interval + 1) * self.checkpoint_interval
+
+        for event, next_offset in read_events(self.events_path, self.offset):
+            if event.block > target:
+                break
+            if self.block < 0:
+                # 第一个事件：检查点边界从它所在的区块开始计算，而不是从区块 0
+                next_checkpoint = (event.block // self.checkpoint_interval + 1) * self.checkpoint_interval
+            elif event.block > self.block:
+                # 上一个区块已经完整回放（池子尚未初始化时没有可保存的状态）
+                if self.checkpoint_dir is not None and self.pool is not None and event.block >= next_checkpoint:
+                    self.save_checkpoint()
+                    next_checkpoint = (event.block // self.checkpoint_interval + 1) * self.checkpoint_interval
+            self.apply(event)
+            self.block = max(self.block, event.block)
+            self.offset = next_offset
+            self.events_applied += 1
+
+        if block is not None:
+            self.block = max(self.block, block)
+        return self.pool
+
+    # ---------- 检查点 ----------
+
+    def _checkpoint_path(self, block):
+        return os.path.join(self.checkpoint_dir, f"checkpoint_{block:012d}.pkl")
+
+    def checkpoints(self):
+        """返回已保存检查点的区块号（升序）"""
+        if self.checkpoint_dir is None:
+            return []
+        blocks = []
+        for name in os.listdir(self.checkpoint_dir):
+            if name.startswith("checkpoint_") and name.endswith(".pkl"):
+                blocks.append(int(name[len("checkpoint_"):-len(".pkl")]))
+        return sorted(blocks)
+
+    def save_checkpoint(self):
+        """保存当前状态为检查点"""
+        checkpoint = Checkpoint(self.block, self.offset, self.events_applied, self.pool)
+        path = self._checkpoint_path(self.block)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(checkpoint, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    def _nearest_checkpoint(self, target):
+        """
+        加载不晚于 target 且比当前状态更新的最近检查点
+
+        先只比较文件名中的区块号，当前状态已经不早于该检查点时不读取文件，
+        逐块向前回放时不必每次反序列化整个池子。
+        """
+        blocks = self.checkpoints()
+        i = bisect.bisect_right(blocks, target)
+        if i == 0 or blocks[i - 1] <= self.block:
+            return None
+        with open(self._checkpoint_path(blocks[i - 1]), "rb") as f:
+            return pickle.load(f)
+
+    def _restore(self, checkpoint):
+        self.pool = checkpoint.pool
+        self.block = checkpoint.block
+        self.offset = checkpoint.offset
+        self.events_applied = checkpoint.events_applied
+
+
+# ============================================================
+# 主程序
+# ============================================================
+
+def add_pool_arguments(parser):
+    """添加池子参数（--fee / --tick-spacing），供基于事件回放的命令行工具共用"""
+    parser.add_argument("--fee", type=int, default=0, help="池子手续费率（百万分之一，例如 3000）")
+    parser.add_argument("--tick-spacing", type=int, help="Tick 间距（默认取手续费档位的间距）")
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="从 Mint / Swap 事件重建池子状态")
+    parser.add_argument("events", help="事件文件（JSONL 或二进制）")
+    parser.add_argument("--to-block", type=int, help="回放到的区块（默认全部）")
+    parser.add_argument("--checkpoint-dir", help="检查点目录")
+    parser.add_argument("--checkpoint-interval", type=int, default=10000, help="检查点间隔（区块数）")
+    parser.add_argument("--verify", action="store_true", help="校验 Mint 金额并重新模拟 Swap")
+    add_pool_arguments(parser)
+    parser.add_argument("--convert", metavar="OUTPUT", help="将事件文件转换为二进制格式后退出")
+    args = parser.parse_args()
+
+    if args.convert:
+        write_events_binary((event for event, _ in read_events(args.events)), args.convert)
+        print(f"✅ 已写入 {args.convert}")
+        return
+
+    replayer = PoolReplayer(
+        args.events, args.checkpoint_dir, args.checkpoint_interval, verify=args.verify,
+        fee=args.fee, tick_spacing=args.tick_spacing
+    )
+    pool = replayer.replay_to(args.to_block)
+    if pool is None:
+        print("⚠️  事件文件中没有 Initialize 记录")
+        return
+
+    print(f"区块:       {replayer.block}")
+    print(f"事件数:     {replayer.events_applied}")
+    print(f"sqrtPriceX96: {pool.sqrt_price_x96}")
+    print(f"tick:       {pool.tick}")
+    print(f"liquidity:  {pool.liquidity}")
+    print(f"仓位数:     {len(pool.positions)}")
+    print(f"已初始化 Tick: {sum(1 for info in pool.ticks.values() if info.initialized)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,753 @@
+#!/usr/bin/env python3
+"""
+Python 数学内核与 Solidity 数学库的差分模糊测试
+
+v3math.py 是 Math.sol / SwapMath.sol 的整数移植，unimath.py 的流动性公式用的是
+浮点除法；两者都可能在某些输入上与合约悄悄地不一致。本工具随机生成大量
+(√P, L, amount) 用例，把 Python 内核的结果与参考实现逐个比较:
+
+    - SolidityMath: 按 Solidity 0.8 语义逐行移植 src/lib/Math.sol 与
+      SwapMath.sol 的精确整数参考实现——checked 运算溢出即回滚，unchecked 的
+      mulDiv 与左移按 2^256 回绕，uint160(...) 截断高位
+    - 有理数参考: unimath 的浮点公式与 Fraction 精确值比较（相对误差）
+
+每个不一致按原因归类。已知并记录在案的差异（例如 v3math 的输出金额向下取整，
+合约的 calcAmount*Delta 总是向上取整）只计数；其余类别视为发现问题，
+命令行以非零状态码退出。每个类别保留一个反例，并逐个字段贪心缩小
+（清零、右移、清除低位、减一）到仍然复现同一类别的最简输入。
+
+用例按目标和分片划分，每个分片使用由 (seed, 目标, 分片号) 确定的独立随机数，
+可以分给多个进程执行，结果与进程数无关。
+
+安装了 Hypothesis 时，hypothesis_search 用同一套生成器和比较函数做基于属性的
+搜索，由 Hypothesis 负责缩小反例。
+
+也可以比较 forge 在本地导出的固定用例（JSON Lines，每行一个调用）:
+    {"function": "computeSwapStep", "args": [sqrtP, target, L, amount, true], "result": [next, in, out]}
+    {"function": "calcAmount0Delta", "args": [sqrtA, sqrtB, L], "revert": true}
+固定用例先用来校验 SolidityMath 本身（不一致归为 reference_mismatch），
+再按同样的规则比较 Python 内核。
+
+使用方法:
+    from fuzz_math import fuzz, format_report
+
+    results = fuzz(cases=100000, workers=8)
+    print(format_report(results))
+
+    python scripts/fuzz_math.py --cases 1000000 --workers 8
+    python scripts/fuzz_math.py --target swap_step --cases 100000 --seed 7 --json
+    python scripts/fuzz_math.py --fixtures swap_math_fixtures.jsonl
+
+参考文档: docs/2SecondSwap/11-输出金额计算与 Solidity 数学实现.md
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from fractions import Fraction
+
+import unimath
+import v3math
+from tickmath import MAX_SQRT_RATIO, MIN_SQRT_RATIO
+from v3math import MAX_UINT160, MAX_UINT256, Q96, RESOLUTION
+
+
+# ============================================================
+# 常量与结果类型
+# ============================================================
+
+REL_TOL = 1e-12  # 浮点公式允许的相对误差
+
+KNOWN = {
+    "output_rounding": "v3math 的输出金额向下取整，合约的 calcAmount*Delta 总是向上取整",
+    "muldiv_wrap": "合约的 Math.mulDiv 是 unchecked 的，a × b ≥ 2^256 时回绕；v3math 做全精度乘除",
+    "uint_truncation": "合约的 unchecked 左移或 uint160(...) 截断了高位；Python 整数没有位宽",
+    "revert_overflow": "合约的 checked 运算溢出回滚（例如 amountIn × √P），v3math 改走替代公式或不检查位宽",
+    "revert_division_by_zero": "合约除零回滚（例如 amountIn = 0 时的 product / amountIn），v3math 直接返回",
+    "revert": "固定用例在合约中回滚，v3math 返回了结果",
+}
+
+Target = namedtuple("Target", ["name", "generate", "compare", "minimum"])
+Target.__doc__ = """
+模糊测试目标
+
+generate(rng): 用 random.Random 生成一组参数（元组）
+compare(args): 比较 Python 内核与参考实现，一致时返回 None，否则返回差异类别
+minimum: 各参数的下界（√P 为 MIN_SQRT_RATIO），反例只在下界之上缩小
+"""
+
+Divergence = namedtuple("Divergence", ["kind", "known", "count", "example"])
+Divergence.__doc__ = """
+一类差异
+
+kind: 类别名称（已知类别见 KNOWN）
+known: 是否为已记录的已知差异
+count: 出现次数
+example: 反例参数（minimize=True 时为缩小后的反例）
+"""
+
+FuzzResult = namedtuple("FuzzResult", ["target", "cases", "divergences"])
+FuzzResult.__doc__ = """
+一个目标的模糊测试结果
+
+target: 目标名称
+cases: 用例数
+divergences: Divergence 列表，未知类别在前，同类按次数降序
+"""
+
+
+# ============================================================
+# Solidity 语义参考实现
+# ============================================================
+
+class Revert(Exception):
+    """合约调用回滚；kind 为 overflow / division_by_zero（Panic）或自定义错误名"""
+
+    def __init__(self, kind):
+        super().__init__(kind)
+        self.kind = kind
+
+
+def _checked(value, max_value=MAX_UINT256):
+    """Solidity 0.8 的 checked 运算：超出类型范围时回滚（Panic 0x11）"""
+    if value < 0 or value > max_value:
+        raise Revert("overflow")
+    return value
+
+
+def _div(a, b):
+    """Solidity 的整数除法：除数为零时回滚（Panic 0x12）"""
+    if b == 0:
+        raise Revert("division_by_zero")
+    return a // b
+
+
+class SolidityMath:
+    """
+    Math.sol 与 SwapMath.sol 的逐行移植
+
+    与 v3math 不同，这里刻意保留合约的全部位宽语义。notes 记录本次调用中
+    发生过的回绕或截断，用于给差异归类。
+    """
+
+    def __init__(self):
+        self.notes = set()
+
+    def _wrap(self, value, max_value, note):
+        """unchecked 运算或显式类型转换：保留低位"""
+        if value > max_value:
+            self.notes.add(note)
+        return value & max_value
+
+    # ---------- 辅助数学函数 ----------
+
+    def mul_div(self, a, b, denominator):
+        """Math.mulDiv: unchecked { (a * b) / denominator }"""
+        return _div(self._wrap(a * b, MAX_UINT256, "muldiv_wrap"), denominator)
+
+    def mul_div_rounding_up(self, a, b, denominator):
+        """Math.mulDivRoundingUp（mulmod 是全精度的）"""
+        result = self.mul_div(a, b, denominator)
+        if a * b % denominator > 0:
+            if result == MAX_UINT256:
+                raise Revert("Overflow")
+            result += 1
+        return result
+
+    def div_rounding_up(self, a, b):
+        """Math.divRoundingUp"""
+        result = _div(a, b)
+        if a % b > 0:
+            if result == MAX_UINT256:
+                raise Revert("Overflow")
+            result += 1
+        return result
+
+    # ---------- 代币数量计算 ----------
+
+    def calc_amount0_delta(self, sqrt_price_a_x96, sqrt_price_b_x96, liquidity):
+        """Math.calcAmount0Delta（向上取整）"""
+        if sqrt_price_a_x96 > sqrt_price_b_x96:
+            sqrt_price_a_x96, sqrt_price_b_x96 = sqrt_price_b_x96, sqrt_price_a_x96
+        if sqrt_price_a_x96 == 0:
+            raise Revert("DivisionByZero")
+        return self.div_rounding_up(
+            self.mul_div_rounding_up(
+                liquidity << RESOLUTION, sqrt_price_b_x96 - sqrt_price_a_x96, sqrt_price_b_x96
+            ),
+            sqrt_price_a_x96
+        )
+
+    def calc_amount1_delta(self, sqrt_price_a_x96, sqrt_price_b_x96, liquidity):
+        """Math.calcAmount1Delta（向上取整）"""
+        if sqrt_price_a_x96 > sqrt_price_b_x96:
+            sqrt_price_a_x96, sqrt_price_b_x96 = sqrt_price_b_x96, sqrt_price_a_x96
+        return self.mul_div_rounding_up(liquidity, sqrt_price_b_x96 - sqrt_price_a_x96, Q96)
+
+    # ---------- 价格计算 ----------
+
+    def get_next_sqrt_price_from_input(self, sqrt_price_x96, liquidity, amount_in, zero_for_one):
+        """Math.getNextSqrtPriceFromInput"""
+        if zero_for_one:
+            return self._next_from_amount0(sqrt_price_x96, liquidity, amount_in)
+        return self._next_from_amount1(sqrt_price_x96, liquidity, amount_in)
+
+    def _next_from_amount0(self, sqrt_price_x96, liquidity, amount_in):
+        """Math.getNextSqrtPriceFromAmount0RoundingUp"""
+        numerator = liquidity << RESOLUTION
+        # 0.8 的乘法是 checked 的：溢出时直接回滚，溢出检查和替代公式都执行不到
+        product = _checked(amount_in * sqrt_price_x96)
+        if _div(product, amount_in) == sqrt_price_x96:
+            denominator = _checked(numerator + product)
+            if denominator >= numerator:
+                return self._wrap(
+                    self.mul_div_rounding_up(numerator, sqrt_price_x96, denominator),
+                    MAX_UINT160, "uint_truncation"
+                )
+        return self._wrap(
+            self.div_rounding_up(numerator, _div(numerator, sqrt_price_x96) + amount_in),
+            MAX_UINT160, "uint_truncation"
+        )
+
+    def _next_from_amount1(self, sqrt_price_x96, liquidity, amount_in):
+        """Math.getNextSqrtPriceFromAmount1RoundingDown"""
+        shifted = self._wrap(amount_in << RESOLUTION, MAX_UINT256, "uint_truncation")
+        delta = self._wrap(_div(shifted, liquidity), MAX_UINT160, "uint_truncation")
+        return _checked(sqrt_price_x96 + delta, MAX_UINT160)
+
+    # ---------- 交换计算 ----------
+
+    def compute_swap_step(self, sqrt_price_current_x96, sqrt_price_target_x96, liquidity,
+                          amount_remaining, zero_for_one):
+        """SwapMath.computeSwapStep（输入、输出金额都向上取整）"""
+        if zero_for_one:
+            amount_in_max = self.calc_amount0_delta(sqrt_price_current_x96, sqrt_price_target_x96, liquidity)
+        else:
+            amount_in_max = self.calc_amount1_delta(sqrt_price_current_x96, sqrt_price_target_x96, liquidity)
+
+        if amount_remaining >= amount_in_max:
+            sqrt_price_next_x96 = sqrt_price_target_x96
+        else:
+            sqrt_price_next_x96 = self.get_next_sqrt_price_from_input(
+                sqrt_price_current_x96, liquidity, amount_remaining, zero_for_one
+            )
+
+        if zero_for_one:
+            amount_in = self.calc_amount0_delta(sqrt_price_current_x96, sqrt_price_next_x96, liquidity)
+            amount_out = self.calc_amount1_delta(sqrt_price_current_x96, sqrt_price_next_x96, liquidity)
+        else:
+            amount_in = self.calc_amount1_delta(sqrt_price_current_x96, sqrt_price_next_x96, liquidity)
+            amount_out = self.calc_amount0_delta(sqrt_price_current_x96, sqrt_price_next_x96, liquidity)
+        return sqrt_price_next_x96, amount_in, amount_out
+
+
+# ============================================================
+# 比较
+# ============================================================
+
+def _call(fn, args):
+    """调用 fn(*args)，回滚或算术错误作为返回值"""
+    try:
+        return fn(*args)
+    except (Revert, ArithmeticError) as exc:
+        return exc
+
+
+def _output_rounding(actual, expected):
+    """computeSwapStep 只有输出金额差 1（合约向上取整）时归为 output_rounding"""
+    if actual[:2] == expected[:2] and expected[2] - actual[2] == 1:
+        return "output_rounding"
+    return None
+
+
+def _check_contract(method, args, classify=None):
+    """
+    比较 v3math 与 SolidityMath 的同名函数
+
+    返回:
+        一致时为 None，否则为差异类别
+    """
+    solidity = SolidityMath()
+    expected = _call(getattr(solidity, method), args)
+    actual = _call(getattr(v3math, method), args)
+
+    if isinstance(expected, Exception):
+        if isinstance(actual, Exception):
+            return None
+        return f"revert_{expected.kind}"
+    if isinstance(actual, Exception):
+        return "python_error"
+    if actual == expected:
+        return None
+    for note in ("muldiv_wrap", "uint_truncation"):
+        if note in solidity.notes:
+            return note
+    return (classify and classify(actual, expected)) or "mismatch"
+
+
+def _check_float(python_fn, reference_fn, args, slack=0):
+    """
+    比较浮点公式与有理数精确值
+
+    参数:
+        slack: 额外允许的绝对误差（结果被 int() 截断时为 1）
+    """
+    expected = _call(reference_fn, args)
+    actual = _call(python_fn, args)
+
+    if isinstance(expected, Exception):
+        return None if isinstance(actual, Exception) else "python_value"
+    if isinstance(actual, Exception):
+        return "python_error"
+    if abs(actual - expected) <= expected * Fraction(REL_TOL) + slack:
+        return None
+    return "float_precision"
+
+
+# ============================================================
+# 精确参考值（unimath 的浮点公式）
+# ============================================================
+
+def _sorted(pa, pb):
+    return (pb, pa) if pa > pb else (pa, pb)
+
+
+def exact_liquidity_from_x(amount, pa, pb):
+    """L = Δx × √P_a × √P_b / (√P_b - √P_a)，有理数"""
+    pa, pb = _sorted(pa, pb)
+    return Fraction(amount * pa * pb, Q96 * (pb - pa))
+
+
+def exact_liquidity_from_y(amount, pa, pb):
+    """L = Δy / (√P_b - √P_a)，有理数"""
+    pa, pb = _sorted(pa, pb)
+    return Fraction(amount * Q96, pb - pa)
+
+
+def exact_amount_x(liquidity, pa, pb):
+    """Δx = L × (√P_b - √P_a) / (√P_a × √P_b)，向下取整"""
+    pa, pb = _sorted(pa, pb)
+    return liquidity * Q96 * (pb - pa) // (pa * pb)
+
+
+def exact_amount_y(liquidity, pa, pb):
+    """Δy = L × (√P_b - √P_a)，向下取整"""
+    pa, pb = _sorted(pa, pb)
+    return liquidity * (pb - pa) // Q96
+
+
+# ============================================================
+# 用例生成
+# ============================================================
+
+_SQRT_EDGES = (MIN_SQRT_RATIO, MIN_SQRT_RATIO + 1, Q96 - 1, Q96, Q96 + 1, MAX_SQRT_RATIO - 1, MAX_SQRT_RATIO)
+
+
+def _uint(rng, bits):
+    """uintN：10% 取边界值，其余的位数均匀分布（小数值和大数值同样常见）"""
+    if rng.random() < 0.1:
+        return rng.choice((0, 1, 2, 1 << (bits - 1), (1 << bits) - 2, (1 << bits) - 1))
+    return rng.getrandbits(rng.randint(1, bits))
+
+
+def _sqrt_price(rng):
+    """[MIN_SQRT_RATIO, MAX_SQRT_RATIO] 内的 √P：偏向端点和价格 1 附近"""
+    r = rng.random()
+    if r < 0.1:
+        return rng.choice(_SQRT_EDGES)
+    if r < 0.2:
+        return Q96 + rng.randint(-(1 << 64), 1 << 64)
+    bits = rng.randint(MIN_SQRT_RATIO.bit_length(), MAX_SQRT_RATIO.bit_length())
+    value = rng.getrandbits(bits) | (1 << (bits - 1))
+    return min(max(value, MIN_SQRT_RATIO), MAX_SQRT_RATIO)
+
+
+def _gen_range(rng):
+    return _sqrt_price(rng), _sqrt_price(rng), _uint(rng, 128)
+
+
+def _gen_next_price(rng):
+    return _sqrt_price(rng), _uint(rng, 128), _uint(rng, 256), rng.random() < 0.5
+
+
+def _gen_swap_step(rng):
+    a, b = _sqrt_price(rng), _sqrt_price(rng)
+    zero_for_one = rng.random() < 0.5
+    # 目标价格位于交换方向上：token0 换 token1 时价格下降
+    current, target = (max(a, b), min(a, b)) if zero_for_one else (min(a, b), max(a, b))
+    return current, target, _uint(rng, 128), _uint(rng, 256), zero_for_one
+
+
+def _gen_float(rng):
+    return _uint(rng, 128), _sqrt_price(rng), _sqrt_price(rng)
+
+
+def _check_swap_step(args):
+    """computeSwapStep 的目标价格必须位于交换方向上，否则不在比较范围内"""
+    current, target, _, _, zero_for_one = args
+    if (target > current) if zero_for_one else (target < current):
+        return None
+    return _check_contract("compute_swap_step", args, _output_rounding)
+
+
+_RANGE_MIN = (MIN_SQRT_RATIO, MIN_SQRT_RATIO, 0)
+_FLOAT_MIN = (0, MIN_SQRT_RATIO, MIN_SQRT_RATIO)
+
+
+TARGETS = {target.name: target for target in (
+    Target("amount0_delta", _gen_range,
+           lambda args: _check_contract("calc_amount0_delta", args), _RANGE_MIN),
+    Target("amount1_delta", _gen_range,
+           lambda args: _check_contract("calc_amount1_delta", args), _RANGE_MIN),
+    Target("next_sqrt_price", _gen_next_price,
+           lambda args: _check_contract("get_next_sqrt_price_from_input", args), (MIN_SQRT_RATIO, 0, 0, False)),
+    Target("swap_step", _gen_swap_step, _check_swap_step, (MIN_SQRT_RATIO, MIN_SQRT_RATIO, 0, 0, False)),
+    Target("liquidity_from_x", _gen_float,
+           lambda args: _check_float(unimath.liquidity_from_x, exact_liquidity_from_x, args), _FLOAT_MIN),
+    Target("liquidity_from_y", _gen_float,
+           lambda args: _check_float(unimath.liquidity_from_y, exact_liquidity_from_y, args), _FLOAT_MIN),
+    Target("calc_amount_x", _gen_float,
+           lambda args: _check_float(unimath.calc_amount_x, exact_amount_x, args, slack=1), _FLOAT_MIN),
+    Target("calc_amount_y", _gen_float,
+           lambda args: _check_float(unimath.calc_amount_y, exact_amount_y, args, slack=1), _FLOAT_MIN),
+)}
+
+
+# ============================================================
+# 反例缩小
+# ============================================================
+
+def _smaller(value):
+    """按从简单到接近原值的顺序给出比 value 小的候选值"""
+    if value <= 0:
+        return
+    yield 0
+    bits = value.bit_length()
+    for shift in range(bits - 1, 0, -1):
+        yield value >> shift
+    for shift in range(bits - 1, 0, -1):
+        rounded = value >> shift << shift
+        if rounded != value:
+            yield rounded
+    yield value - 1
+
+
+def shrink(target, args, kind, max_calls=5000):
+    """
+    逐个字段贪心缩小反例（不低于 target.minimum），直到任何字段都无法再缩小
+    而不改变差异类别
+
+    参数:
+        target: Target
+        args: 反例参数
+        kind: 要保持的差异类别
+        max_calls: 最多调用 compare 的次数
+
+    返回:
+        缩小后的参数
+    """
+    args = list(args)
+    calls = 0
+    improved = True
+    while improved and calls < max_calls:
+        improved = False
+        for i, value in enumerate(args):
+            if isinstance(value, bool):
+                continue
+            low = target.minimum[i]
+            for candidate in _smaller(value - low):
+                trial = args[:i] + [low + candidate] + args[i + 1:]
+                calls += 1
+                if target.compare(tuple(trial)) == kind:
+                    args = trial
+                    improved = True
+                    break
+                if calls >= max_calls:
+                    break
+    return tuple(args)
+
+
+# ============================================================
+# 分片执行
+# ============================================================
+
+def _run_shard(task):
+    """
+    执行一个分片
+
+    参数:
+        task: (目标名称, seed, 分片号, 用例数)
+
+    返回:
+        (目标名称, 用例数, {类别: 次数}, {类别: 首个反例})
+    """
+    name, seed, index, count = task
+    target = TARGETS[name]
+    rng = random.Random(f"{seed}/{name}/{index}")
+    counts, examples = Counter(), {}
+    for _ in range(count):
+        args = target.generate(rng)
+        kind = target.compare(args)
+        if kind is not None:
+            counts[kind] += 1
+            examples.setdefault(kind, args)
+    return name, count, counts, examples
+
+
+def _run(tasks, workers):
+    """在当前进程或进程池中执行各分片，按任务顺序返回"""
+    workers = min(workers, len(tasks))
+    if workers <= 1:
+        return [_run_shard(task) for task in tasks]
+    with ProcessPoolExecutor(workers) as executor:
+        return list(executor.map(_run_shard, tasks))
+
+
+def _collect(name, cases, counts, examples, minimize):
+    """把合并后的计数与反例整理为 FuzzResult"""
+    target = TARGETS.get(name)
+    divergences = []
+    for kind, count in counts.items():
+        example = examples[kind]
+        if minimize and target is not None:
+            example = shrink(target, example, kind)
+        divergences.append(Divergence(kind, kind in KNOWN, count, example))
+    divergences.sort(key=lambda d: (d.known, -d.count, d.kind))
+    return FuzzResult(name, cases, divergences)
+
+
+def fuzz(targets=None, cases=100000, shards=None, workers=1, seed=0, minimize=True):
+    """
+    对各目标执行差分模糊测试
+
+    参数:
+        targets: 目标名称列表（None 表示 TARGETS 中的全部）
+        cases: 每个目标的用例数
+        shards: 每个目标的分片数，默认等于进程数
+        workers: 进程数；None 表示 os.cpu_count()，1 表示在当前进程中执行
+        seed: 随机种子；相同的 (seed, cases, shards) 得到相同的结果
+        minimize: 是否缩小反例
+
+    返回:
+        FuzzResult 列表，与 targets 顺序一致
+    """
+    names = list(TARGETS) if targets is None else list(targets)
+    unknown = [name for name in names if name not in TARGETS]
+    if unknown:
+        raise ValueError(f"unknown fuzz targets: {', '.join(unknown)}")
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if shards is None:
+        shards = max(workers, 1)
+    if shards <= 0 or cases < 0:
+        raise ValueError("shards must be positive and cases non-negative")
+
+    tasks = []
+    for name in names:
+        for index in range(shards):
+            count = cases // shards + (index < cases % shards)
+            if count:
+                tasks.append((name, seed, index, count))
+
+    merged = {name: [0, Counter(), {}] for name in names}
+    for name, count, counts, examples in _run(tasks, workers):
+        entry = merged[name]
+        entry[0] += count
+        entry[1].update(counts)
+        for kind, args in examples.items():
+            entry[2].setdefault(kind, args)
+
+    return [_collect(name, *merged[name], minimize) for name in names]
+
+
+# ============================================================
+# Hypothesis
+# ============================================================
+
+def _import_hypothesis():
+    """按需导入 Hypothesis（仅 hypothesis_search 需要）"""
+    try:
+        import hypothesis
+        from hypothesis import strategies
+    except ImportError:
+        raise ImportError("基于属性的搜索需要 hypothesis: pip install hypothesis") from None
+    return hypothesis, strategies
+
+
+def hypothesis_search(name, max_examples=10000):
+    """
+    用 Hypothesis 搜索目标的未知差异
+
+    生成器从 Hypothesis 控制的 Random 取数，因此 Hypothesis 可以直接缩小反例。
+
+    参数:
+        name: 目标名称
+        max_examples: 最多尝试的用例数
+
+    返回:
+        缩小后的反例参数，没有找到时返回 None
+    """
+    hypothesis, st = _import_hypothesis()
+    target = TARGETS[name]
+
+    def unexpected(args):
+        kind = target.compare(args)
+        return kind is not None and kind not in KNOWN
+
+    try:
+        return hypothesis.find(
+            st.builds(target.generate, st.randoms(use_true_random=False)),
+            unexpected,
+            settings=hypothesis.settings(max_examples=max_examples, database=None),
+        )
+    except hypothesis.errors.NoSuchExample:
+        return None
+
+
+# ============================================================
+# forge 固定用例
+# ============================================================
+
+FIXTURE_FUNCTIONS = {
+    "calcAmount0Delta": "calc_amount0_delta",
+    "calcAmount1Delta": "calc_amount1_delta",
+    "getNextSqrtPriceFromInput": "get_next_sqrt_price_from_input",
+    "computeSwapStep": "compute_swap_step",
+}
+
+
+def _fixture_value(value):
+    """JSON 中的数值可以是整数或十进制字符串（uint256 超出 JavaScript 的安全整数）"""
+    if isinstance(value, list):
+        return tuple(_fixture_value(v) for v in value)
+    if isinstance(value, str):
+        return int(value, 0)
+    return value
+
+
+def check_fixtures(path):
+    """
+    比较 forge 导出的固定用例
+
+    每个用例先与 SolidityMath 比较（校验参考实现本身），
+    一致时再按 fuzz 的规则比较 v3math。
+
+    参数:
+        path: JSON Lines 文件
+
+    返回:
+        FuzzResult（反例不做缩小）
+    """
+    counts, examples, cases = Counter(), {}, 0
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            method = FIXTURE_FUNCTIONS[record["function"]]
+            args = _fixture_value(record["args"])
+            reference = _call(getattr(SolidityMath(), method), args)
+            if record.get("revert"):
+                agrees = isinstance(reference, Exception)
+            else:
+                agrees = reference == _fixture_value(record["result"])
+
+            if not agrees:
+                kind = "reference_mismatch"
+            else:
+                classify = _output_rounding if method == "compute_swap_step" else None
+                kind = _check_contract(method, args, classify)
+                if kind is not None and kind.startswith("revert_") and record.get("revert"):
+                    kind = "revert"
+
+            cases += 1
+            if kind is not None:
+                counts[kind] += 1
+                examples.setdefault(kind, (record["function"],) + args)
+    return _collect(f"fixtures:{os.path.basename(path)}", cases, counts, examples, minimize=False)
+
+
+# ============================================================
+# 报告
+# ============================================================
+
+def has_unexpected(results):
+    """结果中是否存在未知类别的差异"""
+    return any(not d.known for result in results for d in result.divergences)
+
+
+def format_report(results):
+    """把结果格式化为文本报告"""
+    lines = []
+    for result in results:
+        lines.append(f"{result.target}: {result.cases} 个用例")
+        if not result.divergences:
+            lines.append("  ✅ 与参考实现一致")
+        for d in result.divergences:
+            mark = "ℹ️ 已知" if d.known else "❌ 未知"
+            lines.append(f"  {mark} {d.kind}: {d.count} 次（{d.count / max(result.cases, 1):.2%}）")
+            if d.known:
+                lines.append(f"      {KNOWN[d.kind]}")
+            lines.append(f"      反例: {d.example}")
+    return "\n".join(lines)
+
+
+def to_json(results):
+    """把结果转换为可 JSON 序列化的列表（整数保持精确）"""
+    return [
+        {
+            "target": result.target,
+            "cases": result.cases,
+            "divergences": [d._asdict() for d in result.divergences],
+        }
+        for result in results
+    ]
+
+
+# ============================================================
+# 主程序
+# ============================================================
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="Python 数学内核与 Solidity 数学库的差分模糊测试")
+    parser.add_argument("--target", action="append", choices=sorted(TARGETS),
+                        help="只测试指定目标（可重复，默认全部）")
+    parser.add_argument("--cases", type=int, default=100000, help="每个目标的用例数")
+    parser.add_argument("--shards", type=int, default=None, help="每个目标的分片数（默认等于进程数）")
+    parser.add_argument("--workers", type=int, default=None, help="进程数（默认 CPU 核数）")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--no-minimize", action="store_true", help="不缩小反例")
+    parser.add_argument("--fixtures", metavar="PATH", action="append", default=[],
+                        help="同时比较 forge 导出的固定用例（JSON Lines，可重复）")
+    parser.add_argument("--hypothesis", action="store_true", help="改用 Hypothesis 搜索（需要 hypothesis）")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出结果")
+    args = parser.parse_args()
+
+    if args.hypothesis:
+        failed = False
+        for name in args.target or TARGETS:
+            example = hypothesis_search(name, max_examples=args.cases)
+            failed = failed or example is not None
+            print(f"{name}: {'❌ 反例 ' + str(example) if example is not None else '✅ 未发现未知差异'}")
+        sys.exit(1 if failed else 0)
+
+    results = []
+    if args.cases > 0:
+        results = fuzz(args.target, cases=args.cases, shards=args.shards, workers=args.workers,
+                       seed=args.seed, minimize=not args.no_minimize)
+    results += [check_fixtures(path) for path in args.fixtures]
+
+    if args.json:
+        print(json.dumps(to_json(results), indent=2))
+    else:
+        print(format_report(results))
+    sys.exit(1 if has_unexpected(results) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+价格冲击曲面：交易规模 → 交换后价格与输出金额，支持 Mint / Swap 增量更新
+
+ImpactSurface 保存池子 Tick 映射的一份分段表示：相邻两个已初始化 Tick 之间的
+区间（段）的流动性，以及完整穿过每一段时两个方向的输入 / 输出金额
+（取整方式与 computeSwapStep 相同，输入金额包含池子的手续费）。
+各段金额的前缀和使任意交易规模的报价只需两次二分查找加上最后一段内的单区间交换，复杂度为 O(log 段数)。
+
+增量更新:
+    - Mint(lower, upper, L)：必要时在 lower / upper 处拆分段，只重新计算
+      [lower, upper) 内各段的金额，前缀和从第一个受影响的段开始惰性重建
+    - Swap：完整段的金额与当前价格无关，只更新 slot0（价格、Tick、流动性），
+      当前价格所在段的部分金额在查询时计算
+
+池子设置 skip_empty_words=True 时，报价与 Pool.simulate_swap 逐位一致。
+默认的按字查找会在空字边界多停一步，每多一步输入金额可能多出 1 wei 的取整差异。
+与交换内核一样，遇到零流动性的段时交换停止（exhausted）。
+
+使用方法:
+    from impact_surface import ImpactSurface
+
+    surface = ImpactSurface(pool)
+    amount_in, amount_out, sqrt_price_after, exhausted = surface.quote(True, 10 * 10**18)
+    points = surface.surface(True, sizes)
+
+    # 回放事件时同步更新
+    surface.apply(mint_event)
+    surface.apply(swap_event)
+
+参考文档: docs/3MultiPoolSwap/18-跨Tick交换.md
+"""
+
+import bisect
+from collections import namedtuple
+from itertools import accumulate, islice
+
+from swap_solver import Solution, swap_in_range
+from tickmath import get_sqrt_ratio_at_tick
+from v3math import amount_with_fee, calc_amount0_delta, calc_amount1_delta
+
+
+# ============================================================
+# 结果类型
+# ============================================================
+
+# 各段金额在元组中的位置
+_IN0, _OUT1, _IN1, _OUT0 = range(4)
+
+SurfaceCurve = namedtuple("SurfaceCurve", ["amount_in", "amount_out", "sqrt_price_x96"])
+SurfaceCurve.__doc__ = """
+曲面在各个已初始化 Tick 处的断点（沿交换方向，从当前价格开始）
+
+amount_in / amount_out: 把价格推到该 Tick 所需的累计输入与得到的累计输出
+sqrt_price_x96: 断点价格
+"""
+
+
+# ============================================================
+# 价格冲击曲面
+# ============================================================
+
+class ImpactSurface:
+    """
+    可增量更新的价格冲击曲面
+
+    属性:
+        sqrt_price_x96 / tick / liquidity: 当前 slot0 与活跃流动性
+        fee: 池子的手续费率（百万分之一）
+        segments_computed: 累计计算过的段数（用于观察增量更新的开销）
+    """
+
+    def __init__(self, pool):
+        """
+        参数:
+            pool: pool_sim.Pool（只在构造时读取一次）
+        """
+        self.sqrt_price_x96 = pool.sqrt_price_x96
+        self.tick = pool.tick
+        self.liquidity = pool.liquidity
+        self.fee = pool.fee
+        self.segments_computed = 0
+
+        self._ticks = pool.ticks.keys()
+        self._sqrt = [get_sqrt_ratio_at_tick(tick) for tick in self._ticks]
+        self._liquidity = list(accumulate(pool.ticks.liquidity_net(tick) for tick in self._ticks[:-1]))
+        self._segments = [self._segment(i) for i in range(len(self._liquidity))]
+
+        self._prefix = [[0] for _ in range(4)]
+        self._walls = []  # 零流动性段的下标
+        self._dirty = 0  # 前缀和需要从该段开始重建，None 表示无需重建
+
+    # ---------- 分段维护 ----------
+
+    def _segment(self, i):
+        """完整穿过第 i 段的 (in0, out1, in1, out0)"""
+        self.segments_computed += 1
+        liquidity = self._liquidity[i]
+        if liquidity == 0:
+            return 0, 0, 0, 0
+        a, b, fee = self._sqrt[i], self._sqrt[i + 1], self.fee
+        return (
+            amount_with_fee(calc_amount0_delta(a, b, liquidity), fee),
+            calc_amount1_delta(a, b, liquidity, False),
+            amount_with_fee(calc_amount1_delta(a, b, liquidity), fee),
+            calc_amount0_delta(a, b, liquidity, False),
+        )
+
+    def _mark_dirty(self, i):
+        self._dirty = i if self._dirty is None else min(self._dirty, i)
+
+    def _insert_tick(self, tick):
+        """插入一个边界；落在已有段内时把该段一分为二。返回边界下标"""
+        i = bisect.bisect_left(self._ticks, tick)
+        if i < len(self._ticks) and self._ticks[i] == tick:
+            return i
+
+        self._ticks.insert(i, tick)
+        self._sqrt.insert(i, get_sqrt_ratio_at_tick(tick))
+        if len(self._ticks) == 1:
+            return i
+        if i == 0 or i == len(self._ticks) - 1:
+            # 在已有范围之外新增一个零流动性段
+            segment = 0 if i == 0 else i - 1
+            self._liquidity.insert(segment, 0)
+            self._segments.insert(segment, (0, 0, 0, 0))
+            self._mark_dirty(segment)
+        else:
+            self._liquidity.insert(i, self._liquidity[i - 1])
+            self._segments[i - 1] = self._segment(i - 1)
+            self._segments.insert(i, self._segment(i))
+            self._mark_dirty(i - 1)
+        return i
+
+    def _prefixes(self):
+        """按需从第一个受影响的段开始重建前缀和与零流动性段列表"""
+        if self._dirty is not None:
+            start = self._dirty
+            for k, prefix in enumerate(self._prefix):
+                del prefix[start + 1:]
+                totals = accumulate((segment[k] for segment in self._segments[start:]), initial=prefix[start])
+                prefix.extend(islice(totals, 1, None))
+            self._walls = [i for i, liquidity in enumerate(self._liquidity) if liquidity == 0]
+            self._dirty = None
+        return self._prefix
+
+    # ---------- 增量更新 ----------
+
+    def on_mint(self, lower_tick, upper_tick, amount):
+        """
+        应用一次 Mint（amount 为负时表示移除流动性）
+
+        参数:
+            lower_tick / upper_tick: 价格区间
+            amount: 流动性变化量
+        """
+        if lower_tick >= upper_tick:
+            raise ValueError("lower_tick must be below upper_tick")
+        lower = self._insert_tick(lower_tick)
+        upper = self._insert_tick(upper_tick)
+        for i in range(lower, upper):
+            self._liquidity[i] += amount
+            self._segments[i] = self._segment(i)
+        self._mark_dirty(lower)
+        if lower_tick <= self.tick < upper_tick:
+            self.liquidity += amount
+
+    def on_swap(self, sqrt_price_x96, tick, liquidity):
+        """
+        应用一次 Swap（只更新 slot0 与活跃流动性）
+
+        参数:
+            sqrt_price_x96 / tick / liquidity: 交换后的池子状态（Swap 事件字段）
+        """
+        self.sqrt_price_x96 = sqrt_price_x96
+        self.tick = tick
+        self.liquidity = liquidity
+
+    def apply(self, event):
+        """
+        应用 event_replay 的 MintEvent / SwapEvent
+
+        参数:
+            event: MintEvent 或 SwapEvent
+        """
+        from event_replay import MintEvent, SwapEvent
+
+        if isinstance(event, MintEvent):
+            self.on_mint(event.lower_tick, event.upper_tick, event.amount)
+        elif isinstance(event, SwapEvent):
+            self.on_swap(event.sqrt_price_x96, event.tick, event.liquidity)
+        else:
+            raise TypeError(f"unsupported event {type(event).__name__}")
+
+    # ---------- 查询 ----------
+
+    def _current(self):
+        """当前价格所在段的下标；不在任何段内时返回 None"""
+        c = bisect.bisect_right(self._ticks, self.tick) - 1
+        if self.liquidity == 0 or not 0 <= c < len(self._liquidity):
+            return None
+        return c
+
+    def _partial(self, c, zero_for_one):
+        """从当前价格到当前段边界的 (输入, 输出)"""
+        s, liquidity, fee = self.sqrt_price_x96, self.liquidity, self.fee
+        if zero_for_one:
+            a = self._sqrt[c]
+            return (amount_with_fee(calc_amount0_delta(a, s, liquidity), fee),
+                    calc_amount1_delta(a, s, liquidity, False))
+        b = self._sqrt[c + 1]
+        return (amount_with_fee(calc_amount1_delta(s, b, liquidity), fee),
+                calc_amount0_delta(s, b, liquidity, False))
+
+    def quote(self, zero_for_one, amount_in):
+        """
+        计算交易规模 amount_in 的交换结果
+
+        参数:
+            zero_for_one: 交换方向
+            amount_in: 输入金额
+
+        返回:
+            swap_solver.Solution(amount_in, amount_out, sqrt_price_x96, exhausted)；
+            exhausted 为 True 时流动性不足，amount_in 为实际可消耗的输入
+        """
+        if amount_in <= 0:
+            raise ValueError("amount_in must be positive")
+        prefix = self._prefixes()
+        c = self._current()
+        if c is None:
+            return Solution(0, 0, self.sqrt_price_x96, True)
+
+        partial_in, partial_out = self._partial(c, zero_for_one)
+        boundary = self._sqrt[c] if zero_for_one else self._sqrt[c + 1]
+        if amount_in < partial_in:
+            price, used, out = swap_in_range(
+                self.sqrt_price_x96, boundary, self.liquidity, amount_in, zero_for_one, self.fee
+            )
+            return Solution(used, out, price, False)
+
+        if zero_for_one:
+            ins, outs = prefix[_IN0], prefix[_OUT1]
+            # 到达第 j 段下边界所需的输入 = base_in - ins[j]
+            base_in, base_out = partial_in + ins[c], partial_out + outs[c]
+            wall = self._walls[bisect.bisect_left(self._walls, c) - 1] if self._walls and self._walls[0] < c else -1
+            j = bisect.bisect_left(ins, base_in - amount_in, wall + 1, c + 1) - 1
+            if j <= wall:
+                return Solution(base_in - ins[wall + 1], base_out - outs[wall + 1], self._sqrt[wall + 1], True)
+            spent, received = base_in - ins[j + 1], base_out - outs[j + 1]
+            price, used, out = swap_in_range(self._sqrt[j + 1], self._sqrt[j], self._liquidity[j],
+                                             amount_in - spent, True, self.fee)
+        else:
+            ins, outs = prefix[_IN1], prefix[_OUT0]
+            # 到达第 j 段上边界所需的输入 = base_in + ins[j + 1]
+            base_in, base_out = partial_in - ins[c + 1], partial_out - outs[c + 1]
+            k = bisect.bisect_right(self._walls, c)
+            wall = self._walls[k] if k < len(self._walls) else len(self._liquidity)
+            j = bisect.bisect_right(ins, amount_in - base_in, c + 1, wall + 1) - 1
+            if j >= wall:
+                return Solution(base_in + ins[wall], base_out + outs[wall], self._sqrt[wall], True)
+            spent, received = base_in + ins[j], base_out + outs[j]
+            price, used, out = swap_in_range(self._sqrt[j], self._sqrt[j + 1], self._liquidity[j],
+                                             amount_in - spent, False, self.fee)
+        return Solution(spent + used, received + out, price, False)
+
+    def surface(self, zero_for_one, sizes):
+        """
+        对一组交易规模求值
+
+        参数:
+            zero_for_one: 交换方向
+            sizes: 交易规模序列
+
+        返回:
+            Solution 列表
+        """
+        return [self.quote(zero_for_one, size) for size in sizes]
+
+    def curve(self, zero_for_one):
+        """
+        沿交换方向列出各个已初始化 Tick 处的断点，直到零流动性段为止
+
+        返回:
+            SurfaceCurve（三个等长列表，第一个断点为当前价格）
+        """
+        prefix = self._prefixes()
+        c = self._current()
+        if c is None:
+            return SurfaceCurve([0], [0], [self.sqrt_price_x96])
+
+        partial_in, partial_out = self._partial(c, zero_for_one)
+        amount_in, amount_out, prices = [0], [0], [self.sqrt_price_x96]
+        if zero_for_one:
+            ins, outs = prefix[_IN0], prefix[_OUT1]
+            base_in, base_out = partial_in + ins[c], partial_out + outs[c]
+            k = bisect.bisect_left(self._walls, c)
+            wall = self._walls[k - 1] if k else -1
+            boundaries = range(c, wall, -1)
+            amount_in += [base_in - ins[j] for j in boundaries]
+            amount_out += [base_out - outs[j] for j in boundaries]
+        else:
+            ins, outs = prefix[_IN1], prefix[_OUT0]
+            base_in, base_out = partial_in - ins[c + 1], partial_out - outs[c + 1]
+            k = bisect.bisect_right(self._walls, c)
+            wall = self._walls[k] if k < len(self._walls) else len(self._liquidity)
+            boundaries = range(c + 1, wall + 1)
+            amount_in += [base_in + ins[j] for j in boundaries]
+            amount_out += [base_out + outs[j] for j in boundaries]
+        prices += [self._sqrt[j] for j in boundaries]
+        return SurfaceCurve(amount_in, amount_out, prices)
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+流动性深度曲线与订单簿视图
+
+把池子的 Tick 映射（每个已初始化 Tick 的 liquidityNet，由 Tick.update 维护）
+转换为累计深度曲线。相邻两个已初始化 Tick 之间的区间内流动性恒定:
+
+    L_i = Σ_{j ≤ i} liquidityNet(t_j)        —— 一次前缀和（整数精确）
+
+区间 [√P_i, √P_{i+1}] 内的代币数量（当前价格之上只有 token0，之下只有 token1，
+当前价格所在的区间按当前价格拆分）:
+
+    token0 = L_i × (1/√P_a - 1/√P_b)
+    token1 = L_i × (√P_b - √P_a)
+
+再对当前价格两侧分别做一次前缀和，得到"从当前价格到某个价格为止可以买到的
+token0 / 卖出的 token1"，即订单簿的卖盘 / 买盘深度。全部计算都在 NumPy 数组上完成，
+Tick 列通过 np.frombuffer 直接读取 TickStore 的存储，不逐个 Tick 调用 Python 代码。
+
+结果可以直接用来画 docs/resource/usdceth_liquidity.png 那样的流动性分布图。
+
+使用方法:
+    from liquidity_depth import depth_curve, order_book
+
+    curve = depth_curve(pool)
+    plt.stairs(curve.liquidity, curve.prices)
+
+    book = order_book(pool, levels=20)
+    for price, size, depth in zip(book.ask_prices, book.ask_sizes, book.ask_depth):
+        ...
+
+    python scripts/liquidity_depth.py events.jsonl --levels 10 --plot depth.png
+
+参考文档: docs/2SecondSwap/13-广义铸币（Generalized Minting）.md
+"""
+
+import argparse
+from collections import namedtuple
+
+import numpy as np
+
+from tickmath import Q96
+
+
+# ============================================================
+# 结果类型
+# ============================================================
+
+DepthCurve = namedtuple("DepthCurve", [
+    "ticks", "prices", "liquidity", "amount0", "amount1", "depth0", "depth1", "current"
+])
+DepthCurve.__doc__ = """
+流动性深度曲线（区间 i 为 [ticks[i], ticks[i + 1])）
+
+ticks: 已初始化 Tick（int64，n 个边界）
+prices: 边界价格 1.0001^tick（token1 / token0，n 个）
+liquidity: 各区间内的流动性（n - 1 个）
+amount0 / amount1: 各区间当前持有的 token0 / token1（wei）
+depth0: 从当前价格向上到区间上边界为止的累计 token0（当前价格以下的区间为 0）
+depth1: 从当前价格向下到区间下边界为止的累计 token1（当前价格以上的区间为 0）
+current: 当前价格所在区间的下标（不在任何区间内时为 -1 或 n - 1）
+"""
+
+OrderBook = namedtuple("OrderBook", [
+    "bid_prices", "bid_sizes", "bid_depth", "ask_prices", "ask_sizes", "ask_depth"
+])
+OrderBook.__doc__ = """
+订单簿视图
+
+ask_*: 卖盘，价格从当前价格向上递增；size 为该价位区间内的 token0
+bid_*: 买盘，价格从当前价格向下递减；size 为该价位区间内的 token1
+*_depth: 累计数量
+"""
+
+
+# ============================================================
+# 深度曲线
+# ============================================================
+
+def _active_liquidity(store, exact):
+    """
+    从 TickStore 的列中读取 Tick，并对 liquidityNet 做前缀和
+
+    liquidityNet 是 int128，拆成 int64 高位和两个 32 位低位分别在 int64 中
+    做前缀和（低位的和在 2^31 个 Tick 以内不会溢出），最后再合并，
+    因此结果是精确的：流动性为零的区间得到的正好是 0。
+
+    返回:
+        (ticks, 区间流动性)，区间流动性比 ticks 少一个元素
+    """
+    ticks, net_lo, net_hi = store.liquidity_net_columns()
+    ticks = np.frombuffer(ticks, dtype=np.int32).astype(np.int64)
+    lo = np.frombuffer(net_lo, dtype=np.uint64)[:-1]
+    hi = np.cumsum(np.frombuffer(net_hi, dtype=np.int64)[:-1])
+    middle = np.cumsum((lo >> np.uint64(32)).astype(np.int64))
+    low = np.cumsum((lo & np.uint64(0xFFFFFFFF)).astype(np.int64))
+    if exact:
+        # Python int 的 object 数组，与合约逐位一致
+        liquidity = (hi.astype(object) << 64) + (middle.astype(object) << 32) + low.astype(object)
+    else:
+        liquidity = hi * 2.0**64 + middle * 2.0**32 + low
+    return ticks, liquidity
+
+
+def depth_curve(pool, exact=False):
+    """
+    计算池子的流动性深度曲线
+
+    参数:
+        pool: pool_sim.Pool
+        exact: True 时 liquidity 为 Python int 的 object 数组（精确），
+               代币数量仍为 float64
+
+    返回:
+        DepthCurve
+    """
+    ticks, liquidity = _active_liquidity(pool.ticks, exact)
+    liquidity_f = np.asarray(liquidity, dtype=np.float64)
+
+    sqrt_prices = np.power(1.0001, ticks / 2)
+    sqrt_a, sqrt_b = sqrt_prices[:-1], sqrt_prices[1:]
+    sqrt_current = pool.sqrt_price_x96 / Q96
+    current = int(np.searchsorted(ticks, pool.tick, side="right")) - 1
+
+    # 每个区间只持有当前价格一侧的代币：价格之上为 token0，之下为 token1
+    upper = np.maximum(sqrt_a, sqrt_current)
+    lower = np.minimum(sqrt_b, sqrt_current)
+    amount0 = liquidity_f * np.maximum(1 / upper - 1 / sqrt_b, 0)
+    amount1 = liquidity_f * np.maximum(lower - sqrt_a, 0)
+
+    # 以当前区间为起点分别向上、向下累加
+    start = max(current, 0)
+    depth0 = np.zeros_like(amount0)
+    depth0[start:] = np.cumsum(amount0[start:])
+    depth1 = np.zeros_like(amount1)
+    stop = min(current + 1, len(amount1))
+    depth1[:stop] = np.cumsum(amount1[:stop][::-1])[::-1]
+
+    return DepthCurve(ticks, sqrt_prices ** 2, liquidity, amount0, amount1, depth0, depth1, current)
+
+
+def order_book(pool, levels=None, curve=None):
+    """
+    生成订单簿风格的买卖盘
+
+    参数:
+        pool: pool_sim.Pool
+        levels: 每侧最多返回的价位数（None 表示全部）
+        curve: 已计算的 DepthCurve（省略时重新计算）
+
+    返回:
+        OrderBook
+    """
+    if curve is None:
+        curve = depth_curve(pool)
+
+    ask = curve.amount0 > 0
+    ask_prices = curve.prices[1:][ask]
+    ask_sizes = curve.amount0[ask]
+    ask_depth = curve.depth0[ask]
+
+    # 买盘从当前价格向下排列
+    bid = curve.amount1 > 0
+    bid_prices = curve.prices[:-1][bid][::-1]
+    bid_sizes = curve.amount1[bid][::-1]
+    bid_depth = curve.depth1[bid][::-1]
+
+    if levels is not None:
+        ask_prices, ask_sizes, ask_depth = ask_prices[:levels], ask_sizes[:levels], ask_depth[:levels]
+        bid_prices, bid_sizes, bid_depth = bid_prices[:levels], bid_sizes[:levels], bid_depth[:levels]
+    return OrderBook(bid_prices, bid_sizes, bid_depth, ask_prices, ask_sizes, ask_depth)
+
+
+# ============================================================
+# 绘图
+# ============================================================
+
+def _import_pyplot():
+    """按需导入 matplotlib（仅 --plot 需要）"""
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot
+    except ImportError:
+        raise ImportError("绘图需要 matplotlib: pip install matplotlib") from None
+    return matplotlib.pyplot
+
+
+def plot_depth(curve, path, price_scale=1.0):
+    """
+    画出流动性分布图（风格同 docs/resource/usdceth_liquidity.png）
+
+    参数:
+        curve: DepthCurve
+        path: 输出图片路径
+        price_scale: 价格乘数（例如代币精度不同时换算为显示单位）
+    """
+    plt = _import_pyplot()
+    prices = curve.prices * price_scale
+    fig, ax = plt.subplots(figsize=(10, 4))
+    ax.stairs(np.asarray(curve.liquidity, dtype=np.float64), prices, fill=True, alpha=0.6)
+    if 0 <= curve.current < len(curve.liquidity):
+        ax.axvspan(prices[curve.current], prices[curve.current + 1], color="tab:orange", alpha=0.6)
+    ax.set_xlabel("price")
+    ax.set_ylabel("liquidity")
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+
+
+# ============================================================
+# 主程序
+# ============================================================
+
+def main():
+    """主函数"""
+    from event_replay import PoolReplayer, add_pool_arguments
+
+    parser = argparse.ArgumentParser(description="流动性深度曲线与订单簿")
+    parser.add_argument("events", help="事件文件（event_replay 格式），回放到最新区块")
+    parser.add_argument("--levels", type=int, default=10, help="每侧显示的价位数")
+    parser.add_argument("--plot", metavar="PNG", help="输出流动性分布图（需要 matplotlib）")
+    add_pool_arguments(parser)
+    args = parser.parse_args()
+
+    pool = PoolReplayer(args.events, fee=args.fee, tick_spacing=args.tick_spacing).replay_to()
+    curve = depth_curve(pool)
+    book = order_book(pool, levels=args.levels, curve=curve)
+
+    print(f"{'卖盘价格':>14} {'token0':>14} {'累计 token0':>16}")
+    for price, size, depth in reversed(list(zip(book.ask_prices, book.ask_sizes, book.ask_depth))):
+        print(f"{price:>14.6g} {size / 1e18:>14.6g} {depth / 1e18:>16.6g}")
+    print(f"{'-' * 20} 当前价格 {(pool.sqrt_price_x96 / Q96) ** 2:.6g} {'-' * 20}")
+    print(f"{'买盘价格':>14} {'token1':>14} {'累计 token1':>16}")
+    for price, size, depth in zip(book.bid_prices, book.bid_sizes, book.bid_depth):
+        print(f"{price:>14.6g} {size / 1e18:>14.6g} {depth / 1e18:>16.6g}")
+
+    if args.plot:
+        plot_depth(curve, args.plot)
+        print(f"\n✅ 流动性分布图已保存: {args.plot}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,442 @@
+#!/usr/bin/env python3
+"""
+流动性仓位蒙特卡洛回测（GBM 模拟价格路径 / 回放价格路径）
+
+对成千上万条价格路径评估同一个区间策略：按初始价格用 calculate_liquidity
+的公式确定流动性 L，然后沿路径跟踪仓位价值、区间内时间占比和无常损失。
+
+价格路径以 (路径数 × 时间步) 的 NumPy 矩阵整体计算，不逐步循环:
+    √P 截断到 [√P_a, √P_b] 后，仓位持有的代币数量为
+        x = calc_amount_x(L, √P, √P_b)，y = calc_amount_y(L, √P_a, √P)
+    对整个矩阵一次求出，仓位价值 = x × P + y（以 USDC 计）。
+
+路径按块（block_size 条）计算，块可以分给多个进程；给定的价格矩阵按块随任务
+发送，每个工作进程只收到自己处理的行。GBM 路径在工作进程中按块生成，每块使用
+SeedSequence 派生的独立种子，结果与进程数无关。
+
+replay_path_on_pool 是逐步驱动 pool_sim.Pool 的 mint / swap 的参考实现，
+速度慢得多，只用于校验矩阵计算。
+
+使用方法:
+    from lp_backtest import backtest_gbm, summarize
+
+    result = backtest_gbm(5000, 4545, 5500, 1, 5000, sigma=0.8, steps=24 * 30,
+                          n_paths=10000, seed=42, workers=8)
+    print(summarize(result))
+
+    python scripts/lp_backtest.py --price 5000 --lower 4545 --upper 5500 --paths 10000 --steps 720
+    python scripts/lp_backtest.py --events events.jsonl --lower 4545 --upper 5500
+
+参考文档: docs/1FirstSwap/05-流动性计算.md
+"""
+
+import argparse
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from unimath import Q96, ETH
+from unimath_batch import calc_amount_x_batch, calc_amount_y_batch, calculate_liquidity_batch
+
+
+# ============================================================
+# 常量与结果类型
+# ============================================================
+
+HOURS_PER_YEAR = 365 * 24
+DEFAULT_BLOCK_ELEMENTS = 1 << 20  # 每块约 100 万个（路径 × 时间步）元素
+
+BacktestResult = namedtuple("BacktestResult", [
+    "final_value", "hodl_value", "impermanent_loss", "in_range", "values"
+])
+BacktestResult.__doc__ = """
+回测结果（每个字段都是按路径排列的数组）
+
+final_value: 路径终点的仓位价值（USDC）
+hodl_value: 同样的初始代币数量一直持有的终点价值（USDC）
+impermanent_loss: final_value / hodl_value - 1（不高于 0）
+in_range: 价格位于 [price_lower, price_upper] 内的时间步占比
+values: keep_values=True 时为 (路径 × 时间步) 的仓位价值矩阵，否则为 None
+
+初始价格不在区间内的路径无法按 calculate_liquidity 建仓，结果为 NaN。
+"""
+
+
+# ============================================================
+# 价格路径
+# ============================================================
+
+def gbm_paths(price0, steps, n_paths, mu=0.0, sigma=0.8, dt=1 / HOURS_PER_YEAR, seed=None):
+    """
+    生成几何布朗运动价格路径
+
+    参数:
+        price0: 初始价格
+        steps: 时间步数
+        n_paths: 路径数
+        mu: 年化漂移率
+        sigma: 年化波动率
+        dt: 每步的时间长度（年），默认 1 小时
+        seed: 随机种子（int 或 np.random.SeedSequence）
+
+    返回:
+        (n_paths, steps + 1) 的价格矩阵，第 0 列为 price0
+    """
+    rng = np.random.default_rng(seed)
+    log_returns = rng.standard_normal((n_paths, steps))
+    log_returns *= sigma * np.sqrt(dt)
+    log_returns += (mu - sigma * sigma / 2) * dt
+
+    paths = np.empty((n_paths, steps + 1))
+    paths[:, 0] = 0.0
+    np.cumsum(log_returns, axis=1, out=paths[:, 1:])
+    np.exp(paths, out=paths)
+    paths *= price0
+    return paths
+
+
+def prices_from_events(events_path):
+    """
+    从事件日志中提取回放价格路径（每个 Swap 事件后的价格）
+
+    参数:
+        events_path: event_replay 支持的事件文件（JSONL 或二进制）
+
+    返回:
+        一维价格数组（token1 / token0）
+    """
+    from event_replay import InitializeEvent, SwapEvent, read_events
+
+    prices = []
+    for event, _ in read_events(events_path):
+        if isinstance(event, (InitializeEvent, SwapEvent)):
+            prices.append((event.sqrt_price_x96 / Q96) ** 2)
+    return np.asarray(prices, dtype=np.float64)
+
+
+# ============================================================
+# 矩阵计算
+# ============================================================
+
+def evaluate_paths(paths, price_lower, price_upper, amount_eth, amount_usdc, keep_values=False):
+    """
+    对一块价格路径计算回测指标
+
+    每条路径在第 0 列的价格上按 calculate_liquidity 建仓，之后的每一步
+    都用同一个流动性 L 计算仓位的代币数量。
+
+    参数:
+        paths: (路径 × 时间步) 的价格矩阵
+        price_lower: 区间下限价格
+        price_upper: 区间上限价格
+        amount_eth: 初始 ETH 数量
+        amount_usdc: 初始 USDC 数量
+        keep_values: 是否返回完整的仓位价值矩阵
+
+    返回:
+        BacktestResult
+    """
+    paths = np.atleast_2d(np.asarray(paths, dtype=np.float64))
+    n = len(paths)
+    price0 = paths[:, 0]
+
+    position = calculate_liquidity_batch(
+        price0,
+        np.full(n, float(price_lower)),
+        np.full(n, float(price_upper)),
+        np.full(n, float(amount_eth)),
+        np.full(n, float(amount_usdc)),
+        exact=False
+    )
+    valid = (price_lower < price0) & (price0 < price_upper)
+    liquidity = np.where(valid, position['liquidity'], np.nan)[:, None]
+
+    sqrtp_lower = np.sqrt(float(price_lower)) * Q96
+    sqrtp_upper = np.sqrt(float(price_upper)) * Q96
+    sqrtp = np.sqrt(paths) * Q96
+    np.clip(sqrtp, sqrtp_lower, sqrtp_upper, out=sqrtp)
+
+    amount_x = calc_amount_x_batch(liquidity, sqrtp, sqrtp_upper)
+    amount_y = calc_amount_y_batch(liquidity, sqrtp_lower, sqrtp)
+    values = (amount_x * paths + amount_y) / ETH
+
+    # 持有策略：与仓位实际存入的代币数量相同
+    deposit_eth = np.where(valid, position['amount_eth_final'], np.nan)
+    deposit_usdc = np.where(valid, position['amount_usdc_final'], np.nan)
+    final_price = paths[:, -1]
+    hodl_value = deposit_eth * final_price + deposit_usdc
+
+    final_value = values[:, -1].copy()
+    moving = paths[:, 1:] if paths.shape[1] > 1 else paths
+    in_range = ((moving >= price_lower) & (moving <= price_upper)).mean(axis=1)
+    in_range = np.where(valid, in_range, np.nan)
+
+    return BacktestResult(
+        final_value,
+        hodl_value,
+        final_value / hodl_value - 1,
+        in_range,
+        values if keep_values else None,
+    )
+
+
+def _concat(results):
+    """合并各块的结果"""
+    keep_values = results[0].values is not None
+    return BacktestResult(
+        *(np.concatenate([getattr(r, name) for r in results]) for name in BacktestResult._fields[:-1]),
+        np.concatenate([r.values for r in results]) if keep_values else None,
+    )
+
+
+def _block_size(steps, block_size):
+    if block_size is None:
+        return max(1, DEFAULT_BLOCK_ELEMENTS // (steps + 1))
+    if block_size <= 0:
+        raise ValueError("block_size must be positive")
+    return block_size
+
+
+# ============================================================
+# 工作进程
+# ============================================================
+
+# 工作进程中的只读输入，由 _init_worker 设置
+_shared = None
+
+
+def _init_worker(shared):
+    """工作进程初始化：保存只读输入"""
+    global _shared
+    _shared = shared
+
+
+def _evaluate_block(task):
+    """
+    评估一块路径
+
+    参数:
+        task: (paths, n_paths, seed)。paths 为这一块的价格矩阵（只有这几行随任务
+              发送给工作进程）；为 None 时用 seed 生成 n_paths 条 GBM 路径
+
+    返回:
+        BacktestResult
+    """
+    paths, n_paths, seed = task
+    shared = _shared
+    if paths is None:
+        paths = gbm_paths(
+            shared['price0'], shared['steps'], n_paths,
+            mu=shared['mu'], sigma=shared['sigma'], dt=shared['dt'], seed=seed
+        )
+    return evaluate_paths(
+        paths, shared['price_lower'], shared['price_upper'],
+        shared['amount_eth'], shared['amount_usdc'], shared['keep_values']
+    )
+
+
+def _run(shared, tasks, workers):
+    """在当前进程或进程池中执行各块并按顺序合并"""
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(tasks))
+
+    if workers <= 1:
+        _init_worker(shared)
+        try:
+            results = [_evaluate_block(task) for task in tasks]
+        finally:
+            _init_worker(None)
+    else:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(shared,)) as executor:
+            results = list(executor.map(_evaluate_block, tasks))
+    return _concat(results)
+
+
+# ============================================================
+# 回测
+# ============================================================
+
+def backtest(paths, price_lower, price_upper, amount_eth, amount_usdc,
+             workers=1, block_size=None, keep_values=False):
+    """
+    在给定的价格路径矩阵上回测区间策略
+
+    参数:
+        paths: (路径 × 时间步) 的价格矩阵，一维数组视为单条路径
+        price_lower / price_upper: 区间价格
+        amount_eth / amount_usdc: 初始代币数量
+        workers: 进程数；None 表示 os.cpu_count()，1 表示在当前进程中计算
+        block_size: 每块的路径数，默认使每块约有 DEFAULT_BLOCK_ELEMENTS 个元素
+        keep_values: 是否返回完整的仓位价值矩阵
+
+    返回:
+        BacktestResult
+    """
+    paths = np.atleast_2d(np.asarray(paths, dtype=np.float64))
+    block_size = _block_size(paths.shape[1] - 1, block_size)
+    # 价格矩阵不放进 shared（那样每个工作进程都会收到整个矩阵），而是按块随任务发送
+    shared = {
+        'price_lower': float(price_lower),
+        'price_upper': float(price_upper),
+        'amount_eth': float(amount_eth),
+        'amount_usdc': float(amount_usdc),
+        'keep_values': keep_values,
+    }
+    tasks = [(paths[start:start + block_size], None, None) for start in range(0, len(paths), block_size)]
+    return _run(shared, tasks, workers)
+
+
+def backtest_gbm(price0, price_lower, price_upper, amount_eth, amount_usdc,
+                 mu=0.0, sigma=0.8, steps=24 * 30, n_paths=10000, dt=1 / HOURS_PER_YEAR,
+                 seed=None, workers=None, block_size=None, keep_values=False):
+    """
+    在 GBM 模拟路径上回测区间策略（路径在各工作进程中按块生成）
+
+    参数:
+        price0: 初始价格
+        price_lower / price_upper: 区间价格
+        amount_eth / amount_usdc: 初始代币数量
+        mu / sigma / dt: GBM 参数，见 gbm_paths
+        steps: 时间步数
+        n_paths: 路径数
+        seed: 随机种子；相同的种子和 block_size 得到相同的结果，与 workers 无关
+        workers / block_size / keep_values: 同 backtest
+
+    返回:
+        BacktestResult
+    """
+    block_size = _block_size(steps, block_size)
+    starts = range(0, n_paths, block_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(starts))
+    shared = {
+        'price0': float(price0),
+        'steps': steps,
+        'mu': mu,
+        'sigma': sigma,
+        'dt': dt,
+        'price_lower': float(price_lower),
+        'price_upper': float(price_upper),
+        'amount_eth': float(amount_eth),
+        'amount_usdc': float(amount_usdc),
+        'keep_values': keep_values,
+    }
+    tasks = [(None, min(start + block_size, n_paths) - start, s) for start, s in zip(starts, seeds)]
+    return _run(shared, tasks, workers)
+
+
+def summarize(result, percentiles=(5, 50, 95)):
+    """
+    汇总回测结果
+
+    参数:
+        result: BacktestResult
+        percentiles: 要计算的百分位数
+
+    返回:
+        字典：各指标的均值与百分位数，以及有效路径数
+    """
+    valid = ~np.isnan(result.final_value)
+    summary = {'paths': int(valid.sum())}
+    for name in ("final_value", "hodl_value", "impermanent_loss", "in_range"):
+        values = getattr(result, name)[valid]
+        if not len(values):
+            summary[name] = dict.fromkeys(['mean'] + [f'p{q}' for q in percentiles], float('nan'))
+            continue
+        summary[name] = {'mean': float(values.mean())}
+        for q, value in zip(percentiles, np.percentile(values, percentiles)):
+            summary[name][f'p{q}'] = float(value)
+    return summary
+
+
+# ============================================================
+# 参考实现：逐步驱动池子模拟器
+# ============================================================
+
+def replay_path_on_pool(prices, price_lower, price_upper, amount_eth, amount_usdc):
+    """
+    沿单条价格路径逐步执行 Pool.mint / Pool.swap，返回每一步的仓位价值
+
+    池子中另有一个覆盖全部 Tick 的背景仓位，保证价格可以移动到任意位置；
+    每一步用 swap_solver.amount_to_price 求出把价格推到目标所需的输入。
+    区间边界取 price_to_tick 向下取整后的 Tick，因此与 evaluate_paths
+    的结果有不超过一个 Tick（0.01%）量级的差异。
+
+    参数:
+        prices: 一维价格数组，prices[0] 为建仓价格
+        price_lower / price_upper / amount_eth / amount_usdc: 同 evaluate_paths
+
+    返回:
+        每一步的仓位价值数组（USDC）
+    """
+    from calculate_liquidity import calculate_amounts_for_liquidity
+    from pool_sim import Pool
+    from swap_solver import amount_to_price
+    from tickmath import MIN_TICK, MAX_TICK, get_tick_at_sqrt_ratio
+    from unimath import calculate_liquidity, price_to_sqrtp_q96, price_to_tick
+
+    sqrt_price_x96 = price_to_sqrtp_q96(prices[0])
+    pool = Pool(sqrt_price_x96, get_tick_at_sqrt_ratio(sqrt_price_x96))
+    pool.mint("background", MIN_TICK, MAX_TICK, 10**24)
+
+    liquidity = calculate_liquidity(prices[0], price_lower, price_upper, amount_eth, amount_usdc, verbose=False)['liquidity']
+    tick_lower, tick_upper = price_to_tick(price_lower), price_to_tick(price_upper)
+    pool.mint("lp", tick_lower, tick_upper, liquidity)
+
+    values = []
+    for price in prices:
+        target = price_to_sqrtp_q96(price)
+        if target != pool.sqrt_price_x96:
+            zero_for_one = target < pool.sqrt_price_x96
+            amount_in = amount_to_price(pool, zero_for_one, target).amount_in
+            if amount_in:
+                pool.swap(zero_for_one, amount_in)
+        amount0, amount1 = calculate_amounts_for_liquidity(pool.sqrt_price_x96, tick_lower, tick_upper, liquidity)
+        values.append((amount0 * (pool.sqrt_price_x96 / Q96) ** 2 + amount1) / ETH)
+    return np.asarray(values)
+
+
+# ============================================================
+# 主程序
+# ============================================================
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="流动性仓位蒙特卡洛回测")
+    parser.add_argument("--price", type=float, default=5000, help="初始价格（GBM）")
+    parser.add_argument("--lower", type=float, default=4545, help="区间下限价格")
+    parser.add_argument("--upper", type=float, default=5500, help="区间上限价格")
+    parser.add_argument("--eth", type=float, default=1, help="初始 ETH 数量")
+    parser.add_argument("--usdc", type=float, default=5000, help="初始 USDC 数量")
+    parser.add_argument("--paths", type=int, default=10000, help="GBM 路径数")
+    parser.add_argument("--steps", type=int, default=24 * 30, help="时间步数（每步 1 小时）")
+    parser.add_argument("--mu", type=float, default=0.0, help="年化漂移率")
+    parser.add_argument("--sigma", type=float, default=0.8, help="年化波动率")
+    parser.add_argument("--seed", type=int, default=None, help="随机种子")
+    parser.add_argument("--events", metavar="PATH", help="改为回放事件文件中的价格路径")
+    parser.add_argument("--workers", type=int, default=None, help="进程数（默认全部 CPU）")
+    args = parser.parse_args()
+
+    if args.events:
+        result = backtest(
+            prices_from_events(args.events), args.lower, args.upper, args.eth, args.usdc, workers=args.workers
+        )
+    else:
+        result = backtest_gbm(
+            args.price, args.lower, args.upper, args.eth, args.usdc,
+            mu=args.mu, sigma=args.sigma, steps=args.steps, n_paths=args.paths,
+            seed=args.seed, workers=args.workers
+        )
+
+    summary = summarize(result)
+    print(f"有效路径: {summary['paths']}")
+    print(f"{'指标':<18} {'均值':>14} {'P5':>14} {'P50':>14} {'P95':>14}")
+    for name in ("final_value", "hodl_value", "impermanent_loss", "in_range"):
+        row = summary[name]
+        print(f"{name:<20} {row['mean']:>14.6g} {row['p5']:>14.6g} {row['p50']:>14.6g} {row['p95']:>14.6g}")
+
+
+if __name__ == "__main__":
+    main()
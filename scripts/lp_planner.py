@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+流动性区间规划器（多进程并行）
+
+在 (price_lower, price_upper) 网格上批量评估 calculate_liquidity，
+按评分函数选出最好的 N 个区间。
+
+网格为下限价格数组与上限价格数组的笛卡尔积。每个工作进程在启动时
+通过 initializer 接收一次只读输入（价格网格、代币数量、评分函数），
+之后的任务只是扁平下标区间 [start, stop)，任务本身几乎不需要序列化。
+每个任务在 unimath_batch 中向量化计算整块区间，只把本块的前 N 名
+返回主进程，最后用堆合并，因此通信量与网格大小无关，扩展性接近线性。
+
+评分函数接收一个块的结果字典（与 calculate_liquidity_batch 的返回值
+相同，另含 price_lower / price_upper 两列和 amount_eth / amount_usdc
+两个输入数量），返回同长度的分数数组，
+分数越高越好。多进程模式下评分函数必须是模块级函数（可被 pickle）。
+
+使用方法:
+    from lp_planner import plan_ranges, score_capital_usage
+
+    plans = plan_ranges(5000, 1, 5000, lowers, uppers,
+                        score=score_capital_usage, top_n=10, workers=64)
+    for score, price_lower, price_upper, position in plans:
+        ...
+
+    python scripts/lp_planner.py --price 5000 --eth 1 --usdc 5000 \\
+        --lower 4000:4990:10 --upper 5010:6000:10 --top 5
+
+参考文档: docs/1FirstSwap/05-流动性计算.md
+"""
+
+import argparse
+import heapq
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from unimath import calculate_liquidity
+from unimath_batch import calculate_liquidity_batch
+
+
+# ============================================================
+# 常量与结果类型
+# ============================================================
+
+DEFAULT_CHUNK_SIZE = 16384  # 每个任务评估的区间数
+
+RangePlan = namedtuple("RangePlan", ["score", "price_lower", "price_upper", "position"])
+
+
+# ============================================================
+# 评分函数
+# ============================================================
+
+def score_liquidity(results):
+    """按流动性评分（相同资金下区间越窄，流动性越高）"""
+    return np.asarray(results['liquidity'], dtype=np.float64)
+
+
+def score_capital_usage(results):
+    """
+    按资金利用率评分
+
+    两种代币中较少被用完的那一种决定利用率，满分为 1，
+    即区间的代币比例与持仓比例越接近分数越高。
+    """
+    amount_eth = np.asarray(results['amount_eth_final'], dtype=np.float64)
+    amount_usdc = np.asarray(results['amount_usdc_final'], dtype=np.float64)
+    return np.minimum(amount_eth / results['amount_eth'], amount_usdc / results['amount_usdc'])
+
+
+# ============================================================
+# 工作进程
+# ============================================================
+
+# 工作进程中的只读输入，由 _init_worker 设置
+_shared = None
+
+
+def _init_worker(shared):
+    """工作进程初始化：保存只读输入"""
+    global _shared
+    _shared = shared
+
+
+def _evaluate_chunk(bounds):
+    """
+    评估扁平下标区间 [start, stop) 内的区间
+
+    参数:
+        bounds: (start, stop)
+
+    返回:
+        本块前 top_n 名的 [(score, -index)]
+    """
+    start, stop = bounds
+    lowers, uppers = _shared['lowers'], _shared['uppers']
+
+    index = np.arange(start, stop)
+    price_lower = lowers[index // len(uppers)]
+    price_upper = uppers[index % len(uppers)]
+
+    price_current = _shared['price_current']
+    valid = (price_lower > 0) & (price_lower < price_current) & (price_current < price_upper)
+    if not valid.any():
+        return []
+    index, price_lower, price_upper = index[valid], price_lower[valid], price_upper[valid]
+
+    n = len(index)
+    results = calculate_liquidity_batch(
+        np.full(n, price_current),
+        price_lower,
+        price_upper,
+        np.full(n, _shared['amount_eth']),
+        np.full(n, _shared['amount_usdc']),
+        exact=_shared['exact']
+    )
+    results['price_lower'] = price_lower
+    results['price_upper'] = price_upper
+    results['amount_eth'] = _shared['amount_eth']
+    results['amount_usdc'] = _shared['amount_usdc']
+
+    scores = np.asarray(_shared['score'](results), dtype=np.float64)
+    keep = ~np.isnan(scores)
+    scores, index = scores[keep], index[keep]
+
+    top_n = _shared['top_n']
+    if len(scores) > top_n:
+        # 稳定排序保证同分时保留网格中靠前的区间
+        order = np.argsort(-scores, kind="stable")[:top_n]
+        scores, index = scores[order], index[order]
+    return list(zip(scores.tolist(), (-index).tolist()))
+
+
+# ============================================================
+# 规划器
+# ============================================================
+
+def plan_ranges(
+    price_current,
+    amount_eth,
+    amount_usdc,
+    lowers,
+    uppers,
+    score=score_liquidity,
+    top_n=10,
+    workers=None,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    exact=False
+):
+    """
+    在价格区间网格上选出评分最高的 N 个区间
+
+    参数:
+        price_current: 当前价格（USDC/ETH）
+        amount_eth: 可用 ETH 数量
+        amount_usdc: 可用 USDC 数量
+        lowers: 候选下限价格数组
+        uppers: 候选上限价格数组（与 lowers 做笛卡尔积，
+                不满足 下限 < 当前 < 上限 的组合被跳过）
+        score: 评分函数，见模块说明
+        top_n: 返回的区间数
+        workers: 进程数；None 表示 os.cpu_count()，1 表示在当前进程中计算
+        chunk_size: 每个任务评估的区间数
+        exact: 网格评估是否使用精确整数路径（较慢）。
+               无论取值如何，返回的 position 都由标量版本精确计算
+
+    返回:
+        RangePlan 列表，按分数从高到低排序；同分时网格中靠前的区间优先
+    """
+    if amount_eth <= 0 or amount_usdc <= 0:
+        raise ValueError("amounts must be positive")
+    if top_n <= 0 or chunk_size <= 0:
+        raise ValueError("top_n and chunk_size must be positive")
+
+    lowers = np.asarray(lowers, dtype=np.float64)
+    uppers = np.asarray(uppers, dtype=np.float64)
+    total = len(lowers) * len(uppers)
+
+    shared = {
+        'price_current': float(price_current),
+        'amount_eth': float(amount_eth),
+        'amount_usdc': float(amount_usdc),
+        'lowers': lowers,
+        'uppers': uppers,
+        'score': score,
+        'top_n': top_n,
+        'exact': exact,
+    }
+    tasks = [(start, min(start + chunk_size, total)) for start in range(0, total, chunk_size)]
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(tasks))
+
+    if workers <= 1:
+        _init_worker(shared)
+        try:
+            partials = [_evaluate_chunk(task) for task in tasks]
+        finally:
+            _init_worker(None)
+    else:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(shared,)) as executor:
+            partials = list(executor.map(_evaluate_chunk, tasks))
+
+    best = heapq.nlargest(top_n, (item for partial in partials for item in partial))
+
+    plans = []
+    for value, neg_index in best:
+        i = -neg_index
+        price_lower = float(lowers[i // len(uppers)])
+        price_upper = float(uppers[i % len(uppers)])
+        position = calculate_liquidity(
+            price_current, price_lower, price_upper, amount_eth, amount_usdc, verbose=False
+        )
+        plans.append(RangePlan(value, price_lower, price_upper, position))
+    return plans
+
+
+# ============================================================
+# 主程序
+# ============================================================
+
+def _parse_grid(text):
+    """解析 START:STOP:STEP 形式的价格网格（包含 STOP）"""
+    start, stop, step = (float(v) for v in text.split(":"))
+    return np.arange(start, stop + step / 2, step)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="流动性区间规划器")
+    parser.add_argument("--price", type=float, default=5000, help="当前价格")
+    parser.add_argument("--eth", type=float, default=1, help="可用 ETH 数量")
+    parser.add_argument("--usdc", type=float, default=5000, help="可用 USDC 数量")
+    parser.add_argument("--lower", default="4000:4990:10", help="下限价格网格 START:STOP:STEP")
+    parser.add_argument("--upper", default="5010:6000:10", help="上限价格网格 START:STOP:STEP")
+    parser.add_argument("--top", type=int, default=5, help="输出的区间数")
+    parser.add_argument("--workers", type=int, default=None, help="进程数（默认全部 CPU）")
+    parser.add_argument("--score", choices=("liquidity", "capital"), default="capital", help="评分方式")
+    args = parser.parse_args()
+
+    score = score_capital_usage if args.score == "capital" else score_liquidity
+    plans = plan_ranges(
+        args.price, args.eth, args.usdc,
+        _parse_grid(args.lower), _parse_grid(args.upper),
+        score=score, top_n=args.top, workers=args.workers
+    )
+
+    print(f"{'排名':<4} {'下限':>10} {'上限':>10} {'分数':>14} {'流动性':>26}")
+    for rank, plan in enumerate(plans, 1):
+        print(f"{rank:<6} {plan.price_lower:>10.2f} {plan.price_upper:>10.2f} "
+              f"{plan.score:>14.6g} {plan.position['liquidity']:>26d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+UniswapV3Pool 链下模拟器
+
+用精确整数运算复刻 src/UniswapV3Pool.sol 的 mint 和 swap 逻辑，
+包括 SwapMath.computeSwapStep、TickBitmap.nextInitializedTickWithinOneWord、
+Tick.cross 和 LiquidityMath.addLiquidity。报价无需 EVM 往返，
+可以在进程内每秒完成数千次。
+
+与合约的差异:
+    - 价格 ↔ Tick 转换使用 tickmath.py（Uniswap V3 原版 TickMath）
+    - 交换输出金额向下取整（见 v3math.py），与测试中的期望值一致
+    - 交换结束时总是写回 sqrtPriceX96（合约只在 Tick 变化时写回）
+    - 当前流动性为零时抛出 ZeroLiquidity，而不是让交换循环空转
+    - 流动性极大时，剩余的零头金额可能无法再移动价格，此时结束交换，
+      未使用的零头不计入输入金额（合约在这种情况下会无限循环）
+    - 与 Uniswap V3 原版一样支持手续费率（fee）和 Tick 间距（tick_spacing），
+      合约中写死的是无手续费、间距为 1；位图按压缩后的 Tick（tick // tick_spacing）
+      建立索引，间距为 200 时位图字数减少到 1/200
+
+使用方法:
+    from pool_sim import Pool
+
+    pool = Pool(sqrt_price_x96=5602277097478614198912276234240, tick=85176)
+    pool.mint("alice", 84222, 86129, 1517882343751509868544)
+    result = pool.swap(zero_for_one=False, amount_specified=42 * 10**18)
+    print(result.amount_out, result.sqrt_price_x96, result.tick)
+
+    # 0.3% 手续费档位，Tick 间距为 60
+    pool = Pool(5602277097478614198912276234240, 85176, fee=3000)
+    pool.mint("alice", 84180, 86160, 1517882343751509868544)
+
+参考文档: docs/2SecondSwap/14-广义交换（Generalized Swapping）.md
+"""
+
+import time
+from collections import namedtuple
+
+import profiling
+from tick_bitmap import TickBitmap
+from tick_store import TickInfo, TickStore
+from tickmath import (
+    MIN_TICK,
+    MAX_TICK,
+    get_sqrt_ratio_at_tick,
+    get_tick_at_sqrt_ratio
+)
+from v3math import (
+    MAX_UINT128,
+    add_liquidity,
+    calc_amount0_delta,
+    calc_amount1_delta,
+    compute_swap_step
+)
+
+
+# ============================================================
+# 常量定义
+# ============================================================
+
+# UniswapV3Factory 默认启用的手续费档位（百万分之一）→ Tick 间距
+FEE_TICK_SPACINGS = {100: 1, 500: 10, 3000: 60, 10000: 200}
+
+
+# ============================================================
+# 错误定义
+# ============================================================
+
+class InvalidTickRange(ValueError):
+    """Tick 区间无效（对应 UniswapV3Pool.InvalidTickRange）"""
+
+
+class ZeroLiquidity(ValueError):
+    """流动性为零（对应 UniswapV3Pool.ZeroLiquidity）"""
+
+
+# ============================================================
+# 数据结构
+# ============================================================
+
+class SwapResult(namedtuple(
+    "SwapResult", ["amount0", "amount1", "sqrt_price_x96", "liquidity", "tick"]
+)):
+    """
+    交换结果，字段与合约的 Swap 事件一致
+
+    amount0 / amount1 为池子视角的有符号变化量：正数表示用户支付，
+    负数表示用户获得。
+    """
+
+    __slots__ = ()
+
+    @property
+    def amount_in(self):
+        """用户支付的输入金额"""
+        return max(self.amount0, self.amount1)
+
+    @property
+    def amount_out(self):
+        """用户获得的输出金额"""
+        return -min(self.amount0, self.amount1)
+
+
+# ============================================================
+# 池子模拟器
+# ============================================================
+
+class Pool:
+    """
+    UniswapV3Pool 的链下模型
+
+    状态与合约一一对应:
+        sqrt_price_x96 / tick: slot0
+        liquidity: 当前价格点的流动性
+        ticks: Tick 状态映射（列式存储的 TickStore）
+        positions: (owner, lower_tick, upper_tick) → 仓位流动性
+        tick_bitmap: 刻度位图索引
+        version: 状态版本号，每次 mint / swap 后递增，供报价缓存判断失效
+        fee: 手续费率（百万分之一）
+        tick_spacing: Tick 间距，仓位边界必须是它的整数倍
+    """
+
+    def __init__(self, sqrt_price_x96, tick, token0=None, token1=None, skip_empty_words=False,
+                 fee=0, tick_spacing=None):
+        """
+        创建新的池子
+
+        参数:
+            sqrt_price_x96: 初始平方根价格（Q64.96）
+            tick: 初始 Tick
+            token0: 第一个代币（可选，仅作标识）
+            token1: 第二个代币（可选，仅作标识）
+            skip_empty_words: 交换时跨字查找下一个已初始化的 Tick，
+                一步跨过中间的空字。合约在每个字边界都会结算一次，
+                因此开启后结果可能与合约有几 wei 的取整差异
+            fee: 手续费率（百万分之一，例如 3000 表示 0.3%），从每一步的输入中扣除
+            tick_spacing: Tick 间距，默认为 FEE_TICK_SPACINGS 中该手续费档位的间距，
+                不在表中的手续费率默认为 1
+        """
+        if not 0 <= fee < 10**6:
+            raise ValueError("fee must be in [0, 1000000)")
+        if tick_spacing is None:
+            tick_spacing = FEE_TICK_SPACINGS.get(fee, 1)
+        if tick_spacing <= 0:
+            raise ValueError("tick_spacing must be positive")
+        self.fee = fee
+        self.tick_spacing = tick_spacing
+        self.token0 = token0
+        self.token1 = token1
+        self.skip_empty_words = skip_empty_words
+        self.sqrt_price_x96 = sqrt_price_x96
+        self.tick = tick
+        self.liquidity = 0
+        self.ticks = TickStore()
+        self.positions = {}
+        self.tick_bitmap = TickBitmap()
+        self.version = 0
+
+    # ---------- 流动性 ----------
+
+    def _update_tick(self, tick, liquidity_delta, upper):
+        """更新 tick 信息，返回 tick 是否被翻转（对应 Tick.update）"""
+        return self.ticks.update(tick, liquidity_delta, upper)
+
+    def mint(self, owner, lower_tick, upper_tick, amount):
+        """
+        在指定价格区间添加流动性
+
+        参数:
+            owner: 流动性仓位的所有者
+            lower_tick: 价格区间下限
+            upper_tick: 价格区间上限
+            amount: 要添加的流动性数量（L）
+
+        返回:
+            (amount0, amount1) 需要存入的代币数量
+        """
+        if (lower_tick >= upper_tick or lower_tick < MIN_TICK or upper_tick > MAX_TICK
+                or lower_tick % self.tick_spacing or upper_tick % self.tick_spacing):
+            raise InvalidTickRange((lower_tick, upper_tick))
+        if amount == 0:
+            raise ZeroLiquidity()
+        prof = profiling.active
+        start = time.perf_counter_ns() if prof is not None else 0
+
+        # 更新 Tick 和位图索引
+        flipped = 0
+        if self._update_tick(lower_tick, amount, False):
+            self.tick_bitmap.flip_tick(lower_tick, self.tick_spacing)
+            flipped += 1
+        if self._update_tick(upper_tick, amount, True):
+            self.tick_bitmap.flip_tick(upper_tick, self.tick_spacing)
+            flipped += 1
+
+        # 更新仓位
+        key = (owner, lower_tick, upper_tick)
+        position = self.positions.get(key, 0) + amount
+        if position > MAX_UINT128:
+            raise OverflowError("position liquidity exceeds uint128")
+        self.positions[key] = position
+
+        # 根据价格区间位置计算代币数量
+        if self.tick < lower_tick:
+            # 价格区间在当前价格之上，只需要 token0
+            amount0 = calc_amount0_delta(
+                get_sqrt_ratio_at_tick(lower_tick), get_sqrt_ratio_at_tick(upper_tick), amount
+            )
+            amount1 = 0
+        elif self.tick < upper_tick:
+            # 价格区间包含当前价格，需要两种代币
+            amount0 = calc_amount0_delta(self.sqrt_price_x96, get_sqrt_ratio_at_tick(upper_tick), amount)
+            amount1 = calc_amount1_delta(self.sqrt_price_x96, get_sqrt_ratio_at_tick(lower_tick), amount)
+            self.liquidity = add_liquidity(self.liquidity, amount)
+        else:
+            # 价格区间在当前价格之下，只需要 token1
+            amount0 = 0
+            amount1 = calc_amount1_delta(
+                get_sqrt_ratio_at_tick(lower_tick), get_sqrt_ratio_at_tick(upper_tick), amount
+            )
+
+        self.version += 1
+        if prof is not None:
+            prof.record_mint(flipped, time.perf_counter_ns() - start)
+        return amount0, amount1
+
+    # ---------- 交换 ----------
+
+    def simulate_swap(self, zero_for_one, amount_specified, state=None):
+        """
+        计算交换结果但不修改池子状态
+
+        参数:
+            zero_for_one: 交换方向，True 表示用 token0 换 token1
+            amount_specified: 输入金额
+            state: 起始的 (sqrt_price_x96, tick, liquidity)，默认为池子的当前状态
+                （quoter.quote_many 从交换中途的状态继续时使用）
+
+        返回:
+            SwapResult
+        """
+        if self.skip_empty_words:
+            find_next = self.tick_bitmap.next_initialized_tick
+        else:
+            find_next = self.tick_bitmap.next_initialized_tick_within_one_word
+        step, sqrt_at_tick, tick_at_sqrt = compute_swap_step, get_sqrt_ratio_at_tick, get_tick_at_sqrt_ratio
+        liquidity_net = self.ticks.liquidity_net
+
+        # 启用性能计数时换成计时版本；未启用时只多这一次属性读取
+        prof = profiling.active
+        if prof is not None:
+            swap, (find_next, step, sqrt_at_tick, tick_at_sqrt, liquidity_net) = prof.swap_hooks(
+                self, find_next, step, sqrt_at_tick, tick_at_sqrt, liquidity_net
+            )
+
+        amount_remaining = amount_specified
+        amount_calculated = 0
+        fee = self.fee
+        if state is None:
+            sqrt_price_x96, tick, liquidity = self.sqrt_price_x96, self.tick, self.liquidity
+        else:
+            sqrt_price_x96, tick, liquidity = state
+
+        try:
+            # 主循环：直到处理完所有输入金额
+            while amount_remaining > 0:
+                if liquidity == 0:
+                    raise ZeroLiquidity()
+
+                next_tick, initialized = find_next(tick, self.tick_spacing, zero_for_one)
+                # 位图的字边界可能超出有效 Tick 范围
+                next_tick = max(MIN_TICK, min(MAX_TICK, next_tick))
+                sqrt_price_next_x96 = sqrt_at_tick(next_tick)
+
+                sqrt_price_start_x96 = sqrt_price_x96
+                sqrt_price_x96, amount_in, amount_out = step(
+                    sqrt_price_x96, sqrt_price_next_x96, liquidity, amount_remaining, zero_for_one, fee
+                )
+                amount_remaining -= amount_in
+                amount_calculated += amount_out
+
+                if amount_in == 0 and sqrt_price_x96 == sqrt_price_start_x96 != sqrt_price_next_x96:
+                    # 剩余金额太小，已经无法移动价格（合约会在这里空转到 gas 耗尽）
+                    break
+
+                if sqrt_price_x96 == sqrt_price_next_x96:
+                    # 到达区间边界，处理 tick 交叉（对应 Tick.cross）
+                    if initialized:
+                        liquidity_delta = liquidity_net(next_tick)
+                        if zero_for_one:
+                            liquidity_delta = -liquidity_delta
+                        liquidity = add_liquidity(liquidity, liquidity_delta)
+                        if liquidity == 0:
+                            raise ZeroLiquidity()
+                    tick = next_tick - 1 if zero_for_one else next_tick
+                else:
+                    tick = tick_at_sqrt(sqrt_price_x96)
+        finally:
+            if prof is not None:
+                prof.end_swap(swap)
+
+        amount_in = amount_specified - amount_remaining
+        if zero_for_one:
+            amount0, amount1 = amount_in, -amount_calculated
+        else:
+            amount0, amount1 = -amount_calculated, amount_in
+
+        return SwapResult(amount0, amount1, sqrt_price_x96, liquidity, tick)
+
+    def swap(self, zero_for_one, amount_specified):
+        """
+        执行代币交换并更新池子状态
+
+        参数:
+            zero_for_one: 交换方向，True 表示用 token0 换 token1
+            amount_specified: 输入金额
+
+        返回:
+            SwapResult（与合约 Swap 事件的字段一致）
+        """
+        result = self.simulate_swap(zero_for_one, amount_specified)
+        self.sqrt_price_x96 = result.sqrt_price_x96
+        self.tick = result.tick
+        self.liquidity = result.liquidity
+        self.version += 1
+        return result
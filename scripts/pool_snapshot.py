@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+"""
+池子状态的二进制快照格式
+
+分析任务的工作进程冷启动时要载入成千上万个池子。从事件回放或 pickle 恢复
+需要逐个 Tick 创建 Python 对象；快照文件则把 pool_sim.Pool 的全部状态
+（slot0、liquidity、Tick 列、位图字、仓位）按定宽列连续存放，
+加载时通过 mmap 映射文件，再用 np.frombuffer 直接得到各列的只读视图，
+不复制、不解析。
+
+文件格式（小端序，每一节从 8 字节对齐的位置开始，偏移由各计数推出）:
+    头部:  MAGIC(8) + 格式版本(uint16) + 标志(uint16) + tick_spacing(int32) + tick(int32)
+           + fee(uint32) + version(uint64) + sqrtPriceX96(32 字节) + liquidity(16 字节)
+           + Tick 数 / 位图字数 / 仓位数 / 字符串数 / 字符串字节数(各 uint32)
+    Tick 列:  ticks int32 | gross_lo uint64 | gross_hi uint64 | net_lo uint64
+              | net_hi int64 | initialized uint8    （与 tick_store.TickStore 的列相同）
+    位图:    word_positions int32 | words uint64 × 4（每个 256 位字由低到高 4 个分量）
+    仓位:    lower int32 | upper int32 | liquidity_lo uint64 | liquidity_hi uint64
+              | owner uint32（字符串表下标）
+    字符串:  offsets uint32 × (n + 1) | UTF-8 数据（0、1 号为 token0 / token1）
+
+PoolSnapshot 可以直接交给只读取 Tick 列的分析函数（例如 liquidity_depth.depth_curve），
+需要交换模拟时再用 to_pool() 构建 Pool：Tick 列每列一次内存复制，
+位图和仓位的数量通常只有 Tick 数的零头。
+
+使用方法:
+    from pool_snapshot import load_snapshot, save_snapshot
+
+    save_snapshot(pool, "pool.snap")
+    with load_snapshot("pool.snap") as snapshot:
+        curve = depth_curve(snapshot)
+        pool = snapshot.to_pool()
+
+    python scripts/pool_snapshot.py events.jsonl --out pool.snap
+    python scripts/pool_snapshot.py --info pool.snap
+
+参考文档: docs/2SecondSwap/13-广义铸币（Generalized Minting）.md
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+import numpy as np
+
+from pool_sim import Pool
+from tick_bitmap import TickBitmap
+from tick_store import TickStore
+
+
+# ============================================================
+# 常量定义
+# ============================================================
+
+MAGIC = b"UV3SNAP\x00"
+FORMAT_VERSION = 2
+
+HEADER = struct.Struct("<8sHHiiIQ32s16sIIIII")
+
+FLAG_SKIP_EMPTY_WORDS = 1
+FLAG_TOKEN0 = 2
+FLAG_TOKEN1 = 4
+
+_MASK64 = (1 << 64) - 1
+
+# (节名称, dtype, 元素个数对应的计数)
+_SECTIONS = (
+    ("ticks", "<i4", "ticks"),
+    ("gross_lo", "<u8", "ticks"),
+    ("gross_hi", "<u8", "ticks"),
+    ("net_lo", "<u8", "ticks"),
+    ("net_hi", "<i8", "ticks"),
+    ("initialized", "u1", "ticks"),
+    ("word_positions", "<i4", "words"),
+    ("words", "<u8", "word_limbs"),
+    ("position_lower", "<i4", "positions"),
+    ("position_upper", "<i4", "positions"),
+    ("position_liquidity_lo", "<u8", "positions"),
+    ("position_liquidity_hi", "<u8", "positions"),
+    ("position_owner", "<u4", "positions"),
+    ("string_offsets", "<u4", "string_offsets"),
+    ("string_data", "u1", "string_bytes"),
+)
+
+TICK_COLUMNS = ("ticks", "gross_lo", "gross_hi", "net_lo", "net_hi", "initialized")
+
+
+class SnapshotError(ValueError):
+    """快照文件格式错误或不完整"""
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+
+def _layout(n_ticks, n_words, n_positions, n_strings, string_bytes):
+    """
+    计算各节的位置
+
+    返回:
+        ([(节名称, dtype, 元素个数, 起始偏移)], 文件总长度)
+    """
+    counts = {
+        "ticks": n_ticks,
+        "words": n_words,
+        "word_limbs": 4 * n_words,
+        "positions": n_positions,
+        "string_offsets": n_strings + 1,
+        "string_bytes": string_bytes,
+    }
+    layout = []
+    offset = _align(HEADER.size)
+    for name, dtype, count_key in _SECTIONS:
+        count = counts[count_key]
+        layout.append((name, dtype, count, offset))
+        offset = _align(offset + count * np.dtype(dtype).itemsize)
+    return layout, offset
+
+
+# ============================================================
+# 写入
+# ============================================================
+
+def _little_endian(column):
+    """array 列按小端序的字节（小端机器上不复制）"""
+    if sys.byteorder == "little":
+        return column
+    column = array(column.typecode, column)
+    column.byteswap()
+    return column
+
+
+def dump_snapshot(pool):
+    """
+    将池子状态编码为快照字节串
+
+    参数:
+        pool: pool_sim.Pool（仓位 owner 必须是字符串）
+
+    返回:
+        bytes
+    """
+    strings = [pool.token0 or "", pool.token1 or ""]
+    owner_index = {}
+    lower, upper = array("i"), array("i")
+    liquidity_lo, liquidity_hi, owners = array("Q"), array("Q"), array("I")
+    for (owner, lower_tick, upper_tick), liquidity in pool.positions.items():
+        if not isinstance(owner, str):
+            raise TypeError(f"position owner must be str, got {type(owner).__name__}")
+        if owner not in owner_index:
+            owner_index[owner] = len(strings)
+            strings.append(owner)
+        lower.append(lower_tick)
+        upper.append(upper_tick)
+        liquidity_lo.append(liquidity & _MASK64)
+        liquidity_hi.append(liquidity >> 64)
+        owners.append(owner_index[owner])
+
+    encoded = [s.encode() for s in strings]
+    string_offsets = array("I", [0])
+    for data in encoded:
+        string_offsets.append(string_offsets[-1] + len(data))
+
+    words = pool.tick_bitmap.words
+    word_positions = array("i", sorted(words))
+    word_data = b"".join(words[pos].to_bytes(32, "little") for pos in word_positions)
+
+    flags = ((FLAG_SKIP_EMPTY_WORDS if pool.skip_empty_words else 0)
+             | (FLAG_TOKEN0 if pool.token0 is not None else 0)
+             | (FLAG_TOKEN1 if pool.token1 is not None else 0))
+    layout, size = _layout(len(pool.ticks), len(word_positions), len(owners), len(strings), string_offsets[-1])
+
+    buf = bytearray(size)
+    HEADER.pack_into(
+        buf, 0, MAGIC, FORMAT_VERSION, flags, pool.tick_spacing, pool.tick, pool.fee, pool.version,
+        pool.sqrt_price_x96.to_bytes(32, "little"), pool.liquidity.to_bytes(16, "little"),
+        len(pool.ticks), len(word_positions), len(owners), len(strings), string_offsets[-1],
+    )
+    sections = dict(zip(TICK_COLUMNS, pool.ticks.columns()))
+    sections.update({
+        "word_positions": word_positions,
+        "words": word_data,
+        "position_lower": lower,
+        "position_upper": upper,
+        "position_liquidity_lo": liquidity_lo,
+        "position_liquidity_hi": liquidity_hi,
+        "position_owner": owners,
+        "string_offsets": string_offsets,
+        "string_data": b"".join(encoded),
+    })
+    for name, _, _, offset in layout:
+        data = sections[name]
+        if isinstance(data, array):
+            data = _little_endian(data).tobytes()
+        buf[offset:offset + len(data)] = data
+    return bytes(buf)
+
+
+def save_snapshot(pool, path):
+    """
+    将池子状态写入快照文件（先写临时文件再改名，读取方不会读到半个文件）
+
+    参数:
+        pool: pool_sim.Pool
+        path: 输出文件
+    """
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(dump_snapshot(pool))
+    os.replace(tmp, path)
+
+
+# ============================================================
+# 读取
+# ============================================================
+
+class _SnapshotTicks:
+    """快照中的 Tick 列，提供 TickStore 的只读列接口"""
+
+    __slots__ = ("_columns",)
+
+    def __init__(self, columns):
+        self._columns = columns
+
+    def __len__(self):
+        return len(self._columns["ticks"])
+
+    def liquidity_net_columns(self):
+        """与 TickStore.liquidity_net_columns 相同的 (ticks, net_lo, net_hi)，是文件的只读视图"""
+        columns = self._columns
+        return columns["ticks"], columns["net_lo"], columns["net_hi"]
+
+
+class PoolSnapshot:
+    """
+    快照文件的只读视图
+
+    属性:
+        sqrt_price_x96 / tick / liquidity / version / fee / tick_spacing / skip_empty_words /
+        token0 / token1: 与 Pool 的同名属性相同
+        columns: 节名称 → NumPy 数组（直接指向文件数据，只读）
+        ticks: 提供 liquidity_net_columns() 的 Tick 列视图
+    """
+
+    def __init__(self, buf, mm=None):
+        """
+        参数:
+            buf: 快照数据（bytes、mmap 等支持缓冲区协议的对象）
+            mm: 需要在 close 时关闭的 mmap
+        """
+        self._mmap = mm
+        if len(buf) < HEADER.size:
+            raise SnapshotError("snapshot is truncated")
+        (magic, format_version, flags, self.tick_spacing, self.tick, self.fee, self.version,
+         sqrt_price, liquidity, n_ticks, n_words, n_positions, n_strings, string_bytes) = \
+            HEADER.unpack_from(buf, 0)
+        if magic != MAGIC:
+            raise SnapshotError("not a pool snapshot")
+        if format_version != FORMAT_VERSION:
+            raise SnapshotError(f"unsupported snapshot version {format_version}")
+        layout, size = _layout(n_ticks, n_words, n_positions, n_strings, string_bytes)
+        if len(buf) < size:
+            raise SnapshotError("snapshot is truncated")
+
+        self.sqrt_price_x96 = int.from_bytes(sqrt_price, "little")
+        self.liquidity = int.from_bytes(liquidity, "little")
+        self.skip_empty_words = bool(flags & FLAG_SKIP_EMPTY_WORDS)
+        self.columns = {
+            name: np.frombuffer(buf, dtype=dtype, count=count, offset=offset)
+            for name, dtype, count, offset in layout
+        }
+        self.ticks = _SnapshotTicks(self.columns)
+        self.token0 = self._string(0) if flags & FLAG_TOKEN0 else None
+        self.token1 = self._string(1) if flags & FLAG_TOKEN1 else None
+
+    def _string(self, index):
+        offsets = self.columns["string_offsets"]
+        return self.columns["string_data"][offsets[index]:offsets[index + 1]].tobytes().decode()
+
+    # ---------- 解码 ----------
+
+    def bitmap_words(self):
+        """返回 wordPos → 256 位字"""
+        positions = self.columns["word_positions"].tolist()
+        data = self.columns["words"].tobytes()  # dtype 为 <u8，tobytes 总是小端序
+        return {pos: int.from_bytes(data[i * 32:(i + 1) * 32], "little") for i, pos in enumerate(positions)}
+
+    def positions(self):
+        """返回 (owner, lower_tick, upper_tick) → 仓位流动性"""
+        columns = self.columns
+        offsets = columns["string_offsets"].tolist()
+        data = columns["string_data"].tobytes()
+        owners = [data[offsets[i]:offsets[i + 1]].decode() for i in range(len(offsets) - 1)]
+        return {
+            (owners[owner], lower, upper): (hi << 64) | lo
+            for owner, lower, upper, lo, hi in zip(
+                columns["position_owner"].tolist(), columns["position_lower"].tolist(),
+                columns["position_upper"].tolist(), columns["position_liquidity_lo"].tolist(),
+                columns["position_liquidity_hi"].tolist(),
+            )
+        }
+
+    def to_pool(self, positions=True):
+        """
+        构建可以继续 mint / swap 的 Pool
+
+        参数:
+            positions: 是否解码仓位。交换模拟不读取仓位，而仓位字典的构建
+                是 to_pool 的主要开销，只做报价的工作进程可以传 False
+
+        返回:
+            pool_sim.Pool（数据已复制，关闭快照后仍可使用）
+        """
+        pool = Pool(self.sqrt_price_x96, self.tick, self.token0, self.token1,
+                    skip_empty_words=self.skip_empty_words, fee=self.fee, tick_spacing=self.tick_spacing)
+        pool.liquidity = self.liquidity
+        pool.version = self.version
+        # 大端机器上先转换为本机字节序（小端机器上不复制）
+        pool.ticks = TickStore.from_columns(*(
+            np.asarray(self.columns[name], dtype=self.columns[name].dtype.newbyteorder("="))
+            for name in TICK_COLUMNS
+        ))
+        pool.tick_bitmap = TickBitmap.from_words(self.bitmap_words())
+        if positions:
+            pool.positions = self.positions()
+        return pool
+
+    # ---------- 资源管理 ----------
+
+    def close(self):
+        """释放列视图并关闭 mmap（仅 load_snapshot 得到的实例需要）"""
+        self.columns = {}
+        self.ticks = _SnapshotTicks(self.columns)
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # 调用方仍持有列数组，最后一个引用释放时 mmap 随之关闭
+                pass
+            self._mmap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def load_snapshot(path):
+    """
+    通过 mmap 加载快照文件
+
+    数据页按需从磁盘载入，多个进程可以共享同一份页缓存。
+
+    参数:
+        path: save_snapshot 生成的文件
+
+    返回:
+        PoolSnapshot
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise SnapshotError(f"snapshot is truncated: {path}")
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        return PoolSnapshot(mm, mm)
+    except SnapshotError as e:
+        mm.close()
+        raise SnapshotError(f"{e}: {path}") from None
+
+
+def load_pool(path, positions=True):
+    """加载快照文件并构建 Pool（参数 positions 见 PoolSnapshot.to_pool）"""
+    with load_snapshot(path) as snapshot:
+        return snapshot.to_pool(positions)
+
+
+# ============================================================
+# 主程序
+# ============================================================
+
+def main():
+    """主函数"""
+    from event_replay import PoolReplayer, add_pool_arguments
+
+    parser = argparse.ArgumentParser(description="池子状态的二进制快照")
+    parser.add_argument("events", nargs="?", help="事件文件（event_replay 格式），回放到最新区块")
+    parser.add_argument("--out", help="输出快照文件")
+    parser.add_argument("--info", metavar="SNAPSHOT", help="打印快照文件的摘要")
+    add_pool_arguments(parser)
+    args = parser.parse_args()
+
+    if args.info:
+        with load_snapshot(args.info) as snapshot:
+            print(f"sqrtPriceX96: {snapshot.sqrt_price_x96}")
+            print(f"tick:         {snapshot.tick}")
+            print(f"liquidity:    {snapshot.liquidity}")
+            print(f"version:      {snapshot.version}")
+            print(f"fee:          {snapshot.fee}")
+            print(f"tick spacing: {snapshot.tick_spacing}")
+            print(f"ticks:        {len(snapshot.ticks)}")
+            print(f"bitmap words: {len(snapshot.columns['word_positions'])}")
+            print(f"positions:    {len(snapshot.columns['position_owner'])}")
+        return
+    if not args.events or not args.out:
+        parser.error("events and --out are required (or --info)")
+
+    pool = PoolReplayer(args.events, fee=args.fee, tick_spacing=args.tick_spacing).replay_to()
+    save_snapshot(pool, args.out)
+    print(f"✅ 已写入 {args.out}（{os.path.getsize(args.out)} 字节，{len(pool.ticks)} 个 Tick）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+多池并行模拟调度器（PoolUniverse）
+
+每个区块要在数百个相互独立的池子上执行 mint、swap 和报价。PoolUniverse
+把这些操作按池子分组，分发到线程池或进程池中执行:
+
+    - 池子状态按池子划分：每个池子在任一时刻只由一个工作线程 / 进程访问，
+      池子之间没有共享的可变状态，因此不需要任何锁
+    - 同一个池子的操作按提交顺序依次执行，不同池子的操作并行执行
+    - 进程模式下池子常驻在各自的工作进程中（按轮转分片），每个区块只传输
+      操作和结果；池子可以以 pool_snapshot 快照文件的路径给出，由工作进程自己加载
+
+选择执行方式（mode="auto"）:
+    pool_sim 的交换循环是 Python 大整数运算，在有 GIL 的解释器上线程之间
+    不能并行，此时使用进程池；在自由线程（free-threaded，sys._is_gil_enabled()
+    为 False）的 CPython 上使用线程池，池子对象不需要序列化。
+    Call 操作可以在池子所属的工作者上执行任意函数，例如 liquidity_depth.depth_curve
+    这类 NumPy 批量计算在执行期间释放 GIL，即使在线程模式下也能并行。
+
+使用方法:
+    from pool_universe import Mint, PoolUniverse, Quote, Swap
+
+    with PoolUniverse({"ETH/USDC": pool, "WBTC/ETH": "wbtc_eth.snap"}, workers=8) as universe:
+        results = universe.apply([
+            Mint("ETH/USDC", "alice", 84222, 86129, 10**21),
+            Swap("ETH/USDC", False, 42 * 10**18),
+            Quote("WBTC/ETH", True, [10**8 * k for k in range(1, 101)]),
+        ])
+
+参考文档: docs/3MultiPoolSwap/18-跨Tick交换.md
+"""
+
+import os
+import sys
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from quoter import quote_many
+
+
+# ============================================================
+# 操作
+# ============================================================
+
+Mint = namedtuple("Mint", ["pool", "owner", "lower_tick", "upper_tick", "amount"])
+Mint.__doc__ = "在池子中添加流动性（Pool.mint），结果为 (amount0, amount1)"
+
+Swap = namedtuple("Swap", ["pool", "zero_for_one", "amount"])
+Swap.__doc__ = "执行交换并更新池子状态（Pool.swap），结果为 SwapResult"
+
+Quote = namedtuple("Quote", ["pool", "zero_for_one", "amounts"])
+Quote.__doc__ = "报价阶梯（quoter.quote_many），结果为 QuoteResult 列表"
+
+Call = namedtuple("Call", ["pool", "fn", "args"])
+Call.__doc__ = """
+在池子所属的工作者上执行 fn(pool, *args)，结果为返回值
+
+进程模式下 fn 必须可以 pickle（模块级函数或类的方法，例如 Pool.simulate_swap）。
+"""
+
+MODES = ("auto", "inline", "thread", "process")
+
+
+def _gil_enabled():
+    """当前解释器是否启用了 GIL（3.13 之前的版本总是启用）"""
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return True if is_gil_enabled is None else is_gil_enabled()
+
+
+def _apply(pool, op):
+    """在池子上执行一个操作"""
+    if isinstance(op, Swap):
+        return pool.swap(op.zero_for_one, op.amount)
+    if isinstance(op, Quote):
+        return quote_many(pool, op.zero_for_one, op.amounts)
+    if isinstance(op, Mint):
+        return pool.mint(op.owner, op.lower_tick, op.upper_tick, op.amount)
+    if isinstance(op, Call):
+        return op.fn(pool, *op.args)
+    raise TypeError(f"unknown operation: {type(op).__name__}")
+
+
+def _apply_ops(pools, ops):
+    """
+    依次执行操作
+
+    单个操作失败（例如 ZeroLiquidity）不影响其余操作，异常对象作为该操作的结果返回。
+    """
+    results = []
+    for op in ops:
+        try:
+            results.append(_apply(pools[op.pool], op))
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+# ============================================================
+# 工作进程
+# ============================================================
+
+# 工作进程拥有的池子，由 _init_worker 设置
+_pools = None
+
+
+def _init_worker(pools):
+    """工作进程初始化：加载本分片的池子（字符串视为快照文件路径）"""
+    global _pools
+    _pools = {}
+    for pool_id, pool in pools.items():
+        if isinstance(pool, str):
+            from pool_snapshot import load_pool
+            pool = load_pool(pool)
+        _pools[pool_id] = pool
+
+
+def _run_ops(ops):
+    """在工作进程中执行一批操作"""
+    return _apply_ops(_pools, ops)
+
+
+def _fetch(pool_id):
+    """返回工作进程中的池子（序列化后的副本）"""
+    return _pools[pool_id]
+
+
+# ============================================================
+# 调度器
+# ============================================================
+
+class PoolUniverse:
+    """
+    一组独立池子的并行调度器
+
+    属性:
+        mode: 实际使用的执行方式（inline / thread / process）
+        workers: 工作线程数或进程数
+    """
+
+    def __init__(self, pools, workers=None, mode="auto"):
+        """
+        参数:
+            pools: 池子编号 → pool_sim.Pool 或快照文件路径
+            workers: 工作线程 / 进程数，None 表示 CPU 核数，≤ 1 表示在当前线程中执行
+            mode: auto / inline / thread / process
+        """
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}")
+        if workers is None:
+            workers = os.cpu_count() or 1
+        workers = max(1, min(workers, len(pools)))
+        if workers == 1 or mode == "inline":
+            mode, workers = "inline", 1
+        elif mode == "auto":
+            mode = "process" if _gil_enabled() else "thread"
+        self.mode = mode
+        self.workers = workers
+
+        if mode == "process":
+            # 轮转分片：每个分片一个单进程的执行器，池子常驻其中
+            self._shard_of = {pool_id: i % workers for i, pool_id in enumerate(pools)}
+            shards = [{} for _ in range(workers)]
+            for pool_id, pool in pools.items():
+                shards[self._shard_of[pool_id]][pool_id] = pool
+            self._executors = [
+                ProcessPoolExecutor(1, initializer=_init_worker, initargs=(shard,)) for shard in shards
+            ]
+            self._pools = None
+        else:
+            self._pools = {}
+            for pool_id, pool in pools.items():
+                if isinstance(pool, str):
+                    from pool_snapshot import load_pool
+                    pool = load_pool(pool)
+                self._pools[pool_id] = pool
+            self._executors = [ThreadPoolExecutor(workers, thread_name_prefix="pool")] if mode == "thread" else []
+
+    # ---------- 执行 ----------
+
+    def apply(self, ops):
+        """
+        执行一个区块的操作
+
+        参数:
+            ops: Mint / Swap / Quote / Call 序列；同一池子的操作按顺序执行
+
+        返回:
+            与 ops 顺序相同的结果列表，失败的操作对应其异常对象
+        """
+        ops = list(ops)
+        # 按池子（进程模式下按分片）分组，记录每个操作在原列表中的位置
+        groups = {}
+        for index, op in enumerate(ops):
+            if self.mode == "process":
+                key = self._shard_of[op.pool]
+            elif op.pool in self._pools:
+                key = op.pool
+            else:
+                raise KeyError(op.pool)
+            indexes, group = groups.setdefault(key, ([], []))
+            indexes.append(index)
+            group.append(op)
+
+        if self.mode == "process":
+            futures = {key: self._executors[key].submit(_run_ops, group) for key, (_, group) in groups.items()}
+        elif self.mode == "thread":
+            futures = {key: self._executors[0].submit(_apply_ops, self._pools, group)
+                       for key, (_, group) in groups.items()}
+        else:
+            futures = None
+
+        results = [None] * len(ops)
+        for key, (indexes, group) in groups.items():
+            output = _apply_ops(self._pools, group) if futures is None else futures[key].result()
+            for index, result in zip(indexes, output):
+                results[index] = result
+        return results
+
+    def fetch(self, pool_id):
+        """
+        返回池子（进程模式下为工作进程中池子的副本）
+
+        可以交给 pool_snapshot.save_snapshot 保存当前状态。
+        """
+        if self._pools is not None:
+            return self._pools[pool_id]
+        return self._executors[self._shard_of[pool_id]].submit(_fetch, pool_id).result()
+
+    # ---------- 资源管理 ----------
+
+    def close(self):
+        """关闭线程池 / 进程池"""
+        for executor in self._executors:
+            executor.shutdown()
+        self._executors = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+仓位索引与聚合查询（PositionBook）
+
+对应 src/lib/Position.sol：仓位以 (owner, lowerTick, upperTick) 为键，
+mint 时累加流动性。pool_sim.Pool.positions 是同样的字典，但回答
+"某个 owner 在价格 P 下应得多少 token0 / token1"、"Tick T 处有哪些仓位在区间内"
+只能逐个仓位扫描。PositionBook 把仓位按列存放在 NumPy 数组中，
+并维护三个有序下标:
+
+    按 owner 排序: 同一 owner 的仓位是一段连续切片，用 searchsorted 定位
+    按 lower 排序 / 按 upper 排序: lower ≤ T 的仓位是前者的前缀，upper ≤ T 的
+        仓位是后者的前缀（后者一定包含在前者中），两者之差就是区间内的仓位
+
+流动性拆成 4 个 32 位分量存放，前缀和与按 owner 的分段求和都在 uint64 中
+逐分量进行，最后合并为 Python int，结果与逐个相加完全一致:
+    count_at_tick / liquidity_at_tick: 两次二分查找，O(log n)
+    liquidity_by_owner: 各分量按 owner 一次分组求和
+    amounts_by_owner: 全部仓位一次向量化计算（float64），再按 owner 分组求和
+
+区间内的代币数量（√P 截断到 [√P_a, √P_b]，与 calculate_liquidity 的三种情况等价）:
+    amount0 = L × (1/√P - 1/√P_b)
+    amount1 = L × (√P - √P_a)
+
+新增仓位后，下一次查询时把新行二分插入三个有序下标（每个区块通常只有少量 mint，
+不必重新排序）；改变流动性后只重算前缀和。
+
+使用方法:
+    from position_book import PositionBook
+
+    book = PositionBook.from_pool(pool)
+    book.update("alice", 84222, 86129, 10**18)
+    amount0, amount1 = book.amounts_for_owner("alice", pool.sqrt_price_x96)
+    assert book.liquidity_at_tick(pool.tick) == pool.liquidity
+    totals = book.amounts_by_owner(pool.sqrt_price_x96)
+
+    python scripts/position_book.py events.jsonl --owner alice
+
+参考文档: docs/2SecondSwap/13-广义铸币（Generalized Minting）.md
+"""
+
+import argparse
+from collections import namedtuple
+
+import numpy as np
+
+from tickmath import MAX_TICK, MIN_TICK, get_sqrt_ratio_at_tick
+from v3math import MAX_UINT128, Q96, calc_amount0_delta, calc_amount1_delta
+
+
+# ============================================================
+# 常量定义
+# ============================================================
+
+LIMBS = 4  # uint128 流动性拆成 4 个 32 位分量
+_LIMB_MASK = (1 << 32) - 1
+_INITIAL_CAPACITY = 1024
+_BINCOUNT_EXACT = 1 << 21  # 行数少于此值时按 owner 求和用 np.bincount
+
+
+OwnerAmounts = namedtuple("OwnerAmounts", ["owners", "amount0", "amount1"])
+OwnerAmounts.__doc__ = """
+按 owner 汇总的代币数量（float64，单位 wei）
+
+owners: owner 列表（按首次出现的顺序）
+amount0 / amount1: 与 owners 一一对应的数组
+"""
+
+
+# ============================================================
+# 仓位索引
+# ============================================================
+
+def _limbs(liquidity):
+    """将 uint128 拆成由低到高的 4 个 32 位分量"""
+    return [(liquidity >> (32 * i)) & _LIMB_MASK for i in range(LIMBS)]
+
+
+def _combine(limb_sums):
+    """合并各分量的和（Python int）"""
+    return sum(int(value) << (32 * i) for i, value in enumerate(limb_sums))
+
+
+def _merge(rows, keys, new_rows, new_keys):
+    """把新行按键二分插入有序下标，返回新的 (rows, keys)"""
+    rank = np.argsort(new_keys, kind="stable")
+    new_rows, new_keys = new_rows[rank], new_keys[rank]
+    at = np.searchsorted(keys, new_keys, side="right")
+    return np.insert(rows, at, new_rows), np.insert(keys, at, new_keys)
+
+
+class PositionBook:
+    """
+    按列存放的仓位索引，支持字典风格的访问（get / in / len / items）
+    """
+
+    def __init__(self):
+        self._rows = {}  # (owner, lower, upper) → 行号
+        self._owner_ids = {}  # owner → 编号
+        self._owners = []  # 编号 → owner
+        self._size = 0
+        self._owner = np.empty(_INITIAL_CAPACITY, dtype=np.int32)
+        self._lower = np.empty(_INITIAL_CAPACITY, dtype=np.int32)
+        self._upper = np.empty(_INITIAL_CAPACITY, dtype=np.int32)
+        self._limbs = np.empty((LIMBS, _INITIAL_CAPACITY), dtype=np.uint64)  # 按分量连续存放
+        self._liquidity = np.empty(_INITIAL_CAPACITY, dtype=np.float64)
+        self._order = None  # 有序下标
+        self._indexed = 0  # 已加入有序下标的行数
+        self._prefix = None  # 流动性变化后失效
+
+    @classmethod
+    def from_positions(cls, positions):
+        """
+        由 (owner, lower, upper) → 流动性 的映射构建
+
+        参数:
+            positions: 例如 Pool.positions 或 PoolSnapshot.positions()
+        """
+        book = cls()
+        for (owner, lower, upper), liquidity in positions.items():
+            book.update(owner, lower, upper, liquidity)
+        return book
+
+    @classmethod
+    def from_pool(cls, pool):
+        """由 pool_sim.Pool 的仓位构建"""
+        return cls.from_positions(pool.positions)
+
+    # ---------- Position.sol ----------
+
+    def get(self, owner, lower_tick, upper_tick):
+        """返回仓位的流动性（不存在时为 0，与合约的 mapping 一致）"""
+        row = self._rows.get((owner, lower_tick, upper_tick))
+        if row is None:
+            return 0
+        return _combine(self._limbs[:, row])
+
+    def update(self, owner, lower_tick, upper_tick, liquidity_delta):
+        """
+        增加仓位的流动性（对应 Position.update）
+
+        参数:
+            owner: 仓位所有者
+            lower_tick: 价格区间下限
+            upper_tick: 价格区间上限
+            liquidity_delta: 增加的流动性（uint128）
+
+        返回:
+            更新后的仓位流动性
+        """
+        if liquidity_delta < 0:
+            raise ValueError("liquidity delta must be non-negative")
+        key = (owner, lower_tick, upper_tick)
+        row = self._rows.get(key)
+        if row is None:
+            if lower_tick >= upper_tick or lower_tick < MIN_TICK or upper_tick > MAX_TICK:
+                raise ValueError(f"invalid tick range: {(lower_tick, upper_tick)}")
+            row = self._append(owner, lower_tick, upper_tick)
+            self._rows[key] = row
+            liquidity = liquidity_delta
+        else:
+            liquidity = _combine(self._limbs[:, row]) + liquidity_delta
+        if liquidity > MAX_UINT128:
+            raise OverflowError("position liquidity exceeds uint128")
+
+        self._limbs[:, row] = _limbs(liquidity)
+        self._liquidity[row] = liquidity
+        self._prefix = None
+        return liquidity
+
+    def _append(self, owner, lower_tick, upper_tick):
+        """追加一行，容量不足时加倍"""
+        row = self._size
+        if row == len(self._owner):
+            for name in ("_owner", "_lower", "_upper", "_limbs", "_liquidity"):
+                old = getattr(self, name)
+                new = np.empty(old.shape[:-1] + (2 * row,), dtype=old.dtype)
+                new[..., :row] = old
+                setattr(self, name, new)
+
+        owner_id = self._owner_ids.get(owner)
+        if owner_id is None:
+            owner_id = self._owner_ids[owner] = len(self._owners)
+            self._owners.append(owner)
+        self._owner[row] = owner_id
+        self._lower[row] = lower_tick
+        self._upper[row] = upper_tick
+        self._size = row + 1
+        return row
+
+    # ---------- 字典接口 ----------
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, key):
+        return key in self._rows
+
+    def items(self):
+        """按插入顺序返回 ((owner, lower, upper), 流动性)"""
+        return [(key, _combine(self._limbs[:, row])) for key, row in self._rows.items()]
+
+    def owners(self):
+        """按首次出现的顺序返回全部 owner"""
+        return list(self._owners)
+
+    # ---------- 下标 ----------
+
+    def _index(self):
+        """按 owner / lower / upper 排序的行号，以及排序后的键"""
+        n = self._size
+        if self._order is None:
+            order = {}
+            for name, column in (("owner", self._owner), ("lower", self._lower), ("upper", self._upper)):
+                rows = np.argsort(column[:n])
+                order[name] = (rows, column[rows])
+            self._order = order
+        elif self._indexed < n:
+            new_rows = np.arange(self._indexed, n)
+            for name, column in (("owner", self._owner), ("lower", self._lower), ("upper", self._upper)):
+                self._order[name] = _merge(*self._order[name], new_rows, column[self._indexed:n])
+        else:
+            return self._order
+
+        self._indexed = n
+        self._order["owner_starts"] = np.searchsorted(self._order["owner"][1], np.arange(len(self._owners) + 1))
+        self._prefix = None
+        return self._order
+
+    def _prefix_sums(self):
+        """按 lower / upper 排序后各分量的前缀和，形状 (LIMBS, n + 1)，首列为 0"""
+        order = self._index()
+        if self._prefix is None:
+            self._prefix = tuple(
+                np.concatenate([np.zeros((LIMBS, 1), dtype=np.uint64),
+                                np.cumsum(np.take(self._limbs, order[name][0], axis=1), axis=1)], axis=1)
+                for name in ("lower", "upper")
+            )
+        return self._prefix
+
+    def _liquidities(self, rows):
+        """rows 中各仓位的流动性（Python int 列表）"""
+        limbs = np.take(self._limbs, rows, axis=1)
+        lo = (limbs[0] | (limbs[1] << np.uint64(32))).tolist()
+        hi = (limbs[2] | (limbs[3] << np.uint64(32))).tolist()
+        return [(h << 64) | l if h else l for l, h in zip(lo, hi)]
+
+    def _owner_rows(self, owner):
+        """owner 的全部行号"""
+        owner_id = self._owner_ids.get(owner)
+        if owner_id is None:
+            return np.empty(0, dtype=np.intp)
+        order = self._index()
+        starts = order["owner_starts"]
+        return order["owner"][0][starts[owner_id]:starts[owner_id + 1]]
+
+    # ---------- Tick 查询 ----------
+
+    def _counts_at_tick(self, tick):
+        """(lower ≤ tick 的仓位数, upper ≤ tick 的仓位数)"""
+        order = self._index()
+        return (int(np.searchsorted(order["lower"][1], tick, side="right")),
+                int(np.searchsorted(order["upper"][1], tick, side="right")))
+
+    def count_at_tick(self, tick):
+        """lower ≤ tick < upper 的仓位数"""
+        started, ended = self._counts_at_tick(tick)
+        return started - ended
+
+    def liquidity_at_tick(self, tick):
+        """
+        价格位于 tick 时区间内仓位的流动性之和
+
+        与池子在该 Tick 处的当前流动性（pool.liquidity）相同。
+        """
+        started, ended = self._counts_at_tick(tick)
+        by_lower, by_upper = self._prefix_sums()
+        return _combine(by_lower[:, started]) - _combine(by_upper[:, ended])
+
+    def positions_at_tick(self, tick):
+        """
+        返回 lower ≤ tick < upper 的全部仓位
+
+        只检查 lower ≤ tick 与 upper > tick 两个候选集中较小的一个。
+
+        返回:
+            {(owner, lower, upper): 流动性}，按 lower 升序
+        """
+        order = self._index()
+        started, ended = self._counts_at_tick(tick)
+        if started <= self._size - ended:
+            rows = order["lower"][0][:started]
+            rows = rows[self._upper[rows] > tick]
+        else:
+            rows = order["upper"][0][ended:]
+            rows = rows[self._lower[rows] <= tick]
+            rows = rows[np.argsort(self._lower[rows])]
+        owners = self._owners
+        keys = zip(map(owners.__getitem__, self._owner[rows].tolist()),
+                   self._lower[rows].tolist(), self._upper[rows].tolist())
+        return dict(zip(keys, self._liquidities(rows)))
+
+    # ---------- owner 查询 ----------
+
+    def liquidity_by_owner(self):
+        """
+        每个 owner 添加的流动性总和
+
+        返回:
+            {owner: 流动性}
+        """
+        n = self._size
+        if not n:
+            return {}
+        if n < _BINCOUNT_EXACT:
+            # 32 位分量在 float64 中求和，2^21 行以内不超过 2^53，结果是精确的
+            owner = self._owner[:n]
+            sums = np.array([np.bincount(owner, weights=self._limbs[i, :n], minlength=len(self._owners))
+                             for i in range(LIMBS)])
+        else:
+            order = self._index()
+            sums = np.add.reduceat(np.take(self._limbs, order["owner"][0], axis=1),
+                                   order["owner_starts"][:-1], axis=1)
+        return {owner: _combine(sums[:, i]) for i, owner in enumerate(self._owners)}
+
+    def _amounts(self, rows, sqrt_price_x96):
+        """rows 中各仓位的 (amount0, amount1)，float64"""
+        sqrt_lower = np.power(1.0001, self._lower[rows] / 2)
+        sqrt_upper = np.power(1.0001, self._upper[rows] / 2)
+        sqrt_price = np.clip(sqrt_price_x96 / Q96, sqrt_lower, sqrt_upper)
+        liquidity = self._liquidity[rows]
+        return liquidity * (1 / sqrt_price - 1 / sqrt_upper), liquidity * (sqrt_price - sqrt_lower)
+
+    def amounts_for_owner(self, owner, sqrt_price_x96, exact=False):
+        """
+        owner 的全部仓位在给定价格下可以取回的代币数量
+
+        参数:
+            owner: 仓位所有者
+            sqrt_price_x96: 价格（Q64.96）
+            exact: True 时逐个仓位用 TickMath 与 v3math 做整数计算（向下取整，
+                与 burn 时的取整方向一致），否则做 float64 向量化计算
+
+        返回:
+            (amount0, amount1)，单位为 wei
+        """
+        rows = self._owner_rows(owner)
+        if not exact:
+            amount0, amount1 = self._amounts(rows, sqrt_price_x96)
+            return float(amount0.sum()), float(amount1.sum())
+
+        total0 = total1 = 0
+        for lower, upper, liquidity in zip(self._lower[rows].tolist(), self._upper[rows].tolist(),
+                                           self._liquidities(rows)):
+            sqrt_lower = get_sqrt_ratio_at_tick(lower)
+            sqrt_upper = get_sqrt_ratio_at_tick(upper)
+            sqrt_price = min(max(sqrt_price_x96, sqrt_lower), sqrt_upper)
+            total0 += calc_amount0_delta(sqrt_price, sqrt_upper, liquidity, round_up=False)
+            total1 += calc_amount1_delta(sqrt_lower, sqrt_price, liquidity, round_up=False)
+        return total0, total1
+
+    def amounts_by_owner(self, sqrt_price_x96):
+        """
+        全部 owner 在给定价格下可以取回的代币数量（组合估值）
+
+        参数:
+            sqrt_price_x96: 价格（Q64.96）
+
+        返回:
+            OwnerAmounts（float64）
+        """
+        n = self._size
+        amount0, amount1 = self._amounts(slice(0, n), sqrt_price_x96)
+        owner = self._owner[:n]
+        count = len(self._owners)
+        return OwnerAmounts(
+            self.owners(),
+            np.bincount(owner, weights=amount0, minlength=count),
+            np.bincount(owner, weights=amount1, minlength=count),
+        )
+
+
+# ============================================================
+# 主程序
+# ============================================================
+
+def main():
+    """主函数"""
+    from event_replay import PoolReplayer, add_pool_arguments
+
+    parser = argparse.ArgumentParser(description="仓位索引与聚合查询")
+    parser.add_argument("events", help="事件文件（event_replay 格式），回放到最新区块")
+    parser.add_argument("--owner", action="append", help="只显示指定 owner（可以重复）")
+    parser.add_argument("--exact", action="store_true", help="逐个仓位做整数计算")
+    add_pool_arguments(parser)
+    args = parser.parse_args()
+
+    pool = PoolReplayer(args.events, fee=args.fee, tick_spacing=args.tick_spacing).replay_to()
+    book = PositionBook.from_pool(pool)
+    print(f"仓位: {len(book)}，区间内: {book.count_at_tick(pool.tick)}，当前流动性: {book.liquidity_at_tick(pool.tick)}")
+
+    liquidity = book.liquidity_by_owner()
+    print(f"\n{'owner':<20} {'流动性':>28} {'token0':>16} {'token1':>16}")
+    for owner in args.owner or book.owners():
+        amount0, amount1 = book.amounts_for_owner(owner, pool.sqrt_price_x96, exact=args.exact)
+        print(f"{str(owner):<20} {liquidity.get(owner, 0):>28} {amount0 / 1e18:>16.6f} {amount1 / 1e18:>16.6f}")
+
+
+if __name__ == "__main__":
+    main()
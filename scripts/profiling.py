@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+交换 / 流动性热点路径的性能计数器
+
+报价变慢时，需要知道时间花在了 Tick 遍历、位图查找还是大整数运算上。
+在 profile() 上下文中，pool_sim.Pool 的 simulate_swap（以及 swap、quote 等
+基于它的调用）、quoter.quote_many 和 mint 会记录:
+
+    计数: swaps / swap_steps（computeSwapStep 次数）/ ticks_crossed（跨越的
+          已初始化 Tick）/ bitmap_lookups / bitmap_words_scanned / mints / ticks_flipped
+    分阶段耗时: bitmap（查找下一个 Tick）/ tick_math（价格 ↔ Tick）/
+          swap_math（computeSwapStep）/ cross（读取 liquidityNet）/ swap / mint
+
+未启用时 simulate_swap 只多读一次模块属性 active，循环中调用的是与原来
+相同的函数；启用后这些函数被替换为计时包装。计数结果可以导出为
+Prometheus 文本格式（node_exporter 的 textfile collector）或 JSON。
+
+active 是进程级的全局状态，不区分线程。每次交换先计入自己的局部计数，
+结束时在锁内合并到 Profile，多个线程同时交换时计数和慢交换明细都不会互相干扰。
+
+使用方法:
+    from profiling import profile
+
+    with profile(slow_threshold=0.005) as prof:
+        quote(pool, 10**18, True)
+    print(prof.counters["ticks_crossed"], prof.seconds())
+    prof.write_prometheus("/var/lib/node_exporter/uniswap_sim.prom")
+    prof.write_json("profile.json")
+
+参考文档: docs/3MultiPoolSwap/18-跨Tick交换.md
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+# ============================================================
+# 常量定义
+# ============================================================
+
+COUNTERS = {
+    "swaps": "simulate_swap 调用次数",
+    "swap_steps": "computeSwapStep 迭代次数",
+    "ticks_crossed": "交换跨越的已初始化 Tick 数",
+    "bitmap_lookups": "查找下一个 Tick 的次数",
+    "bitmap_words_scanned": "查找时读取的位图字数",
+    "mints": "mint 调用次数",
+    "ticks_flipped": "mint 翻转的 Tick 数",
+}
+
+PHASES = {
+    "bitmap": "在位图中查找下一个已初始化的 Tick",
+    "tick_math": "getSqrtRatioAtTick / getTickAtSqrtRatio",
+    "swap_math": "computeSwapStep",
+    "cross": "跨越 Tick 时读取 liquidityNet",
+    "swap": "simulate_swap 总耗时",
+    "mint": "mint 总耗时",
+}
+
+MAX_SLOW_SWAPS = 100  # 最多保留的慢交换记录数
+
+# 每次交换单独统计的计数与阶段（慢交换明细中的字段）
+_SWAP_COUNTERS = ("swap_steps", "ticks_crossed", "bitmap_lookups", "bitmap_words_scanned")
+_SWAP_PHASES = ("bitmap", "tick_math", "swap_math", "cross")
+
+# 当前生效的 Profile，None 表示未启用
+active = None
+
+
+# ============================================================
+# 计数器
+# ============================================================
+
+class Profile:
+    """
+    一次性能采集的计数器与分阶段耗时
+
+    属性:
+        counters: {计数名称: 次数}
+        phase_ns: {阶段名称: 纳秒}
+        slow_swaps: 耗时超过 slow_threshold 的交换各自的计数与耗时
+    """
+
+    def __init__(self, slow_threshold=None):
+        """
+        参数:
+            slow_threshold: 单次交换耗时超过该秒数时记录其明细（None 表示不记录）
+        """
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.phase_ns = dict.fromkeys(PHASES, 0)
+        self.slow_threshold_ns = None if slow_threshold is None else int(slow_threshold * 1e9)
+        self.slow_swaps = []
+        self._lock = threading.Lock()
+
+    # ---------- 包装 ----------
+
+    @staticmethod
+    def _timed(fn, phase_ns, counters, phase, counter=None):
+        """返回计时（并计数）的 fn 包装，结果写入给定的计数字典"""
+        clock = time.perf_counter_ns
+
+        def wrapper(*args):
+            start = clock()
+            try:
+                return fn(*args)
+            finally:
+                phase_ns[phase] += clock() - start
+                if counter is not None:
+                    counters[counter] += 1
+        return wrapper
+
+    @staticmethod
+    def _bitmap(find_next, phase_ns, counters, skip_empty_words):
+        """
+        位图查找的包装
+
+        单字查找总是读取一个字；跨字查找在当前字中没有找到时，
+        再通过非空字列表直接读取下一个非空字，共两个字。
+        """
+        clock = time.perf_counter_ns
+
+        def wrapper(tick, tick_spacing, lte):
+            start = clock()
+            result = find_next(tick, tick_spacing, lte)
+            phase_ns["bitmap"] += clock() - start
+            counters["bitmap_lookups"] += 1
+            words = 1
+            if skip_empty_words:
+                compressed = tick // tick_spacing
+                first = compressed >> 8 if lte else (compressed + 1) >> 8
+                words = 1 if result[0] // tick_spacing >> 8 == first else 2
+            counters["bitmap_words_scanned"] += words
+            return result
+        return wrapper
+
+    def swap_hooks(self, pool, find_next, step, sqrt_at_tick, tick_at_sqrt, liquidity_net):
+        """
+        返回 simulate_swap 循环中使用的计时版本函数，并开始一次交换的计时
+
+        包装函数只写入本次交换自己的计数，不与其他线程共享。
+
+        返回:
+            (swap, (find_next, step, sqrt_at_tick, tick_at_sqrt, liquidity_net))，
+            交换结束时把 swap 传给 end_swap
+        """
+        counters = dict.fromkeys(_SWAP_COUNTERS, 0)
+        phase_ns = dict.fromkeys(_SWAP_PHASES, 0)
+        swap = (time.perf_counter_ns(), counters, phase_ns)
+        return swap, (
+            self._bitmap(find_next, phase_ns, counters, pool.skip_empty_words),
+            self._timed(step, phase_ns, counters, "swap_math", "swap_steps"),
+            self._timed(sqrt_at_tick, phase_ns, counters, "tick_math"),
+            self._timed(tick_at_sqrt, phase_ns, counters, "tick_math"),
+            self._timed(liquidity_net, phase_ns, counters, "cross", "ticks_crossed"),
+        )
+
+    def end_swap(self, swap):
+        """
+        结束一次交换的计时，把它的计数合并到 Profile；超过阈值时记录明细
+
+        参数:
+            swap: swap_hooks 返回的本次交换状态
+        """
+        start, counters, phase_ns = swap
+        elapsed = time.perf_counter_ns() - start
+        with self._lock:
+            self.counters["swaps"] += 1
+            for name, value in counters.items():
+                self.counters[name] += value
+            for name, value in phase_ns.items():
+                self.phase_ns[name] += value
+            self.phase_ns["swap"] += elapsed
+            if self.slow_threshold_ns is not None and elapsed >= self.slow_threshold_ns \
+                    and len(self.slow_swaps) < MAX_SLOW_SWAPS:
+                record = dict(counters)
+                record["seconds"] = {name: ns / 1e9 for name, ns in phase_ns.items()}
+                record["seconds"]["swap"] = elapsed / 1e9
+                self.slow_swaps.append(record)
+
+    def record_mint(self, flipped, elapsed_ns):
+        """记录一次 mint"""
+        with self._lock:
+            self.counters["mints"] += 1
+            self.counters["ticks_flipped"] += flipped
+            self.phase_ns["mint"] += elapsed_ns
+
+    # ---------- 导出 ----------
+
+    def seconds(self):
+        """各阶段耗时（秒）"""
+        return {name: ns / 1e9 for name, ns in self.phase_ns.items()}
+
+    def to_dict(self):
+        """转换为可 JSON 序列化的字典（在锁内复制，其他线程仍在交换时也是一致的快照）"""
+        with self._lock:
+            return {
+                "counters": dict(self.counters),
+                "seconds": self.seconds(),
+                "slow_swaps": list(self.slow_swaps),
+            }
+
+    def write_json(self, path):
+        """写出 JSON 文件"""
+        _write_atomic(path, json.dumps(self.to_dict(), indent=2))
+
+    def to_prometheus(self, prefix="uniswap_sim", labels=None):
+        """
+        转换为 Prometheus 文本格式
+
+        参数:
+            prefix: 指标名前缀
+            labels: 附加到每个指标的标签字典（例如 {"pool": "ETH/USDC"}）
+
+        返回:
+            文本（以换行结尾）
+        """
+        with self._lock:
+            counters, phase_ns = dict(self.counters), dict(self.phase_ns)
+        base = ",".join(f'{key}="{_escape(value)}"' for key, value in (labels or {}).items())
+        lines = []
+        for name, help_text in COUNTERS.items():
+            metric = f"{prefix}_{name}_total"
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric}{{{base}}} {counters[name]}" if base else f"{metric} {counters[name]}")
+
+        metric = f"{prefix}_phase_seconds_total"
+        lines.append(f"# HELP {metric} 各阶段累计耗时")
+        lines.append(f"# TYPE {metric} counter")
+        for name, ns in phase_ns.items():
+            phase_labels = f'{base},phase="{name}"' if base else f'phase="{name}"'
+            lines.append(f"{metric}{{{phase_labels}}} {ns / 1e9:.9f}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path, prefix="uniswap_sim", labels=None):
+        """写出 Prometheus 文本文件（先写临时文件再改名，采集方不会读到半个文件）"""
+        _write_atomic(path, self.to_prometheus(prefix, labels))
+
+
+def _escape(value):
+    """Prometheus 标签值的转义"""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _write_atomic(path, text):
+    """写入临时文件后原子地替换目标文件"""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+# ============================================================
+# 启用
+# ============================================================
+
+@contextmanager
+def profile(slow_threshold=None, into=None):
+    """
+    在上下文中启用性能计数
+
+    参数:
+        slow_threshold: 单次交换耗时超过该秒数时记录其明细
+        into: 继续累加到已有的 Profile（例如长期运行的服务定期导出）
+
+    返回:
+        Profile（上下文结束后仍可读取和导出）
+    """
+    global active
+    prof = into if into is not None else Profile(slow_threshold)
+    previous, active = active, prof
+    try:
+        yield prof
+    finally:
+        active = previous
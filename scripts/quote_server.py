@@ -0,0 +1,493 @@
+#!/usr/bin/env python3
+"""
+asyncio 报价服务：请求合并、微批处理与工作进程卸载
+
+在一个进程内对外提供报价（quoter.quote）和流动性计算（unimath.calculate_liquidity），
+供多个机器人协程并发调用：
+
+    - 请求合并：参数完全相同且仍在计算中的请求共享同一个结果，不重复计算
+    - 微批处理：在 batch_window 秒内到达（或攒满 max_batch 个）的待处理请求
+      合成一批，流动性请求一次送入 unimath_batch 的向量化内核；报价请求按
+      (池子, 方向) 分组，每组只沿 Tick 遍历一次（quoter.quote_many），结果写入报价缓存
+    - 卸载：行数不少于 offload_threshold 的流动性批次交给进程池计算，
+      报价批次在单独的线程中按池子执行（池子与 QuoteCache 都不是线程安全的，
+      因此只用一个线程），事件循环始终保持响应
+
+协议（TCP 或 Unix 套接字）:
+    每行一个 JSON 请求，响应同样每行一个 JSON，按完成顺序返回，用 id 对应
+        {"id": 1, "method": "quote", "params": {"pool": "WETH/USDC", "amount_in": 42000000000000000000, "zero_for_one": false}}
+        {"id": 2, "method": "liquidity", "params": {"price_current": 5000, "price_lower": 4545,
+         "price_upper": 5500, "amount_eth": 1, "amount_usdc": 5000}}
+        {"id": 1, "result": {"amount_out": ..., "sqrt_price_x96_after": ..., "tick_after": ...}}
+        {"id": 3, "error": {"type": "InvalidAmountIn", "message": ""}}
+    也接受 HTTP POST（请求体为单个请求或请求数组），响应后关闭连接。
+
+使用方法:
+    from quote_server import QuoteServer
+
+    server = QuoteServer({"WETH/USDC": pool})
+    result = await server.quote("WETH/USDC", 42 * 10**18, False)
+    await server.serve_tcp("127.0.0.1", 8765)
+
+    python scripts/quote_server.py --pool WETH/USDC=events.jsonl --port 8765
+    python scripts/quote_server.py --pool WETH/USDC=events.jsonl --unix /tmp/quote.sock
+    python scripts/quote_server.py --pool WETH/USDC=weth_usdc_3000.jsonl:3000 --pool WETH/USDT=weth_usdt.jsonl:500:10
+    python scripts/quote_server.py --pool WETH/USDC=events.jsonl --metrics /var/lib/node_exporter/quote.prom
+
+参考文档: docs/2SecondSwap/15-Quoter合约实现.md
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+import profiling
+from pool_sim import ZeroLiquidity
+from quoter import InvalidAmountIn, InvalidPool, QuoteCache
+from unimath_batch import INPUT_COLUMNS, RESULT_COLUMNS, calculate_liquidity_chunks
+
+
+# ============================================================
+# 常量定义
+# ============================================================
+
+DEFAULT_BATCH_WINDOW = 0.002  # 秒，等待同一批次其他请求的时间
+DEFAULT_MAX_BATCH = 1024  # 攒满后立即计算
+DEFAULT_OFFLOAD_THRESHOLD = 256  # 流动性批次达到该行数时交给进程池
+
+_MAX_HTTP_BODY = 1 << 24
+
+
+# ============================================================
+# 批处理内核（在工作进程中执行，必须是模块级函数）
+# ============================================================
+
+def _liquidity_rows(columns):
+    """
+    对一批流动性请求执行向量化计算
+
+    参数:
+        columns: 按 INPUT_COLUMNS 组织的 float64 数组字典
+
+    返回:
+        与输入行一一对应的结果字典列表，参数无效的行为 None
+    """
+    rows = [None] * len(columns[INPUT_COLUMNS[0]])
+    for _, valid, results in calculate_liquidity_chunks([columns]):
+        values = [results[name].tolist() for name in RESULT_COLUMNS]
+        for index, row in zip(np.flatnonzero(valid).tolist(), zip(*values)):
+            rows[index] = {name: int(value) for name, value in zip(RESULT_COLUMNS, row)}
+    return rows
+
+
+# ============================================================
+# 服务
+# ============================================================
+
+class QuoteServer:
+    """
+    合并并批量处理报价 / 流动性请求的 asyncio 服务
+
+    属性:
+        pools: 池子名称 → pool_sim.Pool
+        requests: 收到的请求数
+        coalesced: 与进行中的请求合并的请求数
+        batches: 已计算的批次数
+    """
+
+    def __init__(
+        self,
+        pools=None,
+        batch_window=DEFAULT_BATCH_WINDOW,
+        max_batch=DEFAULT_MAX_BATCH,
+        workers=None,
+        offload_threshold=DEFAULT_OFFLOAD_THRESHOLD,
+        cache_size=4096
+    ):
+        """
+        参数:
+            pools: 池子名称 → pool_sim.Pool
+            batch_window: 微批处理的等待时间（秒）
+            max_batch: 单个批次的请求数上限
+            workers: 进程池大小，None 表示 CPU 核数，0 表示不使用进程池
+            offload_threshold: 流动性批次交给进程池的最小行数
+            cache_size: 报价缓存条目上限
+        """
+        if max_batch <= 0:
+            raise ValueError("max_batch must be positive")
+        self.pools = dict(pools or {})
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.workers = workers
+        self.offload_threshold = offload_threshold
+        self.requests = 0
+        self.coalesced = 0
+        self.batches = 0
+
+        self._cache = QuoteCache(cache_size)
+        self._inflight = {}  # 请求键 → 等待该结果的 Future 列表
+        self._pending = {"quote": [], "liquidity": []}  # 种类 → [(键, 参数)]
+        self._timers = {}  # 种类 → 定时刷新句柄
+        self._tasks = set()
+        self._process_pool = None
+        self._quote_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="quote")
+
+    # ---------- 请求合并与微批处理 ----------
+
+    def _submit(self, kind, key, item):
+        """
+        登记一个请求，返回调用方自己的 Future
+
+        相同的进行中请求只计算一次，结果分发给每个等待者。
+        每个调用方持有独立的 Future，取消其中一个不会影响其他等待者。
+        """
+        self.requests += 1
+        future = asyncio.get_running_loop().create_future()
+        waiters = self._inflight.get(key)
+        if waiters is not None:
+            self.coalesced += 1
+            waiters.append(future)
+            return future
+
+        self._inflight[key] = [future]
+        pending = self._pending[kind]
+        pending.append((key, item))
+        if len(pending) >= self.max_batch:
+            self._flush(kind)
+        elif kind not in self._timers:
+            self._timers[kind] = asyncio.get_running_loop().call_later(self.batch_window, self._flush, kind)
+        return future
+
+    def _flush(self, kind):
+        """取出当前的待处理请求，作为一个批次开始计算"""
+        timer = self._timers.pop(kind, None)
+        if timer is not None:
+            timer.cancel()
+        batch, self._pending[kind] = self._pending[kind], []
+        if not batch:
+            return
+        runner = self._run_quotes if kind == "quote" else self._run_liquidity
+        task = asyncio.get_running_loop().create_task(self._run(runner, batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, runner, batch):
+        """执行一个批次并把结果（或异常）分发给各个 Future"""
+        self.batches += 1
+        try:
+            results = await runner([item for _, item in batch])
+        except Exception as e:
+            results = [e] * len(batch)
+        for (key, _), result in zip(batch, results):
+            for future in self._inflight.pop(key):
+                if future.done():
+                    continue  # 调用方已取消
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    async def _run_quotes(self, items):
+        """
+        在报价线程中计算一批报价
+
+        同一池子、同一方向的请求合成一组，用一次 QuoteCache.quote_many 遍历求出
+        （命中缓存的金额不重复模拟）。整个批次在报价线程中基于同一个池子状态计算。
+        """
+        def compute():
+            results = [None] * len(items)
+            groups = {}
+            for index, (pool, amount_in, zero_for_one) in enumerate(items):
+                if amount_in <= 0:
+                    results[index] = InvalidAmountIn()
+                else:
+                    groups.setdefault((pool, zero_for_one), []).append(index)
+            for (pool, zero_for_one), indexes in groups.items():
+                try:
+                    quotes = self._cache.quote_many(pool, zero_for_one, [items[i][1] for i in indexes])
+                except Exception as e:
+                    quotes = [e] * len(indexes)
+                for index, result in zip(indexes, quotes):
+                    results[index] = ZeroLiquidity() if result is None else result
+            return results
+
+        return await asyncio.get_running_loop().run_in_executor(self._quote_thread, compute)
+
+    async def _run_liquidity(self, items):
+        """向量化计算；批次足够大时交给进程池"""
+        columns = {
+            name: np.array([item[i] for item in items], dtype=np.float64)
+            for i, name in enumerate(INPUT_COLUMNS)
+        }
+        if self.workers != 0 and len(items) >= self.offload_threshold:
+            if self._process_pool is None:
+                self._process_pool = ProcessPoolExecutor(self.workers)
+            rows = await asyncio.get_running_loop().run_in_executor(self._process_pool, _liquidity_rows, columns)
+        else:
+            rows = _liquidity_rows(columns)
+        return [ValueError("invalid position parameters") if row is None else row for row in rows]
+
+    # ---------- 公开接口 ----------
+
+    async def quote(self, pool, amount_in, zero_for_one):
+        """
+        获取交换报价
+
+        参数:
+            pool: 池子名称
+            amount_in: 输入金额
+            zero_for_one: 交换方向
+
+        返回:
+            quoter.QuoteResult
+        """
+        target = self.pools.get(pool)
+        if target is None:
+            raise InvalidPool(f"unknown pool {pool!r}")
+        # 池子状态变化后（version 改变）不与旧的进行中请求合并
+        key = ("quote", pool, target.version, amount_in, bool(zero_for_one))
+        return await self._submit("quote", key, (target, amount_in, bool(zero_for_one)))
+
+    async def liquidity(self, price_current, price_lower, price_upper, amount_eth, amount_usdc):
+        """
+        计算仓位的流动性与精确代币数量（与 calculate_liquidity 逐位一致）
+
+        返回:
+            字典，键为 unimath_batch.RESULT_COLUMNS
+        """
+        item = tuple(float(value) for value in (price_current, price_lower, price_upper, amount_eth, amount_usdc))
+        return await self._submit("liquidity", ("liquidity",) + item, item)
+
+    async def handle(self, request):
+        """
+        处理一个 JSON 请求对象
+
+        返回:
+            响应对象（result 或 error）
+        """
+        request_id = request.get("id") if isinstance(request, dict) else None
+        try:
+            if not isinstance(request, dict):
+                raise ValueError("request must be an object")
+            method = request.get("method")
+            params = request.get("params") or {}
+            if method == "quote":
+                result = await self.quote(params["pool"], int(params["amount_in"]), bool(params["zero_for_one"]))
+                result = result._asdict()
+            elif method == "liquidity":
+                result = await self.liquidity(*(params[name] for name in INPUT_COLUMNS))
+            elif method == "stats":
+                result = self.stats()
+            else:
+                raise ValueError(f"unknown method {method!r}")
+        except KeyError as e:
+            return {"id": request_id, "error": {"type": "KeyError", "message": f"missing parameter {e}"}}
+        except Exception as e:
+            return {"id": request_id, "error": {"type": type(e).__name__, "message": str(e)}}
+        return {"id": request_id, "result": result}
+
+    def stats(self):
+        """服务计数器"""
+        return {
+            "requests": self.requests,
+            "coalesced": self.coalesced,
+            "batches": self.batches,
+            "cache_hits": self._cache.hits,
+            "cache_misses": self._cache.misses,
+        }
+
+    # ---------- 网络 ----------
+
+    async def _handle_connection(self, reader, writer):
+        """每行一个请求，逐个并发处理；以 HTTP 请求行开头时按 HTTP 处理"""
+        tasks = set()
+        try:
+            first = await reader.readline()
+            if first.startswith((b"POST ", b"GET ", b"PUT ")):
+                await self._handle_http(first, reader, writer)
+                return
+
+            line = first
+            while line:
+                if line.strip():
+                    task = asyncio.create_task(self._respond(line, writer))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                line = await reader.readline()
+            if tasks:
+                await asyncio.gather(*tasks)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, line, writer):
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            response = {"id": None, "error": {"type": "JSONDecodeError", "message": str(e)}}
+        else:
+            response = await self.handle(request)
+        writer.write(json.dumps(response).encode() + b"\n")
+        await writer.drain()
+
+    async def _handle_http(self, request_line, reader, writer):
+        length = 0
+        while True:
+            header = await reader.readline()
+            if header in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = header.decode("latin-1").partition(":")
+            if name.strip().lower() == "content-length":
+                try:
+                    length = int(value)
+                except ValueError:
+                    length = -1
+
+        if not request_line.startswith(b"POST "):
+            status, body = "405 Method Not Allowed", {"error": {"type": "MethodNotAllowed", "message": "use POST"}}
+        elif length > _MAX_HTTP_BODY:
+            status, body = "413 Payload Too Large", {
+                "error": {"type": "PayloadTooLarge", "message": f"body exceeds {_MAX_HTTP_BODY} bytes"}
+            }
+        elif length < 0:
+            status, body = "400 Bad Request", {"error": {"type": "ValueError", "message": "invalid Content-Length"}}
+        else:
+            try:
+                payload = json.loads(await reader.readexactly(length))
+            except ValueError as e:
+                status, body = "400 Bad Request", {"error": {"type": "JSONDecodeError", "message": str(e)}}
+            else:
+                status = "200 OK"
+                if isinstance(payload, list):
+                    body = await asyncio.gather(*(self.handle(request) for request in payload))
+                else:
+                    body = await self.handle(payload)
+
+        data = json.dumps(body).encode()
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode() + data
+        )
+        await writer.drain()
+
+    async def serve_tcp(self, host="127.0.0.1", port=8765):
+        """启动 TCP 服务，返回 asyncio.Server"""
+        return await asyncio.start_server(self._handle_connection, host, port)
+
+    async def serve_unix(self, path):
+        """启动 Unix 套接字服务，返回 asyncio.Server"""
+        return await asyncio.start_unix_server(self._handle_connection, path)
+
+    def close(self):
+        """关闭工作线程与进程池"""
+        self._quote_thread.shutdown(wait=False)
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False)
+            self._process_pool = None
+
+
+# ============================================================
+# 命令行接口
+# ============================================================
+
+def load_pools(specs):
+    """
+    从 NAME=EVENTS[:FEE[:SPACING]] 形式的参数加载池子（回放事件文件到最新区块）
+
+    参数:
+        specs: 字符串列表，例如 ["WETH/USDC=events.jsonl:3000"]；
+            省略 FEE 时为无手续费池子，省略 SPACING 时取手续费档位的间距
+
+    返回:
+        池子名称 → Pool
+    """
+    from event_replay import PoolReplayer
+
+    pools = {}
+    for spec in specs:
+        name, sep, path = spec.partition("=")
+        if not sep:
+            raise ValueError(f"expected NAME=EVENTS[:FEE[:SPACING]], got {spec!r}")
+        # 从右侧取出整数形式的 FEE / SPACING，路径本身可以包含冒号
+        numbers = []
+        while len(numbers) < 2:
+            head, colon, tail = path.rpartition(":")
+            if not colon or not tail.isdigit():
+                break
+            numbers.insert(0, int(tail))
+            path = head
+        fee = numbers[0] if numbers else 0
+        tick_spacing = numbers[1] if len(numbers) > 1 else None
+        pools[name] = PoolReplayer(path, fee=fee, tick_spacing=tick_spacing).replay_to()
+    return pools
+
+
+async def _write_metrics(prof, path, interval):
+    """定期导出性能计数（.json 结尾时为 JSON，否则为 Prometheus 文本格式）"""
+    while True:
+        await asyncio.sleep(interval)
+        if path.endswith(".json"):
+            prof.write_json(path)
+        else:
+            prof.write_prometheus(path)
+
+
+async def _serve(args):
+    server = QuoteServer(
+        load_pools(args.pool),
+        batch_window=args.batch_window,
+        max_batch=args.max_batch,
+        workers=args.workers,
+    )
+    if args.unix:
+        listener = await server.serve_unix(args.unix)
+        where = args.unix
+    else:
+        listener = await server.serve_tcp(args.host, args.port)
+        where = f"{args.host}:{args.port}"
+    print(f"✅ 报价服务已启动: {where}（{len(server.pools)} 个池子）")
+
+    metrics = None
+    with contextlib.ExitStack() as stack:
+        if args.metrics:
+            prof = stack.enter_context(profiling.profile(slow_threshold=args.slow_quote))
+            metrics = asyncio.create_task(_write_metrics(prof, args.metrics, args.metrics_interval))
+        try:
+            async with listener:
+                await listener.serve_forever()
+        finally:
+            if metrics is not None:
+                metrics.cancel()
+            server.close()
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="asyncio 报价服务")
+    parser.add_argument("--pool", action="append", default=[], metavar="NAME=EVENTS[:FEE[:SPACING]]",
+                        help="池子名称、事件文件与可选的手续费率 / Tick 间距（可重复）")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", metavar="PATH", help="监听 Unix 套接字而不是 TCP")
+    parser.add_argument("--batch-window", type=float, default=DEFAULT_BATCH_WINDOW, help="微批处理等待时间（秒）")
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH, help="单个批次的请求数上限")
+    parser.add_argument("--workers", type=int, default=None, help="进程池大小（0 表示不使用进程池）")
+    parser.add_argument("--metrics", metavar="PATH", help="定期导出交换热点路径的性能计数（Prometheus 文本或 .json）")
+    parser.add_argument("--metrics-interval", type=float, default=15, help="导出间隔（秒）")
+    parser.add_argument("--slow-quote", type=float, default=None, metavar="SECONDS",
+                        help="记录耗时超过该秒数的报价明细（导出到 JSON）")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        print("\n已停止")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+UniswapV3Quoter 链下报价与报价缓存
+
+quote 对应 src/UniswapV3Quoter.sol 的 quote：在池子模拟器上执行一次
+不修改状态的交换，返回输出金额和交换后的价格与 Tick。
+
+quote_many 一次给出同一方向多个金额的报价：金额排序后只遍历一次已初始化的 Tick，
+累计输入越过某个金额时就地完成该金额的最后一步。100 档报价阶梯的开销
+约等于一次最大金额的交换，加上每个金额各自的最后一步。
+
+QuoteCache 在 quote 之上提供有容量上限的 LRU 缓存，键为
+(id(pool), zero_for_one, amount_in, sqrtPriceX96, liquidity)。池子发生
+Mint 或 Swap（Pool.version 变化）后，该池子的缓存条目全部失效。缓存只持有
+池子的弱引用，池子被回收后它的条目在下一次访问缓存时清除，长期运行、不断
+替换池子的服务不会因此泄漏内存。
+路由器在同一区块内对相同状态反复询问相同金额时，可以直接命中缓存。
+QuoteCache.quote_many 只对未命中的金额做一次 quote_many 遍历。
+
+在 profiling.profile() 中，quote_many 与 simulate_swap 一样记录步数、跨越的 Tick、
+位图查找和分阶段耗时；一次遍历计为一次交换，超过阈值时记入慢交换明细。
+
+使用方法:
+    from quoter import QuoteCache
+
+    cache = QuoteCache(maxsize=4096)
+    amount_out, sqrt_price_x96_after, tick_after = cache.quote(pool, 42 * 10**18, False)
+
+    ladder = quote_many(pool, False, [10**18 * k for k in range(1, 101)])
+
+参考文档: docs/2SecondSwap/15-Quoter合约实现.md
+"""
+
+import weakref
+from collections import OrderedDict, namedtuple
+
+import profiling
+from pool_sim import ZeroLiquidity
+from tickmath import MAX_TICK, MIN_TICK, get_sqrt_ratio_at_tick, get_tick_at_sqrt_ratio
+from v3math import add_liquidity, compute_swap_step
+
+
+# ============================================================
+# 错误定义
+# ============================================================
+
+class InvalidPool(ValueError):
+    """无效的池子（对应 UniswapV3Quoter.InvalidPool）"""
+
+
+class InvalidAmountIn(ValueError):
+    """无效的输入金额（对应 UniswapV3Quoter.InvalidAmountIn）"""
+
+
+# ============================================================
+# 报价
+# ============================================================
+
+QuoteResult = namedtuple("QuoteResult", ["amount_out", "sqrt_price_x96_after", "tick_after"])
+
+
+def quote(pool, amount_in, zero_for_one):
+    """
+    获取交换报价（不修改池子状态）
+
+    参数:
+        pool: pool_sim.Pool 实例
+        amount_in: 输入金额
+        zero_for_one: 交换方向，True 表示用 token0 换 token1
+
+    返回:
+        QuoteResult(amount_out, sqrt_price_x96_after, tick_after)
+    """
+    if pool is None:
+        raise InvalidPool()
+    if amount_in <= 0:
+        raise InvalidAmountIn()
+
+    result = pool.simulate_swap(zero_for_one, amount_in)
+    return QuoteResult(result.amount_out, result.sqrt_price_x96, result.tick)
+
+
+def quote_many(pool, zero_for_one, amounts):
+    """
+    同一方向多个输入金额的报价，只遍历一次 Tick
+
+    金额按升序处理。到达区间边界的一步对所有剩余金额都相同，只计算一次；
+    某个金额的剩余部分不足以到达边界时，在当前状态上计算它的最后一步，
+    共享的状态继续为更大的金额前进。每个结果与单独调用 quote 完全一致。
+
+    参数:
+        pool: pool_sim.Pool 实例
+        zero_for_one: 交换方向，True 表示用 token0 换 token1
+        amounts: 输入金额序列
+
+    返回:
+        与 amounts 顺序相同的 QuoteResult 列表；流动性不足以完成交换的金额
+        （quote 会抛出 ZeroLiquidity）对应 None
+    """
+    if pool is None:
+        raise InvalidPool()
+    if any(amount <= 0 for amount in amounts):
+        raise InvalidAmountIn()
+
+    if pool.skip_empty_words:
+        find_next = pool.tick_bitmap.next_initialized_tick
+    else:
+        find_next = pool.tick_bitmap.next_initialized_tick_within_one_word
+    step, sqrt_at_tick, tick_at_sqrt = compute_swap_step, get_sqrt_ratio_at_tick, get_tick_at_sqrt_ratio
+    liquidity_net = pool.ticks.liquidity_net
+
+    # 与 simulate_swap 相同：启用性能计数时换成计时版本
+    prof = profiling.active
+    if prof is not None:
+        swap, (find_next, step, sqrt_at_tick, tick_at_sqrt, liquidity_net) = prof.swap_hooks(
+            pool, find_next, step, sqrt_at_tick, tick_at_sqrt, liquidity_net
+        )
+    try:
+        return _quote_many(pool, zero_for_one, amounts, find_next, step, sqrt_at_tick, tick_at_sqrt, liquidity_net)
+    finally:
+        if prof is not None:
+            prof.end_swap(swap)
+
+
+def _quote_many(pool, zero_for_one, amounts, find_next, step, sqrt_at_tick, tick_at_sqrt, liquidity_net):
+    """quote_many 的 Tick 遍历，使用传入的（可能带计时的）查找与数学函数"""
+    results = [None] * len(amounts)
+    order = sorted(range(len(amounts)), key=amounts.__getitem__)
+    sqrt_price_x96, tick, liquidity = pool.sqrt_price_x96, pool.tick, pool.liquidity
+    amount_used = 0  # 共享路径上已消耗的输入
+    amount_out = 0  # 共享路径上已得到的输出
+    target = None  # 当前区间的 (next_tick, initialized, sqrtP_next)
+
+    k = 0
+    while k < len(order) and liquidity > 0:
+        amount_remaining = amounts[order[k]] - amount_used
+        if amount_remaining == 0:
+            # 与上一个金额相同，或上一步恰好用完
+            results[order[k]] = QuoteResult(amount_out, sqrt_price_x96, tick)
+            k += 1
+            continue
+
+        if target is None:
+            next_tick, initialized = find_next(tick, pool.tick_spacing, zero_for_one)
+            next_tick = max(MIN_TICK, min(MAX_TICK, next_tick))
+            target = (next_tick, initialized, sqrt_at_tick(next_tick))
+        next_tick, initialized, sqrt_price_next_x96 = target
+
+        sqrt_price_after, step_in, step_out = step(
+            sqrt_price_x96, sqrt_price_next_x96, liquidity, amount_remaining, zero_for_one, pool.fee
+        )
+
+        if sqrt_price_after == sqrt_price_next_x96:
+            # 到达区间边界：对当前及更大的金额都一样，推进共享状态
+            amount_used += step_in
+            amount_out += step_out
+            sqrt_price_x96 = sqrt_price_after
+            if initialized:
+                liquidity_delta = liquidity_net(next_tick)
+                liquidity = add_liquidity(liquidity, -liquidity_delta if zero_for_one else liquidity_delta)
+            tick = next_tick - 1 if zero_for_one else next_tick
+            target = None
+            continue
+
+        # 当前金额在这个区间内结束
+        if step_in == 0 and sqrt_price_after == sqrt_price_x96:
+            # 剩余金额太小，已经无法移动价格
+            results[order[k]] = QuoteResult(amount_out, sqrt_price_x96, tick)
+        elif step_in == amount_remaining:
+            results[order[k]] = QuoteResult(
+                amount_out + step_out, sqrt_price_after, tick_at_sqrt(sqrt_price_after)
+            )
+        else:
+            # 向上取整留下的零头：按 simulate_swap 的循环从这一步之后继续
+            state = (sqrt_price_after, tick_at_sqrt(sqrt_price_after), liquidity)
+            try:
+                rest = pool.simulate_swap(zero_for_one, amount_remaining - step_in, state)
+            except ZeroLiquidity:
+                rest = None
+            if rest is not None:
+                results[order[k]] = QuoteResult(amount_out + step_out + rest.amount_out, rest.sqrt_price_x96, rest.tick)
+        k += 1
+
+    return results
+
+
+# ============================================================
+# 报价缓存
+# ============================================================
+
+class QuoteCache:
+    """
+    按池子状态失效的 LRU 报价缓存
+
+    属性:
+        maxsize: 缓存条目上限
+        hits / misses: 命中与未命中次数
+    """
+
+    def __init__(self, maxsize=4096):
+        """
+        参数:
+            maxsize: 缓存条目上限
+        """
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._pool_keys = {}  # id(pool) → 该池子的缓存键集合
+        self._pools = {}  # id(pool) → (池子的弱引用, 缓存条目对应的 Pool.version)
+        self._collected = []  # 已被回收的池子 id（弱引用回调只记录，下次访问缓存时清除）
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _sync(self, pool):
+        """池子发生过 Mint / Swap（version 变化）时，该池子旧的报价全部失效"""
+        if pool is None:
+            raise InvalidPool()
+        while self._collected:
+            key = self._collected.pop()
+            ref = self._pools.get(key)
+            if ref is not None and ref[0]() is None:
+                self._forget(key)
+
+        key = id(pool)
+        ref = self._pools.get(key)
+        # 弱引用失效说明 id 已被新的池子复用，旧条目同样作废
+        if ref is None or ref[0]() is not pool or ref[1] != pool.version:
+            self._forget(key)
+            self._pools[key] = (weakref.ref(pool, lambda _, key=key: self._collected.append(key)), pool.version)
+
+    def _forget(self, key):
+        """清除 id 为 key 的池子的全部条目"""
+        for entry in self._pool_keys.pop(key, ()):
+            del self._entries[entry]
+        self._pools.pop(key, None)
+
+    def _lookup(self, key):
+        result = self._entries.get(key)
+        if result is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return result
+
+    def _store(self, key, result):
+        self._entries[key] = result
+        self._pool_keys.setdefault(key[0], set()).add(key)
+        while len(self._entries) > self.maxsize:
+            old_key, _ = self._entries.popitem(last=False)
+            self._pool_keys[old_key[0]].discard(old_key)
+
+    def quote(self, pool, amount_in, zero_for_one):
+        """
+        获取交换报价，优先使用缓存
+
+        参数与返回值同 quote()
+        """
+        self._sync(pool)
+        key = (id(pool), zero_for_one, amount_in, pool.sqrt_price_x96, pool.liquidity)
+        result = self._lookup(key)
+        if result is not None:
+            return result
+
+        self.misses += 1
+        result = quote(pool, amount_in, zero_for_one)
+        self._store(key, result)
+        return result
+
+    def quote_many(self, pool, zero_for_one, amounts):
+        """
+        批量报价，优先使用缓存：未命中的金额用一次 quote_many 遍历计算后写入缓存
+
+        参数与返回值同 quote_many()
+        """
+        self._sync(pool)
+        keys = [(id(pool), zero_for_one, amount, pool.sqrt_price_x96, pool.liquidity) for amount in amounts]
+        results = [self._lookup(key) for key in keys]
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            self.misses += len(missing)
+            computed = quote_many(pool, zero_for_one, [amounts[i] for i in missing])
+            for i, result in zip(missing, computed):
+                results[i] = result
+                if result is not None:
+                    self._store(keys[i], result)
+        return results
+
+    def invalidate(self, pool=None):
+        """
+        使缓存失效
+
+        参数:
+            pool: 只清除该池子的条目；None 表示清空全部缓存
+        """
+        if pool is None:
+            self._entries.clear()
+            self._pool_keys.clear()
+            self._pools.clear()
+            return
+        self._forget(id(pool))
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+多池路由：单跳 / 多跳路径搜索与并行池拆单
+
+UniswapV3Manager 只能在单个池子上交换。Router 在一组 pool_sim.Pool 上
+搜索最优路径，交换金额全部由链下交换内核（Pool.simulate_swap）精确计算。
+
+    - 路径搜索：在代币图上枚举不超过 max_hops 跳的简单路径，先用各跳的
+      即时价格（零金额时扣除手续费后的边际汇率）估算并排序，只对前 top_k 条路径做精确模拟
+    - 拆单：同一代币对的多个池子视为一跳中的并行边。最优拆分使各池子交换后
+      扣除手续费的边际汇率相等（池子价格 × (1 - fee)），因此对共同的目标边际汇率求根，
+      每个池子的目标价格由边际汇率去掉手续费得到，达到目标价格所需的输入金额
+      （扣费前的金额加上手续费）由 swap_solver.amount_to_price 逐个 Tick 解析求出，
+      不需要对拆分比例做穷举
+
+池子必须设置 token0 / token1（任意可比较、可哈希的标识）。
+
+使用方法:
+    from router import Router
+
+    router = Router(pools)
+    route = router.route("WETH", "USDC", 10 * 10**18)
+    print(route.amount_out)
+    for hop in route.hops:
+        for leg in hop:
+            print(leg.pool, leg.amount_in, leg.amount_out, leg.sqrt_price_x96_after)
+
+参考文档: docs/3MultiPoolSwap/18-跨Tick交换.md
+"""
+
+import heapq
+import math
+from collections import namedtuple
+
+from pool_sim import ZeroLiquidity
+from swap_solver import amount_to_price
+from tickmath import MIN_SQRT_RATIO, MAX_SQRT_RATIO, Q96
+from v3math import FEE_DENOMINATOR
+
+
+# ============================================================
+# 错误定义
+# ============================================================
+
+class NoRoute(ValueError):
+    """找不到可以完成交换的路径"""
+
+
+# ============================================================
+# 结果类型
+# ============================================================
+
+Leg = namedtuple("Leg", [
+    "pool", "token_in", "token_out", "zero_for_one", "amount_in", "amount_out", "sqrt_price_x96_after"
+])
+Route = namedtuple("Route", ["path", "amount_in", "amount_out", "hops"])
+
+# 拆单求解的迭代上限与收敛容差（总输入超出 amount_in 的比例）
+_MAX_ITERATIONS = 64
+_SPLIT_TOLERANCE = 1e-9
+
+
+# ============================================================
+# 单池工具
+# ============================================================
+
+def _log_fee(fee):
+    """手续费对边际汇率的影响 log(1 - fee)"""
+    return math.log1p(-fee / FEE_DENOMINATOR)
+
+
+def _log_rate(pool, zero_for_one):
+    """池子当前扣除手续费后的边际汇率（每单位输入换得的输出）的自然对数"""
+    log_sqrt = math.log(pool.sqrt_price_x96) - math.log(Q96)
+    return (2 * log_sqrt if zero_for_one else -2 * log_sqrt) + _log_fee(pool.fee)
+
+
+def _sqrt_price_at_log_rate(log_rate, zero_for_one, fee=0):
+    """_log_rate 的反函数（fee 为池子的手续费率），结果限制在有效价格范围内"""
+    log_rate -= _log_fee(fee)
+    log_sqrt = (log_rate if zero_for_one else -log_rate) / 2
+    sqrt_price = int(math.exp(min(log_sqrt, 100.0)) * Q96)
+    return max(MIN_SQRT_RATIO, min(MAX_SQRT_RATIO, sqrt_price))
+
+
+def split_amount(pools, zero_for_one, amount_in):
+    """
+    在并行池子之间拆分输入金额，使交换后扣除手续费的边际汇率相等
+
+    参数:
+        pools: 同一代币对的池子列表
+        zero_for_one: 每个池子对应的交换方向（与 pools 一一对应）
+        amount_in: 总输入金额
+
+    返回:
+        每个池子的输入金额列表，总和等于 amount_in
+    """
+    if len(pools) == 1:
+        return [amount_in]
+
+    rates = [_log_rate(pool, zfo) for pool, zfo in zip(pools, zero_for_one)]
+
+    def inputs_at(log_rate):
+        amounts = []
+        for pool, zfo, rate in zip(pools, zero_for_one, rates):
+            if rate <= log_rate:
+                amounts.append(0)
+            else:
+                amounts.append(amount_to_price(pool, zfo, _sqrt_price_at_log_rate(log_rate, zfo, pool.fee)).amount_in)
+        return amounts
+
+    # 目标边际汇率在 (low, high] 中：high 处无需输入，向下扩展 low 直到输入足够
+    high = max(rates)
+    width = 1e-4
+    low = high - width
+    amounts = inputs_at(low)
+    while sum(amounts) < amount_in:
+        width *= 4
+        if width > 200:
+            raise NoRoute("insufficient liquidity")
+        low = high - width
+        amounts = inputs_at(low)
+
+    # 在 [low, high] 上用 Illinois 法（带区间保持的割线法）求 sum(inputs) = amount_in，
+    # 总输入关于对数汇率分段光滑，通常几次迭代即可收敛
+    best = amounts
+    f_low, f_high = float(sum(amounts) - amount_in), float(-amount_in)
+    tolerance = amount_in * _SPLIT_TOLERANCE
+    side = 0
+    for _ in range(_MAX_ITERATIONS):
+        if f_low <= tolerance:
+            break
+        middle = (low * f_high - high * f_low) / (f_high - f_low)
+        if not low < middle < high:
+            middle = (low + high) / 2
+        amounts = inputs_at(middle)
+        f_middle = float(sum(amounts) - amount_in)
+        if f_middle >= 0:
+            low, f_low, best = middle, f_middle, amounts
+            if side == 1:
+                f_high /= 2
+            side = 1
+        else:
+            high, f_high = middle, f_middle
+            if side == -1:
+                f_low /= 2
+            side = -1
+
+    # best 的总和略大于 amount_in，按比例缩减后把取整余数给最大的一份
+    total = sum(best)
+    split = [amount * amount_in // total for amount in best]
+    split[max(range(len(split)), key=split.__getitem__)] += amount_in - sum(split)
+    return split
+
+
+# ============================================================
+# 路由器
+# ============================================================
+
+class Router:
+    """
+    多池路由器
+
+    属性:
+        pools: 参与路由的池子列表
+    """
+
+    def __init__(self, pools):
+        """
+        参数:
+            pools: pool_sim.Pool 列表，必须设置 token0 / token1
+        """
+        self.pools = list(pools)
+        # (token_in, token_out) → [(pool, zero_for_one)]
+        self._edges = {}
+        # token → 相邻代币集合
+        self._neighbors = {}
+        for pool in self.pools:
+            if pool.token0 is None or pool.token1 is None:
+                raise ValueError("pool tokens must be set for routing")
+            for token_in, token_out, zero_for_one in (
+                (pool.token0, pool.token1, True),
+                (pool.token1, pool.token0, False),
+            ):
+                self._edges.setdefault((token_in, token_out), []).append((pool, zero_for_one))
+                self._neighbors.setdefault(token_in, set()).add(token_out)
+
+    def paths(self, token_in, token_out, max_hops=3):
+        """
+        枚举不超过 max_hops 跳的简单代币路径
+
+        返回:
+            代币路径列表，例如 [("WETH", "USDC"), ("WETH", "DAI", "USDC")]
+        """
+        found = []
+        stack = [(token_in,)]
+        while stack:
+            path = stack.pop()
+            for token in self._neighbors.get(path[-1], ()):
+                if token == token_out:
+                    found.append(path + (token,))
+                elif token not in path and len(path) < max_hops:
+                    stack.append(path + (token,))
+        return found
+
+    def _estimate(self, path):
+        """路径的即时汇率估算（各跳最优池子扣除手续费后的边际汇率之积的对数）"""
+        total = 0.0
+        for token_in, token_out in zip(path, path[1:]):
+            rates = [_log_rate(pool, zfo) for pool, zfo in self._edges[(token_in, token_out)] if pool.liquidity]
+            if not rates:
+                return -math.inf
+            total += max(rates)
+        return total
+
+    def _hop(self, token_in, token_out, amount_in, split):
+        """执行一跳：拆单或选择单个最优池子，返回 Leg 列表"""
+        edges = [(pool, zfo) for pool, zfo in self._edges[(token_in, token_out)] if pool.liquidity]
+        if not edges:
+            raise NoRoute(f"no liquidity for {token_in} -> {token_out}")
+
+        if split and len(edges) > 1:
+            amounts = split_amount([pool for pool, _ in edges], [zfo for _, zfo in edges], amount_in)
+            legs = []
+            for (pool, zfo), amount in zip(edges, amounts):
+                if amount:
+                    result = pool.simulate_swap(zfo, amount)
+                    legs.append(Leg(pool, token_in, token_out, zfo, amount, result.amount_out, result.sqrt_price_x96))
+            return legs
+
+        best = None
+        for pool, zfo in edges:
+            try:
+                result = pool.simulate_swap(zfo, amount_in)
+            except ZeroLiquidity:
+                continue
+            if best is None or result.amount_out > best.amount_out:
+                best = Leg(pool, token_in, token_out, zfo, amount_in, result.amount_out, result.sqrt_price_x96)
+        if best is None:
+            raise NoRoute(f"insufficient liquidity for {token_in} -> {token_out}")
+        return [best]
+
+    def quote_path(self, path, amount_in, split=True):
+        """
+        沿指定代币路径精确计算交换结果
+
+        参数:
+            path: 代币路径
+            amount_in: 输入金额
+            split: 是否在并行池子之间拆单
+
+        返回:
+            Route
+        """
+        hops = []
+        amount = amount_in
+        for token_in, token_out in zip(path, path[1:]):
+            legs = self._hop(token_in, token_out, amount, split)
+            hops.append(legs)
+            amount = sum(leg.amount_out for leg in legs)
+        return Route(tuple(path), amount_in, amount, hops)
+
+    def route(self, token_in, token_out, amount_in, max_hops=3, split=True, top_k=4):
+        """
+        搜索最优路径
+
+        参数:
+            token_in: 输入代币
+            token_out: 输出代币
+            amount_in: 输入金额
+            max_hops: 最大跳数
+            split: 是否在并行池子之间拆单
+            top_k: 按即时汇率排序后精确模拟的路径数（None 表示全部模拟）
+
+        返回:
+            输出金额最大的 Route
+        """
+        if amount_in <= 0:
+            raise ValueError("amount_in must be positive")
+
+        candidates = self.paths(token_in, token_out, max_hops)
+        if top_k is not None:
+            candidates = heapq.nlargest(top_k, candidates, key=self._estimate)
+
+        best = None
+        for path in candidates:
+            try:
+                route = self.quote_path(path, amount_in, split)
+            except (NoRoute, ZeroLiquidity):
+                continue
+            if best is None or route.amount_out > best.amount_out:
+                best = route
+        if best is None:
+            raise NoRoute(f"no route from {token_in} to {token_out}")
+        return best
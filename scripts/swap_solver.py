@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+交换反向求解：达到目标价格所需的金额与滑点约束下的最大金额
+
+price_tick_demo.py 的示例 3 通过反复报价来回答"多少输入能把价格推到 P"
+或"滑点不超过 X% 的最大交易量"。这里改为沿交换方向只遍历一次已初始化的
+Tick，在每个流动性恒定的区间内解析求解：
+
+    - amount_to_price / amount_to_tick：区间内所需输入就是 calcAmount0Delta /
+      calcAmount1Delta（向上取整），与 getNextSqrtPriceFromInput 的取整方向
+      配合，得到的是使交换到达目标价格的最小输入金额
+    - max_amount_for_price_impact：交换后的边际价格不低于当前价格的 (1 - X%)
+    - max_amount_within_slippage：平均成交价不低于当前价格的 (1 - X%)。
+      区间内累计输入、输出分别是 1/√P 和 √P 的线性函数，约束取等号时
+      是关于 √P 的二次方程，求根后只在根附近用单步交换做整数修正
+
+所有金额都按交换内核（Pool.simulate_swap）的取整规则计算，输入金额包含池子的手续费，
+simulate_swap(zero_for_one, amount_in) 的结果与返回值一致，复杂度为 O(跨越的 Tick 数)。
+
+使用方法:
+    from swap_solver import amount_to_price, max_amount_within_slippage
+
+    amount_in, amount_out, sqrt_price_after, exhausted = amount_to_price(pool, False, target_sqrt_price_x96)
+    solution = max_amount_within_slippage(pool, zero_for_one=True, slippage=0.005)
+
+参考文档: docs/3MultiPoolSwap/18-跨Tick交换.md
+"""
+
+import math
+from collections import namedtuple
+from fractions import Fraction
+
+from tickmath import MIN_TICK, MAX_TICK, MIN_SQRT_RATIO, MAX_SQRT_RATIO, Q96, get_sqrt_ratio_at_tick
+from v3math import (
+    FEE_DENOMINATOR,
+    add_liquidity,
+    amount_with_fee,
+    calc_amount0_delta,
+    calc_amount1_delta,
+    compute_swap_step
+)
+
+
+# ============================================================
+# 结果类型
+# ============================================================
+
+Solution = namedtuple("Solution", ["amount_in", "amount_out", "sqrt_price_x96", "exhausted"])
+Solution.__doc__ = """
+反向求解结果
+
+amount_in / amount_out: 交换的输入与输出金额（与 simulate_swap 一致）
+sqrt_price_x96: 交换后的价格
+exhausted: 流动性在到达目标前耗尽，结果为可交换的最大金额
+"""
+
+
+# ============================================================
+# 内部工具
+# ============================================================
+
+def _ranges(pool, zero_for_one):
+    """
+    沿交换方向逐个产出流动性恒定的区间
+
+    与交换内核相同地查找下一个已初始化的 Tick 并处理 Tick 交叉。
+
+    返回:
+        生成器，每次产出 (区间起点价格, 区间终点价格, 流动性)
+    """
+    sqrt_price_x96 = pool.sqrt_price_x96
+    tick = pool.tick
+    liquidity = pool.liquidity
+
+    while True:
+        if pool.skip_empty_words:
+            next_tick, initialized = pool.tick_bitmap.next_initialized_tick(
+                tick, pool.tick_spacing, zero_for_one
+            )
+        else:
+            next_tick, initialized = pool.tick_bitmap.next_initialized_tick_within_one_word(
+                tick, pool.tick_spacing, zero_for_one
+            )
+        next_tick = max(MIN_TICK, min(MAX_TICK, next_tick))
+        sqrt_price_next_x96 = get_sqrt_ratio_at_tick(next_tick)
+
+        yield sqrt_price_x96, sqrt_price_next_x96, liquidity
+
+        if sqrt_price_next_x96 in (MIN_SQRT_RATIO, MAX_SQRT_RATIO):
+            return
+        if initialized:
+            liquidity_delta = pool.ticks.liquidity_net(next_tick)
+            liquidity = add_liquidity(liquidity, -liquidity_delta if zero_for_one else liquidity_delta)
+        tick = next_tick - 1 if zero_for_one else next_tick
+        sqrt_price_x96 = sqrt_price_next_x96
+
+
+def _range_amounts(sqrt_price_a_x96, sqrt_price_b_x96, liquidity, zero_for_one, fee_pips=0):
+    """完整穿过一个区间的 (含手续费的输入, 输出)，取整方向与 computeSwapStep 一致"""
+    if zero_for_one:
+        return (amount_with_fee(calc_amount0_delta(sqrt_price_a_x96, sqrt_price_b_x96, liquidity), fee_pips),
+                calc_amount1_delta(sqrt_price_a_x96, sqrt_price_b_x96, liquidity, False))
+    return (amount_with_fee(calc_amount1_delta(sqrt_price_a_x96, sqrt_price_b_x96, liquidity), fee_pips),
+            calc_amount0_delta(sqrt_price_a_x96, sqrt_price_b_x96, liquidity, False))
+
+
+def _target_after_move(pool, zero_for_one, fraction):
+    """交换方向上价格变化 fraction（0 到 1）后的目标 √P"""
+    factor = math.sqrt(1 - fraction)
+    if not zero_for_one:
+        factor = 1 / factor
+    # 浮点系数转为 2^64 定点数，避免把 160 位整数转成浮点数
+    target = pool.sqrt_price_x96 * int(factor * 2**64) >> 64
+    return max(MIN_SQRT_RATIO, min(MAX_SQRT_RATIO, target))
+
+
+# ============================================================
+# 单区间交换
+# ============================================================
+
+def swap_in_range(sqrt_price_x96, sqrt_price_next_x96, liquidity, amount, zero_for_one, fee_pips=0):
+    """
+    在流动性恒定的单个区间内交换 amount，与交换内核在该区间内的循环一致
+
+    参数:
+        sqrt_price_x96: 起点价格
+        sqrt_price_next_x96: 区间终点价格（不会越过）
+        liquidity: 区间流动性
+        amount: 输入金额（含手续费）
+        zero_for_one: 交换方向
+        fee_pips: 手续费率（百万分之一）
+
+    返回:
+        (交换后价格, 实际输入, 输出)
+    """
+    amount_in = amount_out = 0
+    while amount > amount_in:
+        start = sqrt_price_x96
+        sqrt_price_x96, step_in, step_out = compute_swap_step(
+            sqrt_price_x96, sqrt_price_next_x96, liquidity, amount - amount_in, zero_for_one, fee_pips
+        )
+        amount_in += step_in
+        amount_out += step_out
+        if step_in == 0 and sqrt_price_x96 == start:
+            break
+    return sqrt_price_x96, amount_in, amount_out
+
+
+# ============================================================
+# 到达目标价格
+# ============================================================
+
+def amount_to_price(pool, zero_for_one, sqrt_price_target_x96):
+    """
+    计算把池子价格推到目标价格所需的最小输入金额
+
+    参数:
+        pool: pool_sim.Pool
+        zero_for_one: 交换方向，True 时价格下降
+        sqrt_price_target_x96: 目标价格（Q64.96）
+
+    返回:
+        Solution。目标价格不在交换方向上时返回零金额
+    """
+    if (sqrt_price_target_x96 >= pool.sqrt_price_x96) if zero_for_one else (sqrt_price_target_x96 <= pool.sqrt_price_x96):
+        return Solution(0, 0, pool.sqrt_price_x96, False)
+
+    fee = pool.fee
+    amount_in = amount_out = 0
+    for sqrt_price_x96, sqrt_price_next_x96, liquidity in _ranges(pool, zero_for_one):
+        if liquidity == 0:
+            return Solution(amount_in, amount_out, sqrt_price_x96, True)
+
+        beyond = (sqrt_price_target_x96 <= sqrt_price_next_x96) if zero_for_one \
+            else (sqrt_price_target_x96 >= sqrt_price_next_x96)
+        if not beyond:
+            # 目标在本区间内：最小输入是到目标价格的 delta（向上取整）
+            need = _range_amounts(sqrt_price_x96, sqrt_price_target_x96, liquidity, zero_for_one, fee)[0]
+            sqrt_price_after, step_in, step_out = swap_in_range(
+                sqrt_price_x96, sqrt_price_next_x96, liquidity, need, zero_for_one, fee
+            )
+            return Solution(amount_in + step_in, amount_out + step_out, sqrt_price_after, False)
+
+        step_in, step_out = _range_amounts(sqrt_price_x96, sqrt_price_next_x96, liquidity, zero_for_one, fee)
+        amount_in += step_in
+        amount_out += step_out
+        if sqrt_price_next_x96 == sqrt_price_target_x96:
+            return Solution(amount_in, amount_out, sqrt_price_next_x96, False)
+
+    return Solution(amount_in, amount_out, sqrt_price_next_x96, True)
+
+
+def amount_to_tick(pool, zero_for_one, tick):
+    """
+    计算把池子价格推到 getSqrtRatioAtTick(tick) 所需的最小输入金额
+
+    参数:
+        pool: pool_sim.Pool
+        zero_for_one: 交换方向
+        tick: 目标 Tick
+
+    返回:
+        Solution
+    """
+    return amount_to_price(pool, zero_for_one, get_sqrt_ratio_at_tick(tick))
+
+
+def max_amount_for_price_impact(pool, zero_for_one, max_impact):
+    """
+    计算交换后边际价格变化不超过 max_impact 的最大输入金额
+
+    参数:
+        pool: pool_sim.Pool
+        zero_for_one: 交换方向
+        max_impact: 允许的价格变化比例（例如 0.01 表示 1%），按输出代币计价
+
+    返回:
+        Solution（amount_in 为到达边界价格的最小金额，即不越过边界的最大金额）
+    """
+    if not 0 < max_impact < 1:
+        raise ValueError("max_impact must be in (0, 1)")
+    return amount_to_price(pool, zero_for_one, _target_after_move(pool, zero_for_one, max_impact))
+
+
+# ============================================================
+# 平均成交价约束
+# ============================================================
+
+def max_amount_within_slippage(pool, zero_for_one, slippage):
+    """
+    计算平均成交价相对当前价格的滑点不超过 slippage 的最大输入金额
+
+    约束: amount_out / amount_in >= 当前价格 × (1 - slippage)，
+    价格按"每单位输入换得的输出"计。
+
+    参数:
+        pool: pool_sim.Pool
+        zero_for_one: 交换方向
+        slippage: 允许的滑点比例（例如 0.005 表示 0.5%）
+
+    返回:
+        Solution
+    """
+    if not 0 < float(slippage) < 1:
+        raise ValueError("slippage must be in (0, 1)")
+
+    # 精确的整数判定：out / in >= (1 - slippage) × spot，slippage 按十进制字面值取有理数
+    bound = 1 - Fraction(str(slippage))
+    sqrt_price_sq = pool.sqrt_price_x96 ** 2
+    if zero_for_one:
+        lhs_scale, rhs_scale = Q96 ** 2 * bound.denominator, bound.numerator * sqrt_price_sq
+    else:
+        lhs_scale, rhs_scale = sqrt_price_sq * bound.denominator, bound.numerator * Q96 ** 2
+
+    def within(amount_in, amount_out):
+        return amount_out * lhs_scale >= amount_in * rhs_scale
+
+    # 浮点的平均价格下限（用于区间内的解析解）
+    spot = (pool.sqrt_price_x96 / Q96) ** (2 if zero_for_one else -2)
+    c = (1 - slippage) * spot
+    fee = pool.fee
+    # 扣费后进入池子的比例：含手续费的输入 A + net / keep 满足 out = c × 输入，
+    # 等价于 out = (c / keep) × (A × keep + net)，仍是无手续费时的二次方程
+    keep = 1 - fee / FEE_DENOMINATOR
+
+    amount_in = amount_out = 0
+    for sqrt_price_x96, sqrt_price_next_x96, liquidity in _ranges(pool, zero_for_one):
+        if liquidity == 0:
+            return Solution(amount_in, amount_out, sqrt_price_x96, True)
+
+        step_in, step_out = _range_amounts(sqrt_price_x96, sqrt_price_next_x96, liquidity, zero_for_one, fee)
+        if within(amount_in + step_in, amount_out + step_out):
+            amount_in += step_in
+            amount_out += step_out
+            continue
+
+        # 约束在本区间内变为不满足：解析求出边界处的 √P，再做整数修正
+        def outcome(extra):
+            return swap_in_range(sqrt_price_x96, sqrt_price_next_x96, liquidity, extra, zero_for_one, fee)
+
+        def feasible(extra):
+            _, extra_in, extra_out = outcome(extra)
+            return within(amount_in + extra_in, amount_out + extra_out)
+
+        guess = _solve_in_range(
+            amount_in * keep, amount_out, sqrt_price_x96, sqrt_price_next_x96, liquidity, zero_for_one, c / keep
+        )
+        low, high = 0, step_in
+        if guess is not None:
+            guess = amount_with_fee(guess, fee)
+            margin = guess // 10**9 + 16
+            if feasible(guess - margin if guess > margin else 0):
+                low = guess - margin if guess > margin else 0
+            if guess + margin < step_in and not feasible(guess + margin):
+                high = guess + margin
+
+        # 区间内可行集合是 [0, 边界]，在 (low, high) 上二分出最大可行值
+        while high - low > 1:
+            middle = (low + high) // 2
+            if feasible(middle):
+                low = middle
+            else:
+                high = middle
+
+        sqrt_price_after, extra_in, extra_out = outcome(low)
+        return Solution(amount_in + extra_in, amount_out + extra_out, sqrt_price_after, False)
+
+    return Solution(amount_in, amount_out, sqrt_price_next_x96, True)
+
+
+def _solve_in_range(amount_in, amount_out, sqrt_price_x96, sqrt_price_next_x96, liquidity, zero_for_one, c):
+    """
+    求解区间内平均价格恰好等于 c 时还需要的输入金额（浮点近似）
+
+    以 s 表示区间起点的 √P、S 表示交换后的 √P（实数），A / B 为之前累计的输入 / 输出:
+        zero_for_one:  in = A + L(1/S - 1/s)，out = B + L(s - S)
+        one_for_zero:  in = A + L(S - s)，    out = B + L(1/s - 1/S)
+    out = c × in 两边乘以 S 后是关于 S 的二次方程。
+
+    返回:
+        本区间内的输入金额估计值，无解时返回 None
+    """
+    s = sqrt_price_x96 / Q96
+    end = sqrt_price_next_x96 / Q96
+    L = float(liquidity)
+    A, B = float(amount_in), float(amount_out)
+
+    if zero_for_one:
+        # L S² - (B + L s - c(A - L/s)) S + c L = 0
+        qa, qb, qc = L, -(B + L * s - c * (A - L / s)), c * L
+    else:
+        # c L S² - (B + L/s - c(A - L s)) S + L = 0
+        qa, qb, qc = c * L, -(B + L / s - c * (A - L * s)), L
+
+    disc = qb * qb - 4 * qa * qc
+    if disc < 0:
+        return None
+    low, high = min(s, end), max(s, end)
+    for root in ((-qb - math.sqrt(disc)) / (2 * qa), (-qb + math.sqrt(disc)) / (2 * qa)):
+        if low <= root <= high:
+            extra = L * (1 / root - 1 / s) if zero_for_one else L * (root - s)
+            return max(0, int(extra))
+    return None
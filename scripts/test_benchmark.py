@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+基准测试运行器测试
+验证结果格式和基线比较逻辑（不检查具体性能数值）
+"""
+
+import json
+import sys
+
+import benchmark
+from benchmark import run_benchmarks, to_json, compare, all_benchmarks, BenchmarkResult, BASELINE_FILE, QUICK_SIZES
+
+
+def test_run_benchmarks():
+    """测试运行器输出结果和 JSON 格式"""
+    print("测试: run_benchmarks")
+
+    min_time = benchmark.MIN_TIME
+    benchmark.MIN_TIME = 0.001  # 只验证流程，缩短计时
+    try:
+        results = run_benchmarks(sizes=[1, 10, 1000], name_filter="price_to_tick", max_size=10)
+    finally:
+        benchmark.MIN_TIME = min_time
+
+    names = {r.name for r in results}
+    assert names == {"price_to_tick", "price_to_tick_batch"}, f"用例筛选不正确: {names}"
+    assert all(r.size in (1, 10) for r in results), "超过上限的规模应该被跳过"
+    assert all(r.ops_per_sec > 0 and r.peak_bytes >= 0 for r in results), "结果数值不正确"
+
+    data = json.loads(json.dumps(to_json(results)))
+    assert len(data["results"]) == len(results) and "python" in data["meta"], "JSON 格式不正确"
+
+    print(f"  ✅ {len(results)} 个结果")
+    print("  通过！\n")
+
+
+def test_compare_baseline():
+    """测试基线比较只报告超过阈值的回退"""
+    print("测试: compare")
+
+    baseline = to_json([
+        BenchmarkResult("a", 10, 1.0, 1000.0, 0),
+        BenchmarkResult("b", 10, 1.0, 1000.0, 0),
+    ])
+    results = [
+        BenchmarkResult("a", 10, 1.0, 850.0, 0),  # 下降 15%，未超过阈值
+        BenchmarkResult("b", 10, 1.0, 500.0, 0),  # 下降 50%
+        BenchmarkResult("c", 10, 1.0, 1.0, 0),  # 基线中不存在
+    ]
+    regressions = compare(results, baseline, threshold=0.2)
+    assert [(r.name, r.ratio) for r in regressions] == [("b", 0.5)], f"回退检测不正确: {regressions}"
+
+    print("  ✅ 回退检测正确")
+    print("  通过！\n")
+
+
+def test_baseline_covers_cases():
+    """测试提交的参考基线覆盖全部用例的 --quick 规模"""
+    print("测试: 参考基线")
+
+    with open(BASELINE_FILE) as f:
+        baseline = json.load(f)
+    recorded = {(r["name"], r["size"]) for r in baseline["results"]}
+    names = {case.name for case in all_benchmarks()}
+    assert {"liquidity_from_y_batch", "calc_amount_y_batch"} <= names, f"缺少 y 侧批量用例: {names}"
+    missing = [(name, size) for name in sorted(names) for size in QUICK_SIZES if (name, size) not in recorded]
+    assert not missing, f"基线缺少用例，需要重新生成: {missing}"
+
+    print(f"  ✅ {len(names)} 个用例均有基线")
+    print("  通过！\n")
+
+
+def run_all_tests():
+    """运行所有测试"""
+    print("=" * 60)
+    print("基准测试运行器 - 测试套件")
+    print("=" * 60)
+    print()
+
+    tests = [
+        test_run_benchmarks,
+        test_compare_baseline,
+        test_baseline_covers_cases,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            print(f"  ❌ 测试失败: {e}\n")
+            failed += 1
+        except Exception as e:
+            print(f"  ❌ 测试出错: {e}\n")
+            failed += 1
+
+    print("=" * 60)
+    if failed == 0:
+        print("✅ 所有测试通过！")
+    else:
+        print(f"❌ {failed} 个测试失败")
+    print("=" * 60)
+
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
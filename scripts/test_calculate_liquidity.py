@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+流动性代币数量计算测试
+验证整数版本与池子模拟器的 mint 金额一致，以及最大流动性的闭式解
+"""
+
+import random
+import sys
+
+from pool_sim import Pool
+from tickmath import get_sqrt_ratio_at_tick
+from calculate_liquidity import (
+    calculate_amounts_for_liquidity,
+    max_liquidity_for_amounts
+)
+
+
+SQRT_PRICE_X96 = 5602277097478614198912276234240
+
+
+def test_amounts_match_mint():
+    """测试三种区间位置的金额与 Pool.mint 一致"""
+    print("测试: calculate_amounts_for_liquidity")
+
+    amounts = calculate_amounts_for_liquidity(SQRT_PRICE_X96, 84222, 86129, 1517882343751509868544, verify=True)
+    assert amounts == (998628802115141959, 5000209190920489524100), f"金额不正确: {amounts}"
+
+    for lower, upper in [(84222, 86129), (86000, 87000), (80000, 85000)]:
+        pool = Pool(sqrt_price_x96=SQRT_PRICE_X96, tick=85176)
+        expected = pool.mint("alice", lower, upper, 10**21)
+        actual = calculate_amounts_for_liquidity(SQRT_PRICE_X96, lower, upper, 10**21, verify=True)
+        assert actual == expected, f"区间 [{lower}, {upper}] 金额与 mint 不一致"
+
+    print("  ✅ 区间内 / 区间上方 / 区间下方 与 mint 一致")
+    print("  通过！\n")
+
+
+def test_verify_deep_ticks():
+    """测试极端 Tick 处校验不会把 Q64.96 量化误差误报为不一致"""
+    print("测试: verify 深度 Tick")
+
+    cases = [
+        (get_sqrt_ratio_at_tick(-800001), -800000, -799000),  # 区间上方，只需要 token0
+        (get_sqrt_ratio_at_tick(-800000) + 1, -800000, -700000),  # 区间内
+        (get_sqrt_ratio_at_tick(-887272), -887272, -887000),  # 最小 Tick 边界
+        (get_sqrt_ratio_at_tick(862870), 862870, 862873),  # 当前价格恰好在下限
+        (get_sqrt_ratio_at_tick(887272), 880000, 887272),  # 区间下方，只需要 token1
+    ]
+    for sqrt_price, lower, upper in cases:
+        for liquidity in (1, 10**18, 10**30):
+            calculate_amounts_for_liquidity(sqrt_price, lower, upper, liquidity, verify=True)
+
+    print(f"  ✅ {len(cases)} 个极端区间通过校验")
+    print("  通过！\n")
+
+
+def test_max_liquidity_closed_form():
+    """测试最大流动性不超过余额，且再加 1 就会超过"""
+    print("测试: max_liquidity_for_amounts")
+
+    rng = random.Random(8)
+    for _ in range(300):
+        lower = rng.randrange(-100000, 100000)
+        upper = lower + rng.randrange(1, 20000)
+        sqrt_price = get_sqrt_ratio_at_tick(rng.randrange(lower - 5000, upper + 5000))
+        balance0, balance1 = rng.randrange(1, 10**24), rng.randrange(1, 10**24)
+
+        liquidity = max_liquidity_for_amounts(sqrt_price, lower, upper, balance0, balance1)
+        amount0, amount1 = calculate_amounts_for_liquidity(sqrt_price, lower, upper, liquidity)
+        assert amount0 <= balance0 and amount1 <= balance1, "金额超过余额"
+
+        # 闭式解向下取整，与真正的最大值至多相差极小的比例
+        amount0, amount1 = calculate_amounts_for_liquidity(sqrt_price, lower, upper, liquidity * 1000001 // 1000000 + 1)
+        assert amount0 > balance0 or amount1 > balance1, "流动性不是最大值"
+
+    print("  ✅ 300 个随机区间满足余额约束")
+    print("  通过！\n")
+
+
+def run_all_tests():
+    """运行所有测试"""
+    print("=" * 60)
+    print("流动性代币数量计算 - 测试套件")
+    print("=" * 60)
+    print()
+
+    tests = [
+        test_amounts_match_mint,
+        test_verify_deep_ticks,
+        test_max_liquidity_closed_form,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            print(f"  ❌ 测试失败: {e}\n")
+            failed += 1
+        except Exception as e:
+            print(f"  ❌ 测试出错: {e}\n")
+            failed += 1
+
+    print("=" * 60)
+    if failed == 0:
+        print("✅ 所有测试通过！")
+    else:
+        print(f"❌ {failed} 个测试失败")
+    print("=" * 60)
+
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+事件日志回放测试
+用池子模拟器生成事件流，验证回放结果、二进制格式和检查点恢复
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+
+from pool_sim import Pool, ZeroLiquidity
+from event_replay import (
+    PoolReplayer,
+    InitializeEvent,
+    MintEvent,
+    SwapEvent,
+    ReplayMismatch,
+    event_to_dict,
+    read_events,
+    write_events_binary
+)
+
+
+SQRT_PRICE_X96 = 5602277097478614198912276234240
+
+
+def generate_events(blocks=200, seed=10, fee=0):
+    """在模拟器上执行随机 Mint / Swap，返回事件列表和每个区块结束时的状态"""
+    rng = random.Random(seed)
+    pool = Pool(SQRT_PRICE_X96, 85176, fee=fee)
+    spacing = pool.tick_spacing
+    events = [InitializeEvent(0, 0, SQRT_PRICE_X96, 85176)]
+    states = {0: pool_state(pool)}
+
+    for block in range(1, blocks + 1):
+        for log_index in range(rng.randrange(0, 3)):
+            if rng.random() < 0.3:
+                lower = (pool.tick - rng.randrange(1, 3000)) // spacing * spacing
+                upper = -(-(pool.tick + rng.randrange(1, 3000)) // spacing) * spacing
+                owner = f"0x{rng.randrange(16):040x}"
+                amount = rng.randrange(10**18, 10**21)
+                amount0, amount1 = pool.mint(owner, lower, upper, amount)
+                events.append(MintEvent(block, log_index, owner, lower, upper, amount, amount0, amount1))
+            elif pool.liquidity:
+                zero_for_one = rng.random() < 0.5
+                amount = rng.randrange(10**15, 10**18) * (1 if zero_for_one else 5000)
+                try:
+                    result = pool.swap(zero_for_one, amount)
+                except ZeroLiquidity:
+                    continue
+                events.append(SwapEvent(block, log_index, *result))
+        states[block] = pool_state(pool)
+    return events, states
+
+
+def pool_state(pool):
+    """池子状态的可比较快照"""
+    ticks = {t: (i.liquidity_gross, i.liquidity_net) for t, i in pool.ticks.items() if i.initialized}
+    return (pool.sqrt_price_x96, pool.tick, pool.liquidity, dict(pool.positions), ticks, dict(pool.tick_bitmap.words))
+
+
+def write_jsonl(events, path):
+    with open(path, "w") as f:
+        for event in events:
+            f.write(json.dumps(event_to_dict(event)) + "\n")
+
+
+def test_replay_matches_simulation():
+    """测试回放结果与生成事件时的池子状态一致"""
+    print("测试: PoolReplayer.replay_to")
+
+    events, states = generate_events()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "events.jsonl")
+        write_jsonl(events, path)
+
+        replayer = PoolReplayer(path, verify=True)
+        for block in (0, 37, 120, 200):
+            assert pool_state(replayer.replay_to(block)) == states[block], f"区块 {block} 状态不一致"
+        # 回到更早的区块
+        assert pool_state(replayer.replay_to(50)) == states[50], "回退后状态不一致"
+
+        # 篡改 Swap 事件后校验失败
+        bad = [e._replace(tick=e.tick + 1) if isinstance(e, SwapEvent) else e for e in events]
+        write_jsonl(bad, path)
+        try:
+            PoolReplayer(path, verify=True).replay_to()
+        except ReplayMismatch:
+            pass
+        else:
+            raise AssertionError("应该检测到不一致的 Swap 事件")
+
+    # 手续费档位池子：回放时提供 fee 才能通过校验
+    events, states = generate_events(fee=3000)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "events.jsonl")
+        write_jsonl(events, path)
+        pool = PoolReplayer(path, verify=True, fee=3000).replay_to()
+        assert pool_state(pool) == states[200] and (pool.fee, pool.tick_spacing) == (3000, 60)
+        try:
+            PoolReplayer(path, verify=True).replay_to()
+        except (ReplayMismatch, ValueError):
+            pass
+        else:
+            raise AssertionError("按无手续费池子回放时应该校验失败")
+
+    print(f"  ✅ {len(events)} 个事件回放结果一致（含 fee=3000 的池子）")
+    print("  通过！\n")
+
+
+def test_binary_format():
+    """测试二进制事件格式的往返"""
+    print("测试: write_events_binary / read_events")
+
+    events, states = generate_events(blocks=50)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "events.bin")
+        write_events_binary(events, path)
+        assert [event for event, _ in read_events(path)] == events, "二进制往返结果不一致"
+        assert pool_state(PoolReplayer(path).replay_to()) == states[50], "二进制回放状态不一致"
+
+    print("  ✅ 二进制格式往返一致")
+    print("  通过！\n")
+
+
+def test_checkpoint_resume():
+    """测试从检查点恢复回放"""
+    print("测试: 检查点")
+
+    events, states = generate_events()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "events.jsonl")
+        checkpoint_dir = os.path.join(tmp, "checkpoints")
+        write_jsonl(events, path)
+
+        PoolReplayer(path, checkpoint_dir, checkpoint_interval=50).replay_to()
+
+        replayer = PoolReplayer(path, checkpoint_dir, checkpoint_interval=50)
+        # 每跨过 50 个区块的边界保存一次，检查点为边界前最后一个有事件的区块
+        checkpoints = replayer.checkpoints()
+        assert [b // 50 for b in checkpoints] == [0, 1, 2, 3], f"检查点不正确: {checkpoints}"
+
+        pool = replayer.replay_to(130)
+        assert pool_state(pool) == states[130], "从检查点恢复后状态不一致"
+        from_genesis = sum(1 for e in events if e.block <= 130)
+        assert replayer.events_applied == from_genesis, "事件计数应该包含检查点之前的事件"
+
+        # 逐块向前回放：已经不早于的检查点不再加载；回退时从检查点恢复
+        loaded = []
+        nearest = replayer._nearest_checkpoint
+
+        def counting(target):
+            checkpoint = nearest(target)
+            if checkpoint is not None:
+                loaded.append(checkpoint.block)
+            return checkpoint
+
+        replayer._nearest_checkpoint = counting
+        for block in range(131, 171):
+            assert pool_state(replayer.replay_to(block)) == states[block], f"区块 {block} 状态不一致"
+        assert loaded == [b for b in checkpoints if 131 <= b <= 170], f"向前回放不应该重复加载检查点: {loaded}"
+        assert pool_state(replayer.replay_to(60)) == states[60] and loaded[-1] == checkpoints[0], "回退应该从检查点恢复"
+
+        # 事件从远大于检查点间隔的区块开始：不应该在回放任何事件之前保存检查点
+        offset = 1_000_000
+        write_jsonl([event._replace(block=event.block + offset) for event in events], path)
+        late_dir = os.path.join(tmp, "late")
+        late = PoolReplayer(path, late_dir, checkpoint_interval=50)
+        late.replay_to()
+        assert [b - offset for b in late.checkpoints()] == checkpoints, f"检查点不正确: {late.checkpoints()}"
+        assert pool_state(PoolReplayer(path, late_dir, checkpoint_interval=50).replay_to(offset + 130)) == states[130]
+
+    print(f"  ✅ 从区块 {checkpoints[1]} 的检查点恢复到区块 130")
+    print("  通过！\n")
+
+
+def run_all_tests():
+    """运行所有测试"""
+    print("=" * 60)
+    print("事件日志回放 - 测试套件")
+    print("=" * 60)
+    print()
+
+    tests = [
+        test_replay_matches_simulation,
+        test_binary_format,
+        test_checkpoint_resume,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            print(f"  ❌ 测试失败: {e}\n")
+            failed += 1
+        except Exception as e:
+            print(f"  ❌ 测试出错: {e}\n")
+            failed += 1
+
+    print("=" * 60)
+    if failed == 0:
+        print("✅ 所有测试通过！")
+    else:
+        print(f"❌ {failed} 个测试失败")
+    print("=" * 60)
+
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+差分模糊测试工具测试
+验证 Solidity 语义参考实现、分片结果可复现以及反例缩小
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+from fuzz_math import (
+    KNOWN,
+    SolidityMath,
+    TARGETS,
+    Target,
+    check_fixtures,
+    fuzz,
+    has_unexpected,
+    shrink,
+)
+from v3math import Q96
+
+
+ETH = 10**18
+
+# √P 从 2 降到 1 附近：L = 1 ETH，输入 0.1 ETH 的 token0
+# √P' = L × √P / (L + Δx × √P) = 5/3，输出 = L × (2 - 5/3) = 1/3 ETH
+ZERO_FOR_ONE = (2 * Q96, Q96, ETH, ETH // 10, True)
+ZERO_FOR_ONE_RESULT = (132046937523773895989239917227, ETH // 10, 333333333333333334)
+
+# test/UniswapV3Pool.t.sol 中用 42 USDC 购买 ETH 的那一步
+BUY_ETH = (5602277097478614198912276234240, 5875717789736564987741329162240,
+           1517882343751509868544, 42 * ETH, False)
+
+
+def test_solidity_reference():
+    """测试 Solidity 语义参考实现与固定用例"""
+    print("测试: SolidityMath 与 check_fixtures")
+
+    solidity = SolidityMath()
+    assert solidity.compute_swap_step(*ZERO_FOR_ONE) == ZERO_FOR_ONE_RESULT
+    assert not solidity.notes
+    # v3math 的输出向下取整，只差 1 wei
+    assert TARGETS["swap_step"].compare(ZERO_FOR_ONE) == "output_rounding"
+
+    # L << 96 与价格差的乘积超过 2^256，合约的 unchecked mulDiv 回绕
+    solidity = SolidityMath()
+    solidity.compute_swap_step(*BUY_ETH)
+    assert "muldiv_wrap" in solidity.notes
+    assert TARGETS["swap_step"].compare(BUY_ETH) == "muldiv_wrap"
+
+    records = [
+        {"function": "computeSwapStep", "args": [str(v) for v in ZERO_FOR_ONE[:4]] + [True],
+         "result": [str(v) for v in ZERO_FOR_ONE_RESULT]},
+        {"function": "calcAmount1Delta", "args": [Q96, 2 * Q96, 10], "result": 10},
+        {"function": "calcAmount0Delta", "args": [0, Q96, 1], "revert": True},
+        {"function": "calcAmount1Delta", "args": [Q96, 2 * Q96, 10], "result": 11},
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "fixtures.jsonl")
+        with open(path, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(record) + "\n" for record in records)
+        result = check_fixtures(path)
+
+    kinds = {d.kind: d.count for d in result.divergences}
+    assert result.cases == 4
+    assert kinds == {"output_rounding": 1, "reference_mismatch": 1}, kinds
+    assert has_unexpected([result]), "固定用例与参考实现不一致应视为未知差异"
+
+    print(f"  ✅ {result.cases} 个固定用例: {kinds}")
+    print("  通过！\n")
+
+
+def test_sharded_fuzz():
+    """测试分片执行可复现且没有未知差异"""
+    print("测试: fuzz 分片")
+
+    targets = ["swap_step", "amount1_delta", "calc_amount_x", "liquidity_from_x"]
+    in_process = fuzz(targets, cases=1000, shards=4, workers=1, seed=5, minimize=False)
+    in_pool = fuzz(targets, cases=1000, shards=4, workers=2, seed=5, minimize=False)
+    assert in_process == in_pool, "结果应该与进程数无关"
+    assert [r.cases for r in in_process] == [1000] * len(targets)
+    assert not has_unexpected(in_process), [r for r in in_process if r.divergences]
+
+    swap_step = {d.kind for d in in_process[0].divergences}
+    assert "output_rounding" in swap_step and swap_step <= set(KNOWN), swap_step
+
+    for result in in_process:
+        print(f"  ✅ {result.target}: {[(d.kind, d.count) for d in result.divergences]}")
+    print("  通过！\n")
+
+
+def test_shrink():
+    """测试反例缩小到最简输入"""
+    print("测试: shrink")
+
+    # 人为的缺陷：amount ≥ 1000 且 L 为奇数时出错
+    def compare(args):
+        amount, liquidity = args
+        return "mismatch" if amount >= 1000 and liquidity % 2 else None
+
+    buggy = Target("buggy", None, compare, (0, 0))
+    example = shrink(buggy, (123456789 << 100, (1 << 127) + 12345), "mismatch")
+    assert example == (1000, 1), example
+
+    # 真实目标：缩小后的反例仍是同一类别且不低于下界
+    target = TARGETS["swap_step"]
+    minimized = shrink(target, BUY_ETH, "muldiv_wrap")
+    assert target.compare(minimized) == "muldiv_wrap"
+    assert all(value >= low for value, low in zip(minimized, target.minimum))
+    assert minimized <= BUY_ETH
+
+    try:
+        import hypothesis  # noqa: F401
+    except ImportError:
+        print("  ⚠️ 未安装 hypothesis，跳过 hypothesis_search")
+    else:
+        from fuzz_math import hypothesis_search
+        assert hypothesis_search("swap_step", max_examples=200) is None
+
+    print(f"  ✅ {example}，{minimized}")
+    print("  通过！\n")
+
+
+def run_all_tests():
+    """运行所有测试"""
+    print("=" * 60)
+    print("差分模糊测试 - 测试套件")
+    print("=" * 60)
+    print()
+
+    tests = [
+        test_solidity_reference,
+        test_sharded_fuzz,
+        test_shrink,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            print(f"  ❌ 测试失败: {e}\n")
+            failed += 1
+        except Exception as e:
+            print(f"  ❌ 测试出错: {e}\n")
+            failed += 1
+
+    print("=" * 60)
+    if failed == 0:
+        print("✅ 所有测试通过！")
+    else:
+        print(f"❌ {failed} 个测试失败")
+    print("=" * 60)
+
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+价格冲击曲面测试
+验证报价与交换内核逐位一致，以及 Mint / Swap 后的增量更新只重算受影响的段
+"""
+
+import sys
+
+from event_replay import MintEvent, SwapEvent
+from impact_surface import ImpactSurface
+from pool_sim import Pool, ZeroLiquidity
+from tickmath import get_sqrt_ratio_at_tick
+
+
+SIZES = [10**k for k in range(3, 24, 2)]
+
+
+def make_pool():
+    """创建 ETH/USDC 池子（当前价格约 5000，上方有一段不相连的流动性）"""
+    pool = Pool(get_sqrt_ratio_at_tick(85176) + 12345, 85176, skip_empty_words=True)
+    pool.mint("alice", 84222, 86129, 1517882343751509868544)
+    pool.mint("bob", 85000, 85400, 3 * 10**21)
+    pool.mint("carol", 83000, 85100, 5 * 10**20)
+    pool.mint("dave", 86500, 87000, 10**21)
+    return pool
+
+
+def assert_matches(surface, pool):
+    """曲面在各个交易规模上的报价与 simulate_swap 一致"""
+    for zero_for_one in (True, False):
+        for size in SIZES:
+            point = surface.quote(zero_for_one, size)
+            try:
+                result = pool.simulate_swap(zero_for_one, size)
+            except ZeroLiquidity:
+                assert point.exhausted, f"规模 {size} 应该耗尽流动性"
+                continue
+            assert not point.exhausted and point.amount_in == size
+            assert (point.amount_out, point.sqrt_price_x96) == (result.amount_out, result.sqrt_price_x96), \
+                f"zero_for_one={zero_for_one} 规模 {size} 与交换内核不一致"
+
+
+def test_quote_matches_kernel():
+    """测试报价与交换内核一致"""
+    print("测试: ImpactSurface.quote")
+
+    pool = make_pool()
+    surface = ImpactSurface(pool)
+    assert_matches(surface, pool)
+
+    # 断点处的累计金额就是把价格推到该 Tick 的交换结果；向上在零流动性段前停止
+    # （最后一个断点之后流动性为零，交换内核在那里会抛出 ZeroLiquidity）
+    curve = surface.curve(False)
+    assert curve.sqrt_price_x96[-1] == get_sqrt_ratio_at_tick(86129)
+    for amount_in, amount_out, sqrt_price in list(zip(*curve))[1:-1]:
+        result = pool.simulate_swap(False, amount_in)
+        assert (result.amount_out, result.sqrt_price_x96) == (amount_out, sqrt_price)
+
+    exhausted = surface.quote(False, 10**30)
+    assert exhausted.exhausted and exhausted.amount_in == curve.amount_in[-1]
+    print(f"  ✅ {2 * len(SIZES)} 个规模，向上 {len(curve.amount_in) - 1} 个断点")
+    print("  通过！\n")
+
+
+def test_incremental_updates():
+    """测试 Mint / Swap 后的增量更新"""
+    print("测试: 增量更新")
+
+    pool = make_pool()
+    surface = ImpactSurface(pool)
+    before = surface.segments_computed
+
+    # 落在已有段内的窄区间：拆分两个段，再更新区间内的段
+    pool.mint("erin", 85150, 85250, 2 * 10**21)
+    surface.apply(MintEvent(1, 0, "erin", 85150, 85250, 2 * 10**21, 0, 0))
+    assert surface.segments_computed - before <= 5, "Mint 只应该重算受影响的段"
+    assert surface.liquidity == pool.liquidity
+    assert_matches(surface, pool)
+
+    # Swap 不需要重算任何段
+    before = surface.segments_computed
+    for zero_for_one, amount in ((True, 10**18), (False, 6000 * 10**18), (True, 10**15)):
+        result = pool.swap(zero_for_one, amount)
+        surface.apply(SwapEvent(2, 0, result.amount0, result.amount1,
+                                result.sqrt_price_x96, result.liquidity, result.tick))
+        assert_matches(surface, pool)
+    assert surface.segments_computed == before
+
+    # 在已有范围之外的 Mint 以及填平零流动性段
+    for lower, upper in ((80000, 82000), (86129, 86500)):
+        pool.mint("frank", lower, upper, 10**20)
+        surface.on_mint(lower, upper, 10**20)
+    assert_matches(surface, pool)
+
+    fresh = ImpactSurface(pool)
+    assert fresh.curve(True) == surface.curve(True) and fresh.curve(False) == surface.curve(False), \
+        "增量更新后的曲面应该与重新构建的一致"
+    print(f"  ✅ 重新构建需要计算 {fresh.segments_computed} 个段")
+    print("  通过！\n")
+
+
+def run_all_tests():
+    """运行所有测试"""
+    print("=" * 60)
+    print("价格冲击曲面 - 测试套件")
+    print("=" * 60)
+    print()
+
+    tests = [
+        test_quote_matches_kernel,
+        test_incremental_updates,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            print(f"  ❌ 测试失败: {e}\n")
+            failed += 1
+        except Exception as e:
+            print(f"  ❌ 测试出错: {e}\n")
+            failed += 1
+
+    print("=" * 60)
+    if failed == 0:
+        print("✅ 所有测试通过！")
+    else:
+        print(f"❌ {failed} 个测试失败")
+    print("=" * 60)
+
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+流动性深度曲线测试
+验证前缀和得到的流动性、代币数量和累计深度与池子状态及交换结果一致
+"""
+
+import sys
+
+import numpy as np
+
+from calculate_liquidity import calculate_amounts_for_liquidity
+from liquidity_depth import depth_curve, order_book
+from pool_sim import Pool
+from swap_solver import amount_to_tick
+from tickmath import get_sqrt_ratio_at_tick
+
+
+POSITIONS = [
+    ("alice", 84222, 86129, 1517882343751509868544),
+    ("bob", 85000, 85400, 3 * 10**21),
+    ("carol", 83000, 85100, 5 * 10**20),
+    ("dave", 86500, 87000, 10**21),  # 当前价格之上、与其他仓位不相连
+]
+
+
+def make_pool():
+    """创建 ETH/USDC 池子（当前价格约 5000）"""
+    pool = Pool(get_sqrt_ratio_at_tick(85176) + 12345, 85176)
+    for position in POSITIONS:
+        pool.mint(*position)
+    return pool
+
+
+def test_depth_curve():
+    """测试流动性与代币数量"""
+    print("测试: depth_curve")
+
+    pool = make_pool()
+    curve = depth_curve(pool, exact=True)
+
+    assert curve.ticks.tolist() == sorted({t for _, lower, upper, _ in POSITIONS for t in (lower, upper)})
+    assert curve.liquidity[curve.current] == pool.liquidity, "当前区间的流动性应该等于 pool.liquidity"
+    for i, (lower, upper) in enumerate(zip(curve.ticks, curve.ticks[1:])):
+        expected = sum(amount for _, a, b, amount in POSITIONS if a <= lower and upper <= b)
+        assert curve.liquidity[i] == expected, f"区间 [{lower}, {upper}) 的流动性不正确"
+
+    # 各区间代币之和等于全部仓位持有的代币
+    amounts = [calculate_amounts_for_liquidity(pool.sqrt_price_x96, a, b, amount) for _, a, b, amount in POSITIONS]
+    for total, expected in ((curve.amount0.sum(), sum(a for a, _ in amounts)),
+                            (curve.amount1.sum(), sum(b for _, b in amounts))):
+        assert abs(total / expected - 1) < 1e-9, f"代币数量不一致: {total} vs {expected}"
+    print(f"  ✅ {len(curve.liquidity)} 个区间，token0 {curve.amount0.sum() / 1e18:.6f}，"
+          f"token1 {curve.amount1.sum() / 1e18:.2f}")
+    print("  通过！\n")
+
+
+def test_order_book():
+    """测试订单簿深度与交换结果一致"""
+    print("测试: order_book")
+
+    pool = make_pool()
+    book = order_book(pool)
+    assert np.all(np.diff(book.ask_prices) > 0) and np.all(np.diff(book.bid_prices) < 0)
+    assert np.all(np.diff(book.ask_depth) > 0) and np.all(np.diff(book.bid_depth) > 0)
+    assert book.bid_prices[0] < (pool.sqrt_price_x96 / 2**96) ** 2 < book.ask_prices[0]
+
+    # 累计深度就是把价格推到该价位时交换得到的输出
+    curve = depth_curve(pool)
+    assert curve.liquidity[-2] == 0, "不相连的仓位之间应该有零流动性区间"
+    for i in range(curve.current, len(curve.liquidity) - 2):
+        # 交换无法越过零流动性区间，只比较之前的部分
+        solution = amount_to_tick(pool, False, int(curve.ticks[i + 1]))
+        assert abs(solution.amount_out / curve.depth0[i] - 1) < 1e-9
+    for i in range(curve.current + 1):
+        solution = amount_to_tick(pool, True, int(curve.ticks[i]))
+        assert abs(solution.amount_out / curve.depth1[i] - 1) < 1e-9
+
+    top = order_book(pool, levels=2)
+    assert len(top.ask_prices) == len(top.bid_prices) == 2
+    print(f"  ✅ 卖盘 {len(book.ask_prices)} 档，买盘 {len(book.bid_prices)} 档")
+    print("  通过！\n")
+
+
+def run_all_tests():
+    """运行所有测试"""
+    print("=" * 60)
+    print("流动性深度曲线 - 测试套件")
+    print("=" * 60)
+    print()
+
+    tests = [
+        test_depth_curve,
+        test_order_book,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            print(f"  ❌ 测试失败: {e}\n")
+            failed += 1
+        except Exception as e:
+            print(f"  ❌ 测试出错: {e}\n")
+            failed += 1
+
+    print("=" * 60)
+    if failed == 0:
+        print("✅ 所有测试通过！")
+    else:
+        print(f"❌ {failed} 个测试失败")
+    print("=" * 60)
+
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
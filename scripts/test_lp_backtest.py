@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+蒙特卡洛回测测试
+验证矩阵计算与逐步驱动池子模拟器一致、多进程结果可复现
+"""
+
+import sys
+
+import numpy as np
+
+from lp_backtest import backtest, backtest_gbm, evaluate_paths, gbm_paths, replay_path_on_pool, summarize
+from unimath import calculate_liquidity
+
+
+def test_matches_pool_replay():
+    """测试矩阵计算与 Pool.mint / Pool.swap 逐步回放一致"""
+    print("测试: evaluate_paths 与 replay_path_on_pool")
+
+    prices = gbm_paths(5000, 40, 1, sigma=1.5, dt=1 / 365, seed=3)[0]
+    assert prices.min() < 4545 or prices.max() > 5500, "路径应该离开过区间"
+
+    values = evaluate_paths(prices, 4545, 5500, 1, 5000, keep_values=True).values[0]
+    reference = replay_path_on_pool(prices, 4545, 5500, 1, 5000)
+    error = np.max(np.abs(reference / values - 1))
+    assert error < 1e-3, f"与池子模拟器的相对误差过大: {error}"
+
+    # 第 0 步的价值就是按 calculate_liquidity 存入的代币
+    position = calculate_liquidity(5000, 4545, 5500, 1, 5000, verbose=False)
+    expected = position['amount_eth_final'] * 5000 + position['amount_usdc_final']
+    assert abs(values[0] / expected - 1) < 1e-12
+
+    print(f"  ✅ {len(prices)} 步，最大相对误差 {error:.2e}")
+    print("  通过！\n")
+
+
+def test_metrics():
+    """测试回测指标"""
+    print("测试: backtest 指标")
+
+    flat = np.full((1, 10), 5000.0)
+    below = np.concatenate([[5000.0], np.full(9, 4000.0)])
+    above = np.concatenate([[5000.0], np.full(9, 6000.0)])
+    outside = np.full(10, 6000.0)  # 建仓价格不在区间内
+    result = backtest(np.vstack([flat, below, above, outside]), 4545, 5500, 1, 5000)
+
+    assert abs(result.impermanent_loss[0]) < 1e-12, "价格不变时没有无常损失"
+    assert np.all(result.impermanent_loss[1:3] < 0), "价格离开区间后应该有无常损失"
+    assert result.in_range[:3].tolist() == [1.0, 0.0, 0.0]
+    assert np.isnan(result.final_value[3]) and summarize(result)['paths'] == 3
+
+    # 价格跌出区间后全部持有 ETH，价值与价格成正比
+    position = calculate_liquidity(5000, 4545, 5500, 1, 5000, verbose=False)
+    assert result.final_value[1] > position['amount_eth_final'] * 4000
+    print(f"  ✅ 无常损失 {result.impermanent_loss[:3].round(6).tolist()}")
+    print("  通过！\n")
+
+
+def test_gbm_reproducible():
+    """测试 GBM 回测与进程数无关"""
+    print("测试: backtest_gbm 多进程")
+
+    kwargs = dict(steps=48, n_paths=2000, seed=7, block_size=300)
+    single = backtest_gbm(5000, 4545, 5500, 1, 5000, workers=1, **kwargs)
+    parallel = backtest_gbm(5000, 4545, 5500, 1, 5000, workers=2, **kwargs)
+    for name in ("final_value", "hodl_value", "impermanent_loss", "in_range"):
+        assert np.array_equal(getattr(single, name), getattr(parallel, name)), f"{name} 与进程数有关"
+    assert len(single.final_value) == 2000
+    assert np.all(single.impermanent_loss <= 1e-12), "无常损失不应该为正"
+
+    # 给定价格矩阵：各块随任务发送给工作进程，结果同样与进程数无关
+    paths = gbm_paths(5000, 48, 1000, seed=8)
+    single = backtest(paths, 4545, 5500, 1, 5000, workers=1, block_size=300)
+    parallel = backtest(paths, 4545, 5500, 1, 5000, workers=2, block_size=300)
+    for name in ("final_value", "hodl_value", "impermanent_loss", "in_range"):
+        assert np.array_equal(getattr(single, name), getattr(parallel, name)), f"{name} 与进程数有关"
+    print(f"  ✅ 2000 条路径，平均无常损失 {single.impermanent_loss.mean():.4%}")
+    print("  通过！\n")
+
+
+def run_all_tests():
+    """运行所有测试"""
+    print("=" * 60)
+    print("蒙特卡洛回测 - 测试套件")
+    print("=" * 60)
+    print()
+
+    tests = [
+        test_matches_pool_replay,
+        test_metrics,
+        test_gbm_reproducible,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            print(f"  ❌ 测试失败: {e}\n")
+            failed += 1
+        except Exception as e:
+            print(f"  ❌ 测试出错: {e}\n")
+            failed += 1
+
+    print("=" * 60)
+    if failed == 0:
+        print("✅ 所有测试通过！")
+    else:
+        print(f"❌ {failed} 个测试失败")
+    print("=" * 60)
+
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+流动性区间规划器测试
+验证并行规划结果与逐个调用 calculate_liquidity 的穷举结果一致
+"""
+
+import sys
+
+import numpy as np
+
+from unimath import calculate_liquidity
+from lp_planner import plan_ranges, score_liquidity, score_capital_usage
+
+
+LOWERS = np.arange(4000, 5010, 50)  # 包含一个不小于当前价格的下限
+UPPERS = np.arange(5050, 6500, 75)
+
+
+def brute_force(score_key):
+    """逐个计算网格中的全部区间，作为参照"""
+    scored = []
+    for lower in LOWERS:
+        for upper in UPPERS:
+            if not lower < 5000 < upper:
+                continue
+            result = calculate_liquidity(5000, float(lower), float(upper), 1, 5000, verbose=False)
+            scored.append((score_key(result), float(lower), float(upper)))
+    return scored
+
+
+def test_plan_matches_brute_force():
+    """测试前 N 名与穷举结果一致"""
+    print("测试: plan_ranges 与穷举比较")
+
+    scored = brute_force(lambda r: r['liquidity'])
+    expected = sorted(scored, key=lambda item: -item[0])[:5]
+
+    # 块大小很小，验证跨块合并
+    plans = plan_ranges(5000, 1, 5000, LOWERS, UPPERS, score=score_liquidity,
+                        top_n=5, workers=1, chunk_size=37)
+    assert [(p.price_lower, p.price_upper) for p in plans] == [e[1:] for e in expected], \
+        "选出的区间与穷举结果不一致"
+    for plan in plans:
+        expected_position = calculate_liquidity(5000, plan.price_lower, plan.price_upper, 1, 5000, verbose=False)
+        assert plan.position == expected_position, "返回的仓位应该由标量版本精确计算"
+
+    print(f"  ✅ 最佳区间 [{plans[0].price_lower}, {plans[0].price_upper}]")
+    print("  通过！\n")
+
+
+def test_parallel_matches_serial():
+    """测试多进程结果与单进程一致"""
+    print("测试: plan_ranges 多进程")
+
+    serial = plan_ranges(5000, 1, 5000, LOWERS, UPPERS, score=score_capital_usage,
+                         top_n=8, workers=1, chunk_size=50)
+    parallel = plan_ranges(5000, 1, 5000, LOWERS, UPPERS, score=score_capital_usage,
+                           top_n=8, workers=2, chunk_size=50)
+    assert serial == parallel, "多进程结果与单进程不一致"
+    assert all(0 < p.score <= 1 for p in serial), "资金利用率应该在 (0, 1] 范围内"
+    assert [p.score for p in serial] == sorted((p.score for p in serial), reverse=True), "结果应该按分数降序"
+
+    print(f"  ✅ 最高资金利用率 {serial[0].score:.6f}")
+    print("  通过！\n")
+
+
+def run_all_tests():
+    """运行所有测试"""
+    print("=" * 60)
+    print("流动性区间规划器 - 测试套件")
+    print("=" * 60)
+    print()
+
+    tests = [
+        test_plan_matches_brute_force,
+        test_parallel_matches_serial,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            print(f"  ❌ 测试失败: {e}\n")
+            failed += 1
+        except Exception as e:
+            print(f"  ❌ 测试出错: {e}\n")
+            failed += 1
+
+    print("=" * 60)
+    if failed == 0:
+        print("✅ 所有测试通过！")
+    else:
+        print(f"❌ {failed} 个测试失败")
+    print("=" * 60)
+
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
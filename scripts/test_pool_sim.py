@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+UniswapV3Pool 链下模拟器测试
+使用 test/UniswapV3Pool.t.sol 中的数值验证 mint 和 swap 的结果
+"""
+
+import sys
+
+from pool_sim import FEE_TICK_SPACINGS, Pool, InvalidTickRange, ZeroLiquidity
+from tickmath import get_tick_at_sqrt_ratio
+
+
+ETH = 10**18
+SQRTP_5000 = 5602277097478614198912276234240
+LIQUIDITY = 1517882343751509868544
+
+
+def make_pool():
+    """创建与合约测试相同的 ETH/USDC 池子"""
+    pool = Pool(sqrt_price_x96=SQRTP_5000, tick=85176)
+    pool.mint("alice", 84222, 86129, LIQUIDITY)
+    return pool
+
+
+def test_mint():
+    """测试添加流动性"""
+    print("测试: mint")
+
+    pool = Pool(sqrt_price_x96=SQRTP_5000, tick=85176)
+    amount0, amount1 = pool.mint("alice", 84222, 86129, LIQUIDITY)
+
+    assert amount0 == 998628802115141959, f"amount0 = {amount0}"
+    assert amount1 == 5000209190920489524100, f"amount1 = {amount1}"
+    assert pool.liquidity == LIQUIDITY, "当前流动性不正确"
+    assert pool.positions[("alice", 84222, 86129)] == LIQUIDITY, "仓位流动性不正确"
+    assert pool.ticks[84222].liquidity_net == LIQUIDITY, "下限 Tick 净流动性不正确"
+    assert pool.ticks[86129].liquidity_net == -LIQUIDITY, "上限 Tick 净流动性不正确"
+
+    # 区间外的仓位不改变当前流动性
+    pool.mint("bob", 87000, 88000, ETH)
+    assert pool.liquidity == LIQUIDITY, "区间外仓位不应改变当前流动性"
+
+    for lower, upper in [(86129, 84222), (-887273, 0), (0, 887273)]:
+        try:
+            pool.mint("alice", lower, upper, ETH)
+        except InvalidTickRange:
+            pass
+        else:
+            raise AssertionError(f"区间 [{lower}, {upper}] 应该无效")
+
+    print(f"  ✅ amount0 = {amount0}, amount1 = {amount1}")
+    print("  通过！\n")
+
+
+def test_swap_buy_eth():
+    """测试用 42 USDC 购买 ETH"""
+    print("测试: swap 购买 ETH")
+
+    pool = make_pool()
+    result = pool.swap(zero_for_one=False, amount_specified=42 * ETH)
+
+    assert result.amount0 == -8396714242162444, f"amount0 = {result.amount0}"
+    assert result.amount1 == 42 * ETH, f"amount1 = {result.amount1}"
+    assert result.sqrt_price_x96 == 5604469350942327889444743441197, "交换后价格不正确"
+    assert result.tick == 85184, "交换后 Tick 不正确"
+    assert result.liquidity == LIQUIDITY, "流动性不应改变"
+    assert (pool.sqrt_price_x96, pool.tick) == (result.sqrt_price_x96, result.tick), "池子状态未更新"
+
+    print(f"  ✅ 获得 {result.amount_out} wei ETH，Tick -> {result.tick}")
+    print("  通过！\n")
+
+
+def test_simulate_swap_does_not_mutate():
+    """测试模拟交换不修改池子状态"""
+    print("测试: simulate_swap")
+
+    pool = make_pool()
+    result = pool.simulate_swap(zero_for_one=True, amount_specified=ETH // 100)
+
+    assert pool.sqrt_price_x96 == SQRTP_5000 and pool.tick == 85176, "模拟交换修改了池子状态"
+    assert result.amount0 == ETH // 100, "输入金额不正确"
+    assert result.amount1 < 0, "应该获得 USDC"
+    assert result.tick == get_tick_at_sqrt_ratio(result.sqrt_price_x96), "Tick 与价格不一致"
+    assert result == pool.swap(zero_for_one=True, amount_specified=ETH // 100), "模拟与执行结果不一致"
+
+    print(f"  ✅ 卖出 0.01 ETH 获得 {result.amount_out} wei USDC")
+    print("  通过！\n")
+
+
+def test_cross_tick_swap():
+    """测试跨越多个价格区间的交换"""
+    print("测试: 跨 Tick 交换")
+
+    pool = make_pool()
+    # 与第一个区间相邻的第二个区间
+    pool.mint("bob", 86129, 87587, LIQUIDITY)
+
+    result = pool.swap(zero_for_one=False, amount_specified=10000 * ETH)
+    assert result.tick > 86129, "价格应该进入第二个区间"
+    assert result.liquidity == LIQUIDITY, "跨越边界后流动性应该来自第二个区间"
+    assert result.amount1 == 10000 * ETH, "输入应该被完全消耗"
+
+    # 没有更多流动性时交换失败
+    try:
+        pool.swap(zero_for_one=False, amount_specified=100000 * ETH)
+    except ZeroLiquidity:
+        pass
+    else:
+        raise AssertionError("超出所有区间的交换应该失败")
+
+    print(f"  ✅ 跨越 Tick 86129，最终 Tick {result.tick}")
+    print("  通过！\n")
+
+
+def test_fee_tiers():
+    """测试手续费扣除与 Tick 间距"""
+    print("测试: 手续费档位")
+
+    for fee, tick_spacing in FEE_TICK_SPACINGS.items():
+        pool = Pool(sqrt_price_x96=SQRTP_5000, tick=85176, fee=fee)
+        assert pool.tick_spacing == tick_spacing, "默认间距应该与手续费档位一致"
+        lower, upper = 84222 // tick_spacing * tick_spacing, -(-86129 // tick_spacing) * tick_spacing
+        pool.mint("alice", lower, upper, LIQUIDITY)
+        # 位图按压缩后的 Tick 建立索引
+        for tick in (lower, upper):
+            assert pool.tick_bitmap.is_initialized(tick, tick_spacing), f"Tick {tick} 未初始化"
+
+        # 区间内的交换：等价于无手续费的池子交换扣费后的金额
+        no_fee = Pool(sqrt_price_x96=SQRTP_5000, tick=85176, tick_spacing=tick_spacing)
+        no_fee.mint("alice", lower, upper, LIQUIDITY)
+        result = pool.swap(zero_for_one=False, amount_specified=42 * ETH)
+        expected = no_fee.swap(zero_for_one=False, amount_specified=42 * ETH * (10**6 - fee) // 10**6)
+        assert result.amount1 == 42 * ETH, "手续费应该计入输入金额"
+        assert (result.amount0, result.sqrt_price_x96) == (expected.amount0, expected.sqrt_price_x96)
+
+        if tick_spacing > 1:
+            try:
+                pool.mint("bob", lower + 1, upper, ETH)
+            except InvalidTickRange:
+                pass
+            else:
+                raise AssertionError("不是间距整数倍的 Tick 应该无效")
+        print(f"  ✅ fee {fee}, spacing {tick_spacing}: 获得 {result.amount_out} wei ETH")
+
+    print("  通过！\n")
+
+
+def run_all_tests():
+    """运行所有测试"""
+    print("=" * 60)
+    print("UniswapV3Pool 链下模拟器 - 测试套件")
+    print("=" * 60)
+    print()
+
+    tests = [
+        test_mint,
+        test_swap_buy_eth,
+        test_simulate_swap_does_not_mutate,
+        test_cross_tick_swap,
+        test_fee_tiers,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            print(f"  ❌ 测试失败: {e}\n")
+            failed += 1
+        except Exception as e:
+            print(f"  ❌ 测试出错: {e}\n")
+            failed += 1
+
+    print("=" * 60)
+    if failed == 0:
+        print("✅ 所有测试通过！")
+    else:
+        print(f"❌ {failed} 个测试失败")
+    print("=" * 60)
+
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+池子快照测试
+验证快照往返后状态与交换结果不变、mmap 零拷贝视图以及格式错误的处理
+"""
+
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+from liquidity_depth import depth_curve
+from pool_sim import Pool
+from pool_snapshot import SnapshotError, dump_snapshot, load_pool, load_snapshot, save_snapshot
+from tickmath import get_sqrt_ratio_at_tick
+
+
+ETH = 10**18
+
+
+def make_pool(skip_empty_words=False):
+    """价格为 1、仓位分散在多个位图字中，其中一个仓位的流动性超过 2^64"""
+    pool = Pool(get_sqrt_ratio_at_tick(0), 0, "WETH", "USDC", skip_empty_words=skip_empty_words)
+    for i, lower in enumerate(range(-5000, 5000, 700)):
+        pool.mint(f"lp{i % 3}", lower, lower + 1500, (i + 1) * 100 * ETH)
+    pool.mint("流动性提供者", -60, 60, 3 << 70)
+    pool.swap(True, 50 * ETH)
+    return pool
+
+
+def test_round_trip():
+    """测试快照往返后状态一致，并且可以继续交换和 mint"""
+    print("测试: 快照往返")
+
+    for skip_empty_words in (False, True):
+        pool = make_pool(skip_empty_words)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "pool.snap")
+            save_snapshot(pool, path)
+            assert os.listdir(tmp) == ["pool.snap"], "临时文件应该被改名"
+            loaded = load_pool(path)
+
+        for name in ("sqrt_price_x96", "tick", "liquidity", "version", "fee", "tick_spacing",
+                     "token0", "token1", "skip_empty_words"):
+            assert getattr(loaded, name) == getattr(pool, name), name
+        assert loaded.ticks.columns() == pool.ticks.columns()
+        assert loaded.tick_bitmap.words == pool.tick_bitmap.words
+        assert loaded.tick_bitmap._positions == pool.tick_bitmap._positions
+        assert loaded.positions == pool.positions
+
+        for zero_for_one in (True, False):
+            assert loaded.simulate_swap(zero_for_one, 30 * ETH) == pool.simulate_swap(zero_for_one, 30 * ETH)
+        assert loaded.mint("lp0", -7000, -6500, ETH) == pool.mint("lp0", -7000, -6500, ETH)
+        assert loaded.ticks.columns() == pool.ticks.columns()
+
+        print(f"  ✅ skip_empty_words={skip_empty_words}: {len(pool.ticks)} 个 Tick，"
+              f"{len(pool.positions)} 个仓位，{len(dump_snapshot(pool))} 字节")
+
+    empty = Pool(get_sqrt_ratio_at_tick(100), 100, fee=10000)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "empty.snap")
+        save_snapshot(empty, path)
+        loaded = load_pool(path, positions=False)
+    assert len(loaded.ticks) == 0 and loaded.token0 is None and loaded.tick == 100
+    assert (loaded.fee, loaded.tick_spacing) == (10000, 200)
+    print("  ✅ 空池子（手续费档位与 Tick 间距）")
+    print("  通过！\n")
+
+
+def test_zero_copy_view():
+    """测试 mmap 视图直接用于分析，不复制列数据"""
+    print("测试: 零拷贝视图")
+
+    pool = make_pool()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "pool.snap")
+        save_snapshot(pool, path)
+        with load_snapshot(path) as snapshot:
+            ticks = snapshot.columns["ticks"]
+            assert not ticks.flags.owndata and not ticks.flags.writeable
+            assert ticks.tolist() == list(pool.ticks)
+            assert len(snapshot.ticks) == len(pool.ticks)
+            assert snapshot.bitmap_words() == pool.tick_bitmap.words
+
+            expected = depth_curve(pool, exact=True)
+            curve = depth_curve(snapshot, exact=True)
+            assert np.array_equal(curve.ticks, expected.ticks)
+            assert list(curve.liquidity) == list(expected.liquidity)
+            assert curve.current == expected.current
+            del ticks, curve
+
+    print(f"  ✅ depth_curve 在快照上与池子一致（{len(expected.liquidity)} 个区间）")
+    print("  通过！\n")
+
+
+def test_invalid_snapshots():
+    """测试格式错误与不支持的仓位 owner"""
+    print("测试: 格式错误")
+
+    data = dump_snapshot(make_pool())
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "pool.snap")
+        for name, content in (("魔数错误", b"X" + data[1:]), ("文件截断", data[:-100]), ("空文件", b"")):
+            with open(path, "wb") as f:
+                f.write(content)
+            try:
+                load_snapshot(path)
+            except SnapshotError as e:
+                print(f"  ✅ {name}: {e}")
+            else:
+                raise AssertionError(f"{name} 应该抛出 SnapshotError")
+
+    pool = Pool(get_sqrt_ratio_at_tick(0), 0)
+    pool.mint(("alice", 1), -60, 60, ETH)
+    try:
+        dump_snapshot(pool)
+    except TypeError:
+        print("  ✅ 非字符串 owner 抛出 TypeError")
+    else:
+        raise AssertionError("非字符串 owner 应该抛出 TypeError")
+    print("  通过！\n")
+
+
+def run_all_tests():
+    """运行所有测试"""
+    print("=" * 60)
+    print("池子快照 - 测试套件")
+    print("=" * 60)
+    print()
+
+    tests = [
+        test_round_trip,
+        test_zero_copy_view,
+        test_invalid_snapshots,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            print(f"  ❌ 测试失败: {e}\n")
+            failed += 1
+        except Exception as e:
+            print(f"  ❌ 测试出错: {e}\n")
+            failed += 1
+
+    print("=" * 60)
+    if failed == 0:
+        print("✅ 所有测试通过！")
+    else:
+        print(f"❌ {failed} 个测试失败")
+    print("=" * 60)
+
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+多池并行调度器测试
+验证线程 / 进程模式与顺序执行结果一致、同一池子的操作保持顺序以及快照加载
+"""
+
+import os
+import random
+import sys
+import tempfile
+
+from pool_sim import Pool, ZeroLiquidity
+from pool_snapshot import save_snapshot
+from pool_universe import Call, Mint, PoolUniverse, Quote, Swap
+from tickmath import get_sqrt_ratio_at_tick
+
+
+ETH = 10**18
+
+
+def make_pools(count=6):
+    """价格各不相同的一组池子"""
+    pools = {}
+    for i in range(count):
+        tick = 100 * i
+        pool = Pool(get_sqrt_ratio_at_tick(tick), tick)
+        pool.mint("alice", tick - 3000, tick + 3000, 1000 * ETH)
+        pools[f"pool{i}"] = pool
+    return pools
+
+
+def make_block(rng, pool_ids, size=60):
+    """随机的一个区块的操作"""
+    ops = []
+    for _ in range(size):
+        pool_id = rng.choice(pool_ids)
+        kind = rng.randrange(4)
+        if kind == 0:
+            lower = rng.randrange(-2000, 2000)
+            ops.append(Mint(pool_id, f"lp{rng.randrange(3)}", lower, lower + rng.randrange(1, 1500), 100 * ETH))
+        elif kind == 1:
+            ops.append(Swap(pool_id, rng.random() < 0.5, rng.randrange(1, 20 * ETH)))
+        elif kind == 2:
+            ops.append(Quote(pool_id, rng.random() < 0.5, [k * ETH for k in range(1, 21)]))
+        else:
+            ops.append(Call(pool_id, Pool.simulate_swap, (True, ETH)))
+    return ops
+
+
+def run_blocks(universe, blocks):
+    """依次执行各区块，返回全部结果与各池子的最终状态"""
+    results = [universe.apply(ops) for ops in blocks]
+    states = {}
+    for pool_id in ("pool0", "pool3", "pool5"):
+        pool = universe.fetch(pool_id)
+        states[pool_id] = (pool.sqrt_price_x96, pool.tick, pool.liquidity, pool.version, pool.positions)
+    return results, states
+
+
+def test_modes_match_inline():
+    """测试线程与进程模式的结果与顺序执行完全一致"""
+    print("测试: 执行方式一致")
+
+    rng = random.Random(5)
+    pool_ids = list(make_pools())
+    blocks = [make_block(rng, pool_ids) for _ in range(3)]
+    # 超出流动性的交换失败，异常作为结果返回，不影响同一区块的其他操作
+    blocks[0].append(Swap("pool1", True, 10**30))
+    blocks[0].append(Mint("pool1", "bob", 10, 10, ETH))
+
+    with PoolUniverse(make_pools(), workers=1) as universe:
+        assert universe.mode == "inline"
+        expected = run_blocks(universe, blocks)
+    assert isinstance(expected[0][0][-2], ZeroLiquidity)
+    assert isinstance(expected[0][0][-1], ValueError)
+
+    for mode in ("thread", "process"):
+        with PoolUniverse(make_pools(), workers=3, mode=mode) as universe:
+            assert universe.mode == mode and universe.workers == 3
+            results, states = run_blocks(universe, blocks)
+        assert states == expected[1], mode
+        for block, expected_block in zip(results, expected[0]):
+            for result, expected_result in zip(block, expected_block):
+                if isinstance(expected_result, Exception):
+                    assert type(result) is type(expected_result)
+                else:
+                    assert result == expected_result, mode
+        print(f"  ✅ {mode}: {sum(len(ops) for ops in blocks)} 个操作")
+
+    with PoolUniverse(make_pools(), workers=2, mode="thread") as universe:
+        try:
+            universe.apply([Swap("missing", True, ETH)])
+        except KeyError:
+            pass
+        else:
+            raise AssertionError("未知池子应该抛出 KeyError")
+    print("  通过！\n")
+
+
+def test_snapshot_pools():
+    """测试进程模式下由工作进程加载快照文件"""
+    print("测试: 快照池子")
+
+    pools = make_pools(4)
+    ops = [Swap(pool_id, False, 5 * ETH) for pool_id in pools] + [Swap("pool2", True, 7 * ETH)]
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = {}
+        for pool_id, pool in pools.items():
+            paths[pool_id] = os.path.join(tmp, f"{pool_id}.snap")
+            save_snapshot(pool, paths[pool_id])
+        with PoolUniverse(paths, workers=2, mode="process") as universe:
+            results = universe.apply(ops)
+            pool2 = universe.fetch("pool2")
+
+    expected = [pools[op.pool].swap(op.zero_for_one, op.amount) for op in ops]
+    assert results == expected
+    assert (pool2.sqrt_price_x96, pool2.version) == (pools["pool2"].sqrt_price_x96, pools["pool2"].version)
+
+    print(f"  ✅ {len(paths)} 个快照，{len(results)} 次交换")
+    print("  通过！\n")
+
+
+def run_all_tests():
+    """运行所有测试"""
+    print("=" * 60)
+    print("多池并行调度器 - 测试套件")
+    print("=" * 60)
+    print()
+
+    tests = [
+        test_modes_match_inline,
+        test_snapshot_pools,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            print(f"  ❌ 测试失败: {e}\n")
+            failed += 1
+        except Exception as e:
+            print(f"  ❌ 测试出错: {e}\n")
+            failed += 1
+
+    print("=" * 60)
+    if failed == 0:
+        print("✅ 所有测试通过！")
+    else:
+        print(f"❌ {failed} 个测试失败")
+    print("=" * 60)
+
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+仓位索引测试
+验证与 Position.sol / Pool 的一致性、Tick 查询以及按 owner 的聚合
+"""
+
+import random
+import sys
+
+from pool_sim import Pool
+from position_book import PositionBook
+from tickmath import get_sqrt_ratio_at_tick
+from v3math import calc_amount0_delta, calc_amount1_delta
+
+
+ETH = 10**18
+
+
+def random_positions(rng, count, owners=20):
+    """随机仓位，部分流动性超过 2^64"""
+    positions = []
+    for i in range(count):
+        lower = rng.randrange(-3000, 3000)
+        liquidity = rng.randrange(1, 10**22) << (50 if i % 5 == 0 else 0)
+        positions.append((f"lp{rng.randrange(owners)}", lower, lower + rng.randrange(1, 800), liquidity))
+    return positions
+
+
+def brute_force(positions):
+    """逐个累加得到的仓位字典"""
+    book = {}
+    for owner, lower, upper, liquidity in positions:
+        book[(owner, lower, upper)] = book.get((owner, lower, upper), 0) + liquidity
+    return book
+
+
+def test_matches_pool():
+    """测试与 Pool 的仓位和当前流动性一致"""
+    print("测试: 与 Pool 一致")
+
+    pool = Pool(get_sqrt_ratio_at_tick(0), 0)
+    for i, lower in enumerate(range(-3000, 3000, 400)):
+        pool.mint(f"lp{i % 4}", lower, lower + 900, (i + 1) * 1000 * ETH)
+    pool.mint("lp0", -3000, -2100, 1000 * ETH)
+    book = PositionBook.from_pool(pool)
+
+    assert len(book) == len(pool.positions) and dict(book.items()) == pool.positions
+    assert book.get("lp0", -3000, -2100) == 2000 * ETH and ("lp0", -3000, -2100) in book
+    assert book.get("nobody", -3000, -2100) == 0
+
+    for zero_for_one, amount in ((True, 500 * ETH), (False, 1500 * ETH)):
+        pool.swap(zero_for_one, amount)
+        assert book.liquidity_at_tick(pool.tick) == pool.liquidity, (pool.tick, pool.liquidity)
+        print(f"  ✅ tick {pool.tick}: liquidity {pool.liquidity}")
+
+    for args in (("lp0", 10, 10, 1), ("lp0", 0, 10, -1), ("lp0", -3000, -2100, 1 << 128)):
+        try:
+            book.update(*args)
+        except (ValueError, OverflowError):
+            pass
+        else:
+            raise AssertionError(f"{args} 应该被拒绝")
+    print("  通过！\n")
+
+
+def test_tick_queries():
+    """测试 Tick 查询与逐个扫描一致，包括增量插入新仓位之后"""
+    print("测试: Tick 查询")
+
+    rng = random.Random(7)
+    positions = random_positions(rng, 3000)
+    book = PositionBook()
+    added = 0
+    # 第一次查询时建立下标，之后新增的仓位增量插入
+    for end in (2000, 2300, 3000):
+        for position in positions[added:end]:
+            book.update(*position)
+        added = end
+        expected_book = brute_force(positions[:end])
+        for tick in (-3500, -2999, -1, 0, 1234, 3700):
+            expected = {key: value for key, value in expected_book.items() if key[1] <= tick < key[2]}
+            found = book.positions_at_tick(tick)
+            assert found == expected, tick
+            assert [key[1] for key in found] == sorted(key[1] for key in expected), "应该按 lower 升序"
+            assert book.count_at_tick(tick) == len(expected)
+            assert book.liquidity_at_tick(tick) == sum(expected.values())
+        print(f"  ✅ {len(book)} 个仓位，tick 0 处 {book.count_at_tick(0)} 个")
+
+    # 只改变已有仓位的流动性
+    owner, lower, upper, _ = positions[0]
+    before = book.liquidity_at_tick(lower)
+    book.update(owner, lower, upper, 12345)
+    assert book.liquidity_at_tick(lower) == before + 12345
+    print("  通过！\n")
+
+
+def test_owner_aggregates():
+    """测试按 owner 的流动性与代币数量"""
+    print("测试: owner 聚合")
+
+    rng = random.Random(11)
+    positions = random_positions(rng, 2000)
+    book = PositionBook()
+    for position in positions:
+        book.update(*position)
+    expected_book = brute_force(positions)
+
+    liquidity = {}
+    for (owner, _, _), value in expected_book.items():
+        liquidity[owner] = liquidity.get(owner, 0) + value
+    assert book.liquidity_by_owner() == liquidity
+
+    sqrt_price_x96 = get_sqrt_ratio_at_tick(150)
+    totals = book.amounts_by_owner(sqrt_price_x96)
+    for owner in ("lp3", "lp17"):
+        amount0 = amount1 = 0
+        for (key_owner, lower, upper), value in expected_book.items():
+            if key_owner != owner:
+                continue
+            sqrt_lower, sqrt_upper = get_sqrt_ratio_at_tick(lower), get_sqrt_ratio_at_tick(upper)
+            sqrt_price = min(max(sqrt_price_x96, sqrt_lower), sqrt_upper)
+            amount0 += calc_amount0_delta(sqrt_price, sqrt_upper, value, round_up=False)
+            amount1 += calc_amount1_delta(sqrt_lower, sqrt_price, value, round_up=False)
+
+        assert book.amounts_for_owner(owner, sqrt_price_x96, exact=True) == (amount0, amount1)
+        fast0, fast1 = book.amounts_for_owner(owner, sqrt_price_x96)
+        assert abs(fast0 - amount0) <= amount0 * 1e-9 and abs(fast1 - amount1) <= amount1 * 1e-9
+        index = totals.owners.index(owner)
+        assert abs(totals.amount0[index] - fast0) <= fast0 * 1e-12
+        assert abs(totals.amount1[index] - fast1) <= fast1 * 1e-12
+        print(f"  ✅ {owner}: token0 {amount0}, token1 {amount1}")
+
+    assert book.amounts_for_owner("nobody", sqrt_price_x96) == (0.0, 0.0)
+    print("  通过！\n")
+
+
+def run_all_tests():
+    """运行所有测试"""
+    print("=" * 60)
+    print("仓位索引 - 测试套件")
+    print("=" * 60)
+    print()
+
+    tests = [
+        test_matches_pool,
+        test_tick_queries,
+        test_owner_aggregates,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            print(f"  ❌ 测试失败: {e}\n")
+            failed += 1
+        except Exception as e:
+            print(f"  ❌ 测试出错: {e}\n")
+            failed += 1
+
+    print("=" * 60)
+    if failed == 0:
+        print("✅ 所有测试通过！")
+    else:
+        print(f"❌ {failed} 个测试失败")
+    print("=" * 60)
+
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
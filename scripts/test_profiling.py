@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+性能计数器测试
+验证交换 / mint 的计数、未启用时不计数、导出格式以及多线程并发交换
+"""
+
+import json
+import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import profiling
+from pool_sim import Pool
+from profiling import Profile, profile
+from tickmath import get_sqrt_ratio_at_tick
+
+
+ETH = 10**18
+
+
+def make_pool(skip_empty_words=False):
+    """价格为 1、每隔 1000 个 Tick 一个仓位的池子（Tick 分散在多个位图字中）"""
+    pool = Pool(get_sqrt_ratio_at_tick(0), 0, skip_empty_words=skip_empty_words)
+    for lower in range(-5000, 5000, 1000):
+        pool.mint("alice", lower, lower + 1000, 1000 * ETH)
+    return pool
+
+
+def test_swap_counters():
+    """测试交换计数与结果不受影响"""
+    print("测试: 交换计数")
+
+    for skip_empty_words in (False, True):
+        pool = make_pool(skip_empty_words)
+        expected = pool.simulate_swap(True, 200 * ETH)
+
+        with profile() as prof:
+            result = pool.simulate_swap(True, 200 * ETH)
+        assert result == expected, "启用计数不应改变结果"
+        assert profiling.active is None, "退出上下文后应该恢复为未启用"
+
+        counters = prof.counters
+        # 从 Tick 0 向下到 -4000 附近：依次跨越 0、-1000、-2000、-3000 等已初始化的 Tick
+        crossed = -(result.tick // 1000)
+        assert counters["swaps"] == 1
+        assert counters["ticks_crossed"] == crossed, (counters, result.tick)
+        assert counters["swap_steps"] == counters["bitmap_lookups"] >= crossed + 1
+        # 合约模式每个字边界都要结算一步；跨字模式只在已初始化的 Tick 处结算
+        if skip_empty_words:
+            assert counters["swap_steps"] == crossed + 1
+        else:
+            assert counters["bitmap_words_scanned"] == counters["bitmap_lookups"] > crossed + 1
+        assert prof.phase_ns["swap"] >= prof.phase_ns["swap_math"] > 0
+
+        # 未启用时不计数
+        pool.simulate_swap(True, 200 * ETH)
+        assert prof.counters["swaps"] == 1
+
+        print(f"  ✅ skip_empty_words={skip_empty_words}: {counters}")
+
+    with profile() as prof:
+        pool = make_pool()
+    assert prof.counters["mints"] == 10 and prof.counters["ticks_flipped"] == 11, prof.counters
+    print(f"  ✅ mints={prof.counters['mints']}, ticks_flipped={prof.counters['ticks_flipped']}")
+    print("  通过！\n")
+
+
+def test_export():
+    """测试 Prometheus / JSON 导出与慢交换明细"""
+    print("测试: 导出")
+
+    pool = make_pool()
+    prof = Profile(slow_threshold=0)
+    with profile(into=prof):
+        pool.simulate_swap(True, ETH)
+    with profile(into=prof):
+        pool.simulate_swap(False, ETH)
+    assert prof.counters["swaps"] == 2
+    assert len(prof.slow_swaps) == 2 and prof.slow_swaps[0]["swap_steps"] >= 1
+
+    text = prof.to_prometheus(labels={"pool": 'ETH/"USDC"'})
+    assert '# TYPE uniswap_sim_swaps_total counter' in text
+    assert 'uniswap_sim_swaps_total{pool="ETH/\\"USDC\\""} 2' in text
+    assert 'uniswap_sim_phase_seconds_total{pool="ETH/\\"USDC\\"",phase="swap_math"}' in text
+
+    with tempfile.TemporaryDirectory() as tmp:
+        prom = os.path.join(tmp, "sim.prom")
+        prof.write_prometheus(prom)
+        with open(prom, encoding="utf-8") as f:
+            assert f.read() == prof.to_prometheus()
+        path = os.path.join(tmp, "profile.json")
+        prof.write_json(path)
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        assert sorted(os.listdir(tmp)) == ["profile.json", "sim.prom"], "临时文件应该被改名"
+    assert data["counters"] == prof.counters
+    assert data["slow_swaps"][1]["seconds"]["swap"] > 0
+
+    print(f"  ✅ {len(text.splitlines())} 行 Prometheus 文本，{len(data['slow_swaps'])} 条慢交换明细")
+    print("  通过！\n")
+
+
+def test_concurrent_swaps():
+    """测试多个线程同时交换时计数正确合并，交换结果不受影响"""
+    print("测试: 并发交换")
+
+    pools = [make_pool(skip_empty_words=i % 2 == 1) for i in range(4)]
+    amounts = [(i % 7 + 1) * 30 * ETH for i in range(200)]
+    expected = {}
+    with profile() as serial:
+        for pool in pools:
+            expected[id(pool)] = [pool.simulate_swap(True, amount) for amount in amounts]
+
+    def run(pool):
+        return [pool.simulate_swap(True, amount) for amount in amounts]
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # 频繁切换线程，让交换互相交错
+    try:
+        with profile(slow_threshold=0) as prof:
+            with ThreadPoolExecutor(len(pools)) as executor:
+                results = list(executor.map(run, pools))
+    finally:
+        sys.setswitchinterval(interval)
+
+    for pool, result in zip(pools, results):
+        assert result == expected[id(pool)], "并发交换的结果应该与串行一致"
+    assert prof.counters == serial.counters, (prof.counters, serial.counters)
+    assert len(prof.slow_swaps) == profiling.MAX_SLOW_SWAPS
+    assert all(record["swap_steps"] == record["bitmap_lookups"] >= 1 for record in prof.slow_swaps)
+
+    print(f"  ✅ {len(pools)} 个线程 {prof.counters['swaps']} 次交换，计数与串行一致")
+    print("  通过！\n")
+
+
+def run_all_tests():
+    """运行所有测试"""
+    print("=" * 60)
+    print("性能计数器 - 测试套件")
+    print("=" * 60)
+    print()
+
+    tests = [
+        test_swap_counters,
+        test_export,
+        test_concurrent_swaps,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            print(f"  ❌ 测试失败: {e}\n")
+            failed += 1
+        except Exception as e:
+            print(f"  ❌ 测试出错: {e}\n")
+            failed += 1
+
+    print("=" * 60)
+    if failed == 0:
+        print("✅ 所有测试通过！")
+    else:
+        print(f"❌ {failed} 个测试失败")
+    print("=" * 60)
+
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
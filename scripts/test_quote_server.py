@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+报价服务测试
+验证请求合并、微批处理结果与标量函数一致，以及套接字协议
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+
+import profiling
+from pool_sim import Pool, ZeroLiquidity
+from quoter import InvalidAmountIn, InvalidPool, quote
+from event_replay import InitializeEvent, MintEvent, write_events_binary
+from quote_server import QuoteServer, load_pools
+from tickmath import get_sqrt_ratio_at_tick
+from unimath import calculate_liquidity
+
+
+def make_pool():
+    """创建 ETH/USDC 池子（当前价格 5000，流动性区间 4545 - 5500）"""
+    pool = Pool(get_sqrt_ratio_at_tick(85176), 85176)
+    pool.mint("lp", 84222, 86129, 1517882343751509868544)
+    return pool
+
+
+def test_coalescing_and_batching():
+    """测试请求合并与微批处理"""
+    print("测试: 请求合并 / 微批处理")
+
+    pool = make_pool()
+
+    async def scenario():
+        server = QuoteServer({"WETH/USDC": pool}, workers=0)
+        try:
+            same = [server.quote("WETH/USDC", 10**18, True) for _ in range(50)]
+            other = [server.quote("WETH/USDC", amount * 10**17, False) for amount in range(1, 11)]
+            results = await asyncio.gather(*same, *other)
+            # 超出流动性范围的金额与同批次的其他报价一起遍历，单独得到 ZeroLiquidity
+            mixed = await asyncio.gather(
+                server.quote("WETH/USDC", 10**30, True), server.quote("WETH/USDC", 10**17, True),
+                return_exceptions=True,
+            )
+            assert isinstance(mixed[0], ZeroLiquidity) and mixed[1] == quote(pool, 10**17, True), mixed
+            try:
+                await server.quote("WETH/USDC", 0, True)
+            except InvalidAmountIn:
+                pass
+            else:
+                raise AssertionError("应该抛出 InvalidAmountIn")
+            try:
+                await server.quote("WBTC/USDC", 1, True)
+            except InvalidPool:
+                pass
+            else:
+                raise AssertionError("应该抛出 InvalidPool")
+            return server, results
+        finally:
+            server.close()
+
+    server, results = asyncio.run(scenario())
+    assert all(result == quote(pool, 10**18, True) for result in results[:50])
+    assert results[50:] == [quote(pool, amount * 10**17, False) for amount in range(1, 11)]
+    assert server.coalesced == 49, f"相同请求应该合并: {server.coalesced}"
+    # 并发的 60 个请求合成一批，另外两批是 mixed 与单独的 InvalidAmountIn 请求
+    assert server.batches == 3, f"并发请求应该合成一批: {server.batches}"
+    # 每个不同的金额只计算一次，结果写入报价缓存
+    assert server.stats()["cache_misses"] == 13, server.stats()
+    print(f"  ✅ 61 个请求: 合并 {server.coalesced} 个，{server.batches} 个批次")
+    print("  通过！\n")
+
+
+def test_batch_metrics():
+    """测试批量报价在 profile() 中记录交换计数"""
+    print("测试: 批量报价的性能计数")
+
+    pool = make_pool()
+    pool.mint("lp", 86129, 87000, 10**21)  # 大额报价跨越 86129
+
+    async def scenario():
+        server = QuoteServer({"WETH/USDC": pool}, workers=0)
+        try:
+            return await asyncio.gather(*(server.quote("WETH/USDC", amount * 10**21, False) for amount in (1, 5, 8)))
+        finally:
+            server.close()
+
+    with profiling.profile(slow_threshold=0) as prof:
+        results = asyncio.run(scenario())
+    assert results == [quote(pool, amount * 10**21, False) for amount in (1, 5, 8)]
+    counters = prof.counters
+    assert counters["swaps"] >= 1 and counters["swap_steps"] > 0, counters
+    assert counters["ticks_crossed"] > 0 and counters["bitmap_lookups"] > 0, counters
+    assert prof.phase_ns["swap"] > 0 and prof.slow_swaps, "批量报价应该记录耗时和慢交换明细"
+
+    print(f"  ✅ {counters['swap_steps']} 步，跨越 {counters['ticks_crossed']} 个 Tick")
+    print("  通过！\n")
+
+
+def test_liquidity_batch():
+    """测试流动性请求（包括交给进程池的批次）与标量函数逐位一致"""
+    print("测试: liquidity 批处理")
+
+    positions = [(5000 + i, 4545, 5500, 1 + i / 7, 5000) for i in range(40)]
+    keys = ("tick_current", "tick_lower", "tick_upper", "liquidity", "amount_eth_final_wei", "amount_usdc_final_wei")
+
+    async def scenario(workers, offload_threshold):
+        server = QuoteServer(workers=workers, offload_threshold=offload_threshold)
+        try:
+            results = await asyncio.gather(*(server.liquidity(*position) for position in positions))
+            try:
+                await server.liquidity(6000, 4545, 5500, 1, 5000)
+            except ValueError:
+                pass
+            else:
+                raise AssertionError("无效参数应该抛出 ValueError")
+            return results
+        finally:
+            server.close()
+
+    expected = []
+    for position in positions:
+        scalar = calculate_liquidity(*position, verbose=False)
+        expected.append({key: scalar[key] for key in keys})
+
+    assert asyncio.run(scenario(0, 256)) == expected, "批处理结果与 calculate_liquidity 不一致"
+    assert asyncio.run(scenario(1, 8)) == expected, "进程池结果与 calculate_liquidity 不一致"
+    print(f"  ✅ {len(positions)} 个仓位（进程内 / 进程池）")
+    print("  通过！\n")
+
+
+def test_load_pools_fee_spec():
+    """测试 NAME=EVENTS[:FEE[:SPACING]] 把手续费率和 Tick 间距传给回放"""
+    print("测试: load_pools")
+
+    source = Pool(get_sqrt_ratio_at_tick(85176), 85176, fee=3000)
+    amounts = source.mint("lp", 84180, 86160, 10**23)
+    events = [
+        InitializeEvent(0, 0, source.sqrt_price_x96, source.tick),
+        MintEvent(1, 0, "lp", 84180, 86160, 10**23, *amounts),
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "weth:usdc.bin")  # 路径本身包含冒号
+        write_events_binary(events, path)
+        pools = load_pools([f"plain={path}", f"fee={path}:3000", f"spaced={path}:3000:20"])
+
+    assert [(p.fee, p.tick_spacing) for p in pools.values()] == [(0, 1), (3000, 60), (3000, 20)]
+    assert quote(pools["fee"], 10**18, True) == quote(source, 10**18, True), "手续费池子的报价应与原池子一致"
+    assert quote(pools["plain"], 10**18, True).amount_out > quote(pools["fee"], 10**18, True).amount_out
+
+    print("  ✅ 手续费率与 Tick 间距按参数传入")
+    print("  通过！\n")
+
+
+def test_socket_protocol():
+    """测试 JSON 行协议与 HTTP"""
+    print("测试: TCP 协议")
+
+    pool = make_pool()
+
+    async def scenario():
+        server = QuoteServer({"WETH/USDC": pool}, workers=0)
+        listener = await server.serve_tcp("127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            requests = [
+                {"id": 1, "method": "quote", "params": {"pool": "WETH/USDC", "amount_in": str(42 * 10**18),
+                                                        "zero_for_one": False}},
+                {"id": 2, "method": "quote", "params": {"pool": "WETH/USDC", "amount_in": 0, "zero_for_one": True}},
+                {"id": 3, "method": "nope"},
+            ]
+            writer.write(b"".join(json.dumps(request).encode() + b"\n" for request in requests))
+            await writer.drain()
+            writer.write_eof()
+            lines = [json.loads(line) for line in (await reader.read()).splitlines()]
+            writer.close()
+
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            body = json.dumps({"id": 4, "method": "stats"}).encode()
+            writer.write(b"POST / HTTP/1.1\r\nContent-Length: %d\r\n\r\n" % len(body) + body)
+            await writer.drain()
+            http = await reader.read()
+            writer.close()
+
+            # Content-Length 无效时返回 400，而不是直接断开连接；过大时返回 413；非 POST 请求返回 405
+            bad = []
+            for method, length in ((b"POST", b"abc"), (b"POST", b"-5"), (b"POST", b"%d" % (1 << 30)), (b"GET", b"0")):
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+                writer.write(method + b" / HTTP/1.1\r\nContent-Length: " + length + b"\r\n\r\n")
+                await writer.drain()
+                bad.append(await reader.read())
+                writer.close()
+            return {line["id"]: line for line in lines}, http, bad
+        finally:
+            listener.close()
+            await listener.wait_closed()
+            server.close()
+
+    responses, http, bad = asyncio.run(scenario())
+    assert responses[1]["result"] == quote(pool, 42 * 10**18, False)._asdict()
+    assert responses[2]["error"]["type"] == "InvalidAmountIn"
+    assert responses[3]["error"]["type"] == "ValueError"
+
+    head, _, body = http.partition(b"\r\n\r\n")
+    assert head.startswith(b"HTTP/1.1 200"), head
+    assert json.loads(body)["result"]["requests"] == 2
+    expected = [(b"400", "ValueError"), (b"400", "ValueError"), (b"413", "PayloadTooLarge"), (b"405", "MethodNotAllowed")]
+    for response, (status, error) in zip(bad, expected):
+        head, _, body = response.partition(b"\r\n\r\n")
+        assert head.startswith(b"HTTP/1.1 " + status) and json.loads(body)["error"]["type"] == error, response
+    print("  ✅ JSON 行请求与 HTTP POST（无效 Content-Length 返回 400，过大返回 413，非 POST 返回 405）")
+    print("  通过！\n")
+
+
+def run_all_tests():
+    """运行所有测试"""
+    print("=" * 60)
+    print("报价服务 - 测试套件")
+    print("=" * 60)
+    print()
+
+    tests = [
+        test_coalescing_and_batching,
+        test_batch_metrics,
+        test_liquidity_batch,
+        test_load_pools_fee_spec,
+        test_socket_protocol,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            print(f"  ❌ 测试失败: {e}\n")
+            failed += 1
+        except Exception as e:
+            print(f"  ❌ 测试出错: {e}\n")
+            failed += 1
+
+    print("=" * 60)
+    if failed == 0:
+        print("✅ 所有测试通过！")
+    else:
+        print(f"❌ {failed} 个测试失败")
+    print("=" * 60)
+
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+链下报价与报价缓存测试
+"""
+
+import gc
+import random
+import sys
+
+from pool_sim import Pool, ZeroLiquidity
+from quoter import quote, quote_many, QuoteCache, InvalidPool, InvalidAmountIn
+from tickmath import get_sqrt_ratio_at_tick
+
+
+ETH = 10**18
+
+
+def make_pool():
+    """创建与合约测试相同的 ETH/USDC 池子"""
+    pool = Pool(sqrt_price_x96=5602277097478614198912276234240, tick=85176)
+    pool.mint("alice", 84222, 86129, 1517882343751509868544)
+    return pool
+
+
+def test_quote():
+    """测试报价与合约测试的期望值一致"""
+    print("测试: quote")
+
+    pool = make_pool()
+    amount_out, sqrt_price_x96_after, tick_after = quote(pool, 42 * ETH, False)
+
+    assert amount_out == 8396714242162444, f"amount_out = {amount_out}"
+    assert sqrt_price_x96_after == 5604469350942327889444743441197, "交换后价格不正确"
+    assert tick_after == 85184, "交换后 Tick 不正确"
+    assert pool.tick == 85176, "报价不应修改池子状态"
+
+    for pool_arg, amount, error in [(None, ETH, InvalidPool), (pool, 0, InvalidAmountIn), (pool, -ETH, InvalidAmountIn)]:
+        try:
+            quote(pool_arg, amount, False)
+        except error:
+            pass
+        else:
+            raise AssertionError(f"应该抛出 {error.__name__}")
+
+    print(f"  ✅ 42 USDC -> {amount_out} wei ETH")
+    print("  通过！\n")
+
+
+def test_quote_many():
+    """测试批量报价与逐个报价完全一致"""
+    print("测试: quote_many")
+
+    def single(pool, amount, zero_for_one):
+        try:
+            return quote(pool, amount, zero_for_one)
+        except ZeroLiquidity:
+            return None
+
+    rng = random.Random(3)
+    ladders = 0
+    for skip_empty_words, fee in ((False, 0), (True, 0), (False, 3000)):
+        pool = Pool(get_sqrt_ratio_at_tick(0), 0, skip_empty_words=skip_empty_words, fee=fee)
+        for _ in range(40):
+            lower = rng.randrange(-20000, 20000) // pool.tick_spacing * pool.tick_spacing
+            width = rng.randrange(1, 4000 // pool.tick_spacing + 1) * pool.tick_spacing
+            pool.mint("alice", lower, lower + width, rng.randrange(1, 10**6) * ETH)
+        for zero_for_one in (True, False):
+            # 重复金额、1 wei 以及超出流动性的金额
+            amounts = [rng.randrange(1, 10 ** rng.randrange(1, 26)) for _ in range(60)] + [1, 1, 10**30]
+            results = quote_many(pool, zero_for_one, amounts)
+            assert results == [single(pool, amount, zero_for_one) for amount in amounts]
+            assert results[-1] is None
+            ladders += 1
+
+    # 流动性很小时，最后一步向上取整会留下零头，需要继续交换循环
+    pool = Pool(get_sqrt_ratio_at_tick(0), 0)
+    pool.mint("alice", -600, 600, 3 << 96)
+    amounts = [5, 7, 100, 10**6 + 1]
+    assert quote_many(pool, False, amounts) == [quote(pool, amount, False) for amount in amounts]
+
+    assert quote_many(make_pool(), False, [42 * ETH])[0].amount_out == 8396714242162444
+    try:
+        quote_many(make_pool(), False, [ETH, 0])
+    except InvalidAmountIn:
+        pass
+    else:
+        raise AssertionError("应该抛出 InvalidAmountIn")
+
+    print(f"  ✅ {ladders} 组报价阶梯与逐个报价一致")
+    print("  通过！\n")
+
+
+def test_cache_hits_and_invalidation():
+    """测试缓存命中以及 Mint / Swap 后失效"""
+    print("测试: QuoteCache 命中与失效")
+
+    pool = make_pool()
+    cache = QuoteCache(maxsize=16)
+
+    first = cache.quote(pool, 42 * ETH, False)
+    second = cache.quote(pool, 42 * ETH, False)
+    assert first == second == quote(pool, 42 * ETH, False), "缓存结果不正确"
+    assert (cache.hits, cache.misses) == (1, 1), "应该命中一次"
+
+    # 区间外的 Mint 不改变 slot0 和流动性，但仍然使缓存失效
+    pool.mint("bob", 86129, 87000, 10**20)
+    cache.quote(pool, 42 * ETH, False)
+    assert cache.misses == 2, "Mint 后缓存应该失效"
+
+    pool.swap(False, 42 * ETH)
+    after = cache.quote(pool, 42 * ETH, False)
+    assert cache.misses == 3, "Swap 后缓存应该失效"
+    assert after == quote(pool, 42 * ETH, False), "失效后的报价不正确"
+    assert len(cache) == 1, "失效的条目应该被清除"
+
+    print(f"  ✅ hits={cache.hits}, misses={cache.misses}")
+    print("  通过！\n")
+
+
+def test_cache_lru_bound():
+    """测试缓存容量上限"""
+    print("测试: QuoteCache 容量上限")
+
+    pools = [make_pool(), make_pool()]
+    cache = QuoteCache(maxsize=8)
+    for i in range(1, 21):
+        cache.quote(pools[i % 2], i * ETH, False)
+    assert len(cache) == 8, f"缓存条目数 {len(cache)} 超出上限"
+
+    # 最近使用的条目仍在缓存中
+    cache.quote(pools[0], 20 * ETH, False)
+    assert cache.hits == 1, "最近的条目应该命中"
+
+    cache.invalidate(pools[0])
+    assert len(cache) == 4, "只应清除指定池子的条目"
+    cache.invalidate()
+    assert len(cache) == 0, "应该清空全部缓存"
+
+    # 缓存不持有池子：池子被回收后条目随之清除
+    cache.quote(pools[1], ETH, False)
+    cache.quote(pools[0], ETH, False)
+    pools.pop()
+    gc.collect()
+    cache.quote(pools[0], 2 * ETH, False)
+    assert len(cache) == 2, "被回收的池子的条目应该被清除"
+
+    print("  ✅ LRU 淘汰与失效正确")
+    print("  通过！\n")
+
+
+def run_all_tests():
+    """运行所有测试"""
+    print("=" * 60)
+    print("链下报价与报价缓存 - 测试套件")
+    print("=" * 60)
+    print()
+
+    tests = [
+        test_quote,
+        test_quote_many,
+        test_cache_hits_and_invalidation,
+        test_cache_lru_bound,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            print(f"  ❌ 测试失败: {e}\n")
+            failed += 1
+        except Exception as e:
+            print(f"  ❌ 测试出错: {e}\n")
+            failed += 1
+
+    print("=" * 60)
+    if failed == 0:
+        print("✅ 所有测试通过！")
+    else:
+        print(f"❌ {failed} 个测试失败")
+    print("=" * 60)
+
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+多池路由测试
+验证拆单结果不差于穷举网格、多跳路径选择以及各腿金额与交换内核一致
+"""
+
+import sys
+
+from pool_sim import Pool
+from tickmath import get_sqrt_ratio_at_tick
+from router import Router, NoRoute, split_amount
+
+
+ETH = 10**18
+
+
+def make_pool(token0, token1, tick, liquidity, width=3000, fee=0):
+    """创建以 tick 为中心、单一区间流动性的池子"""
+    pool = Pool(get_sqrt_ratio_at_tick(tick), tick, token0, token1, fee=fee)
+    pool.mint("lp", tick - width, tick + width, liquidity)
+    return pool
+
+
+def test_split_parallel_pools():
+    """测试并行池子拆单"""
+    print("测试: split_amount")
+
+    a = make_pool("WETH", "USDC", 85176, 10**23)
+    b = make_pool("WETH", "USDC", 85180, 3 * 10**23)
+    # 代币顺序相反的池子：token1 为 WETH，价格为 1 / 5000
+    c = make_pool("USDC", "WETH", -85190, 2 * 10**23)
+    amount = 50 * ETH
+
+    route = Router([a, b, c]).route("WETH", "USDC", amount)
+    legs = route.hops[0]
+    assert sum(leg.amount_in for leg in legs) == amount, "各腿输入之和应该等于总输入"
+    for leg in legs:
+        result = leg.pool.simulate_swap(leg.zero_for_one, leg.amount_in)
+        assert (leg.amount_out, leg.sqrt_price_x96_after) == (result.amount_out, result.sqrt_price_x96), \
+            "各腿结果应该与交换内核一致"
+
+    # 交换后的边际价格相等（c 的价格取倒数后比较）
+    prices = [(leg.sqrt_price_x96_after / 2**96) ** (2 if leg.zero_for_one else -2) for leg in legs]
+    assert max(prices) / min(prices) - 1 < 1e-6, f"边际价格没有对齐: {prices}"
+
+    # 不差于两个池子之间的穷举拆分
+    amounts = split_amount([a, b], [True, True], amount)
+    split_out = sum(p.simulate_swap(True, x).amount_out for p, x in zip((a, b), amounts) if x)
+    grid_out = max(
+        a.simulate_swap(True, x).amount_out + b.simulate_swap(True, amount - x).amount_out
+        for x in range(amount // 100, amount, amount // 100)
+    )
+    assert split_out >= grid_out, "拆单结果比穷举网格差"
+
+    print(f"  ✅ 三个池子拆单 {[leg.amount_in for leg in legs]}")
+    print("  通过！\n")
+
+
+def test_mixed_fee_pools():
+    """测试手续费不同的并行池子：拆单与路径估算使用扣除手续费后的边际汇率"""
+    print("测试: 不同手续费档位的拆单")
+
+    high = make_pool("WETH", "USDC", 85200, 10**22, fee=10000)
+    low = make_pool("WETH", "USDC", 85200, 10**22, fee=500)
+    amount = 10 * ETH
+
+    amounts = split_amount([high, low], [True, True], amount)
+    assert sum(amounts) == amount and amounts[1] > amounts[0], f"低手续费池子应该分得更多: {amounts}"
+    split_out = sum(p.simulate_swap(True, x).amount_out for p, x in zip((high, low), amounts) if x)
+    grid_out = max(
+        (high.simulate_swap(True, x).amount_out if x else 0) + low.simulate_swap(True, amount - x).amount_out
+        for x in range(0, amount, amount // 200)
+    )
+    assert split_out >= grid_out, f"拆单结果比穷举网格差: {split_out} < {grid_out}"
+
+    # 扣除手续费后的边际汇率相等
+    rates = [(p.simulate_swap(True, x).sqrt_price_x96 / 2**96) ** 2 * (1 - p.fee / 10**6)
+             for p, x in zip((high, low), amounts)]
+    assert max(rates) / min(rates) - 1 < 1e-6, f"边际汇率没有对齐: {rates}"
+
+    # 同价格的池子中，路径估算按手续费区分
+    route = Router([high, low]).route("WETH", "USDC", ETH, split=False)
+    assert route.hops[0][0].pool is low, "应该选择手续费更低的池子"
+
+    print(f"  ✅ 拆单 {amounts}，输出 {split_out}（网格最优 {grid_out}）")
+    print("  通过！\n")
+
+
+def test_multi_hop():
+    """测试多跳路径选择"""
+    print("测试: Router.route 多跳")
+
+    direct = make_pool("WETH", "USDC", 84000, 10**22)  # 价格明显更差
+    weth_dai = make_pool("DAI", "WETH", -85176, 10**24)
+    dai_usdc = make_pool("DAI", "USDC", 0, 10**26)
+    router = Router([direct, weth_dai, dai_usdc])
+
+    route = router.route("WETH", "USDC", ETH)
+    assert route.path == ("WETH", "DAI", "USDC"), f"应该选择两跳路径: {route.path}"
+
+    first = weth_dai.simulate_swap(False, ETH)
+    second = dai_usdc.simulate_swap(True, first.amount_out)
+    assert route.amount_out == second.amount_out, "多跳输出与逐跳模拟不一致"
+    assert route.amount_out > direct.simulate_swap(True, ETH).amount_out
+
+    single = router.route("WETH", "USDC", ETH, max_hops=1)
+    assert single.path == ("WETH", "USDC"), "max_hops=1 时只能走直连池子"
+
+    try:
+        router.route("WETH", "WBTC", ETH)
+    except NoRoute:
+        pass
+    else:
+        raise AssertionError("应该抛出 NoRoute")
+
+    print(f"  ✅ {' -> '.join(route.path)}: {route.amount_out}")
+    print("  通过！\n")
+
+
+def run_all_tests():
+    """运行所有测试"""
+    print("=" * 60)
+    print("多池路由 - 测试套件")
+    print("=" * 60)
+    print()
+
+    tests = [
+        test_split_parallel_pools,
+        test_mixed_fee_pools,
+        test_multi_hop,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            print(f"  ❌ 测试失败: {e}\n")
+            failed += 1
+        except Exception as e:
+            print(f"  ❌ 测试出错: {e}\n")
+            failed += 1
+
+    print("=" * 60)
+    if failed == 0:
+        print("✅ 所有测试通过！")
+    else:
+        print(f"❌ {failed} 个测试失败")
+    print("=" * 60)
+
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
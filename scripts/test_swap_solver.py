@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+交换反向求解测试
+验证求得的金额是最小（或最大）的整数解，且结果与交换内核一致
+"""
+
+import sys
+from fractions import Fraction
+
+from pool_sim import Pool
+from tickmath import get_sqrt_ratio_at_tick
+from swap_solver import amount_to_price, amount_to_tick, max_amount_for_price_impact, max_amount_within_slippage
+
+
+def make_pool(fee=0):
+    """创建当前价格附近有三段重叠流动性的池子（交换会跨越多个 Tick）"""
+    pool = Pool(get_sqrt_ratio_at_tick(85176) + 12345, 85176, fee=fee, tick_spacing=1)
+    pool.mint("alice", 84222, 86129, 10**22)
+    pool.mint("bob", 85000, 85400, 3 * 10**22)
+    pool.mint("carol", 83000, 85100, 5 * 10**21)
+    return pool
+
+
+def reached(pool, zero_for_one, amount_in, sqrt_price_target_x96):
+    """交换 amount_in 后价格是否到达目标"""
+    sqrt_price_x96 = pool.simulate_swap(zero_for_one, amount_in).sqrt_price_x96
+    return sqrt_price_x96 <= sqrt_price_target_x96 if zero_for_one else sqrt_price_x96 >= sqrt_price_target_x96
+
+
+def test_amount_to_price():
+    """测试到达目标价格的最小金额"""
+    print("测试: amount_to_price / amount_to_tick")
+
+    for fee in (0, 3000):
+        pool = make_pool(fee)
+        for zero_for_one, tick in ((True, 85150), (True, 84500), (False, 85200), (False, 85900)):
+            target = get_sqrt_ratio_at_tick(tick) + 7
+            solution = amount_to_price(pool, zero_for_one, target)
+            assert not solution.exhausted
+            assert reached(pool, zero_for_one, solution.amount_in, target), "金额不足以到达目标价格"
+            assert not reached(pool, zero_for_one, solution.amount_in - 1, target), "金额不是最小值"
+
+            result = pool.simulate_swap(zero_for_one, solution.amount_in)
+            assert (solution.amount_out, solution.sqrt_price_x96) == (result.amount_out, result.sqrt_price_x96), \
+                "输出与交换内核不一致"
+            print(f"  ✅ fee {fee} 到达 tick {tick}: {solution.amount_in}")
+
+    # 恰好落在已初始化 Tick 上的目标
+    solution = amount_to_tick(pool, True, 85000)
+    assert solution.sqrt_price_x96 == get_sqrt_ratio_at_tick(85000)
+    assert not reached(pool, True, solution.amount_in - 1, solution.sqrt_price_x96)
+
+    # 反方向的目标不需要输入，超出流动性范围时返回可交换的最大金额
+    assert amount_to_tick(pool, True, 86000).amount_in == 0
+    exhausted = amount_to_tick(pool, True, 80000)
+    assert exhausted.exhausted and exhausted.sqrt_price_x96 == get_sqrt_ratio_at_tick(83000)
+    print("  通过！\n")
+
+
+def test_slippage_bounds():
+    """测试滑点约束下的最大金额"""
+    print("测试: max_amount_within_slippage / max_amount_for_price_impact")
+
+    # 滑点小于手续费率时只能交换零金额，手续费池子只测试更大的滑点
+    for fee, slippages in ((0, (0.0001, 0.002, 0.01)), (3000, (0.005, 0.01))):
+        pool = make_pool(fee)
+        for zero_for_one in (True, False):
+            spot = Fraction(pool.sqrt_price_x96 ** 2, 2**192)
+            if not zero_for_one:
+                spot = 1 / spot
+            for slippage in slippages:
+                solution = max_amount_within_slippage(pool, zero_for_one, slippage)
+                assert not solution.exhausted
+                bound = (1 - Fraction(str(slippage))) * spot
+
+                def average(amount):
+                    return Fraction(pool.simulate_swap(zero_for_one, amount).amount_out, amount)
+
+                assert average(solution.amount_in) >= bound, "超出滑点约束"
+                assert average(solution.amount_in + 1) < bound, "金额不是最大值"
+                assert solution.amount_out == pool.simulate_swap(zero_for_one, solution.amount_in).amount_out
+                print(f"  ✅ fee {fee} zero_for_one={zero_for_one} 滑点 {slippage:.2%}: {solution.amount_in}")
+
+            # 平均价格总是优于交换后的边际价格，同一比例下前者允许更大的金额
+            impact = max_amount_for_price_impact(pool, zero_for_one, 0.01)
+            assert impact.amount_in < max_amount_within_slippage(pool, zero_for_one, 0.01).amount_in
+    print("  通过！\n")
+
+
+def run_all_tests():
+    """运行所有测试"""
+    print("=" * 60)
+    print("交换反向求解 - 测试套件")
+    print("=" * 60)
+    print()
+
+    tests = [
+        test_amount_to_price,
+        test_slippage_bounds,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            print(f"  ❌ 测试失败: {e}\n")
+            failed += 1
+        except Exception as e:
+            print(f"  ❌ 测试出错: {e}\n")
+            failed += 1
+
+    print("=" * 60)
+    if failed == 0:
+        print("✅ 所有测试通过！")
+    else:
+        print(f"❌ {failed} 个测试失败")
+    print("=" * 60)
+
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
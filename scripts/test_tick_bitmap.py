@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+刻度位图索引测试
+验证单字查找与合约一致，以及跨字查找与逐字扫描结果一致
+"""
+
+import random
+import sys
+
+from pool_sim import Pool
+from tick_bitmap import TickBitmap, most_significant_bit, least_significant_bit
+from tickmath import MIN_TICK, MAX_TICK
+
+
+def scan_word_by_word(bitmap, tick, tick_spacing, lte):
+    """逐字调用 next_initialized_tick_within_one_word，作为跨字查找的参照"""
+    while True:
+        next_tick, initialized = bitmap.next_initialized_tick_within_one_word(tick, tick_spacing, lte)
+        if initialized:
+            return next_tick, True
+        if next_tick <= MIN_TICK:
+            return MIN_TICK, False
+        if next_tick >= MAX_TICK:
+            return MAX_TICK, False
+        tick = next_tick - 1 if lte else next_tick
+
+
+def test_bit_scan():
+    """测试最高/最低有效位"""
+    print("测试: most_significant_bit / least_significant_bit")
+
+    for i in (0, 1, 7, 128, 255):
+        assert most_significant_bit(1 << i) == i, f"msb(1 << {i}) 不正确"
+        assert least_significant_bit(1 << i) == i, f"lsb(1 << {i}) 不正确"
+    assert most_significant_bit(0b10110) == 4 and least_significant_bit(0b10110) == 1
+
+    print("  ✅ 位扫描结果正确")
+    print("  通过！\n")
+
+
+def test_within_one_word():
+    """测试单字查找（与合约逻辑一致）"""
+    print("测试: next_initialized_tick_within_one_word")
+
+    bitmap = TickBitmap()
+    bitmap.flip_tick(85184)
+    assert bitmap.next_initialized_tick_within_one_word(85176, 1, False) == (85184, True)
+    assert bitmap.next_initialized_tick_within_one_word(85184, 1, True) == (85184, True)
+    assert bitmap.next_initialized_tick_within_one_word(85185, 1, False) == (85247, False)
+    assert bitmap.next_initialized_tick_within_one_word(85183, 1, True) == (84992, False)
+
+    bitmap.flip_tick(-300)
+    assert bitmap.next_initialized_tick_within_one_word(-257, 1, True) == (-300, True)
+    bitmap.flip_tick(-300)
+    assert -2 not in bitmap.words, "翻转两次后字应该被清空"
+    assert not bitmap.is_initialized(-300) and bitmap.is_initialized(85184)
+
+    print("  ✅ 字内查找结果正确")
+    print("  通过！\n")
+
+
+def test_multi_word_search():
+    """测试跨字查找与逐字扫描结果一致"""
+    print("测试: next_initialized_tick")
+
+    rng = random.Random(42)
+    for spacing in (1, 60):
+        bitmap = TickBitmap()
+        ticks = {rng.randrange(-800000, 800000) // spacing * spacing for _ in range(50)}
+        for tick in ticks:
+            bitmap.flip_tick(tick, spacing)
+
+        for _ in range(500):
+            tick = rng.randrange(-850000, 850000)
+            for lte in (True, False):
+                expected = scan_word_by_word(bitmap, tick, spacing, lte)
+                assert bitmap.next_initialized_tick(tick, spacing, lte) == expected, \
+                    f"Tick {tick} 方向 {lte} 查找结果不一致"
+
+    # 限制查找字数时返回已查找范围的边界
+    bitmap = TickBitmap()
+    bitmap.flip_tick(10 * 256)
+    assert bitmap.next_initialized_tick(0, 1, False, max_words=3) == (4 * 256 - 1, False)
+    assert bitmap.next_initialized_tick(0, 1, False, max_words=10) == (10 * 256, True)
+    assert bitmap.next_initialized_tick(0, 1, True) == (MIN_TICK, False)
+
+    print("  ✅ 跨字查找与逐字扫描一致")
+    print("  通过！\n")
+
+
+def test_pool_skip_empty_words():
+    """测试池子跨字交换"""
+    print("测试: Pool(skip_empty_words=True)")
+
+    results = []
+    for skip in (False, True):
+        pool = Pool(sqrt_price_x96=2**96, tick=0, skip_empty_words=skip)
+        pool.mint("alice", -20000, 20000, 10**24)
+        results.append(pool.swap(zero_for_one=False, amount_specified=5 * 10**23))
+
+    exact, skipped = results
+    assert skipped.amount1 == exact.amount1, "输入金额应该相同"
+    assert abs(skipped.amount0 - exact.amount0) <= 64, "输出金额的取整差异过大"
+    assert abs(skipped.tick - exact.tick) <= 1, "最终 Tick 偏差过大"
+
+    print(f"  ✅ 跨越约 {exact.tick // 256} 个字，输出差异 {abs(skipped.amount0 - exact.amount0)} wei")
+    print("  通过！\n")
+
+
+def run_all_tests():
+    """运行所有测试"""
+    print("=" * 60)
+    print("刻度位图索引 - 测试套件")
+    print("=" * 60)
+    print()
+
+    tests = [
+        test_bit_scan,
+        test_within_one_word,
+        test_multi_word_search,
+        test_pool_skip_empty_words,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            print(f"  ❌ 测试失败: {e}\n")
+            failed += 1
+        except Exception as e:
+            print(f"  ❌ 测试出错: {e}\n")
+            failed += 1
+
+    print("=" * 60)
+    if failed == 0:
+        print("✅ 所有测试通过！")
+    else:
+        print(f"❌ {failed} 个测试失败")
+    print("=" * 60)
+
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
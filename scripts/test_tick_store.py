@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+列式 Tick 存储测试
+验证与字典实现的 Tick.update 语义一致，以及内存占用
+"""
+
+import pickle
+import random
+import sys
+import tracemalloc
+
+from tick_store import TickStore
+
+
+def reference_update(ticks, tick, liquidity_delta, upper):
+    """字典版本的 Tick.update，作为参照"""
+    gross, net = ticks.get(tick, (0, 0))
+    new_gross = gross + liquidity_delta
+    net = net - liquidity_delta if upper else net + liquidity_delta
+    ticks[tick] = (new_gross, net)
+    return (gross > 0) != (new_gross > 0)
+
+
+def test_update_matches_reference():
+    """测试随机增减流动性后与字典实现一致"""
+    print("测试: TickStore.update")
+
+    rng = random.Random(11)
+    store, reference = TickStore(), {}
+    for _ in range(3000):
+        tick = rng.randrange(-887272, 887273) if rng.random() < 0.5 else rng.randrange(-50, 50)
+        gross = reference.get(tick, (0, 0))[0]
+        # 大于 2^64 的流动性覆盖高 64 位
+        delta = rng.randrange(1, 2**100) if gross == 0 or rng.random() < 0.6 else -rng.randrange(1, gross + 1)
+        upper = rng.random() < 0.5
+        assert store.update(tick, delta, upper) == reference_update(reference, tick, delta, upper), "翻转结果不一致"
+
+    assert store.keys() == sorted(reference), "Tick 应该按升序存放"
+    for tick, info in store.items():
+        assert (info.liquidity_gross, info.liquidity_net) == reference[tick], f"Tick {tick} 数值不一致"
+        assert info.initialized == (reference[tick][0] > 0), f"Tick {tick} 初始化标志不一致"
+        assert store.liquidity_net(tick) == reference[tick][1]
+
+    # 视图写入直接作用于列
+    tick = store.keys()[0]
+    store[tick].liquidity_net = -(2**120)
+    assert store.liquidity_net(tick) == -(2**120), "视图写入不正确"
+    assert store.get(10**7) is None and 10**7 not in store
+
+    restored = pickle.loads(pickle.dumps(store))
+    assert [(t, i.liquidity_gross, i.liquidity_net) for t, i in restored.items()] == \
+        [(t, i.liquidity_gross, i.liquidity_net) for t, i in store.items()], "pickle 往返不一致"
+
+    print(f"  ✅ {len(store)} 个 Tick 与字典实现一致")
+    print("  通过！\n")
+
+
+def test_memory_footprint():
+    """测试内存占用比字典 + 对象的实现小一个数量级"""
+    print("测试: 内存占用")
+
+    class DictTickInfo:
+        __slots__ = ("initialized", "liquidity_gross", "liquidity_net")
+
+    rng = random.Random(12)
+    ticks = rng.sample(range(-887272, 887273), 5000)
+
+    tracemalloc.start()
+    store = TickStore()
+    for tick in ticks:
+        store.update(tick, rng.randrange(10**20, 10**22), tick % 2 == 0)
+    store_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    naive = {}
+    for tick in ticks:
+        info = DictTickInfo()
+        info.initialized = True
+        info.liquidity_gross = rng.randrange(10**20, 10**22)
+        info.liquidity_net = -info.liquidity_gross
+        naive[tick] = info
+    naive_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    ratio = naive_bytes / store_bytes
+    assert ratio > 3, f"内存占用只减少了 {ratio:.1f} 倍"
+
+    print(f"  ✅ 每个 Tick {store_bytes / len(ticks):.0f} 字节（字典实现 {naive_bytes / len(ticks):.0f} 字节）")
+    print("  通过！\n")
+
+
+def run_all_tests():
+    """运行所有测试"""
+    print("=" * 60)
+    print("列式 Tick 存储 - 测试套件")
+    print("=" * 60)
+    print()
+
+    tests = [
+        test_update_matches_reference,
+        test_memory_footprint,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            print(f"  ❌ 测试失败: {e}\n")
+            failed += 1
+        except Exception as e:
+            print(f"  ❌ 测试出错: {e}\n")
+            failed += 1
+
+    print("=" * 60)
+    if failed == 0:
+        print("✅ 所有测试通过！")
+    else:
+        print(f"❌ {failed} 个测试失败")
+    print("=" * 60)
+
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
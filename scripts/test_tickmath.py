@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+TickMath 精确整数实现测试
+验证与 Uniswap V3 链上结果的一致性以及查找表的正确性
+"""
+
+import os
+import sys
+import tempfile
+
+from tickmath import (
+    get_sqrt_ratio_at_tick,
+    get_tick_at_sqrt_ratio,
+    SqrtPriceTable,
+    TickOutOfRange,
+    PriceOutOfRange,
+    MIN_TICK,
+    MAX_TICK,
+    MIN_SQRT_RATIO,
+    MAX_SQRT_RATIO
+)
+
+
+def test_sqrt_ratio_known_values():
+    """测试已知的链上数值"""
+    print("测试: get_sqrt_ratio_at_tick 已知数值")
+
+    tests = [
+        (MIN_TICK, MIN_SQRT_RATIO),
+        (MAX_TICK, MAX_SQRT_RATIO),
+        (0, 2**96),
+        (85176, 5602223755577321903022134995689),
+    ]
+
+    for tick, expected in tests:
+        sqrtp = get_sqrt_ratio_at_tick(tick)
+        assert sqrtp == expected, f"Tick {tick} -> {sqrtp}，期望 {expected}"
+        print(f"  ✅ Tick {tick} -> sqrtP {sqrtp}")
+
+    print("  通过！\n")
+
+
+def test_tick_at_sqrt_ratio_boundaries():
+    """测试 Tick 边界处的往返转换"""
+    print("测试: get_tick_at_sqrt_ratio 边界")
+
+    for tick in range(MIN_TICK + 1, MAX_TICK, 7919):
+        sqrtp = get_sqrt_ratio_at_tick(tick)
+        assert get_tick_at_sqrt_ratio(sqrtp) == tick, f"Tick {tick} 往返失败"
+        assert get_tick_at_sqrt_ratio(sqrtp - 1) == tick - 1, f"Tick {tick} 下边界失败"
+
+    assert get_tick_at_sqrt_ratio(MIN_SQRT_RATIO) == MIN_TICK, "最小价格应该对应 MIN_TICK"
+    assert get_tick_at_sqrt_ratio(MAX_SQRT_RATIO - 1) == MAX_TICK - 1, "最大价格应该对应 MAX_TICK - 1"
+
+    print("  ✅ 边界两侧结果正确")
+    print("  通过！\n")
+
+
+def test_out_of_range():
+    """测试超出范围的输入"""
+    print("测试: 超出范围")
+
+    for call, arg, error in [
+        (get_sqrt_ratio_at_tick, MIN_TICK - 1, TickOutOfRange),
+        (get_sqrt_ratio_at_tick, MAX_TICK + 1, TickOutOfRange),
+        (get_tick_at_sqrt_ratio, MIN_SQRT_RATIO - 1, PriceOutOfRange),
+        (get_tick_at_sqrt_ratio, MAX_SQRT_RATIO, PriceOutOfRange),
+    ]:
+        try:
+            call(arg)
+        except error:
+            print(f"  ✅ {call.__name__}({arg}) -> {error.__name__}")
+        else:
+            raise AssertionError(f"{call.__name__}({arg}) 应该抛出 {error.__name__}")
+
+    print("  通过！\n")
+
+
+def test_sqrt_price_table():
+    """测试预计算查找表及其 mmap 加载"""
+    print("测试: SqrtPriceTable")
+
+    table = SqrtPriceTable.build(84000, 87000)
+    path = os.path.join(tempfile.mkdtemp(), "sqrtp.bin")
+    table.save(path)
+    loaded = SqrtPriceTable.load(path)
+
+    try:
+        assert len(loaded) == 3001, "查找表条目数不正确"
+        for tick in range(83990, 87010, 13):
+            sqrtp = get_sqrt_ratio_at_tick(tick)
+            assert loaded.sqrt_ratio_at_tick(tick) == sqrtp, f"Tick {tick} 查表结果不正确"
+            for price in (sqrtp - 1, sqrtp, sqrtp + 1):
+                assert loaded.tick_at_sqrt_ratio(price) == get_tick_at_sqrt_ratio(price), \
+                    f"sqrtP {price} 查表结果不正确"
+    finally:
+        loaded.close()
+
+    print(f"  ✅ Tick [{loaded.min_tick}, {loaded.max_tick}] 查表与精确计算一致")
+    print("  通过！\n")
+
+
+def run_all_tests():
+    """运行所有测试"""
+    print("=" * 60)
+    print("TickMath 精确整数实现 - 测试套件")
+    print("=" * 60)
+    print()
+
+    tests = [
+        test_sqrt_ratio_known_values,
+        test_tick_at_sqrt_ratio_boundaries,
+        test_out_of_range,
+        test_sqrt_price_table,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            print(f"  ❌ 测试失败: {e}\n")
+            failed += 1
+        except Exception as e:
+            print(f"  ❌ 测试出错: {e}\n")
+            failed += 1
+
+    print("=" * 60)
+    if failed == 0:
+        print("✅ 所有测试通过！")
+    else:
+        print(f"❌ {failed} 个测试失败")
+    print("=" * 60)
+
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -36,6 +36,12 @@ def test_price_to_tick():
         assert tick == expected_tick, f"价格 {price} -> Tick {tick}，期望 {expected_tick}"
         print(f"  ✅ 价格 {price} -> Tick {tick}")
     
+    # 按 Tick 间距向下取整
+    for price, tick_spacing, expected_tick in [(5000, 60, 85140), (5000, 200, 85000), (0.5, 60, -6960)]:
+        tick = price_to_tick(price, tick_spacing)
+        assert tick == expected_tick, f"价格 {price}（间距 {tick_spacing}）-> Tick {tick}，期望 {expected_tick}"
+    print("  ✅ 按 Tick 间距取整")
+    
     print("  通过！\n")
 
 
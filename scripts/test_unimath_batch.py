@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+UniswapV3 批量数学计算工具测试
+验证批量版本与 unimath.py 标量版本的结果一致
+"""
+
+import csv
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+from unimath import (
+    price_to_tick,
+    tick_to_price,
+    price_to_sqrtp_q96,
+    sqrtp_q96_to_price,
+    liquidity_from_x,
+    liquidity_from_y,
+    calc_amount_x,
+    calc_amount_y,
+    calculate_liquidity,
+    ETH
+)
+from unimath_batch import (
+    price_to_tick_batch,
+    tick_to_price_batch,
+    price_to_sqrtp_q96_batch,
+    sqrtp_q96_to_price_batch,
+    liquidity_from_x_batch,
+    liquidity_from_y_batch,
+    calc_amount_x_batch,
+    calc_amount_y_batch,
+    calculate_liquidity_batch,
+    run_batch
+)
+
+
+PRICES = [4545, 4999, 5000, 5001, 5500, 1, 0.5, 1234.5678, 98765.4321]
+
+
+def test_price_to_tick_batch():
+    """测试批量价格到 Tick 的转换"""
+    print("测试: price_to_tick_batch")
+
+    ticks = price_to_tick_batch(PRICES)
+    expected = [price_to_tick(p) for p in PRICES]
+    assert ticks.tolist() == expected, f"批量结果 {ticks.tolist()}，期望 {expected}"
+
+    print(f"  ✅ {len(PRICES)} 个价格与标量版本一致")
+    print("  通过！\n")
+
+
+def test_tick_to_price_batch():
+    """测试批量 Tick 到价格的转换"""
+    print("测试: tick_to_price_batch")
+
+    ticks = [-887272, -1000, 0, 84222, 85176, 86129, 887272]
+    prices = tick_to_price_batch(ticks)
+    for tick, price in zip(ticks, prices):
+        expected = tick_to_price(tick)
+        assert abs(price - expected) <= abs(expected) * 1e-12, f"Tick {tick} 价格偏差过大"
+
+    print(f"  ✅ {len(ticks)} 个 Tick 与标量版本一致")
+    print("  通过！\n")
+
+
+def test_sqrtp_q96_roundtrip_batch():
+    """测试 Q64.96 精确路径与标量版本逐位一致"""
+    print("测试: price_to_sqrtp_q96_batch / sqrtp_q96_to_price_batch")
+
+    sqrtps = price_to_sqrtp_q96_batch(PRICES)
+    assert sqrtps.dtype == object, "精确路径应该返回 object 数组"
+    assert sqrtps.tolist() == [price_to_sqrtp_q96(p) for p in PRICES], "Q64.96 结果与标量版本不一致"
+
+    prices_back = sqrtp_q96_to_price_batch(sqrtps)
+    assert prices_back.tolist() == [sqrtp_q96_to_price(s) for s in sqrtps], "往返价格与标量版本不一致"
+
+    approx = price_to_sqrtp_q96_batch(PRICES, exact=False)
+    assert approx.dtype == np.float64, "浮点路径应该返回 float64 数组"
+
+    print(f"  ✅ sqrtP(5000) = {sqrtps[2]}")
+    print("  通过！\n")
+
+
+def test_liquidity_kernels_batch():
+    """测试流动性和代币数量批量内核"""
+    print("测试: liquidity/amount 批量内核")
+
+    lowers = [4545, 4900, 1000, 4999]
+    currents = [5000, 5000, 5000, 5000]
+    uppers = [5500, 5100, 10000, 5001]
+
+    sqrtp_low = price_to_sqrtp_q96_batch(lowers)
+    sqrtp_cur = price_to_sqrtp_q96_batch(currents)
+    sqrtp_upp = price_to_sqrtp_q96_batch(uppers)
+    amounts_eth = np.array([ETH] * 4, dtype=object)
+    amounts_usdc = np.array([5000 * ETH] * 4, dtype=object)
+
+    liq_x = liquidity_from_x_batch(amounts_eth, sqrtp_cur, sqrtp_upp)
+    liq_y = liquidity_from_y_batch(amounts_usdc, sqrtp_low, sqrtp_cur)
+    liq = np.minimum(liq_x, liq_y).astype(np.float64)
+    liq_int = np.array([int(v) for v in liq], dtype=object)
+
+    amount_x = calc_amount_x_batch(liq_int, sqrtp_cur, sqrtp_upp)
+    amount_y = calc_amount_y_batch(liq_int, sqrtp_low, sqrtp_cur)
+
+    for i in range(len(lowers)):
+        lo, cur, up = int(sqrtp_low[i]), int(sqrtp_cur[i]), int(sqrtp_upp[i])
+        assert liq_x[i] == liquidity_from_x(ETH, cur, up), "liquidity_from_x 不一致"
+        assert liq_y[i] == liquidity_from_y(5000 * ETH, lo, cur), "liquidity_from_y 不一致"
+        assert amount_x[i] == calc_amount_x(int(liq[i]), cur, up), "calc_amount_x 不一致"
+        assert amount_y[i] == calc_amount_y(int(liq[i]), lo, cur), "calc_amount_y 不一致"
+
+    # 价格顺序颠倒时结果应该相同
+    swapped = calc_amount_y_batch(liq_int, sqrtp_cur, sqrtp_low)
+    assert swapped.tolist() == amount_y.tolist(), "价格顺序不应影响结果"
+
+    # 浮点路径
+    fx = calc_amount_x_batch(liq, sqrtp_cur.astype(np.float64), sqrtp_upp.astype(np.float64))
+    assert fx.dtype == np.float64, "浮点路径应该返回 float64 数组"
+    assert np.allclose(fx, amount_x.astype(np.float64), rtol=1e-9), "浮点路径偏差过大"
+
+    print(f"  ✅ {len(lowers)} 个区间与标量版本一致")
+    print("  通过！\n")
+
+
+POSITIONS = [
+    (5000, 4545, 5500, 1, 5000),
+    (5000, 4900, 5100, 0.5, 2500),
+    (1234.5678, 1000, 2000, 3, 1000),
+    (5000, 5500, 6000, 1, 5000),  # 当前价格不在区间内，无效
+]
+
+
+def test_calculate_liquidity_batch():
+    """测试完整批量流程与标量版本一致"""
+    print("测试: calculate_liquidity_batch")
+
+    columns = [np.array(col, dtype=np.float64) for col in zip(*POSITIONS[:3])]
+    batch = calculate_liquidity_batch(*columns)
+
+    for i, position in enumerate(POSITIONS[:3]):
+        expected = calculate_liquidity(*position, verbose=False)
+        for key, value in expected.items():
+            assert batch[key][i] == value, f"第 {i} 行 {key} 不一致"
+
+    print(f"  ✅ {len(POSITIONS) - 1} 个仓位与标量版本一致")
+    print("  通过！\n")
+
+
+def test_run_batch_csv():
+    """测试 CSV 流式批处理"""
+    print("测试: run_batch (CSV)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_path = os.path.join(tmp, "positions.csv")
+        output_path = os.path.join(tmp, "results.csv")
+        with open(input_path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["price_current", "price_lower", "price_upper", "amount_eth", "amount_usdc"])
+            writer.writerows(POSITIONS * 3)
+
+        # 块大小小于行数，验证跨块写出
+        total, invalid = run_batch(input_path, output_path, chunk_size=5)
+        assert (total, invalid) == (12, 3), f"行数统计不正确: {total}, {invalid}"
+
+        with open(output_path, newline="") as f:
+            rows = list(csv.DictReader(f))
+
+    assert len(rows) == 12, "输出行数不正确"
+    for i, row in enumerate(rows):
+        position = POSITIONS[i % len(POSITIONS)]
+        if i % len(POSITIONS) == 3:
+            assert row["liquidity"] == "", "无效行的结果应该留空"
+            continue
+        expected = calculate_liquidity(*position, verbose=False)
+        assert int(row["liquidity"]) == expected["liquidity"], f"第 {i} 行流动性不一致"
+        assert int(row["amount_eth_final_wei"]) == expected["amount_eth_final_wei"], f"第 {i} 行 ETH 不一致"
+        assert int(row["amount_usdc_final_wei"]) == expected["amount_usdc_final_wei"], f"第 {i} 行 USDC 不一致"
+
+    print("  ✅ 分块写出结果与标量版本一致")
+    print("  通过！\n")
+
+
+def run_all_tests():
+    """运行所有测试"""
+    print("=" * 60)
+    print("UniswapV3 批量数学计算工具 - 测试套件")
+    print("=" * 60)
+    print()
+
+    tests = [
+        test_price_to_tick_batch,
+        test_tick_to_price_batch,
+        test_sqrtp_q96_roundtrip_batch,
+        test_liquidity_kernels_batch,
+        test_calculate_liquidity_batch,
+        test_run_batch_csv,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            print(f"  ❌ 测试失败: {e}\n")
+            failed += 1
+        except Exception as e:
+            print(f"  ❌ 测试出错: {e}\n")
+            failed += 1
+
+    print("=" * 60)
+    if failed == 0:
+        print("✅ 所有测试通过！")
+    else:
+        print(f"❌ {failed} 个测试失败")
+    print("=" * 60)
+
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+统一命令行入口测试
+验证子命令结果、--serve 循环以及按需导入
+"""
+
+import json
+import os
+import subprocess
+import sys
+from io import StringIO
+
+from calculate_liquidity import calculate_amounts_for_liquidity
+from tickmath import get_sqrt_ratio_at_tick
+from uniswap_cli import CommandError, run, serve
+
+
+LIQUIDITY = 1517882343751509868544
+
+
+def test_commands():
+    """测试子命令与原有函数结果一致"""
+    print("测试: 子命令")
+
+    result = run(["amounts", "--tick", "85176", "--tick-lower", "84222", "--tick-upper", "86129",
+                  "--liquidity", str(LIQUIDITY), "--json"])
+    expected = calculate_amounts_for_liquidity(get_sqrt_ratio_at_tick(85176), 84222, 86129, LIQUIDITY)
+    assert (result["amount0"], result["amount1"]) == expected
+
+    result = run(["liquidity", "--price", "5000", "--lower", "4545", "--upper", "5500",
+                  "--eth", "1", "--usdc", "5000", "--json"])
+    assert result["liquidity"] == LIQUIDITY
+
+    assert run(["price-to-tick", "5000"])["tick"] == 85176
+    assert run(["tick-to-price", "0"])["sqrt_price_x96"] == 1 << 96
+    assert run(["max-liquidity", "--sqrt-price", hex(1 << 96), "--tick-lower", "-60", "--tick-upper", "60",
+                "--amount0", "0", "--amount1", "0"])["liquidity"] == 0
+
+    for argv in ([], ["amounts", "--tick", "1", "--price", "1"], ["tick-to-price", "x"]):
+        try:
+            run(argv)
+        except CommandError:
+            pass
+        else:
+            raise AssertionError(f"{argv} 应该抛出 CommandError")
+
+    print(f"  ✅ amounts = {expected}")
+    print("  通过！\n")
+
+
+def test_serve():
+    """测试 --serve 循环逐行返回 JSON 响应"""
+    print("测试: serve")
+
+    lines = [
+        "tick-to-price 85176",
+        '["price-to-tick", "5000"]',
+        json.dumps({"id": 7, "argv": ["liquidity", "--price", "5000", "--lower", "4545", "--upper", "5500",
+                                      "--eth", "1", "--usdc", "5000", "--verbose"]}),
+        "",
+        "bogus",
+        "amounts --help",
+        "tick-to-price 900000",
+        json.dumps({"id": 8}),
+        json.dumps({"id": 9, "argv": "price-to-tick 5000"}),
+        "[1, 2]",
+    ]
+    out = StringIO()
+    count = serve(StringIO("\n".join(lines) + "\n"), out)
+    responses = [json.loads(line) for line in out.getvalue().splitlines()]
+
+    assert count == len(responses) == 9
+    assert responses[0]["result"]["sqrt_price_x96"] == get_sqrt_ratio_at_tick(85176)
+    assert responses[1]["result"]["tick"] == 85176
+    # --verbose 的过程输出不能混进响应流
+    assert responses[2]["id"] == 7 and responses[2]["result"]["liquidity"] == LIQUIDITY
+    assert responses[3]["error"]["type"] == "CommandError"
+    assert responses[4]["result"].startswith("usage:")
+    assert responses[5]["error"]["type"] == "TickOutOfRange", responses[5]
+    # 格式错误的请求：错误响应带有请求的 id
+    assert responses[6] == {"id": 8, "error": {"type": "KeyError", "message": "missing field 'argv'"}}, responses[6]
+    assert responses[7]["id"] == 9 and responses[7]["error"]["type"] == "CommandError"
+    assert responses[8]["error"]["type"] == "CommandError"
+
+    print(f"  ✅ {count} 个响应")
+    print("  通过！\n")
+
+
+def test_lazy_imports():
+    """测试只导入子命令实际用到的模块"""
+    print("测试: 按需导入")
+
+    code = (
+        "import sys, uniswap_cli\n"
+        "before = sorted(m for m in ('numpy', 'decimal', 'unimath', 'calculate_liquidity') if m in sys.modules)\n"
+        "uniswap_cli.run(['amounts', '--tick', '0', '--tick-lower', '-60', '--tick-upper', '60', '--liquidity', '1'])\n"
+        "after = sorted(m for m in ('numpy', 'decimal', 'calculate_liquidity') if m in sys.modules)\n"
+        "print(before, after)\n"
+    )
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    assert output == "[] ['calculate_liquidity']", output
+
+    print(f"  ✅ {output}")
+    print("  通过！\n")
+
+
+def run_all_tests():
+    """运行所有测试"""
+    print("=" * 60)
+    print("统一命令行入口 - 测试套件")
+    print("=" * 60)
+    print()
+
+    tests = [
+        test_commands,
+        test_serve,
+        test_lazy_imports,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            print(f"  ❌ 测试失败: {e}\n")
+            failed += 1
+        except Exception as e:
+            print(f"  ❌ 测试出错: {e}\n")
+            failed += 1
+
+    print("=" * 60)
+    if failed == 0:
+        print("✅ 所有测试通过！")
+    else:
+        print(f"❌ {failed} 个测试失败")
+    print("=" * 60)
+
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+刻度位图索引（TickBitmap）
+
+对应 src/lib/TickBitmap.sol：每个字（word）是一个 256 位整数，记录 256 个
+（压缩后）Tick 的初始化状态，字按 wordPos（int16）存放在字典中。
+最高/最低有效位通过 int.bit_length() 计算。
+
+除了与合约一致的单字查找 next_initialized_tick_within_one_word，
+还维护一个有序的非空字列表，next_initialized_tick 可以跨字查找：
+流动性稀疏时直接跳到下一个非空字，而不是逐个扫描空字。
+
+参考文档: docs/2SecondSwap/12-Tick Bitmap Index 刻度位图索引.md
+"""
+
+import bisect
+
+from tickmath import MIN_TICK, MAX_TICK
+
+
+# ============================================================
+# 位运算工具
+# ============================================================
+
+def most_significant_bit(x):
+    """
+    查找数字中最高有效位的位置
+
+    参数:
+        x: 正整数
+
+    返回:
+        最高有效位的位置（从 0 开始）
+    """
+    if x <= 0:
+        raise ValueError("Zero input")
+    return x.bit_length() - 1
+
+
+def least_significant_bit(x):
+    """
+    查找数字中最低有效位的位置
+
+    参数:
+        x: 正整数
+
+    返回:
+        最低有效位的位置（从 0 开始）
+    """
+    if x <= 0:
+        raise ValueError("Zero input")
+    return (x & -x).bit_length() - 1
+
+
+# ============================================================
+# 位图索引
+# ============================================================
+
+class TickBitmap:
+    """
+    刻度位图索引
+
+    属性:
+        words: wordPos → 256 位字，只保存非零字
+    """
+
+    __slots__ = ("words", "_positions")
+
+    def __init__(self):
+        self.words = {}
+        self._positions = []  # 非零字的 wordPos，升序
+
+    @classmethod
+    def from_words(cls, words):
+        """
+        由 wordPos → 字 的映射直接构建位图（例如从快照文件加载）
+
+        参数:
+            words: wordPos → 256 位字，值为零的字会被忽略
+
+        返回:
+            TickBitmap 实例
+        """
+        bitmap = cls()
+        bitmap.words = {word_pos: word for word_pos, word in words.items() if word}
+        bitmap._positions = sorted(bitmap.words)
+        return bitmap
+
+    @staticmethod
+    def position(tick):
+        """计算刻度在位图中的位置，返回 (wordPos, bitPos)"""
+        return tick >> 8, tick & 0xFF
+
+    def flip_tick(self, tick, tick_spacing=1):
+        """
+        翻转指定刻度的标志位
+
+        参数:
+            tick: 目标刻度
+            tick_spacing: 刻度间距
+        """
+        if tick % tick_spacing != 0:
+            raise ValueError("Tick not spaced")
+        word_pos, bit_pos = self.position(tick // tick_spacing)
+        old = self.words.get(word_pos, 0)
+        word = old ^ (1 << bit_pos)
+
+        if word:
+            self.words[word_pos] = word
+            if not old:
+                bisect.insort(self._positions, word_pos)
+        else:
+            del self.words[word_pos]
+            del self._positions[bisect.bisect_left(self._positions, word_pos)]
+
+    def is_initialized(self, tick, tick_spacing=1):
+        """检查指定刻度是否已初始化"""
+        word_pos, bit_pos = self.position(tick // tick_spacing)
+        return bool(self.words.get(word_pos, 0) >> bit_pos & 1)
+
+    def next_initialized_tick_within_one_word(self, tick, tick_spacing, lte):
+        """
+        在单个字范围内查找下一个已初始化的刻度（与合约逻辑一致）
+
+        参数:
+            tick: 当前刻度
+            tick_spacing: 刻度间距
+            lte: True 表示向左（价格降低方向）搜索，包含当前刻度
+
+        返回:
+            (next, initialized)。未找到时 next 为字的边界
+        """
+        compressed = tick // tick_spacing
+
+        if lte:
+            word_pos, bit_pos = self.position(compressed)
+            # 当前位及其右侧的所有位
+            masked = self.words.get(word_pos, 0) & ((1 << (bit_pos + 1)) - 1)
+            if masked:
+                msb = masked.bit_length() - 1
+                return (compressed - (bit_pos - msb)) * tick_spacing, True
+            return (compressed - bit_pos) * tick_spacing, False
+
+        word_pos, bit_pos = self.position(compressed + 1)
+        # 当前位左侧的所有位
+        masked = self.words.get(word_pos, 0) >> bit_pos << bit_pos
+        if masked:
+            lsb = (masked & -masked).bit_length() - 1
+            return (compressed + 1 + (lsb - bit_pos)) * tick_spacing, True
+        return (compressed + 1 + (255 - bit_pos)) * tick_spacing, False
+
+    def next_initialized_tick(self, tick, tick_spacing, lte, max_words=None):
+        """
+        跨字查找下一个已初始化的刻度
+
+        先在当前字内查找，未找到时通过有序的非空字列表直接定位下一个非空字，
+        查找代价与已初始化的字数有关，而与中间的空字数无关。
+
+        参数:
+            tick: 当前刻度
+            tick_spacing: 刻度间距
+            lte: True 表示向左（价格降低方向）搜索，包含当前刻度
+            max_words: 最多向前查找的字数（None 表示不限制）
+
+        返回:
+            (next, initialized)。未找到时 next 为查找范围的边界，
+            不限制字数时为 MIN_TICK / MAX_TICK
+        """
+        next_tick, initialized = self.next_initialized_tick_within_one_word(tick, tick_spacing, lte)
+        if initialized:
+            return next_tick, True
+
+        compressed = tick // tick_spacing
+        positions = self._positions
+
+        if lte:
+            word_pos = compressed >> 8
+            i = bisect.bisect_left(positions, word_pos) - 1
+            if i < 0 or (max_words is not None and word_pos - positions[i] > max_words):
+                if max_words is None:
+                    return MIN_TICK, False
+                return ((word_pos - max_words) << 8) * tick_spacing, False
+            found = positions[i]
+            msb = self.words[found].bit_length() - 1
+            return ((found << 8) + msb) * tick_spacing, True
+
+        word_pos = (compressed + 1) >> 8
+        i = bisect.bisect_right(positions, word_pos)
+        if i == len(positions) or (max_words is not None and positions[i] - word_pos > max_words):
+            if max_words is None:
+                return MAX_TICK, False
+            return (((word_pos + max_words) << 8) + 255) * tick_spacing, False
+        found = positions[i]
+        word = self.words[found]
+        lsb = (word & -word).bit_length() - 1
+        return ((found << 8) + lsb) * tick_spacing, True
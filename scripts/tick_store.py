@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+列式 Tick 存储（TickStore）
+
+对应 src/lib/Tick.sol 的 mapping(int24 => Tick.Info)。每个 Tick 用一个
+TickInfo 对象放在字典里时，对象、字典槽位和三个 Python int 合计要占用
+数百字节；同时在内存中保存上千个池子时，这部分开销占了大头。
+
+TickStore 改为按列存放在 array 中，按 Tick 索引升序排列:
+    ticks:        int32
+    gross_lo/hi:  uint64 × 2（liquidityGross，uint128）
+    net_lo/hi:    uint64 + int64（liquidityNet，int128）
+    initialized:  uint8
+
+每个 Tick 约 37 字节，查找为二分查找，插入为有序插入（array 内部的内存移动），
+按价格顺序遍历 Tick 时访问的是连续内存。
+
+TickInfo 是指向存储中某个 Tick 的 __slots__ 视图，读写属性直接作用于列，
+因此 pool.ticks[tick].liquidity_net 等原有写法保持不变。
+
+参考文档: docs/2SecondSwap/13-广义铸币（Generalized Minting）.md
+"""
+
+import bisect
+from array import array
+
+from v3math import add_liquidity
+
+
+# ============================================================
+# 常量定义
+# ============================================================
+
+_MASK64 = (1 << 64) - 1
+
+
+def _split(value):
+    """将 128 位整数拆成 (低 64 位, 高 64 位)；负数的高位为算术右移结果"""
+    return value & _MASK64, value >> 64
+
+
+# ============================================================
+# Tick 视图
+# ============================================================
+
+class TickInfo:
+    """
+    Tick 状态信息视图（对应 Tick.Info）
+
+    不保存数据，只记录所属存储和 Tick 索引。
+    """
+
+    __slots__ = ("_store", "tick")
+
+    def __init__(self, store, tick):
+        self._store = store
+        self.tick = tick
+
+    def _index(self):
+        index = self._store._find(self.tick)
+        if index < 0:
+            raise KeyError(self.tick)
+        return index
+
+    @property
+    def initialized(self):
+        """tick 是否已初始化"""
+        return bool(self._store._initialized[self._index()])
+
+    @initialized.setter
+    def initialized(self, value):
+        self._store._initialized[self._index()] = 1 if value else 0
+
+    @property
+    def liquidity_gross(self):
+        """tick 处的总流动性"""
+        store, index = self._store, self._index()
+        return (store._gross_hi[index] << 64) | store._gross_lo[index]
+
+    @liquidity_gross.setter
+    def liquidity_gross(self, value):
+        store, index = self._store, self._index()
+        store._gross_lo[index], store._gross_hi[index] = _split(value)
+
+    @property
+    def liquidity_net(self):
+        """跨越 tick 时添加或移除的流动性数量"""
+        return self._store.liquidity_net(self.tick)
+
+    @liquidity_net.setter
+    def liquidity_net(self, value):
+        store, index = self._store, self._index()
+        store._net_lo[index], store._net_hi[index] = _split(value)
+
+    def __repr__(self):
+        return (f"TickInfo(tick={self.tick}, initialized={self.initialized}, "
+                f"liquidity_gross={self.liquidity_gross}, liquidity_net={self.liquidity_net})")
+
+
+# ============================================================
+# 列式存储
+# ============================================================
+
+class TickStore:
+    """
+    按 Tick 索引升序存放的列式 Tick 存储
+
+    支持字典风格的访问（get / [] / in / items / values），
+    返回的值是 TickInfo 视图。
+    """
+
+    __slots__ = ("_ticks", "_gross_lo", "_gross_hi", "_net_lo", "_net_hi", "_initialized")
+
+    def __init__(self):
+        self._ticks = array("i")
+        self._gross_lo = array("Q")
+        self._gross_hi = array("Q")
+        self._net_lo = array("Q")
+        self._net_hi = array("q")
+        self._initialized = array("B")
+
+    @classmethod
+    def from_columns(cls, ticks, gross_lo, gross_hi, net_lo, net_hi, initialized):
+        """
+        由六个列直接构建存储（例如从快照文件加载）
+
+        参数:
+            ticks ... initialized: 与 columns() 顺序相同的列，任何支持缓冲区协议的
+                对象（bytes、memoryview、本机字节序的 NumPy 数组），按 Tick 升序排列
+
+        返回:
+            TickStore 实例（每列一次内存复制，不逐个 Tick 插入）
+        """
+        store = cls()
+        columns = (ticks, gross_lo, gross_hi, net_lo, net_hi, initialized)
+        count = None
+        for column, data in zip(store.columns(), columns):
+            column.frombytes(memoryview(data).cast("B"))
+            if count is None:
+                count = len(column)
+            elif len(column) != count:
+                raise ValueError("columns have different lengths")
+        return store
+
+    def _find(self, tick):
+        """返回 tick 所在的下标，不存在时返回 -1"""
+        ticks = self._ticks
+        index = bisect.bisect_left(ticks, tick)
+        if index < len(ticks) and ticks[index] == tick:
+            return index
+        return -1
+
+    def _insert(self, tick):
+        """有序插入一个空 Tick，返回其下标"""
+        index = bisect.bisect_left(self._ticks, tick)
+        self._ticks.insert(index, tick)
+        for column in (self._gross_lo, self._gross_hi, self._net_lo, self._net_hi, self._initialized):
+            column.insert(index, 0)
+        return index
+
+    # ---------- 字典接口 ----------
+
+    def __len__(self):
+        return len(self._ticks)
+
+    def __contains__(self, tick):
+        return self._find(tick) >= 0
+
+    def __iter__(self):
+        return iter(self._ticks)
+
+    def __getitem__(self, tick):
+        if self._find(tick) < 0:
+            raise KeyError(tick)
+        return TickInfo(self, tick)
+
+    def get(self, tick, default=None):
+        """返回 tick 的视图，不存在时返回 default"""
+        if self._find(tick) < 0:
+            return default
+        return TickInfo(self, tick)
+
+    def keys(self):
+        """按升序返回全部 Tick 索引"""
+        return list(self._ticks)
+
+    def values(self):
+        """按 Tick 升序返回视图"""
+        return [TickInfo(self, tick) for tick in self._ticks]
+
+    def items(self):
+        """按 Tick 升序返回 (tick, 视图)"""
+        return [(tick, TickInfo(self, tick)) for tick in self._ticks]
+
+    # ---------- Tick.sol ----------
+
+    def update(self, tick, liquidity_delta, upper):
+        """
+        更新 tick 信息（对应 Tick.update）
+
+        参数:
+            tick: 要更新的 tick
+            liquidity_delta: 流动性变化量
+            upper: 是否为价格区间的上限
+
+        返回:
+            tick 是否被翻转（从未初始化变为已初始化，或相反）
+        """
+        index = self._find(tick)
+        if index < 0:
+            index = self._insert(tick)
+
+        gross_before = (self._gross_hi[index] << 64) | self._gross_lo[index]
+        gross_after = add_liquidity(gross_before, liquidity_delta)
+        self._gross_lo[index], self._gross_hi[index] = _split(gross_after)
+
+        net = (self._net_hi[index] << 64) + self._net_lo[index]
+        net = net - liquidity_delta if upper else net + liquidity_delta
+        self._net_lo[index], self._net_hi[index] = _split(net)
+
+        initialized = gross_after > 0
+        self._initialized[index] = initialized
+        return (gross_before > 0) != initialized
+
+    def liquidity_net(self, tick):
+        """
+        返回 tick 的净流动性（交换跨越 tick 时使用，对应 Tick.cross）
+
+        参数:
+            tick: 已存在的 tick
+
+        返回:
+            liquidityNet
+        """
+        index = self._find(tick)
+        if index < 0:
+            raise KeyError(tick)
+        return (self._net_hi[index] << 64) + self._net_lo[index]
+
+    def liquidity_net_columns(self):
+        """
+        返回按 Tick 升序排列的 (ticks, net_lo, net_hi) 列
+
+        返回的是存储本身的 array（int32 / uint64 / int64），可以直接交给
+        np.frombuffer 做零拷贝的向量化计算；调用方不应修改。
+        liquidityNet = net_hi × 2^64 + net_lo
+        """
+        return self._ticks, self._net_lo, self._net_hi
+
+    def columns(self):
+        """
+        返回全部列 (ticks, gross_lo, gross_hi, net_lo, net_hi, initialized)
+
+        与 liquidity_net_columns 一样返回存储本身的 array，调用方不应修改。
+        """
+        return self._ticks, self._gross_lo, self._gross_hi, self._net_lo, self._net_hi, self._initialized
+
+    @property
+    def nbytes(self):
+        """列数据占用的字节数"""
+        return sum(column.itemsize * len(column) for column in self.columns())
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Uniswap V3 TickMath 精确整数实现
+
+unimath.py 中的 price_to_tick / tick_to_price 使用浮点数 log 和幂运算，
+在 Tick 边界附近会与链上结果产生偏差。本模块用纯整数运算移植 Uniswap V3
+TickMath 库的 getSqrtRatioAtTick / getTickAtSqrtRatio，结果与链上逐位一致。
+
+另外提供 SqrtPriceTable：预先计算 [-887272, 887272] 内每个 Tick 的
+sqrtPriceX96，可保存到文件并通过 mmap 加载：
+    - Tick → sqrtP: O(1) 数组下标访问
+    - sqrtP → Tick: 二分查找
+
+注意: src/lib/TickMath.sol 目前是教学用的线性近似实现，本模块移植的是
+它所基于的 Uniswap V3 原版算法。
+
+使用方法:
+    python scripts/tickmath.py --build tickmath_table.bin
+
+参考文档: docs/2SecondSwap/11-输出金额计算与 Solidity 数学实现.md
+"""
+
+import bisect
+import math
+import mmap
+import struct
+import sys
+
+
+# ============================================================
+# 常量定义
+# ============================================================
+
+MIN_TICK = -887272  # 最小 Tick 索引
+MAX_TICK = -MIN_TICK  # 最大 Tick 索引
+
+MIN_SQRT_RATIO = 4295128739  # getSqrtRatioAtTick(MIN_TICK)
+MAX_SQRT_RATIO = 1461446703485210103287273052203988822378723970342  # getSqrtRatioAtTick(MAX_TICK)
+
+MAX_UINT256 = 2**256 - 1
+Q96 = 2**96  # Q64.96 定点数格式的基数
+LOG_BASE = math.log(1.0001)  # ln(1.0001)
+
+# getSqrtRatioAtTick 使用的 Q128.128 常量: 1 / sqrt(1.0001)^(2^i)
+_TICK_RATIOS = (
+    (0x2, 0xfff97272373d413259a46990580e213a),
+    (0x4, 0xfff2e50f5f656932ef12357cf3c7fdcc),
+    (0x8, 0xffe5caca7e10e4e61c3624eaa0941cd0),
+    (0x10, 0xffcb9843d60f6159c9db58835c926644),
+    (0x20, 0xff973b41fa98c081472e6896dfb254c0),
+    (0x40, 0xff2ea16466c96a3843ec78b326b52861),
+    (0x80, 0xfe5dee046a99a2a811c461f1969c3053),
+    (0x100, 0xfcbe86c7900a88aedcffc83b479aa3a4),
+    (0x200, 0xf987a7253ac413176f2b074cf7815e54),
+    (0x400, 0xf3392b0822b70005940c7a398e4b70f3),
+    (0x800, 0xe7159475a2c29b7443b29c7fa6e889d9),
+    (0x1000, 0xd097f3bdfd2022b8845ad8f792aa5825),
+    (0x2000, 0xa9f746462d870fdf8a65dc1f90e061e5),
+    (0x4000, 0x70d869a156d2a1b890bb3df62baf32f7),
+    (0x8000, 0x31be135f97d08fd981231505542fcfa6),
+    (0x10000, 0x9aa508b5b7a84e1c677de54f3e99bc9),
+    (0x20000, 0x5d6af8dedb81196699c329225ee604),
+    (0x40000, 0x2216e584f5fa1ea926041bedfe98),
+    (0x80000, 0x48a170391f7dc42444e8fa2),
+)
+
+
+# ============================================================
+# 错误定义
+# ============================================================
+
+class TickOutOfRange(ValueError):
+    """Tick 超出 [MIN_TICK, MAX_TICK] 范围"""
+
+
+class PriceOutOfRange(ValueError):
+    """sqrtPriceX96 超出 [MIN_SQRT_RATIO, MAX_SQRT_RATIO) 范围"""
+
+
+# ============================================================
+# 转换函数
+# ============================================================
+
+def get_sqrt_ratio_at_tick(tick):
+    """
+    根据 Tick 索引计算对应的平方根价格
+
+    公式: sqrtPriceX96 = sqrt(1.0001^tick) × 2^96，向上取整
+
+    参数:
+        tick: Tick 索引
+
+    返回:
+        Q64.96 格式的平方根价格（整数）
+    """
+    abs_tick = -tick if tick < 0 else tick
+    if abs_tick > MAX_TICK:
+        raise TickOutOfRange(tick)
+
+    ratio = 0xfffcb933bd6fad37aa2d162d1a594001 if abs_tick & 0x1 else 1 << 128
+    for bit, factor in _TICK_RATIOS:
+        if abs_tick & bit:
+            ratio = (ratio * factor) >> 128
+
+    if tick > 0:
+        ratio = MAX_UINT256 // ratio
+
+    # Q128.128 → Q64.96，向上取整保证 getTickAtSqrtRatio 的一致性
+    return (ratio >> 32) + (0 if ratio & 0xFFFFFFFF == 0 else 1)
+
+
+def get_tick_at_sqrt_ratio(sqrt_price_x96):
+    """
+    根据平方根价格计算对应的 Tick 索引
+
+    返回满足 get_sqrt_ratio_at_tick(tick) <= sqrt_price_x96 的最大 Tick
+
+    参数:
+        sqrt_price_x96: Q64.96 格式的平方根价格
+
+    返回:
+        Tick 索引（整数）
+    """
+    if sqrt_price_x96 < MIN_SQRT_RATIO or sqrt_price_x96 >= MAX_SQRT_RATIO:
+        raise PriceOutOfRange(sqrt_price_x96)
+
+    ratio = sqrt_price_x96 << 32
+    msb = ratio.bit_length() - 1
+
+    if msb >= 128:
+        r = ratio >> (msb - 127)
+    else:
+        r = ratio << (127 - msb)
+
+    # 整数部分 + 14 位二进制小数的 log2（Q64.64）
+    log_2 = (msb - 128) << 64
+    for shift in range(63, 49, -1):
+        r = (r * r) >> 127
+        f = r >> 128
+        log_2 |= f << shift
+        r >>= f
+
+    log_sqrt10001 = log_2 * 255738958999603826347141  # Q128.128
+
+    tick_low = (log_sqrt10001 - 3402992956809132418596140100660247210) >> 128
+    tick_high = (log_sqrt10001 + 291339464771989622907027621153398088495) >> 128
+
+    if tick_low == tick_high:
+        return tick_low
+    return tick_high if get_sqrt_ratio_at_tick(tick_high) <= sqrt_price_x96 else tick_low
+
+
+# ============================================================
+# 预计算查找表
+# ============================================================
+
+class SqrtPriceTable:
+    """
+    预计算的 Tick → sqrtPriceX96 查找表
+
+    每个条目固定 20 字节（uint160，大端序），条目按 Tick 升序排列，
+    因此 sqrtP → Tick 可以直接在表上二分查找。
+
+    文件格式:
+        头部: MAGIC(8 字节) + min_tick(int32) + count(uint32)，小端序
+        数据: count 个 20 字节的大端序无符号整数
+    """
+
+    MAGIC = b"SQRTP96\x00"
+    HEADER = struct.Struct("<8siI")
+    ENTRY_SIZE = 20
+
+    __slots__ = ("_buf", "_offset", "min_tick", "max_tick", "_count", "_mmap")
+
+    def __init__(self, buf, min_tick, count, offset=0, mm=None):
+        self._buf = buf
+        self._offset = offset
+        self.min_tick = min_tick
+        self.max_tick = min_tick + count - 1
+        self._count = count
+        self._mmap = mm
+
+    # ---------- 构建与持久化 ----------
+
+    @classmethod
+    def build(cls, min_tick=MIN_TICK, max_tick=MAX_TICK):
+        """
+        在内存中构建查找表
+
+        完整范围约 177 万个条目，构建需要数秒，建议构建一次后 save 到文件。
+
+        参数:
+            min_tick: 表中最小 Tick
+            max_tick: 表中最大 Tick
+
+        返回:
+            SqrtPriceTable 实例
+        """
+        if min_tick < MIN_TICK or max_tick > MAX_TICK or min_tick > max_tick:
+            raise TickOutOfRange((min_tick, max_tick))
+
+        size = cls.ENTRY_SIZE
+        count = max_tick - min_tick + 1
+        buf = bytearray(count * size)
+        for i in range(count):
+            buf[i * size:(i + 1) * size] = get_sqrt_ratio_at_tick(min_tick + i).to_bytes(size, "big")
+        return cls(buf, min_tick, count)
+
+    def save(self, path):
+        """将查找表写入文件"""
+        with open(path, "wb") as f:
+            f.write(self.HEADER.pack(self.MAGIC, self.min_tick, self._count))
+            start = self._offset
+            f.write(self._buf[start:start + self._count * self.ENTRY_SIZE])
+
+    @classmethod
+    def load(cls, path):
+        """
+        通过 mmap 加载查找表文件
+
+        数据页按需从磁盘载入，多个进程可以共享同一份页缓存。
+
+        参数:
+            path: save 生成的文件路径
+
+        返回:
+            SqrtPriceTable 实例
+        """
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, min_tick, count = cls.HEADER.unpack_from(mm, 0)
+        if magic != cls.MAGIC:
+            mm.close()
+            raise ValueError(f"不是 sqrtP 查找表文件: {path}")
+        if len(mm) < cls.HEADER.size + count * cls.ENTRY_SIZE:
+            mm.close()
+            raise ValueError(f"查找表文件不完整: {path}")
+        return cls(mm, min_tick, count, offset=cls.HEADER.size, mm=mm)
+
+    def close(self):
+        """关闭 mmap（仅 load 得到的实例需要）"""
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    # ---------- 序列接口（供 bisect 使用）----------
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        start = self._offset + index * self.ENTRY_SIZE
+        return int.from_bytes(self._buf[start:start + self.ENTRY_SIZE], "big")
+
+    # ---------- 查询 ----------
+
+    def sqrt_ratio_at_tick(self, tick):
+        """
+        O(1) 查询 Tick 对应的 sqrtPriceX96
+
+        超出表范围时回退到 get_sqrt_ratio_at_tick 精确计算。
+        """
+        if self.min_tick <= tick <= self.max_tick:
+            return self[tick - self.min_tick]
+        return get_sqrt_ratio_at_tick(tick)
+
+    def tick_at_sqrt_ratio(self, sqrt_price_x96):
+        """
+        二分查找 sqrtPriceX96 对应的 Tick
+
+        语义与 get_tick_at_sqrt_ratio 相同；价格超出表范围时回退到精确计算。
+        """
+        # 表的最后一个条目之后无法确定上界，除非表已覆盖到 MAX_TICK
+        upper = MAX_SQRT_RATIO if self.max_tick == MAX_TICK else self[-1]
+        if not self[0] <= sqrt_price_x96 < upper:
+            return get_tick_at_sqrt_ratio(sqrt_price_x96)
+
+        # 先用浮点对数估算位置，把二分区间收缩到几个条目以内
+        estimate = math.floor(2 * math.log(sqrt_price_x96 / Q96) / LOG_BASE) - self.min_tick
+        lo = max(estimate - 2, 0)
+        hi = min(estimate + 3, self._count)
+        if not (self[lo] <= sqrt_price_x96 and (hi == self._count or sqrt_price_x96 < self[hi])):
+            lo, hi = 0, self._count
+        return self.min_tick + bisect.bisect_right(self, sqrt_price_x96, lo, hi) - 1
+
+
+# ============================================================
+# 命令行接口
+# ============================================================
+
+def main():
+    """主函数"""
+    if len(sys.argv) == 3 and sys.argv[1] == '--build':
+        path = sys.argv[2]
+        print(f"正在构建 sqrtP 查找表（{MAX_TICK - MIN_TICK + 1} 个 Tick）...")
+        SqrtPriceTable.build().save(path)
+        print(f"✅ 已写入 {path}")
+    else:
+        for tick in (MIN_TICK, 0, 85176, MAX_TICK):
+            sqrtp = get_sqrt_ratio_at_tick(tick)
+            print(f"Tick {tick:>8d} -> sqrtPriceX96 {sqrtp}")
+
+        print("\n💡 提示: 使用 'python scripts/tickmath.py --build FILE' 生成预计算查找表")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,8 @@ Uniswap V3 数学计算工具
 
 使用方法:
     python scripts/unimath.py
+    python scripts/unimath.py --interactive
+    python scripts/unimath.py --batch positions.csv --out results.csv
 
 参考文档: docs/1FirstSwap/05-流动性计算.md
 """
@@ -25,17 +27,19 @@ ETH = 10**18  # 1 ETH = 10^18 wei
 # 价格和 Tick 转换工具
 # ============================================================
 
-def price_to_tick(price):
+def price_to_tick(price, tick_spacing=1):
     """
     将价格转换为 Tick 索引
     
     参数:
         price: 价格（USDC/ETH）
+        tick_spacing: Tick 间距，结果向下取整到它的整数倍（可用作仓位边界）
     
     返回:
         Tick 索引（整数）
     """
-    return math.floor(math.log(price, 1.0001))
+    tick = math.floor(math.log(price, 1.0001))
+    return tick // tick_spacing * tick_spacing
 
 
 def tick_to_price(tick):
@@ -398,11 +402,38 @@ def interactive_mode():
 # 命令行接口
 # ============================================================
 
+def batch_mode(argv):
+    """
+    批处理模式: --batch INPUT --out OUTPUT [--chunk-size N] [--fast]
+
+    逐块读取仓位参数并写出计算结果，不逐行打印
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="unimath.py --batch")
+    parser.add_argument("--batch", required=True, metavar="INPUT", help="输入文件（CSV 或 Parquet）")
+    parser.add_argument("--out", required=True, metavar="OUTPUT", help="输出文件（CSV 或 Parquet）")
+    parser.add_argument("--chunk-size", type=int, default=65536, help="每个向量化块的行数")
+    parser.add_argument("--fast", action="store_true", help="使用 float64 路径（不保证与标量版本逐位一致）")
+    args = parser.parse_args(argv)
+
+    # NumPy 只在批处理模式下需要
+    from unimath_batch import run_batch
+
+    total, invalid = run_batch(args.batch, args.out, chunk_size=args.chunk_size, exact=not args.fast)
+    print(f"✅ 已处理 {total} 行，结果写入 {args.out}")
+    if invalid:
+        print(f"⚠️  {invalid} 行参数无效（需要 下限 < 当前 < 上限 且数量 > 0），结果留空")
+
+
 def main():
     """主函数"""
     if len(sys.argv) > 1 and sys.argv[1] == '--interactive':
         # 交互模式
         interactive_mode()
+    elif len(sys.argv) > 1 and sys.argv[1] == '--batch':
+        # 批处理模式
+        batch_mode(sys.argv[1:])
     else:
         # 默认运行示例
         example_eth_usdc_pool()
@@ -0,0 +1,499 @@
+#!/usr/bin/env python3
+"""
+Uniswap V3 批量数学计算工具（NumPy 向量化版本）
+
+unimath.py 中的函数一次只处理一个数值，回测时需要对整段价格历史
+或整张 Tick 网格逐个调用。本模块提供对应的批量版本，输入和输出都是
+NumPy 数组，一次调用即可处理数百万个数据点。
+
+两种数值路径:
+    - float64 数组: 纯向量化计算，速度最快，精度与 unimath.py 的浮点公式相当
+    - object 数组（元素为 Python int）: Q64.96 数值的精确路径，
+      逐元素结果与 unimath.py 的标量函数完全一致
+
+另外提供流式批处理管道：逐块读取 CSV / Parquet 中的仓位参数，
+向量化计算后立即写出结果，处理千万行数据时内存占用保持在一个块的大小。
+
+使用方法:
+    from unimath_batch import price_to_tick_batch, price_to_sqrtp_q96_batch
+
+    ticks = price_to_tick_batch(prices)
+    sqrtps = price_to_sqrtp_q96_batch(prices)  # object 数组，精确整数
+
+    # 流式批处理
+    python scripts/unimath.py --batch positions.csv --out results.csv
+
+参考文档: docs/1FirstSwap/05-流动性计算.md
+"""
+
+import csv
+import math
+import os
+
+import numpy as np
+
+from unimath import Q96, ETH
+
+
+# ============================================================
+# 常量定义
+# ============================================================
+
+LOG_BASE = math.log(1.0001)  # ln(1.0001)，Tick 的对数底
+
+# 把浮点数逐元素转换为 Python int（截断），结果为 object 数组
+_to_int = np.frompyfunc(int, 1, 1)
+
+# 批处理输入列（与 calculate_liquidity 的参数一一对应）
+INPUT_COLUMNS = ("price_current", "price_lower", "price_upper", "amount_eth", "amount_usdc")
+
+# 批处理输出的结果列（calculate_liquidity 返回字典中的键）
+RESULT_COLUMNS = (
+    "tick_current",
+    "tick_lower",
+    "tick_upper",
+    "liquidity",
+    "amount_eth_final_wei",
+    "amount_usdc_final_wei",
+)
+
+DEFAULT_CHUNK_SIZE = 65536  # 每个向量化块的行数
+
+
+# ============================================================
+# 内部工具
+# ============================================================
+
+def _is_exact(*arrays):
+    """判断输入中是否存在 object 数组（即需要走精确整数路径）"""
+    return any(a.dtype == object for a in arrays)
+
+
+def _as_array(values):
+    """
+    将输入转换为 NumPy 数组
+
+    Python int 超出 int64 范围时 NumPy 会自动得到 object 数组，
+    因此 Q64.96 数值列表可以直接传入。
+    """
+    arr = np.asarray(values)
+    if arr.dtype.kind in "iu" and arr.dtype != object:
+        # 整数数组统一提升为 object，避免 int64 乘法溢出
+        return arr.astype(object)
+    return arr
+
+
+def _ordered(pa, pb):
+    """逐元素保证 pa <= pb（对应标量版本中的 if pa > pb 交换）"""
+    return np.minimum(pa, pb), np.maximum(pa, pb)
+
+
+# ============================================================
+# 价格和 Tick 转换工具
+# ============================================================
+
+def price_to_tick_batch(prices, tick_spacing=1):
+    """
+    批量将价格转换为 Tick 索引
+
+    参数:
+        prices: 价格数组（USDC/ETH）
+        tick_spacing: Tick 间距，结果向下取整到它的整数倍
+
+    返回:
+        Tick 索引数组（int64）
+    """
+    p = np.asarray(prices, dtype=np.float64)
+    ticks = np.floor(np.log(p) / LOG_BASE).astype(np.int64)
+    if tick_spacing != 1:
+        ticks = ticks // tick_spacing * tick_spacing
+    return ticks
+
+
+def tick_to_price_batch(ticks):
+    """
+    批量将 Tick 索引转换为价格
+
+    参数:
+        ticks: Tick 索引数组
+
+    返回:
+        价格数组（float64）
+    """
+    t = np.asarray(ticks, dtype=np.float64)
+    return np.power(1.0001, t)
+
+
+def price_to_sqrtp_q96_batch(prices, exact=True):
+    """
+    批量将价格转换为 Q64.96 格式的平方根价格
+
+    参数:
+        prices: 价格数组
+        exact: True 返回 object 数组（Python int，与标量版本逐位一致），
+               False 返回 float64 数组（适合后续纯浮点计算）
+
+    返回:
+        Q64.96 格式的平方根价格数组
+    """
+    # 乘以 2 的幂在浮点数中是精确运算，因此与 int(math.sqrt(p) * Q96) 一致
+    sqrtp = np.sqrt(np.asarray(prices, dtype=np.float64)) * float(Q96)
+    if exact:
+        return _to_int(sqrtp)
+    return sqrtp
+
+
+def sqrtp_q96_to_price_batch(sqrtps_q96):
+    """
+    批量将 Q64.96 格式的平方根价格转换回价格
+
+    参数:
+        sqrtps_q96: Q64.96 格式的平方根价格数组（object 或 float64）
+
+    返回:
+        价格数组（float64）
+    """
+    s = _as_array(sqrtps_q96)
+    return np.asarray((s / Q96) ** 2, dtype=np.float64)
+
+
+# ============================================================
+# 流动性计算
+# ============================================================
+
+def liquidity_from_x_batch(amounts, pa, pb):
+    """
+    批量从 x 代币（ETH）数量计算流动性
+
+    公式: L = Δx × (√P_b × √P_c) / (√P_b - √P_c)
+
+    参数:
+        amounts: x 代币数量数组（wei）
+        pa: 当前平方根价格数组（Q64.96）
+        pb: 上限平方根价格数组（Q64.96）
+
+    返回:
+        流动性数组（float64）
+    """
+    amounts, pa, pb = (_as_array(a) for a in (amounts, pa, pb))
+    pa, pb = _ordered(pa, pb)
+    liq = (amounts * (pa * pb) / Q96) / (pb - pa)
+    return np.asarray(liq, dtype=np.float64)
+
+
+def liquidity_from_y_batch(amounts, pa, pb):
+    """
+    批量从 y 代币（USDC）数量计算流动性
+
+    公式: L = Δy / (√P_c - √P_a)
+
+    参数:
+        amounts: y 代币数量数组（wei）
+        pa: 下限平方根价格数组（Q64.96）
+        pb: 当前平方根价格数组（Q64.96）
+
+    返回:
+        流动性数组（float64）
+    """
+    amounts, pa, pb = (_as_array(a) for a in (amounts, pa, pb))
+    pa, pb = _ordered(pa, pb)
+    liq = amounts * Q96 / (pb - pa)
+    return np.asarray(liq, dtype=np.float64)
+
+
+# ============================================================
+# 代币数量计算
+# ============================================================
+
+def calc_amount_x_batch(liquidity, pa, pb):
+    """
+    批量从流动性计算 x 代币（ETH）数量
+
+    公式: Δx = L × (√P_b - √P_c) / (√P_b × √P_c)
+
+    参数:
+        liquidity: 流动性数组
+        pa: 当前平方根价格数组（Q64.96）
+        pb: 上限平方根价格数组（Q64.96）
+
+    返回:
+        x 代币数量数组（wei）。任一输入为 object 数组时返回 Python int
+        组成的 object 数组，否则返回截断后的 float64 数组
+    """
+    liquidity, pa, pb = (_as_array(a) for a in (liquidity, pa, pb))
+    pa, pb = _ordered(pa, pb)
+    amount = liquidity * Q96 * (pb - pa) / pa / pb
+    if _is_exact(liquidity, pa, pb):
+        return _to_int(amount)
+    return np.trunc(amount)
+
+
+def calc_amount_y_batch(liquidity, pa, pb):
+    """
+    批量从流动性计算 y 代币（USDC）数量
+
+    公式: Δy = L × (√P_c - √P_a)
+
+    参数:
+        liquidity: 流动性数组
+        pa: 下限平方根价格数组（Q64.96）
+        pb: 当前平方根价格数组（Q64.96）
+
+    返回:
+        y 代币数量数组（wei），类型规则同 calc_amount_x_batch
+    """
+    liquidity, pa, pb = (_as_array(a) for a in (liquidity, pa, pb))
+    pa, pb = _ordered(pa, pb)
+    amount = liquidity * (pb - pa) / Q96
+    if _is_exact(liquidity, pa, pb):
+        return _to_int(amount)
+    return np.trunc(amount)
+
+
+# ============================================================
+# 完整计算流程
+# ============================================================
+
+def calculate_liquidity_batch(
+    price_current,
+    price_lower,
+    price_upper,
+    amount_eth,
+    amount_usdc,
+    exact=True
+):
+    """
+    批量版本的 calculate_liquidity(verbose=False)
+
+    参数:
+        price_current: 当前价格数组（USDC/ETH）
+        price_lower: 下限价格数组
+        price_upper: 上限价格数组
+        amount_eth: ETH 数量数组
+        amount_usdc: USDC 数量数组
+        exact: True 时与标量版本逐位一致（Q64.96 数值为 object 数组），
+               False 时全部使用 float64
+
+    返回:
+        字典，键与 calculate_liquidity 的返回值相同，值为数组
+    """
+    results = {}
+
+    results['tick_current'] = price_to_tick_batch(price_current)
+    results['tick_lower'] = price_to_tick_batch(price_lower)
+    results['tick_upper'] = price_to_tick_batch(price_upper)
+
+    sqrtp_low = price_to_sqrtp_q96_batch(price_lower, exact)
+    sqrtp_cur = price_to_sqrtp_q96_batch(price_current, exact)
+    sqrtp_upp = price_to_sqrtp_q96_batch(price_upper, exact)
+    results['sqrtp_low'] = sqrtp_low
+    results['sqrtp_cur'] = sqrtp_cur
+    results['sqrtp_upp'] = sqrtp_upp
+
+    # 与 int(amount * ETH) 一致：先做浮点乘法再截断
+    to_int = _to_int if exact else np.trunc
+    amount_eth_wei = to_int(np.asarray(amount_eth, dtype=np.float64) * float(ETH))
+    amount_usdc_wei = to_int(np.asarray(amount_usdc, dtype=np.float64) * float(ETH))
+
+    liq_x = liquidity_from_x_batch(amount_eth_wei, sqrtp_cur, sqrtp_upp)
+    liq_y = liquidity_from_y_batch(amount_usdc_wei, sqrtp_low, sqrtp_cur)
+    liquidity = to_int(np.minimum(liq_x, liq_y))
+
+    results['liquidity_from_eth'] = to_int(liq_x)
+    results['liquidity_from_usdc'] = to_int(liq_y)
+    results['liquidity'] = liquidity
+
+    amount_eth_final = calc_amount_x_batch(liquidity, sqrtp_cur, sqrtp_upp)
+    amount_usdc_final = calc_amount_y_batch(liquidity, sqrtp_low, sqrtp_cur)
+
+    results['amount_eth_final_wei'] = amount_eth_final
+    results['amount_usdc_final_wei'] = amount_usdc_final
+    results['amount_eth_final'] = np.asarray(amount_eth_final / 10**18, dtype=np.float64)
+    results['amount_usdc_final'] = np.asarray(amount_usdc_final / 10**18, dtype=np.float64)
+
+    return results
+
+
+# ============================================================
+# 流式批处理
+# ============================================================
+
+def _is_parquet(path):
+    """根据扩展名判断是否为 Parquet 文件"""
+    return os.path.splitext(path)[1].lower() in (".parquet", ".pq")
+
+
+def _import_parquet():
+    """按需导入 pyarrow（仅 Parquet 输入输出需要）"""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("读写 Parquet 需要 pyarrow: pip install pyarrow") from None
+    return pyarrow, pyarrow.parquet
+
+
+def read_position_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    逐块读取仓位参数
+
+    参数:
+        path: CSV 或 Parquet 文件，包含 INPUT_COLUMNS 中的列
+        chunk_size: 每块的行数
+
+    返回:
+        生成器，每次产出 {列名: float64 数组}
+    """
+    if _is_parquet(path):
+        _, pq = _import_parquet()
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size, columns=list(INPUT_COLUMNS)):
+            yield {
+                name: batch.column(name).to_numpy(zero_copy_only=False).astype(np.float64)
+                for name in INPUT_COLUMNS
+            }
+        return
+
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        missing = [name for name in INPUT_COLUMNS if name not in header]
+        if missing:
+            raise ValueError(f"输入文件缺少列: {', '.join(missing)}")
+        indexes = [header.index(name) for name in INPUT_COLUMNS]
+
+        rows = []
+        for row in reader:
+            rows.append([row[i] for i in indexes])
+            if len(rows) == chunk_size:
+                yield _rows_to_chunk(rows)
+                rows = []
+        if rows:
+            yield _rows_to_chunk(rows)
+
+
+def _rows_to_chunk(rows):
+    """将 CSV 文本行转换为按列存放的 float64 数组"""
+    values = np.array(rows, dtype=np.float64)
+    return {name: values[:, i] for i, name in enumerate(INPUT_COLUMNS)}
+
+
+def calculate_liquidity_chunks(chunks, exact=True):
+    """
+    对每个块执行向量化计算
+
+    不满足 下限 < 当前 < 上限 或代币数量不为正的行不参与计算，
+    对应的结果为 None。
+
+    参数:
+        chunks: read_position_chunks 产出的块
+        exact: 传给 calculate_liquidity_batch
+
+    返回:
+        生成器，每次产出 (chunk, valid, results)
+    """
+    for chunk in chunks:
+        valid = (
+            (chunk["price_lower"] > 0)
+            & (chunk["price_lower"] < chunk["price_current"])
+            & (chunk["price_current"] < chunk["price_upper"])
+            & (chunk["amount_eth"] > 0)
+            & (chunk["amount_usdc"] > 0)
+        )
+        if valid.all():
+            subset = chunk
+        else:
+            subset = {name: values[valid] for name, values in chunk.items()}
+
+        results = calculate_liquidity_batch(
+            subset["price_current"],
+            subset["price_lower"],
+            subset["price_upper"],
+            subset["amount_eth"],
+            subset["amount_usdc"],
+            exact=exact
+        )
+        yield chunk, valid, results
+
+
+def _result_columns(valid, results):
+    """把有效行的结果展开为完整长度的列，无效行填 None"""
+    columns = {}
+    all_valid = valid.all()
+    rows = None if all_valid else np.flatnonzero(valid).tolist()
+    for name in RESULT_COLUMNS:
+        values = results[name].tolist()
+        if all_valid:
+            columns[name] = values
+        else:
+            column = [None] * len(valid)
+            for i, value in zip(rows, values):
+                column[i] = value
+            columns[name] = column
+    return columns
+
+
+def write_results(chunk_results, path):
+    """
+    将计算结果逐块写出
+
+    参数:
+        chunk_results: calculate_liquidity_chunks 产出的结果
+        path: 输出文件（CSV 或 Parquet）
+
+    返回:
+        (总行数, 无效行数)
+    """
+    total = invalid = 0
+    header = INPUT_COLUMNS + RESULT_COLUMNS
+
+    if _is_parquet(path):
+        pa, pq = _import_parquet()
+        # 流动性和 wei 数量可能超出 int64，以十进制字符串保存
+        schema = pa.schema(
+            [(name, pa.float64()) for name in INPUT_COLUMNS]
+            + [(name, pa.int64()) for name in RESULT_COLUMNS[:3]]
+            + [(name, pa.string()) for name in RESULT_COLUMNS[3:]]
+        )
+        with pq.ParquetWriter(path, schema) as writer:
+            for chunk, valid, results in chunk_results:
+                columns = _result_columns(valid, results)
+                for name in RESULT_COLUMNS[3:]:
+                    columns[name] = [None if v is None else str(int(v)) for v in columns[name]]
+                data = {name: chunk[name] for name in INPUT_COLUMNS}
+                data.update(columns)
+                writer.write_table(pa.table(data, schema=schema))
+                total += len(valid)
+                invalid += len(valid) - int(valid.sum())
+        return total, invalid
+
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        for chunk, valid, results in chunk_results:
+            columns = _result_columns(valid, results)
+            inputs = [chunk[name].tolist() for name in INPUT_COLUMNS]
+            outputs = [
+                ["" if v is None else int(v) for v in columns[name]]
+                for name in RESULT_COLUMNS
+            ]
+            writer.writerows(zip(*inputs, *outputs))
+            total += len(valid)
+            invalid += len(valid) - int(valid.sum())
+    return total, invalid
+
+
+def run_batch(input_path, output_path, chunk_size=DEFAULT_CHUNK_SIZE, exact=True):
+    """
+    流式批处理：读取 → 分块向量化计算 → 逐块写出
+
+    参数:
+        input_path: 输入文件（CSV 或 Parquet）
+        output_path: 输出文件（CSV 或 Parquet）
+        chunk_size: 每块的行数
+        exact: 是否使用与标量版本逐位一致的精确路径
+
+    返回:
+        (总行数, 无效行数)
+    """
+    chunks = read_position_chunks(input_path, chunk_size)
+    return write_results(calculate_liquidity_chunks(chunks, exact=exact), output_path)
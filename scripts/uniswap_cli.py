@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Uniswap V3 计算工具的统一命令行入口
+
+把 unimath.py、calculate_liquidity.py、price_tick_demo.py 中的常用计算合并为
+一个带子命令的命令行。模块顶层只导入标准库的 argparse / json / shlex，
+各子命令在执行时才导入所需的模块（NumPy 只有 batch 需要，decimal 只有
+amounts --verify 需要），一次计算的启动开销只包含实际用到的部分。
+
+输出:
+    默认逐行打印 "字段: 值"；--json 输出一个 JSON 对象，不打印任何过程信息；
+    --verbose 打印 unimath.calculate_liquidity 的分步过程
+
+--serve 模式在同一个解释器中循环处理标准输入的每一行，每行是一条命令，
+每条命令输出一行 JSON 响应（格式同 quote_server）；已导入的模块在各命令间复用，
+适合定时任务一次提交成千上万条计算:
+    请求: liquidity --price 5000 --lower 4545 --upper 5500 --eth 1 --usdc 5000
+          ["tick-to-price", "85176"]
+          {"id": 7, "argv": ["amounts", "--tick", "85176", "--tick-lower", "84222", ...]}
+    响应: {"id": 7, "result": {...}}
+          {"id": null, "error": {"type": "CommandError", "message": "..."}}
+
+使用方法:
+    python scripts/uniswap_cli.py liquidity --price 5000 --lower 4545 --upper 5500 --eth 1 --usdc 5000
+    python scripts/uniswap_cli.py amounts --tick 85176 --tick-lower 84222 --tick-upper 86129 \\
+        --liquidity 1517882343751509868544 --json
+    python scripts/uniswap_cli.py price-to-tick 5000
+    python scripts/uniswap_cli.py batch positions.csv --out results.csv
+    python scripts/uniswap_cli.py --serve < commands.txt > results.jsonl
+
+参考文档: docs/1FirstSwap/05-流动性计算.md
+"""
+
+import argparse
+import json
+import shlex
+import sys
+from contextlib import redirect_stdout
+from io import StringIO
+
+
+# ============================================================
+# 错误定义
+# ============================================================
+
+class CommandError(ValueError):
+    """命令行参数错误（--serve 模式下作为错误响应返回，不退出进程）"""
+
+
+class _Parser(argparse.ArgumentParser):
+    """参数错误时抛出 CommandError，而不是打印用法后退出"""
+
+    def error(self, message):
+        raise CommandError(f"{self.prog}: {message}")
+
+
+def _int(value):
+    """整数参数：支持十进制和 0x 十六进制（wei、Q64.96 价格都可能很大）"""
+    try:
+        return int(value, 0)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid integer: {value!r}") from None
+
+
+# ============================================================
+# 子命令
+# ============================================================
+
+def _sqrt_price(args):
+    """当前价格：--sqrt-price 直接给出，--tick 按 TickMath 精确换算，--price 按浮点换算"""
+    if args.sqrt_price is not None:
+        return args.sqrt_price
+    if args.tick is not None:
+        from tickmath import get_sqrt_ratio_at_tick
+        return get_sqrt_ratio_at_tick(args.tick)
+    from unimath import price_to_sqrtp_q96
+    return price_to_sqrtp_q96(args.price)
+
+
+def cmd_liquidity(args):
+    """按代币数量计算流动性和精确存入金额（unimath.calculate_liquidity）"""
+    from unimath import calculate_liquidity
+
+    return calculate_liquidity(args.price, args.lower, args.upper, args.eth, args.usdc, verbose=args.verbose)
+
+
+def cmd_amounts(args):
+    """计算给定流动性需要的代币数量（calculate_liquidity.calculate_amounts_for_liquidity）"""
+    from calculate_liquidity import calculate_amounts_for_liquidity
+
+    sqrt_price_x96 = _sqrt_price(args)
+    amount0, amount1 = calculate_amounts_for_liquidity(
+        sqrt_price_x96, args.tick_lower, args.tick_upper, args.liquidity, verify=args.verify
+    )
+    return {"sqrt_price_x96": sqrt_price_x96, "amount0": amount0, "amount1": amount1}
+
+
+def cmd_max_liquidity(args):
+    """计算给定余额能提供的最大流动性及其实际需要的代币数量"""
+    from calculate_liquidity import calculate_amounts_for_liquidity, max_liquidity_for_amounts
+
+    sqrt_price_x96 = _sqrt_price(args)
+    liquidity = max_liquidity_for_amounts(
+        sqrt_price_x96, args.tick_lower, args.tick_upper, args.amount0, args.amount1
+    )
+    amount0, amount1 = calculate_amounts_for_liquidity(sqrt_price_x96, args.tick_lower, args.tick_upper, liquidity)
+    return {"sqrt_price_x96": sqrt_price_x96, "liquidity": liquidity, "amount0": amount0, "amount1": amount1}
+
+
+def cmd_price_to_tick(args):
+    """价格 → Tick（向下取整）与 Q64.96 平方根价格"""
+    from unimath import price_to_sqrtp_q96, price_to_tick
+
+    return {"price": args.price, "tick": price_to_tick(args.price), "sqrt_price_x96": price_to_sqrtp_q96(args.price)}
+
+
+def cmd_tick_to_price(args):
+    """Tick → 价格与 TickMath 精确的 Q64.96 平方根价格"""
+    from tickmath import get_sqrt_ratio_at_tick
+    from unimath import tick_to_price
+
+    return {"tick": args.tick, "price": tick_to_price(args.tick), "sqrt_price_x96": get_sqrt_ratio_at_tick(args.tick)}
+
+
+def cmd_batch(args):
+    """批量计算仓位文件（unimath_batch.run_batch，需要 NumPy）"""
+    from unimath_batch import run_batch
+
+    total, invalid = run_batch(args.input, args.out, chunk_size=args.chunk_size, exact=not args.fast)
+    return {"rows": total, "invalid": invalid, "out": args.out}
+
+
+# ============================================================
+# 参数解析
+# ============================================================
+
+def _add_price_arguments(parser):
+    """当前价格的三种给法（互斥）"""
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--sqrt-price", type=_int, help="当前平方根价格（Q64.96）")
+    group.add_argument("--tick", type=int, help="当前 Tick")
+    group.add_argument("--price", type=float, help="当前价格")
+
+
+def build_parser():
+    """构建带子命令的参数解析器"""
+    common = _Parser(add_help=False)
+    common.add_argument("--json", action="store_true", help="只输出一个 JSON 对象")
+    common.add_argument("--verbose", action="store_true", help="打印计算过程")
+
+    parser = _Parser(prog="uniswap_cli.py", description="Uniswap V3 计算工具")
+    parser.add_argument("--serve", action="store_true", help="从标准输入逐行读取命令，输出 JSON Lines")
+    commands = parser.add_subparsers(dest="command", metavar="COMMAND")
+
+    p = commands.add_parser("liquidity", parents=[common], help="按代币数量计算流动性")
+    p.add_argument("--price", type=float, required=True, help="当前价格（USDC/ETH）")
+    p.add_argument("--lower", type=float, required=True, help="下限价格")
+    p.add_argument("--upper", type=float, required=True, help="上限价格")
+    p.add_argument("--eth", type=float, required=True, help="ETH 数量")
+    p.add_argument("--usdc", type=float, required=True, help="USDC 数量")
+    p.set_defaults(handler=cmd_liquidity)
+
+    p = commands.add_parser("amounts", parents=[common], help="计算给定流动性需要的代币数量")
+    _add_price_arguments(p)
+    p.add_argument("--tick-lower", type=int, required=True, help="区间下限 Tick")
+    p.add_argument("--tick-upper", type=int, required=True, help="区间上限 Tick")
+    p.add_argument("--liquidity", type=_int, required=True, help="流动性")
+    p.add_argument("--verify", action="store_true", help="用 Decimal 版本交叉验证")
+    p.set_defaults(handler=cmd_amounts)
+
+    p = commands.add_parser("max-liquidity", parents=[common], help="计算给定余额能提供的最大流动性")
+    _add_price_arguments(p)
+    p.add_argument("--tick-lower", type=int, required=True, help="区间下限 Tick")
+    p.add_argument("--tick-upper", type=int, required=True, help="区间上限 Tick")
+    p.add_argument("--amount0", type=_int, required=True, help="token0 余额（wei）")
+    p.add_argument("--amount1", type=_int, required=True, help="token1 余额（wei）")
+    p.set_defaults(handler=cmd_max_liquidity)
+
+    p = commands.add_parser("price-to-tick", parents=[common], help="价格 → Tick")
+    p.add_argument("price", type=float, help="价格")
+    p.set_defaults(handler=cmd_price_to_tick)
+
+    p = commands.add_parser("tick-to-price", parents=[common], help="Tick → 价格")
+    p.add_argument("tick", type=int, help="Tick")
+    p.set_defaults(handler=cmd_tick_to_price)
+
+    p = commands.add_parser("batch", parents=[common], help="批量计算仓位文件（需要 NumPy）")
+    p.add_argument("input", help="输入文件（CSV 或 Parquet）")
+    p.add_argument("--out", required=True, help="输出文件（CSV 或 Parquet）")
+    p.add_argument("--chunk-size", type=int, default=65536, help="每个向量化块的行数")
+    p.add_argument("--fast", action="store_true", help="使用 float64 路径")
+    p.set_defaults(handler=cmd_batch)
+
+    return parser
+
+
+# ============================================================
+# 执行
+# ============================================================
+
+def execute(args):
+    """执行已解析的命令，返回结果字典"""
+    if args.command is None:
+        raise CommandError("a command is required (or --serve)")
+    if args.json:
+        args.verbose = False
+    return args.handler(args)
+
+
+def run(argv, parser=None):
+    """
+    解析并执行一条命令
+
+    参数:
+        argv: 参数列表（不含程序名）
+        parser: build_parser() 的结果，省略时重新构建
+
+    返回:
+        结果字典
+    """
+    return execute((parser or build_parser()).parse_args(argv))
+
+
+def handle_line(line, parser):
+    """
+    --serve 模式下处理一行请求
+
+    参数:
+        line: 命令行文本、JSON 数组（argv）或 {"id": ..., "argv": [...]}
+        parser: build_parser() 的结果（在各请求间复用）
+
+    返回:
+        响应字典 {"id", "result"} 或 {"id", "error"}
+    """
+    request_id = None
+    try:
+        if line.startswith(("{", "[")):
+            request = json.loads(line)
+            if isinstance(request, dict):
+                # 先取出 id，缺少 argv 时错误响应仍然带有请求的 id
+                request_id = request.get("id")
+                argv = request["argv"]
+            elif isinstance(request, list):
+                argv = request
+            else:
+                raise CommandError("request must be a JSON object or array")
+            if not isinstance(argv, list) or not all(isinstance(arg, str) for arg in argv):
+                raise CommandError("argv must be an array of strings")
+        else:
+            argv = shlex.split(line)
+        if "--serve" in argv:
+            raise CommandError("--serve cannot be nested")
+
+        # 过程输出和 --help 的文本都不能混进 JSON Lines 输出流
+        with redirect_stdout(StringIO()) as captured:
+            try:
+                args = parser.parse_args(argv)
+            except SystemExit:
+                return {"id": request_id, "result": captured.getvalue()}
+            args.json = True
+            result = execute(args)
+        return {"id": request_id, "result": result}
+    except KeyError as e:
+        return {"id": request_id, "error": {"type": "KeyError", "message": f"missing field {e}"}}
+    except Exception as e:
+        return {"id": request_id, "error": {"type": type(e).__name__, "message": str(e)}}
+
+
+def serve(infile=None, outfile=None):
+    """
+    持续读取命令并逐行输出 JSON 响应，直到输入结束
+
+    参数:
+        infile: 输入流（默认标准输入）
+        outfile: 输出流（默认标准输出）
+
+    返回:
+        处理的请求数
+    """
+    infile = infile or sys.stdin
+    outfile = outfile or sys.stdout
+    parser = build_parser()
+    count = 0
+    for line in infile:
+        line = line.strip()
+        if not line:
+            continue
+        outfile.write(json.dumps(handle_line(line, parser), ensure_ascii=False) + "\n")
+        outfile.flush()
+        count += 1
+    return count
+
+
+def _print_result(result):
+    """以 "字段: 值" 的形式打印结果"""
+    width = max(len(key) for key in result)
+    for key, value in result.items():
+        print(f"{key:<{width}}: {value}")
+
+
+# ============================================================
+# 主程序
+# ============================================================
+
+def main(argv=None):
+    """主函数"""
+    argv = sys.argv[1:] if argv is None else argv
+    parser = build_parser()
+    try:
+        args = parser.parse_args(argv)
+        if args.serve:
+            if args.command is not None:
+                raise CommandError("--serve reads commands from standard input")
+            serve()
+            return
+        result = execute(args)
+    except CommandError as e:
+        parser.print_usage(sys.stderr)
+        print(e, file=sys.stderr)
+        sys.exit(2)
+    except (ValueError, ArithmeticError, OSError) as e:
+        print(f"❌ {type(e).__name__}: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False))
+    else:
+        _print_result(result)
+
+
+if __name__ == "__main__":
+    main()
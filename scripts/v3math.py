@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Uniswap V3 核心数学库的精确整数实现
+
+移植 src/lib 中的 Math.sol、SwapMath.sol 和 LiquidityMath.sol，
+所有计算都使用 Python 整数，取整方向与合约保持一致。
+
+与合约的差异:
+    - calc_amount0_delta / calc_amount1_delta 增加 round_up 参数（与 Uniswap V3
+      原版一致）：交换输出金额向下取整，与测试和文档中的期望值一致
+    - compute_swap_step 增加 fee_pips 参数，按 Uniswap V3 SwapMath 扣除手续费；
+      返回的输入金额包含手续费（fee_pips 为 0 时与合约完全相同）
+    - Math.mulDiv 在合约中是 unchecked 的 (a * b) / denominator，
+      中间结果超过 2^256 时会回绕；这里按 Uniswap V3 原版语义做全精度乘除，
+      结果超出 uint256 时抛出 Overflow
+
+参考文档: docs/2SecondSwap/11-输出金额计算与 Solidity 数学实现.md
+"""
+
+
+# ============================================================
+# 常量定义
+# ============================================================
+
+RESOLUTION = 96  # Q64.96 格式的精度
+Q96 = 1 << RESOLUTION  # Q64.96 格式的基数（2^96）
+
+MAX_UINT128 = (1 << 128) - 1
+MAX_UINT160 = (1 << 160) - 1
+MAX_UINT256 = (1 << 256) - 1
+
+FEE_DENOMINATOR = 10**6  # 手续费以百万分之一（pip）为单位，3000 表示 0.3%
+
+
+# ============================================================
+# 错误定义
+# ============================================================
+
+class DivisionByZero(ArithmeticError):
+    """除数为零（对应 Math.DivisionByZero）"""
+
+
+class Overflow(ArithmeticError):
+    """结果超出 uint256 范围（对应 Math.Overflow）"""
+
+
+class LiquidityOverflow(ArithmeticError):
+    """流动性加减溢出（对应 LiquidityMath 的 'LS' / 'LA'）"""
+
+
+# ============================================================
+# 辅助数学函数
+# ============================================================
+
+def mul_div(a, b, denominator):
+    """
+    执行乘除运算 a × b / denominator，向下取整
+
+    参数:
+        a: 被乘数
+        b: 乘数
+        denominator: 除数
+
+    返回:
+        乘除运算的结果
+    """
+    if denominator == 0:
+        raise DivisionByZero()
+    result = a * b // denominator
+    if result > MAX_UINT256:
+        raise Overflow()
+    return result
+
+
+def mul_div_rounding_up(a, b, denominator):
+    """
+    执行乘除运算 a × b / denominator，向上取整
+
+    参数:
+        a: 被乘数
+        b: 乘数
+        denominator: 除数
+
+    返回:
+        向上取整的结果
+    """
+    if denominator == 0:
+        raise DivisionByZero()
+    result = -(-a * b // denominator)
+    if result > MAX_UINT256:
+        raise Overflow()
+    return result
+
+
+def div_rounding_up(a, b):
+    """
+    执行除法运算 a / b，向上取整
+
+    参数:
+        a: 被除数
+        b: 除数
+
+    返回:
+        向上取整的结果
+    """
+    if b == 0:
+        raise DivisionByZero()
+    return -(-a // b)
+
+
+# ============================================================
+# 代币数量计算（Math.sol）
+# ============================================================
+
+def calc_amount0_delta(sqrt_price_a_x96, sqrt_price_b_x96, liquidity, round_up=True):
+    """
+    计算价格区间内流动性对应的 Token0 数量
+
+    公式: Δx = L × (√P_b - √P_a) / (√P_b × √P_a)
+
+    参数:
+        sqrt_price_a_x96: 价格区间的一个端点（Q64.96）
+        sqrt_price_b_x96: 价格区间的另一个端点（Q64.96）
+        liquidity: 流动性数量
+        round_up: 是否向上取整（存入金额向上取整，取出金额向下取整）
+
+    返回:
+        Token0 数量
+    """
+    if sqrt_price_a_x96 > sqrt_price_b_x96:
+        sqrt_price_a_x96, sqrt_price_b_x96 = sqrt_price_b_x96, sqrt_price_a_x96
+
+    if sqrt_price_a_x96 == 0:
+        raise DivisionByZero()
+
+    numerator1 = liquidity << RESOLUTION
+    numerator2 = sqrt_price_b_x96 - sqrt_price_a_x96
+
+    if round_up:
+        return div_rounding_up(
+            mul_div_rounding_up(numerator1, numerator2, sqrt_price_b_x96),
+            sqrt_price_a_x96
+        )
+    return mul_div(numerator1, numerator2, sqrt_price_b_x96) // sqrt_price_a_x96
+
+
+def calc_amount1_delta(sqrt_price_a_x96, sqrt_price_b_x96, liquidity, round_up=True):
+    """
+    计算价格区间内流动性对应的 Token1 数量
+
+    公式: Δy = L × (√P_b - √P_a)
+
+    参数:
+        sqrt_price_a_x96: 价格区间的一个端点（Q64.96）
+        sqrt_price_b_x96: 价格区间的另一个端点（Q64.96）
+        liquidity: 流动性数量
+        round_up: 是否向上取整（存入金额向上取整，取出金额向下取整）
+
+    返回:
+        Token1 数量
+    """
+    if sqrt_price_a_x96 > sqrt_price_b_x96:
+        sqrt_price_a_x96, sqrt_price_b_x96 = sqrt_price_b_x96, sqrt_price_a_x96
+
+    if round_up:
+        return mul_div_rounding_up(liquidity, sqrt_price_b_x96 - sqrt_price_a_x96, Q96)
+    return mul_div(liquidity, sqrt_price_b_x96 - sqrt_price_a_x96, Q96)
+
+
+# ============================================================
+# 价格计算函数（Math.sol）
+# ============================================================
+
+def get_next_sqrt_price_from_input(sqrt_price_x96, liquidity, amount_in, zero_for_one):
+    """
+    根据输入金额计算新的价格
+
+    参数:
+        sqrt_price_x96: 当前价格（Q64.96）
+        liquidity: 可用流动性
+        amount_in: 输入金额
+        zero_for_one: 交换方向
+
+    返回:
+        交换后的新价格（Q64.96）
+    """
+    if zero_for_one:
+        return get_next_sqrt_price_from_amount0_rounding_up(sqrt_price_x96, liquidity, amount_in)
+    return get_next_sqrt_price_from_amount1_rounding_down(sqrt_price_x96, liquidity, amount_in)
+
+
+def get_next_sqrt_price_from_amount0_rounding_up(sqrt_price_x96, liquidity, amount_in):
+    """
+    根据 Token0 输入金额计算新价格
+
+    公式: √P_target = (L × √P) / (L + Δx × √P)
+
+    参数:
+        sqrt_price_x96: 当前价格（Q64.96）
+        liquidity: 可用流动性
+        amount_in: Token0 输入金额
+
+    返回:
+        新的价格（Q64.96）
+    """
+    if amount_in == 0:
+        return sqrt_price_x96
+
+    numerator = liquidity << RESOLUTION
+    product = amount_in * sqrt_price_x96
+
+    # 合约在 uint256 不溢出时使用精确公式，否则退化为替代公式；
+    # 两个公式的取整结果不同，因此这里保留相同的分支条件
+    if product <= MAX_UINT256:
+        denominator = numerator + product
+        if denominator <= MAX_UINT256:
+            return mul_div_rounding_up(numerator, sqrt_price_x96, denominator)
+
+    return div_rounding_up(numerator, numerator // sqrt_price_x96 + amount_in)
+
+
+def get_next_sqrt_price_from_amount1_rounding_down(sqrt_price_x96, liquidity, amount_in):
+    """
+    根据 Token1 输入金额计算新价格
+
+    公式: √P_target = √P + Δy × 2^96 / L
+
+    参数:
+        sqrt_price_x96: 当前价格（Q64.96）
+        liquidity: 可用流动性
+        amount_in: Token1 输入金额
+
+    返回:
+        新的价格（Q64.96）
+    """
+    if liquidity == 0:
+        raise DivisionByZero()
+    return sqrt_price_x96 + (amount_in << RESOLUTION) // liquidity
+
+
+# ============================================================
+# 交换计算函数（SwapMath.sol）
+# ============================================================
+
+def amount_with_fee(amount_in, fee_pips):
+    """
+    交换净输入金额加上手续费后的总输入（到达目标价格的一步的 amountIn + feeAmount）
+
+    参数:
+        amount_in: 扣除手续费后进入池子的金额
+        fee_pips: 手续费率（百万分之一）
+
+    返回:
+        用户需要支付的总金额（手续费向上取整）
+    """
+    if fee_pips == 0:
+        return amount_in
+    return amount_in + mul_div_rounding_up(amount_in, fee_pips, FEE_DENOMINATOR - fee_pips)
+
+
+def compute_swap_step(sqrt_price_current_x96, sqrt_price_target_x96, liquidity,
+                      amount_remaining, zero_for_one, fee_pips=0):
+    """
+    计算单步交换的输入输出金额和下一个价格
+
+    手续费按 Uniswap V3 SwapMath.computeSwapStep 从输入中扣除：先用扣费后的
+    剩余金额判断能否到达目标价格；到达时手续费为 amountIn × fee / (1e6 - fee)
+    向上取整，未到达时剩余金额中没有进入池子的部分全部作为手续费。
+
+    参数:
+        sqrt_price_current_x96: 当前价格（Q64.96）
+        sqrt_price_target_x96: 目标价格（Q64.96）
+        liquidity: 当前流动性
+        amount_remaining: 剩余交换金额
+        zero_for_one: 交换方向，True 表示用 token0 换 token1
+        fee_pips: 手续费率（百万分之一，例如 3000 表示 0.3%）
+
+    返回:
+        (sqrt_price_next_x96, amount_in, amount_out)，amount_in 包含手续费
+    """
+    if fee_pips:
+        amount_remaining_less_fee = mul_div(amount_remaining, FEE_DENOMINATOR - fee_pips, FEE_DENOMINATOR)
+    else:
+        amount_remaining_less_fee = amount_remaining
+
+    # 计算当前价格区间能够满足的最大输入金额
+    if zero_for_one:
+        amount_in_max = calc_amount0_delta(sqrt_price_current_x96, sqrt_price_target_x96, liquidity)
+    else:
+        amount_in_max = calc_amount1_delta(sqrt_price_current_x96, sqrt_price_target_x96, liquidity)
+
+    # 判断当前区间是否有足够流动性满足整个交换
+    if amount_remaining_less_fee >= amount_in_max:
+        sqrt_price_next_x96 = sqrt_price_target_x96
+    else:
+        sqrt_price_next_x96 = get_next_sqrt_price_from_input(
+            sqrt_price_current_x96, liquidity, amount_remaining_less_fee, zero_for_one
+        )
+
+    # 重新计算实际的输入输出金额：输入向上取整，输出向下取整
+    if zero_for_one:
+        amount_in = calc_amount0_delta(sqrt_price_current_x96, sqrt_price_next_x96, liquidity)
+        amount_out = calc_amount1_delta(sqrt_price_current_x96, sqrt_price_next_x96, liquidity, False)
+    else:
+        amount_in = calc_amount1_delta(sqrt_price_current_x96, sqrt_price_next_x96, liquidity)
+        amount_out = calc_amount0_delta(sqrt_price_current_x96, sqrt_price_next_x96, liquidity, False)
+
+    if fee_pips:
+        if sqrt_price_next_x96 != sqrt_price_target_x96:
+            # 本步用完了全部剩余金额，没有进入池子的部分都是手续费
+            amount_in = amount_remaining
+        else:
+            amount_in = amount_with_fee(amount_in, fee_pips)
+
+    return sqrt_price_next_x96, amount_in, amount_out
+
+
+# ============================================================
+# 流动性计算（LiquidityMath.sol）
+# ============================================================
+
+def add_liquidity(x, y):
+    """
+    将有符号的流动性变化量加到现有流动性上
+
+    参数:
+        x: 现有流动性（uint128）
+        y: 流动性变化量（int128）
+
+    返回:
+        变化后的流动性
+    """
+    z = x + y
+    if z < 0:
+        raise LiquidityOverflow("LS")
+    if z > MAX_UINT128:
+        raise LiquidityOverflow("LA")
+    return z